@@ -5,10 +5,21 @@ from .config import ConfigManager
 from .logger import Logger
 from .event_manager import EventManager
 from .error_handler import ErrorHandler, TranscriptionError, AnalysisError, OutputError
-from .orchestrator import ProcessingOrchestrator
-from .async_orchestrator import AsyncProcessingOrchestrator
 from .analytics import MetricsCollector
 
+
+def __getattr__(name):
+    # Оркестраторы импортируют модули processing и storage, которые сами зависят от core,
+    # поэтому загружаем их лениво, чтобы избежать циклического импорта
+    if name == 'ProcessingOrchestrator':
+        from .orchestrator import ProcessingOrchestrator
+        return ProcessingOrchestrator
+    if name == 'AsyncProcessingOrchestrator':
+        from .async_orchestrator import AsyncProcessingOrchestrator
+        return AsyncProcessingOrchestrator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     'ConfigManager',
     'Logger',
@@ -0,0 +1,157 @@
+"""
+Модуль адаптивного ограничения параллельности запросов к провайдерам
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict
+from obsidian_ai_automator.core.error_handler import ProcessingError
+from obsidian_ai_automator.core.logger import Logger
+
+
+class AdaptiveLimiter:
+    """
+    Ограничитель параллельности по схеме AIMD (аддитивное увеличение, мультипликативное уменьшение)
+
+    Пока задержка и ошибки в норме, лимит растет на единицу после каждого "окна"
+    успешных запросов (по числу запросов, равному текущему лимиту). При ответе 429/5xx
+    или росте задержки относительно базовой лимит уменьшается в decrease_factor раз
+    """
+
+    def __init__(self, name: str, initial_limit: int = 2, min_limit: int = 1, max_limit: int = 8,
+                 decrease_factor: float = 0.5, latency_tolerance: float = 3.0,
+                 max_retries: int = 3, base_backoff: float = 1.0):
+        """
+        Args:
+            name: Имя провайдера (используется в логах и метриках)
+            initial_limit: Начальное количество одновременных запросов
+            min_limit: Нижняя граница лимита
+            max_limit: Верхняя граница лимита
+            decrease_factor: Множитель уменьшения лимита при перегрузке
+            latency_tolerance: Во сколько раз задержка может превысить базовую до уменьшения лимита
+            max_retries: Количество повторов запроса после ответа 429/5xx
+            base_backoff: Начальная пауза перед повтором в секундах (удваивается с каждой попыткой)
+        """
+        self.name = name
+        self.logger = Logger()
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+
+        self.in_flight = 0
+        self.baseline_latency = None
+        self.average_latency = None
+        self.total_requests = 0
+        self.total_overloads = 0
+        self._successes_in_window = 0
+        self._condition = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        """Создает условие ожидания при первом использовании внутри цикла событий"""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    @property
+    def current_limit(self) -> int:
+        """Текущее целое количество разрешенных одновременных запросов"""
+        return int(self.limit)
+
+    async def _acquire(self):
+        """Ожидает свободный слот в пределах текущего лимита"""
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < self.current_limit)
+            self.in_flight += 1
+
+    async def _release(self):
+        """Освобождает слот и будит ожидающих"""
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    def _on_success(self, latency: float):
+        """Учитывает успешный запрос: увеличивает лимит или уменьшает при росте удельной задержки"""
+        self.total_requests += 1
+        self.average_latency = latency if self.average_latency is None else 0.8 * self.average_latency + 0.2 * latency
+
+        if self.baseline_latency is None or latency < self.baseline_latency:
+            self.baseline_latency = latency
+        elif latency > self.baseline_latency * self.latency_tolerance:
+            self._decrease(f"удельная задержка {latency:.2f} превышает базовую {self.baseline_latency:.2f}")
+            # Базовая задержка медленно подтягивается к текущей, чтобы не снижать лимит бесконечно
+            self.baseline_latency = 0.9 * self.baseline_latency + 0.1 * latency
+            return
+
+        self._successes_in_window += 1
+        if self._successes_in_window >= self.current_limit and self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + 1)
+            self._successes_in_window = 0
+            self.logger.debug(f"Лимит параллельности {self.name} увеличен до {self.current_limit}")
+
+    def _on_overload(self):
+        """Учитывает ответ 429/5xx"""
+        self.total_requests += 1
+        self.total_overloads += 1
+        self._decrease("провайдер ограничивает запросы")
+
+    def _decrease(self, reason: str):
+        """Мультипликативно уменьшает лимит"""
+        self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+        self._successes_in_window = 0
+        self.logger.warning(f"Лимит параллельности {self.name} уменьшен до {self.current_limit}: {reason}")
+
+    async def run(self, operation: Callable[[], Awaitable[Any]], work_units: float = 1.0) -> Any:
+        """
+        Выполняет запрос в пределах лимита с повторами при перегрузке провайдера
+
+        Args:
+            operation: Функция без аргументов, возвращающая корутину запроса
+            work_units: Объем данных запроса (например, мегабайты аудио); задержка
+                сравнивается в пересчете на единицу объема, чтобы длинный файл
+                не считался признаком перегрузки
+
+        Returns:
+            Результат запроса
+        """
+        attempt = 0
+        while True:
+            await self._acquire()
+            start_time = time.monotonic()
+            try:
+                result = await operation()
+            except ProcessingError as e:
+                if not e.is_overload:
+                    raise
+                self._on_overload()
+                if attempt >= self.max_retries:
+                    raise
+                delay = e.retry_after if e.retry_after is not None else self.base_backoff * (2 ** attempt)
+                attempt += 1
+                self.logger.warning(f"{self.name}: ответ {e.status_code}, повтор {attempt}/{self.max_retries} "
+                                    f"через {delay:.1f} сек")
+            else:
+                self._on_success((time.monotonic() - start_time) / max(work_units, 0.001))
+                return result
+            finally:
+                await self._release()
+
+            # Пауза выполняется после освобождения слота, чтобы не удерживать его
+            await asyncio.sleep(delay)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Возвращает текущее состояние ограничителя для метрик"""
+        return {
+            "limit": self.current_limit,
+            "in_flight": self.in_flight,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "average_latency": self.average_latency,
+            "baseline_latency": self.baseline_latency,
+            "total_requests": self.total_requests,
+            "total_overloads": self.total_overloads
+        }
@@ -0,0 +1,76 @@
+"""
+Модуль для учета потокового анализа: запись фрагментов в заметку, события прогресса и задержки
+"""
+import time
+from typing import List, Optional
+from obsidian_ai_automator.core.event_manager import EventManager
+from obsidian_ai_automator.processing.output.note_writer import IncrementalNoteWriter
+
+
+class AnalysisStreamTracker:
+    """
+    Принимает фрагменты ответа модели, дописывает их в заметку и сообщает о прогрессе
+
+    События EventManager (данные - словарь с file_path):
+    - analysis_started: запрос анализа отправлен
+    - analysis_first_token: получен первый фрагмент (time_to_first_token)
+    - analysis_progress: не чаще раза в progress_interval секунд (chars, elapsed)
+    - analysis_completed: ответ получен полностью (chars, time_to_first_token, total_time)
+
+    Записанный текст сбрасывается на диск вместе с событием прогресса
+    """
+
+    def __init__(self, event_manager: EventManager, writer: IncrementalNoteWriter, file_path: str,
+                 progress_interval: float = 1.0):
+        """
+        Args:
+            event_manager: Менеджер событий
+            writer: Открытая заметка, в которую дописывается ответ
+            file_path: Путь к исходному файлу (для данных событий)
+            progress_interval: Минимальный интервал между событиями прогресса в секундах
+        """
+        self.event_manager = event_manager
+        self.writer = writer
+        self.file_path = file_path
+        self.progress_interval = progress_interval
+        self.parts: List[str] = []
+        self.chars = 0
+        self.start_time: Optional[float] = None
+        self.time_to_first_token: Optional[float] = None
+        self.total_time = 0.0
+        self._last_progress = 0.0
+
+    def start(self):
+        """Фиксирует начало запроса анализа"""
+        self.start_time = self._last_progress = time.monotonic()
+        self.event_manager.emit("analysis_started", {"file_path": self.file_path})
+
+    def on_delta(self, delta: str):
+        """Дописывает фрагмент ответа в заметку"""
+        now = time.monotonic()
+        if self.time_to_first_token is None:
+            self.time_to_first_token = now - self.start_time
+            self.event_manager.emit("analysis_first_token", {"file_path": self.file_path,
+                                                             "time_to_first_token": self.time_to_first_token})
+        self.parts.append(delta)
+        self.chars += len(delta)
+        self.writer.write(delta)
+
+        if now - self._last_progress >= self.progress_interval:
+            self._last_progress = now
+            self.writer.flush()
+            self.event_manager.emit("analysis_progress", {"file_path": self.file_path, "chars": self.chars,
+                                                          "elapsed": now - self.start_time})
+
+    def finish(self) -> str:
+        """
+        Фиксирует завершение ответа
+
+        Returns:
+            Полный текст анализа (сохраняется в задании для возобновления)
+        """
+        self.total_time = time.monotonic() - self.start_time
+        self.event_manager.emit("analysis_completed", {"file_path": self.file_path, "chars": self.chars,
+                                                       "time_to_first_token": self.time_to_first_token,
+                                                       "total_time": self.total_time})
+        return "".join(self.parts)
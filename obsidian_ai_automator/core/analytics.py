@@ -134,7 +134,8 @@ class MetricsCollector:
             self.metrics["api_usage"][provider]["total_calls"] += 1
             
             if duration > 0:
-                self.metrics["api_usage"][provider]["total_duration"] += duration
+                provider_usage = self.metrics["api_usage"][provider]
+                provider_usage["total_duration"] = provider_usage.get("total_duration", 0) + duration
                 
             if additional_data:
                 # Обновляем дополнительные метрики в зависимости от провайдера
@@ -143,6 +144,64 @@ class MetricsCollector:
                 elif provider == "nvidia" and "tokens" in additional_data:
                     self.metrics["api_usage"][provider]["total_tokens"] += additional_data["tokens"]
     
+    def record_concurrency(self, provider: str, state: Dict[str, Any]):
+        """Фиксирует текущий адаптивный лимит параллельности провайдера"""
+        concurrency = self.metrics.setdefault("concurrency", {})
+        concurrency[provider] = dict(state, updated_at=datetime.now().isoformat())
+    
+    def record_vad(self, file_path: str, duration: float, voiced_seconds: float, processing_time: float):
+        """Фиксирует результат удаления тишины перед транскрибацией"""
+        vad = self.metrics.setdefault("voice_activity", {
+            "files": 0,
+            "total_duration": 0,
+            "voiced_duration": 0,
+            "processing_time": 0
+        })
+        vad["files"] += 1
+        vad["total_duration"] += duration
+        vad["voiced_duration"] += voiced_seconds
+        vad["processing_time"] += processing_time
+    
+    def record_analysis_input(self, granularity: str, full_tokens: int, input_tokens: int):
+        """Фиксирует размер транскрипции для анализа по сравнению с тайм-кодами у каждого слова"""
+        analysis_input = self.metrics.setdefault("analysis_input", {
+            "files": 0,
+            "full_tokens": 0,
+            "input_tokens": 0
+        })
+        analysis_input["files"] += 1
+        analysis_input["full_tokens"] += full_tokens
+        analysis_input["input_tokens"] += input_tokens
+        analysis_input["granularity"] = granularity
+    
+    def record_analysis_latency(self, time_to_first_token: Optional[float], total_time: float):
+        """
+        Фиксирует задержку потокового анализа
+        
+        Args:
+            time_to_first_token: Время до первого фрагмента ответа в секундах (None - ответ пустой)
+            total_time: Общее время анализа в секундах
+        """
+        latency = self.metrics.setdefault("analysis_latency", {
+            "requests": 0,
+            "total_ttft": 0.0,
+            "max_ttft": 0.0,
+            "total_time": 0.0
+        })
+        latency["requests"] += 1
+        latency["total_time"] += total_time
+        if time_to_first_token is not None:
+            latency["total_ttft"] += time_to_first_token
+            latency["max_ttft"] = max(latency["max_ttft"], time_to_first_token)
+    
+    def record_analysis_cache(self, hit: bool):
+        """Фиксирует обращение к кэшу результатов анализа"""
+        analysis_cache = self.metrics.setdefault("analysis_cache", {
+            "hits": 0,
+            "misses": 0
+        })
+        analysis_cache["hits" if hit else "misses"] += 1
+    
     def get_summary(self) -> Dict[str, Any]:
         """Возвращает сводку по метрикам"""
         return {
@@ -150,7 +209,12 @@ class MetricsCollector:
             "total_processing_errors": self.metrics.get("total_processing_errors", 0),
             "total_api_calls": self.metrics.get("total_api_calls", 0),
             "processing_stats": self.metrics.get("processing_stats", {}),
-            "api_usage": self.metrics.get("api_usage", {})
+            "api_usage": self.metrics.get("api_usage", {}),
+            "concurrency": self.metrics.get("concurrency", {}),
+            "voice_activity": self.metrics.get("voice_activity", {}),
+            "analysis_input": self.metrics.get("analysis_input", {}),
+            "analysis_latency": self.metrics.get("analysis_latency", {}),
+            "analysis_cache": self.metrics.get("analysis_cache", {})
         }
     
     def get_detailed_report(self) -> str:
@@ -179,4 +243,36 @@ class MetricsCollector:
   - Всего вызовов: {summary['api_usage']['nvidia']['total_calls']}
   - Всего токенов: {summary['api_usage']['nvidia']['total_tokens']}
 """
+        if summary['concurrency']:
+            report += "\nАдаптивная параллельность:\n"
+            for provider, state in summary['concurrency'].items():
+                report += (f"- {provider}: лимит {state['limit']} (от {state['min_limit']} до {state['max_limit']}), "
+                           f"запросов {state['total_requests']}, перегрузок {state['total_overloads']}\n")
+        vad = summary['voice_activity']
+        if vad.get('total_duration'):
+            report += (f"\nУдаление тишины:\n"
+                       f"- Файлов: {vad['files']}\n"
+                       f"- Речь: {vad['voiced_duration']:.0f} из {vad['total_duration']:.0f} сек "
+                       f"({vad['voiced_duration'] / vad['total_duration']:.0%})\n"
+                       f"- RTF детектора: {vad['processing_time'] / vad['total_duration']:.4f}\n")
+        analysis_input = summary['analysis_input']
+        if analysis_input.get('full_tokens'):
+            saved = 1 - analysis_input['input_tokens'] / analysis_input['full_tokens']
+            report += (f"\nТранскрипция для анализа (тайм-коды: {analysis_input['granularity']}):\n"
+                       f"- Файлов: {analysis_input['files']}\n"
+                       f"- Токенов: {analysis_input['input_tokens']} вместо {analysis_input['full_tokens']} "
+                       f"(экономия {saved:.0%})\n")
+        latency = summary['analysis_latency']
+        if latency.get('requests'):
+            report += (f"\nПотоковый анализ:\n"
+                       f"- Запросов: {latency['requests']}\n"
+                       f"- Среднее время до первого токена: {latency['total_ttft'] / latency['requests']:.1f} сек "
+                       f"(максимум {latency['max_ttft']:.1f} сек)\n"
+                       f"- Среднее время анализа: {latency['total_time'] / latency['requests']:.1f} сек\n")
+        analysis_cache = summary['analysis_cache']
+        cache_requests = analysis_cache.get('hits', 0) + analysis_cache.get('misses', 0)
+        if cache_requests:
+            report += (f"\nКэш результатов анализа:\n"
+                       f"- Попаданий: {analysis_cache['hits']} из {cache_requests} "
+                       f"({analysis_cache['hits'] / cache_requests:.0%})\n")
         return report
\ No newline at end of file
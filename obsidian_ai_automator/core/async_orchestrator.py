@@ -1,17 +1,41 @@
 import asyncio
+import contextvars
 import os
 import sys
+import threading
 import time
-from typing import Dict, Any, Optional, List
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, Optional, List, Iterable, AsyncIterator, Tuple
 from obsidian_ai_automator.core.config import ConfigManager
 from obsidian_ai_automator.core.logger import Logger
 from obsidian_ai_automator.core.event_manager import EventManager
 from obsidian_ai_automator.storage.cache_manager import CacheManager
+from obsidian_ai_automator.storage.job_store import JobStore, JobState
+from obsidian_ai_automator.storage.fingerprint import compute_fingerprint
+from obsidian_ai_automator.storage.transcript_store import TranscriptStore
+from obsidian_ai_automator.storage.analysis_cache import AnalysisCache
 from obsidian_ai_automator.core.error_handler import ErrorHandler, TranscriptionError, AnalysisError, OutputError
 from obsidian_ai_automator.core.analytics import MetricsCollector
+from obsidian_ai_automator.core.http_client import AsyncHttpClient
+from obsidian_ai_automator.core.scheduler import JobScheduler
+from obsidian_ai_automator.core.adaptive_limiter import AdaptiveLimiter
+from obsidian_ai_automator.core.single_flight import SingleFlight, FlightCancelledError
+from obsidian_ai_automator.core.analysis_stream import AnalysisStreamTracker
 from obsidian_ai_automator.processing.transcription.deepgram_transcriber import DeepgramTranscriber
 from obsidian_ai_automator.processing.analysis.nvidia_analyzer import NvidiaAnalyzer
+from obsidian_ai_automator.processing.analysis.map_reduce_analyzer import MapReduceAnalyzer
+from obsidian_ai_automator.processing.analysis.cached_analyzer import CachedAnalyzer
+from obsidian_ai_automator.processing.analysis.prompt_manager import estimate_tokens
 from obsidian_ai_automator.processing.output.obsidian_formatter import ObsidianFormatter
+from obsidian_ai_automator.processing.transcription.audio_extractor import AudioExtractor
+from obsidian_ai_automator.processing.transcription.base_transcriber import BaseTranscriber
+from obsidian_ai_automator.processing.transcription.chunked_transcriber import ChunkedTranscriber
+from obsidian_ai_automator.processing.transcription.vad import VadTranscriber
+from obsidian_ai_automator.processing.transcription.transcript import Transcript, TimecodeGranularity
+
+
+# Файл задания, стадия которого выполняется в текущей задаче asyncio (для учета работы в пулах потоков)
+_current_job_path: contextvars.ContextVar = contextvars.ContextVar("current_job_path", default=None)
 
 
 class AsyncProcessingOrchestrator:
@@ -24,8 +48,14 @@ class AsyncProcessingOrchestrator:
         self.logger = Logger()
         self.event_manager = EventManager(self.config)
         self.cache_manager = CacheManager()
+        self.transcript_store = TranscriptStore(self.config.get_paths_config()['transcript_cache_directory'])
         self.error_handler = ErrorHandler(self.config)
         self.metrics_collector = MetricsCollector(self.config)
+        self.job_store = JobStore(self.config.get_paths_config()['job_store_path'])
+        self._transcription_flights = SingleFlight()
+        # Работа в пулах потоков по файлам заданий: после отмены стадии по времени она продолжается в фоне
+        self._running_work: Dict[str, set] = {}
+        self._running_work_lock = threading.Lock()
         
         # Инициализируем логирование
         log_level = self.config.get('Logging', 'level', fallback='INFO')
@@ -38,7 +68,80 @@ class AsyncProcessingOrchestrator:
         self._initialize_components()
         
         # Получаем максимальное количество параллельных процессов из конфигурации
-        self.max_parallel_processes = self.config.getint('Processing', 'max_parallel_processes', fallback=2)
+        processing_config = self.config.get_processing_config()
+        self.max_parallel_processes = processing_config['max_parallel_processes']
+        self.max_job_attempts = processing_config['max_job_attempts']
+        # Режим отпечатка содержимого: ключ хранилища транскрипций и кэша дорожек
+        self.fingerprint_mode = processing_config['fingerprint_mode']
+        
+        # Ограничения времени стадий и задания целиком (0 - без ограничений)
+        timeouts_config = self.config.get_timeouts_config()
+        self.transcription_timeout = timeouts_config['transcription_timeout']
+        self.analysis_timeout = timeouts_config['analysis_timeout']
+        self.output_timeout = timeouts_config['output_timeout']
+        self.job_timeout = timeouts_config['job_timeout']
+        
+        self.scheduler = JobScheduler(processing_config['scheduling_policy'],
+                                      processing_config['scheduler_window'],
+                                      processing_config['scheduling_cost'])
+        
+        # Параметры конвейерного режима: отдельные лимиты для каждой стадии
+        self.pipeline_mode = processing_config['pipeline_mode']
+        self.transcription_workers = max(1, processing_config['transcription_workers'])
+        self.analysis_workers = max(1, processing_config['analysis_workers'])
+        self.output_workers = max(1, processing_config['output_workers'])
+        self.pipeline_queue_size = max(1, processing_config['pipeline_queue_size'])
+        
+        # Выделенные пулы потоков для стадий вместо общего пула по умолчанию,
+        # чтобы долгая транскрибация не занимала потоки, нужные анализу
+        self._transcription_executor = ThreadPoolExecutor(max_workers=self.transcription_workers,
+                                                          thread_name_prefix="transcription")
+        self._analysis_executor = ThreadPoolExecutor(max_workers=self.analysis_workers,
+                                                     thread_name_prefix="analysis")
+        self._output_executor = ThreadPoolExecutor(max_workers=self.output_workers,
+                                                   thread_name_prefix="output")
+        
+        # Адаптивные лимиты одновременных запросов к провайдерам транскрибации и анализа
+        adaptive_config = self.config.get_adaptive_concurrency_config()
+        self.adaptive_concurrency = adaptive_config.pop('enabled')
+        self.transcription_limiter = AdaptiveLimiter(processing_config['transcription_provider'], **adaptive_config)
+        self.analysis_limiter = AdaptiveLimiter(processing_config['analysis_provider'], **adaptive_config)
+        
+        # Провайдеры с собственным асинхронным клиентом используют общий пул соединений
+        AsyncHttpClient.configure(processing_config['http_connection_limit'])
+        if not AsyncHttpClient.is_available():
+            self.logger.warning("Библиотека aiohttp не установлена, запросы к API выполняются в пуле потоков")
+    
+    def _wrap_transcriber(self, transcriber: BaseTranscriber) -> BaseTranscriber:
+        """
+        Оборачивает транскрибер провайдера удалением тишины и разбиением на части по конфигурации
+        """
+        # Тишина вырезается внутри каждой части, чтобы декодированная запись не занимала много памяти
+        vad_config = self.config.get_vad_config()
+        if vad_config.pop('enabled'):
+            transcriber = VadTranscriber(transcriber, metrics_collector=self.metrics_collector, **vad_config)
+        
+        # Длинные записи транскрибируются по частям параллельно
+        chunking_config = self.config.get_chunking_config()
+        if chunking_config.pop('enabled'):
+            transcriber = ChunkedTranscriber(transcriber, **chunking_config)
+        return transcriber
+    
+    def shutdown(self):
+        """
+        Останавливает пулы потоков стадий обработки
+        """
+        self._transcription_executor.shutdown(wait=True)
+        self._analysis_executor.shutdown(wait=True)
+        self._output_executor.shutdown(wait=True)
+        self.transcriber.close()
+    
+    async def aclose(self):
+        """
+        Закрывает общий пул HTTP-соединений и останавливает пулы потоков стадий
+        """
+        await AsyncHttpClient.close()
+        self.shutdown()
     
     def _initialize_components(self):
         """
@@ -47,34 +150,74 @@ class AsyncProcessingOrchestrator:
         processing_config = self.config.get_processing_config()
         
         # Инициализируем транскрибер
+        # Ограничение времени одного запроса к API провайдера (0 - без ограничений)
+        request_timeout = self.config.get_timeouts_config()['request_timeout'] or None
+        
         transcription_provider = processing_config['transcription_provider']
         if transcription_provider == 'deepgram':
-            self.transcriber = DeepgramTranscriber()
+            self.transcriber = DeepgramTranscriber(timeout=request_timeout)
         elif transcription_provider == 'openai':
             from obsidian_ai_automator.processing.transcription.openai_transcriber import OpenAITranscriber
-            self.transcriber = OpenAITranscriber()
+            self.transcriber = OpenAITranscriber(timeout=request_timeout)
         elif transcription_provider == 'whisper':
             from obsidian_ai_automator.processing.transcription.whisper_transcriber import WhisperTranscriber
-            self.transcriber = WhisperTranscriber()
+            self.transcriber = WhisperTranscriber(timeout=request_timeout)
         elif transcription_provider == 'ollama':
             from obsidian_ai_automator.processing.transcription.ollama_transcriber import OllamaTranscriber
-            self.transcriber = OllamaTranscriber()
+            self.transcriber = OllamaTranscriber(timeout=request_timeout)
         elif transcription_provider == 'local_whisper':
             from obsidian_ai_automator.processing.transcription.local_whisper_transcriber import LocalWhisperTranscriber
-            self.transcriber = LocalWhisperTranscriber()
+            local_whisper_config = self.config.get_local_whisper_config()
+            warmup = local_whisper_config.pop('warmup')
+            self.transcriber = LocalWhisperTranscriber(**local_whisper_config)
+            if warmup:
+                self.logger.info("Предварительно загружаем модель локального Whisper...")
+                try:
+                    self.transcriber.warmup()
+                except Exception as e:
+                    # Ошибка повторится и будет обработана при транскрибации первого файла
+                    self.logger.warning(f"Не удалось предварительно загрузить модель Whisper: {e}")
         else:
             raise ValueError(f"Неподдерживаемый провайдер транскрибации: {transcription_provider}")
         
+        self.transcriber = self._wrap_transcriber(self.transcriber)
+        
         # Инициализируем анализатор
         analysis_provider = processing_config['analysis_provider']
         if analysis_provider == 'nvidia':
-            self.analyzer = NvidiaAnalyzer()
+            self.analyzer = NvidiaAnalyzer(timeout=request_timeout)
         elif analysis_provider == 'openai':
             from obsidian_ai_automator.processing.analysis.openai_analyzer import OpenAIAnalyzer
-            self.analyzer = OpenAIAnalyzer()
+            self.analyzer = OpenAIAnalyzer(timeout=request_timeout)
         else:
             raise ValueError(f"Неподдерживаемый провайдер анализа: {analysis_provider}")
         
+        # Транскрипции, не помещающиеся в один запрос, анализируются по частям
+        map_reduce_config = self.config.get_map_reduce_config()
+        if map_reduce_config.pop('enabled'):
+            self.analyzer = MapReduceAnalyzer(self.analyzer, **map_reduce_config)
+        
+        # Результат для той же транскрипции, промпта и параметров модели берется из кэша без запроса к модели
+        analysis_cache_config = self.config.get_analysis_cache_config()
+        if analysis_cache_config.pop('enabled'):
+            self.analysis_cache = AnalysisCache(self.config.get_paths_config()['analysis_cache_path'],
+                                                **analysis_cache_config)
+            self.analyzer = CachedAnalyzer(self.analyzer, self.analysis_cache,
+                                           metrics_collector=self.metrics_collector)
+        
+        # Детализация тайм-кодов в транскрипции для анализа (в заметку попадают тайм-коды всех слов)
+        self.analysis_timecodes = self.config.get_analysis_timecodes_config()
+        self.analysis_timecodes['granularity'] = TimecodeGranularity.normalize(self.analysis_timecodes['granularity'])
+        
+        # Потоковый анализ: заметка пишется по мере генерации ответа
+        streaming_config = self.config.get_streaming_config()
+        self.streaming = streaming_config['enabled']
+        self.streaming_progress_interval = streaming_config['progress_interval']
+        
+        # Извлечение аудиодорожки перед отправкой файла провайдеру
+        audio_config = self.config.get_audio_preprocessing_config()
+        self.audio_extractor = AudioExtractor(**audio_config) if audio_config.pop('enabled') else None
+        
         # Инициализируем форматтер
         output_format = processing_config['output_format']
         if output_format == 'obsidian':
@@ -95,26 +238,232 @@ class AsyncProcessingOrchestrator:
         start_time = time.time()
         self.logger.info(f"Начало асинхронной обработки файла: {file_path}")
         
+        job = self._start_job(file_path)
+        if job is None:
+            return None
+        if job['state'] == JobState.WRITTEN:
+            return job['output_path']
+        job['start_time'] = start_time
+        
+        if not await self._transcribe_job(job):
+            return None
+        
+        if not await self._analyze_job(job):
+            return None
+        
+        return await self._output_job(job)
+    
+    def _start_job(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Регистрирует файл в очереди заданий и начинает новую попытку обработки
+        
+        Args:
+            file_path: Путь к файлу для обработки
+            
+        Returns:
+            Словарь задания с результатами уже завершенных стадий или None, если предыдущая
+            попытка, отмененная по времени, еще выполняется в пуле потоков
+        """
+        if self._has_running_work(file_path):
+            # Новая попытка запустила бы ту же транскрибацию поверх еще идущей
+            self.logger.warning(f"Предыдущая попытка обработки еще выполняется в фоне, файл пропущен: {file_path}")
+            return None
+        
+        job = self.job_store.enqueue(file_path)
+        if job['state'] == JobState.WRITTEN:
+            self.logger.info(f"Файл уже обработан ранее: {file_path} -> {job['output_path']}")
+            return job
+        
+        self.job_store.start_attempt(file_path)
+        return job
+    
+    async def _with_deadline(self, job: Dict[str, Any], stage, stage_timeout: float):
+        """
+        Выполняет стадию с ограничением времени стадии и оставшегося времени задания
+        
+        По истечении времени стадия отменяется: запросы aiohttp закрывают соединение,
+        а слот обработки освобождается сразу. Работу в пуле потоков досрочно прервать нельзя
+        (запросы ограничивает request_timeout провайдера), поэтому она учитывается за файлом
+        задания и новая попытка для этого файла не начинается, пока работа не завершится
+        
+        Args:
+            job: Словарь задания с временем начала обработки
+            stage: Корутина стадии
+            stage_timeout: Ограничение времени стадии в секундах (0 - без ограничений)
+            
+        Returns:
+            Результат стадии
+        """
+        timeouts = [stage_timeout] if stage_timeout > 0 else []
+        if self.job_timeout > 0:
+            timeouts.append(job['start_time'] + self.job_timeout - time.time())
+        
+        if not timeouts:
+            return await stage
+        return await asyncio.wait_for(stage, max(0, min(timeouts)))
+    
+    def _mark_timed_out(self, job: Dict[str, Any], stage_name: str):
+        """Фиксирует превышение ограничения времени задания"""
+        message = f"Превышено время ожидания на стадии {stage_name}"
+        self.logger.error(f"{message}: {job['file_path']}")
+        self.event_manager.emit("processing_error", f"{message}: {job['file_path']}")
+        self.metrics_collector.record_error("TimeoutError", f"{message}: {job['file_path']}")
+        self.job_store.mark_timed_out(job['file_path'], message)
+    
+    async def _transcribe_job(self, job: Dict[str, Any]) -> bool:
+        """
+        Выполняет стадию транскрибации задания, если она еще не была завершена
+        """
+        _current_job_path.set(job['file_path'])
+        if job['transcript'] is not None:
+            self.logger.info(f"Возобновляем задание после транскрибации: {job['file_path']}")
+            job['transcript'] = Transcript.from_cached(job['transcript'])
+            return True
+        
+        try:
+            transcript = await self._with_deadline(job, self._run_transcription_stage(job['file_path']),
+                                                   self.transcription_timeout)
+        except asyncio.TimeoutError:
+            self._mark_timed_out(job, "транскрибации")
+            return False
+        if transcript is None:
+            self.job_store.mark_failed(job['file_path'], "Ошибка на стадии транскрибации")
+            return False
+        
+        self.job_store.mark_transcribed(job['file_path'], transcript.to_dict())
+        job['transcript'] = transcript
+        return True
+    
+    async def _analyze_job(self, job: Dict[str, Any]) -> bool:
+        """
+        Выполняет стадию анализа задания, если она еще не была завершена
+        """
+        _current_job_path.set(job['file_path'])
+        if job['analysis'] is not None:
+            self.logger.info(f"Возобновляем задание после анализа: {job['file_path']}")
+            return True
+        
+        if self.streaming:
+            # Ответ дописывается в заметку по мере генерации, стадия сохранения только фиксирует результат
+            stage = self._run_streaming_stage(job['file_path'], job['transcript'], job['start_time'])
+        else:
+            stage = self._run_analysis_stage(job['transcript'])
+        
+        try:
+            analysis_result = await self._with_deadline(job, stage, self.analysis_timeout)
+        except asyncio.TimeoutError:
+            self._mark_timed_out(job, "анализа")
+            return False
+        if analysis_result is None:
+            self.job_store.mark_failed(job['file_path'], "Ошибка на стадии анализа")
+            return False
+        
+        if self.streaming:
+            analysis_result, job['streamed_output_path'] = analysis_result
+        self.job_store.mark_analyzed(job['file_path'], analysis_result)
+        job['analysis'] = analysis_result
+        return True
+    
+    async def _output_job(self, job: Dict[str, Any]) -> Optional[str]:
+        """
+        Выполняет стадию сохранения заметки и фиксирует завершение задания
+        """
+        _current_job_path.set(job['file_path'])
+        if job.get('streamed_output_path'):
+            # Заметка уже записана на стадии потокового анализа
+            self.job_store.mark_written(job['file_path'], job['streamed_output_path'])
+            return job['streamed_output_path']
+        
+        try:
+            output_path = await self._with_deadline(
+                job, self._run_output_stage(job['file_path'], job['transcript'], job['analysis'], job['start_time']),
+                self.output_timeout)
+        except asyncio.TimeoutError:
+            self._mark_timed_out(job, "сохранения")
+            return None
+        if output_path is None:
+            self.job_store.mark_failed(job['file_path'], "Ошибка на стадии сохранения")
+            return None
+        
+        self.job_store.mark_written(job['file_path'], output_path)
+        return output_path
+    
+    async def _run_transcription_stage(self, file_path: str) -> Optional[Transcript]:
+        """
+        Стадия транскрибации: возвращает транскрипцию из хранилища или от провайдера
+        
+        Args:
+            file_path: Путь к файлу для обработки
+            
+        Returns:
+            Структурированная транскрипция или None в случае ошибки
+        """
         # Проверяем, существует ли файл
         if not os.path.exists(file_path):
             self.logger.error(f"Файл не найден: {file_path}")
             self.metrics_collector.record_error("FileNotFound", f"Файл не найден: {file_path}")
             return None
         
-        # Генерируем ключ для кэша на основе пути к файлу и его содержимого
-        cache_key = f"transcript_{file_path}_{os.path.getmtime(file_path)}"
+        # Ключ хранилища транскрипций строится по содержимому, поэтому копия, перемещенный
+        # или переименованный файл и пересохранение с новым mtime используют уже полученную транскрипцию
+        content_hash = await asyncio.to_thread(compute_fingerprint, file_path, self.fingerprint_mode)
+        
+        if self._transcription_flights.is_in_flight(content_hash):
+            self.logger.info(f"Файл с таким же содержимым уже транскрибируется, ожидаем результат: {file_path}")
+        
+        # Одновременные задания для одинакового содержимого ждут одну транскрибацию
+        while True:
+            try:
+                return await self._transcription_flights.run(
+                    content_hash, lambda: self._transcribe_content(file_path, content_hash))
+            except FlightCancelledError:
+                # Задание, выполнявшее транскрибацию, было отменено; пробуем сами
+                self.logger.info(f"Транскрибация файла с таким же содержимым прервана, повторяем: {file_path}")
+    
+    def _prepare_audio(self, file_path: str, content_hash: str) -> str:
+        """
+        Извлекает компактную аудиодорожку для провайдеров, отправляющих файл по сети
+        
+        Args:
+            file_path: Путь к исходному файлу
+            content_hash: Хэш содержимого файла (ключ кэша дорожек)
+            
+        Returns:
+            Путь к файлу для отправки провайдеру
+        """
+        if self.audio_extractor is None or not self.transcriber.uploads_media:
+            return file_path
         
-        # Проверяем, есть ли транскрипция в кэше
-        cached_transcript = self.cache_manager.get(cache_key)
-        if cached_transcript:
-            self.logger.info(f"Используем кэшированную транскрипцию для файла: {file_path}")
-            transcript = cached_transcript
+        try:
+            return self.audio_extractor.prepare(file_path, content_hash)
+        except Exception as e:
+            self.logger.warning(f"Не удалось извлечь аудио из {file_path}, отправляем исходный файл: {e}")
+            return file_path
+    
+    async def _transcribe_content(self, file_path: str, content_hash: str) -> Optional[Transcript]:
+        """
+        Возвращает транскрипцию из хранилища или от провайдера и сохраняет ее в хранилище
+        
+        Args:
+            file_path: Путь к файлу для обработки
+            content_hash: Хэш содержимого файла
+            
+        Returns:
+            Структурированная транскрипция или None в случае ошибки
+        """
+        # Проверяем, есть ли транскрипция этого содержимого с теми же параметрами в хранилище
+        identity = self.transcriber.cache_identity()
+        transcript = await asyncio.to_thread(self.transcript_store.get, content_hash, identity)
+        if transcript:
+            self.logger.info(f"Используем сохраненную транскрипцию для файла: {file_path}")
         else:
             # Выполняем транскрибацию
             self.logger.info("Выполняем транскрибацию файла...")
             transcription_start = time.time()
             try:
-                transcript = await self._transcribe_file_async(file_path)
+                audio_path = await self._run_in_executor(self._transcription_executor, self._prepare_audio,
+                                                         file_path, content_hash)
+                transcript = await self._transcribe_file_async(audio_path)
                 transcription_time = time.time() - transcription_start
                 
                 # Записываем метрики транскрибации
@@ -137,22 +486,56 @@ class AsyncProcessingOrchestrator:
                 self.metrics_collector.record_error("TranscriptionError", "Транскрипция не удалась или вернула пустой результат")
                 return None
             
-            # Сохраняем в кэш на 24 часа
-            self.cache_manager.set(cache_key, transcript, ttl=86400)
+            # Сохраняем структурированную транскрипцию без срока хранения: любые текстовые
+            # представления строятся из нее без повторной отправки файла
+            await asyncio.to_thread(self.transcript_store.put, content_hash, identity, transcript, file_path)
+        
+        return transcript
+    
+    def _prepare_analysis_input(self, transcript: Transcript) -> str:
+        """
+        Строит текст транскрипции для анализа с настроенной детализацией тайм-кодов
+        
+        Args:
+            transcript: Структурированная транскрипция
+            
+        Returns:
+            Текст для промпта
+        """
+        granularity = self.analysis_timecodes['granularity']
+        analysis_input = transcript.render_timecoded(granularity, self.analysis_timecodes['interval_seconds'])
+        full_tokens = estimate_tokens(transcript.timecoded_text)
+        input_tokens = estimate_tokens(analysis_input)
+        self.metrics_collector.record_analysis_input(granularity, full_tokens, input_tokens)
+        self.logger.info(f"Транскрипция для анализа (тайм-коды: {granularity}): "
+                         f"~{input_tokens} токенов вместо ~{full_tokens}")
+        return analysis_input
+    
+    async def _run_analysis_stage(self, transcript: Transcript) -> Optional[Dict[str, Any]]:
+        """
+        Стадия анализа транскрипции
+        
+        Args:
+            transcript: Структурированная транскрипция
+            
+        Returns:
+            Словарь с результатом анализа и тегами или None в случае ошибки
+        """
+        analysis_input = self._prepare_analysis_input(transcript)
         
         # Выполняем анализ
         self.logger.info("Выполняем анализ транскрипции...")
         analysis_start = time.time()
         try:
-            analysis_result = await self._analyze_transcript_async(transcript)
+            analysis_result = await self._analyze_transcript_async(analysis_input)
             analysis_time = time.time() - analysis_start
             
             # Записываем метрики анализа
             self.metrics_collector.record_api_call("nvidia", duration=analysis_time,
-                                                  additional_data={"tokens": len(transcript)})
+                                                  additional_data={"tokens": estimate_tokens(analysis_input)})
             self.metrics_collector.metrics["total_analysis_time"] += analysis_time
         except AnalysisError as e:
-            self.error_handler.handle_analysis_error(e, transcript)
+            self.error_handler.handle_analysis_error(e, analysis_input)
             self.event_manager.emit("processing_error", str(e))
             self.metrics_collector.record_error("AnalysisError", str(e))
             return None
@@ -162,13 +545,117 @@ class AsyncProcessingOrchestrator:
             self.metrics_collector.record_error("AnalysisError", str(e))
             return None
         
-        # Подготавливаем контент для форматирования
-        content = {
+        return analysis_result
+    
+    def _build_note_content(self, file_path: str, transcript: Transcript, tags: List[str],
+                            analysis: str = '') -> Dict[str, Any]:
+        """Подготавливает контент заметки для форматирования"""
+        return {
             'title': f"Анализ: {os.path.basename(file_path)}",
-            'tags': analysis_result['tags'],
-            'analysis': analysis_result['analysis'],
-            'transcript': transcript
+            'tags': tags,
+            'analysis': analysis,
+            'transcript': transcript.timecoded_text
         }
+    
+    def _get_output_file_path(self, file_path: str) -> str:
+        """Возвращает путь к заметке для исходного файла в хранилище Obsidian"""
+        paths_config = self.config.get_paths_config()
+        obsidian_vault_path = os.path.expanduser(paths_config['obsidian_vault_path'])
+        
+        # Создаем безопасное имя файла
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        safe_filename = f"{base_name}.md"
+        return os.path.join(obsidian_vault_path, safe_filename)
+    
+    async def _run_streaming_stage(self, file_path: str, transcript: Transcript,
+                                   start_time: float) -> Optional[Tuple[Dict[str, Any], str]]:
+        """
+        Стадия потокового анализа с постепенной записью заметки
+        
+        Заметка пишется во временный файл, который заменяет итоговый только после
+        полного ответа модели; при ошибке или отмене по времени временный файл удаляется
+        
+        Args:
+            file_path: Путь к исходному файлу
+            transcript: Структурированная транскрипция
+            start_time: Время начала обработки файла
+            
+        Returns:
+            Результат анализа с тегами и путь к созданному файлу или None в случае ошибки
+        """
+        analysis_input = self._prepare_analysis_input(transcript)
+        tags = self.analyzer.build_tags()
+        content = self._build_note_content(file_path, transcript, tags)
+        writer = self.formatter.open_note_writer(self._get_output_file_path(file_path))
+        tracker = AnalysisStreamTracker(self.event_manager, writer, file_path, self.streaming_progress_interval)
+        
+        async def stream():
+            # Ограничитель повторяет запрос при перегрузке провайдера; после начала записи ответа
+            # повтор продублировал бы текст в заметке
+            if tracker.chars:
+                raise AnalysisError("Поток ответа прерван после начала записи заметки")
+            tracker.start()
+            async for delta in self.analyzer.stream_analysis_async(analysis_input):
+                tracker.on_delta(delta)
+            return tracker.finish()
+        
+        self.logger.info(f"Выполняем потоковый анализ транскрипции с записью в: {writer.file_path}")
+        try:
+            with writer:
+                writer.write(self.formatter.format_header(content))
+                # Задержка анализа оценивается на тысячу символов транскрипции
+                analysis = await self._call_provider(self.analysis_limiter, stream, len(analysis_input) / 1000)
+                writer.write(self.formatter.format_footer(content))
+                output_file_path = writer.commit()
+        except AnalysisError as e:
+            self.error_handler.handle_analysis_error(e, analysis_input)
+            self.event_manager.emit("processing_error", str(e))
+            self.metrics_collector.record_error("AnalysisError", str(e))
+            return None
+        except OutputError as e:
+            self.error_handler.handle_output_error(e, writer.file_path)
+            self.event_manager.emit("processing_error", str(e))
+            self.metrics_collector.record_error("OutputError", str(e))
+            return None
+        except Exception as e:
+            self.logger.error(f"Неожиданная ошибка при потоковом анализе: {e}")
+            self.event_manager.emit("processing_error", str(e))
+            self.metrics_collector.record_error("AnalysisError", str(e))
+            return None
+        
+        # Записываем метрики анализа
+        self.metrics_collector.record_api_call("nvidia", duration=tracker.total_time,
+                                              additional_data={"tokens": estimate_tokens(analysis_input)})
+        self.metrics_collector.metrics["total_analysis_time"] += tracker.total_time
+        self.metrics_collector.record_analysis_latency(tracker.time_to_first_token, tracker.total_time)
+        
+        self.logger.info(f"Файл успешно создан: {output_file_path}")
+        self.event_manager.emit("file_processed", output_file_path)
+        
+        # Фиксируем успешную обработку файла
+        processing_time = time.time() - start_time
+        self.metrics_collector.record_file_processed(file_path, processing_time)
+        self.metrics_collector.save_metrics()
+        
+        return {"analysis": analysis, "tags": tags}, output_file_path
+    
+    async def _run_output_stage(self, file_path: str, transcript: Transcript, analysis_result: Dict[str, Any],
+                                start_time: float) -> Optional[str]:
+        """
+        Стадия форматирования и сохранения заметки
+        
+        Args:
+            file_path: Путь к исходному файлу
+            transcript: Структурированная транскрипция (в заметку попадают тайм-коды всех слов)
+            analysis_result: Результат анализа с тегами
+            start_time: Время начала обработки файла
+            
+        Returns:
+            Путь к созданному файлу или None в случае ошибки
+        """
+        # Подготавливаем контент для форматирования
+        content = self._build_note_content(file_path, transcript, analysis_result['tags'],
+                                           analysis_result['analysis'])
         
         # Форматируем контент
         self.logger.info("Форматируем контент для Obsidian...")
@@ -186,13 +673,7 @@ class AsyncProcessingOrchestrator:
             return None
         
         # Определяем путь для сохранения
-        paths_config = self.config.get_paths_config()
-        obsidian_vault_path = os.path.expanduser(paths_config['obsidian_vault_path'])
-        
-        # Создаем безопасное имя файла
-        base_name = os.path.splitext(os.path.basename(file_path))[0]
-        safe_filename = f"{base_name}.md"
-        output_file_path = os.path.join(obsidian_vault_path, safe_filename)
+        output_file_path = self._get_output_file_path(file_path)
         
         # Сохраняем файл
         self.logger.info(f"Сохраняем файл в: {output_file_path}")
@@ -222,63 +703,234 @@ class AsyncProcessingOrchestrator:
             self.metrics_collector.record_error("OutputError", str(e))
             return None
     
-    async def _transcribe_file_async(self, file_path: str) -> str:
+    async def _call_provider(self, limiter: AdaptiveLimiter, operation, work_units: float):
+        """
+        Выполняет запрос к провайдеру через адаптивный ограничитель параллельности
+        
+        Args:
+            limiter: Ограничитель провайдера
+            operation: Функция без аргументов, возвращающая корутину запроса
+            work_units: Объем данных запроса для оценки удельной задержки
+        """
+        if not self.adaptive_concurrency:
+            return await operation()
+        
+        try:
+            return await limiter.run(operation, work_units)
+        finally:
+            self.metrics_collector.record_concurrency(limiter.name, limiter.snapshot())
+    
+    async def _run_in_executor(self, executor: ThreadPoolExecutor, func, *args):
+        """
+        Выполняет синхронную операцию в пуле потоков стадии и учитывает ее за файлом текущего задания
+        
+        Отмена ожидания (например, по ограничению времени) не останавливает поток,
+        поэтому запись о работе снимается только после ее фактического завершения
+        """
+        future = executor.submit(func, *args)
+        job_path = _current_job_path.get()
+        if job_path is not None:
+            with self._running_work_lock:
+                self._running_work.setdefault(job_path, set()).add(future)
+            future.add_done_callback(lambda done: self._finish_running_work(job_path, done))
+        return await asyncio.wrap_future(future)
+    
+    def _finish_running_work(self, job_path: str, future: Future):
+        """Снимает запись о завершенной работе в пуле потоков (вызывается из потока пула)"""
+        with self._running_work_lock:
+            running = self._running_work.get(job_path)
+            if running is not None:
+                running.discard(future)
+                if not running:
+                    del self._running_work[job_path]
+    
+    def _has_running_work(self, file_path: str) -> bool:
+        """Проверяет, выполняется ли в пулах потоков работа предыдущей попытки задания"""
+        with self._running_work_lock:
+            return bool(self._running_work.get(file_path))
+    
+    async def _transcribe_file_async(self, file_path: str) -> Transcript:
         """
         Асинхронная транскрибация файла
         """
-        # Используем asyncio.to_thread для выполнения синхронной операции в отдельном потоке
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.transcriber.get_transcription_with_timecodes, file_path)
+        async def transcribe():
+            if self.transcriber.supports_native_async:
+                return await self.transcriber.get_transcript_async(file_path)
+            
+            # Выполняем синхронную операцию в выделенном пуле потоков стадии
+            return await self._run_in_executor(self._transcription_executor, self.transcriber.get_transcript, file_path)
+        
+        # Задержка транскрибации оценивается на мегабайт файла
+        return await self._call_provider(self.transcription_limiter, transcribe, os.path.getsize(file_path) / 1e6)
     
     async def _analyze_transcript_async(self, transcript: str) -> Dict[str, Any]:
         """
         Асинхронный анализ транскрипции
         """
-        # Используем asyncio.to_thread для выполнения синхронной операции в отдельном потоке
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.analyzer.get_analysis_with_tags, transcript)
+        async def analyze():
+            if self.analyzer.supports_native_async:
+                return await self.analyzer.get_analysis_with_tags_async(transcript)
+            
+            # Выполняем синхронную операцию в выделенном пуле потоков стадии
+            return await self._run_in_executor(self._analysis_executor, self.analyzer.get_analysis_with_tags, transcript)
+        
+        # Задержка анализа оценивается на тысячу символов транскрипции
+        return await self._call_provider(self.analysis_limiter, analyze, len(transcript) / 1000)
     
     async def _format_content_async(self, content: Dict[str, Any]) -> str:
         """
         Асинхронное форматирование контента
         """
-        # Используем asyncio.to_thread для выполнения синхронной операции в отдельном потоке
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.formatter.format, content)
+        # Выполняем синхронную операцию в выделенном пуле потоков стадии
+        return await self._run_in_executor(self._output_executor, self.formatter.format, content)
     
     async def _save_file_async(self, content: str, file_path: str) -> bool:
         """
         Асинхронное сохранение файла
         """
-        # Используем asyncio.to_thread для выполнения синхронной операции в отдельном потоке
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.formatter.save_to_file, content, file_path)
+        # Выполняем синхронную операцию в выделенном пуле потоков стадии
+        return await self._run_in_executor(self._output_executor, self.formatter.save_to_file, content, file_path)
+    
+    async def _iter_scheduled(self, file_paths: Iterable[str]) -> AsyncIterator[str]:
+        """
+        Возвращает файлы в порядке, заданном планировщиком
+        
+        Обход папки и оценка длительности через ffprobe выполняются в потоке,
+        чтобы не блокировать цикл событий
+        """
+        scheduled_paths = self.scheduler.order(file_paths)
+        while True:
+            file_path = await asyncio.to_thread(next, scheduled_paths, None)
+            if file_path is None:
+                return
+            yield file_path
     
-    async def process_multiple_files_async(self, file_paths: List[str]) -> List[str]:
+    async def process_multiple_files_async(self, file_paths: Iterable[str]) -> List[str]:
         """
         Асинхронно обрабатывает несколько файлов параллельно
         
+        Пути читаются из итератора по мере освобождения воркеров, поэтому
+        генератор обхода папки не разворачивается в список целиком
+        
         Args:
-            file_paths: Список путей к файлам для обработки
+            file_paths: Пути к файлам для обработки (список или генератор)
             
         Returns:
             Список путей к созданным файлам
         """
-        semaphore = asyncio.Semaphore(self.max_parallel_processes)
+        if self.pipeline_mode:
+            return await self.process_multiple_files_pipelined(file_paths)
         
-        async def process_with_semaphore(file_path):
-            async with semaphore:
-                return await self.process_file_async(file_path)
+        # Небольшой буфер между обходом папки и воркерами ограничивает число задач в памяти
+        file_queue = asyncio.Queue(maxsize=self.max_parallel_processes * 2)
+        processed_files = []
+        
+        async def worker():
+            while True:
+                file_path = await file_queue.get()
+                try:
+                    result = await self.process_file_async(file_path)
+                    if result:
+                        processed_files.append(result)
+                except Exception as e:
+                    self.logger.error(f"Ошибка при обработке файла {file_path}: {e}")
+                finally:
+                    file_queue.task_done()
         
-        tasks = [process_with_semaphore(file_path) for file_path in file_paths]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, self.max_parallel_processes))]
+        try:
+            async for file_path in self._iter_scheduled(file_paths):
+                # Регистрируем файл в очереди заданий, чтобы после перезапуска его можно было возобновить
+                self.job_store.enqueue(file_path)
+                await file_queue.put(file_path)
+            await file_queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
         
-        # Фильтруем результаты, исключая None и исключения
+        return processed_files
+    
+    async def process_multiple_files_pipelined(self, file_paths: Iterable[str]) -> List[str]:
+        """
+        Обрабатывает файлы в конвейерном режиме: стадии транскрибации, анализа и
+        сохранения работают независимо и связаны ограниченными очередями, поэтому
+        файл N+1 транскрибируется, пока файл N находится на анализе
+        
+        Args:
+            file_paths: Пути к файлам для обработки
+            
+        Returns:
+            Список путей к созданным файлам
+        """
+        transcription_queue = asyncio.Queue(maxsize=self.pipeline_queue_size)
+        analysis_queue = asyncio.Queue(maxsize=self.pipeline_queue_size)
+        output_queue = asyncio.Queue(maxsize=self.pipeline_queue_size)
         processed_files = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                self.logger.error(f"Ошибка при обработке файла {file_paths[i]}: {result}")
-            elif result:
+        
+        async def transcribe_job(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            self.logger.info(f"Начало конвейерной обработки файла: {item['file_path']}")
+            job = self._start_job(item['file_path'])
+            if job is None:
+                return None
+            if job['state'] == JobState.WRITTEN:
+                processed_files.append(job['output_path'])
+                return None
+            job['start_time'] = time.time()
+            return job if await self._transcribe_job(job) else None
+        
+        async def analyze_job(job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            return job if await self._analyze_job(job) else None
+        
+        async def output_job(job: Dict[str, Any]) -> None:
+            result = await self._output_job(job)
+            if result:
                 processed_files.append(result)
         
-        return processed_files
\ No newline at end of file
+        async def stage_worker(in_queue: asyncio.Queue, out_queue: Optional[asyncio.Queue], handler):
+            while True:
+                job = await in_queue.get()
+                try:
+                    result = await handler(job)
+                    if result is not None and out_queue is not None:
+                        await out_queue.put(result)
+                except Exception as e:
+                    self.logger.error(f"Ошибка при обработке файла {job['file_path']}: {e}")
+                finally:
+                    in_queue.task_done()
+        
+        workers = []
+        workers += [asyncio.create_task(stage_worker(transcription_queue, analysis_queue, transcribe_job))
+                    for _ in range(self.transcription_workers)]
+        workers += [asyncio.create_task(stage_worker(analysis_queue, output_queue, analyze_job))
+                    for _ in range(self.analysis_workers)]
+        workers += [asyncio.create_task(stage_worker(output_queue, None, output_job))
+                    for _ in range(self.output_workers)]
+        
+        try:
+            # Очередь ограничена, поэтому подача файлов притормаживает, пока стадия транскрибации занята
+            async for file_path in self._iter_scheduled(file_paths):
+                self.job_store.enqueue(file_path)
+                await transcription_queue.put({'file_path': file_path})
+            
+            # Задание попадает в следующую очередь до task_done(), поэтому ожидание по порядку корректно
+            await transcription_queue.join()
+            await analysis_queue.join()
+            await output_queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        
+        return processed_files
+    
+    async def process_pending_jobs_async(self) -> List[str]:
+        """
+        Возобновляет незавершенные задания из очереди, например после перезапуска
+        
+        Returns:
+            Список путей к созданным файлам
+        """
+        pending_files = self.job_store.get_pending(self.max_job_attempts)
+        self.logger.info(f"Незавершенных заданий в очереди: {len(pending_files)}")
+        return await self.process_multiple_files_async(pending_files)
\ No newline at end of file
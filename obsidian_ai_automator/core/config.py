@@ -1,6 +1,6 @@
 import configparser
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 
 class ConfigManager:
@@ -29,7 +29,8 @@ class ConfigManager:
         self.config['Paths'] = {
             'watch_directory': '/home/nick/Public/ai-automator/',
             'obsidian_vault_path': '/home/nick/Obsidian Vault/Auto_Notes',
-            'transcript_cache_directory': '.deepgram_cache'
+            'transcript_cache_directory': '.deepgram_cache',
+            'job_store_path': '.jobs.sqlite3'
         }
         
         # Секция NVIDIA API
@@ -59,16 +60,94 @@ class ConfigManager:
         # Секция LLM
         self.config['LLM'] = {
             'custom_prompt_file': 'custom_prompt.txt',
-            'forbidden_tags': ''
+            'forbidden_tags': '',
+            'timecode_granularity': 'sentence',
+            'timecode_interval_seconds': '30'
+        }
+        
+        # Секция локального Whisper
+        self.config['Local_Whisper'] = {
+            'model_size': 'base',
+            'workers': '1',
+            'threads_per_worker': '0',
+            'backend': 'openai-whisper',
+            'compute_type': 'int8',
+            'idle_unload_seconds': '900',
+            'warmup': 'false'
         }
         
         # Секция обработки
         self.config['Processing'] = {
             'max_parallel_processes': '2',
+            'pipeline_mode': 'false',
+            'transcription_workers': '1',
+            'analysis_workers': '2',
+            'output_workers': '1',
+            'pipeline_queue_size': '2',
+            'http_connection_limit': '100',
+            'max_job_attempts': '3',
+            'scheduling_policy': 'fifo',
+            'scheduler_window': '64',
+            'scheduling_cost': 'duration',
             'transcription_provider': 'deepgram',
             'analysis_provider': 'nvidia',
             'output_format': 'obsidian'
         }
+        
+        # Секция подготовки аудио
+        self.config['Audio_Preprocessing'] = {
+            'enabled': 'true',
+            'cache_directory': '.audio_cache',
+            'sample_rate': '16000',
+            'bitrate': '24k',
+            'max_cache_age_hours': '24'
+        }
+        
+        # Секция транскрибации по частям
+        self.config['Chunking'] = {
+            'enabled': 'true',
+            'chunk_seconds': '600',
+            'overlap_seconds': '2',
+            'max_concurrency': '4',
+            'max_retries': '2'
+        }
+        
+        # Секция удаления тишины
+        self.config['Voice_Activity'] = {
+            'enabled': 'false',
+            'min_silence_seconds': '1.0',
+            'padding_seconds': '0.25',
+            'margin_db': '10',
+            'max_voiced_ratio': '0.9'
+        }
+        
+        # Секция ограничений времени
+        self.config['Timeouts'] = {
+            'request_timeout': '600',
+            'transcription_timeout': '0',
+            'analysis_timeout': '0',
+            'output_timeout': '0',
+            'job_timeout': '0'
+        }
+        
+        # Секция адаптивной параллельности запросов к провайдерам
+        self.config['Adaptive_Concurrency'] = {
+            'enabled': 'true',
+            'initial_limit': '2',
+            'min_limit': '1',
+            'max_limit': '8',
+            'decrease_factor': '0.5',
+            'latency_tolerance': '3.0',
+            'max_retries': '3'
+        }
+        
+        # Секция демона мониторинга
+        self.config['Monitoring'] = {
+            'daemon_workers': '2',
+            'daemon_queue_size': '100',
+            'file_settle_seconds': '2',
+            'delete_source_after_processing': 'true'
+        }
     
     def save_config(self):
         """Сохраняет конфигурацию в файл"""
@@ -83,6 +162,10 @@ class ConfigManager:
         """Получает целочисленное значение из конфигурации"""
         return self.config.getint(section, key, fallback=fallback)
     
+    def getfloat(self, section: str, key: str, fallback: float = 0.0) -> float:
+        """Получает дробное значение из конфигурации"""
+        return self.config.getfloat(section, key, fallback=fallback)
+    
     def getboolean(self, section: str, key: str, fallback: bool = False) -> bool:
         """Получает булевое значение из конфигурации"""
         return self.config.getboolean(section, key, fallback=fallback)
@@ -95,19 +178,146 @@ class ConfigManager:
     
     def get_processing_config(self) -> Dict[str, Any]:
         """Получает конфигурацию для обработки"""
+        max_parallel_processes = self.getint('Processing', 'max_parallel_processes', fallback=2)
         return {
-            'max_parallel_processes': self.getint('Processing', 'max_parallel_processes', fallback=2),
+            'max_parallel_processes': max_parallel_processes,
+            'pipeline_mode': self.getboolean('Processing', 'pipeline_mode', fallback=False),
+            # Лимиты стадий по умолчанию совпадают с общим лимитом параллельности
+            'transcription_workers': self.getint('Processing', 'transcription_workers', fallback=max_parallel_processes),
+            'analysis_workers': self.getint('Processing', 'analysis_workers', fallback=max_parallel_processes),
+            'output_workers': self.getint('Processing', 'output_workers', fallback=1),
+            'pipeline_queue_size': self.getint('Processing', 'pipeline_queue_size', fallback=2),
+            'http_connection_limit': self.getint('Processing', 'http_connection_limit', fallback=100),
+            'max_job_attempts': self.getint('Processing', 'max_job_attempts', fallback=3),
+            'scheduling_policy': self.get('Processing', 'scheduling_policy', fallback='fifo').strip().lower(),
+            'scheduler_window': self.getint('Processing', 'scheduler_window', fallback=64),
+            'scheduling_cost': self.get('Processing', 'scheduling_cost', fallback='duration').strip().lower(),
+            'fingerprint_mode': self.get('Processing', 'fingerprint_mode', fallback='fast').strip().lower(),
             'transcription_provider': self.get('Processing', 'transcription_provider', fallback='deepgram'),
             'analysis_provider': self.get('Processing', 'analysis_provider', fallback='nvidia'),
             'output_format': self.get('Processing', 'output_format', fallback='obsidian')
         }
     
+    def get_local_whisper_config(self) -> Dict[str, Any]:
+        """Получает конфигурацию локального Whisper"""
+        return {
+            'model_size': self.get('Local_Whisper', 'model_size', fallback='base'),
+            'workers': self.getint('Local_Whisper', 'workers', fallback=1),
+            'threads_per_worker': self.getint('Local_Whisper', 'threads_per_worker', fallback=0),
+            'backend': self.get('Local_Whisper', 'backend', fallback='openai-whisper').strip().lower(),
+            'compute_type': self.get('Local_Whisper', 'compute_type', fallback='int8').strip().lower(),
+            'idle_unload_seconds': self.getfloat('Local_Whisper', 'idle_unload_seconds', fallback=900),
+            'warmup': self.getboolean('Local_Whisper', 'warmup', fallback=False)
+        }
+    
+    def get_analysis_timecodes_config(self) -> Dict[str, Any]:
+        """Получает детализацию тайм-кодов в транскрипции, передаваемой на анализ"""
+        return {
+            'granularity': self.get('LLM', 'timecode_granularity', fallback='sentence').strip().lower(),
+            'interval_seconds': self.getfloat('LLM', 'timecode_interval_seconds', fallback=30)
+        }
+    
+    def get_streaming_config(self) -> Dict[str, Any]:
+        """Получает конфигурацию потокового анализа с постепенной записью заметки"""
+        return {
+            'enabled': self.getboolean('LLM', 'streaming', fallback=True),
+            'progress_interval': self.getfloat('LLM', 'streaming_progress_interval', fallback=1.0)
+        }
+    
+    def get_audio_preprocessing_config(self) -> Dict[str, Any]:
+        """Получает конфигурацию извлечения аудиодорожки перед транскрибацией"""
+        return {
+            'enabled': self.getboolean('Audio_Preprocessing', 'enabled', fallback=True),
+            'cache_dir': self.get('Audio_Preprocessing', 'cache_directory', fallback='.audio_cache'),
+            'sample_rate': self.getint('Audio_Preprocessing', 'sample_rate', fallback=16000),
+            'bitrate': self.get('Audio_Preprocessing', 'bitrate', fallback='24k'),
+            'max_cache_age_hours': self.getfloat('Audio_Preprocessing', 'max_cache_age_hours', fallback=24)
+        }
+    
+    def get_chunking_config(self) -> Dict[str, Any]:
+        """Получает конфигурацию транскрибации длинных записей по частям"""
+        return {
+            'enabled': self.getboolean('Chunking', 'enabled', fallback=True),
+            'chunk_seconds': self.getfloat('Chunking', 'chunk_seconds', fallback=600),
+            'overlap_seconds': self.getfloat('Chunking', 'overlap_seconds', fallback=2),
+            'max_concurrency': self.getint('Chunking', 'max_concurrency', fallback=4),
+            'max_retries': self.getint('Chunking', 'max_retries', fallback=2)
+        }
+    
+    def get_map_reduce_config(self) -> Dict[str, Any]:
+        """Получает конфигурацию анализа длинных транскрипций по частям"""
+        return {
+            'enabled': self.getboolean('Map_Reduce', 'enabled', fallback=True),
+            'max_input_tokens': self.getint('Map_Reduce', 'max_input_tokens', fallback=60000),
+            'chunk_tokens': self.getint('Map_Reduce', 'chunk_tokens', fallback=12000),
+            'max_concurrency': self.getint('Map_Reduce', 'max_concurrency', fallback=4),
+            'max_retries': self.getint('Map_Reduce', 'max_retries', fallback=2)
+        }
+    
+    def get_analysis_cache_config(self) -> Dict[str, Any]:
+        """Получает конфигурацию кэша результатов анализа"""
+        return {
+            'enabled': self.getboolean('Analysis_Cache', 'enabled', fallback=True),
+            'max_entries': self.getint('Analysis_Cache', 'max_entries', fallback=1000),
+            'max_size_mb': self.getfloat('Analysis_Cache', 'max_size_mb', fallback=100),
+            'eviction_policy': self.get('Analysis_Cache', 'eviction_policy', fallback='lru').strip().lower()
+        }
+    
+    def get_vad_config(self) -> Dict[str, Any]:
+        """Получает конфигурацию удаления тишины перед транскрибацией"""
+        return {
+            'enabled': self.getboolean('Voice_Activity', 'enabled', fallback=False),
+            'min_silence_seconds': self.getfloat('Voice_Activity', 'min_silence_seconds', fallback=1.0),
+            'padding_seconds': self.getfloat('Voice_Activity', 'padding_seconds', fallback=0.25),
+            'margin_db': self.getfloat('Voice_Activity', 'margin_db', fallback=10.0),
+            'max_voiced_ratio': self.getfloat('Voice_Activity', 'max_voiced_ratio', fallback=0.9)
+        }
+    
+    def get_timeouts_config(self) -> Dict[str, float]:
+        """Получает ограничения времени в секундах (0 - без ограничений)"""
+        return {
+            'request_timeout': self.getfloat('Timeouts', 'request_timeout', fallback=600),
+            'transcription_timeout': self.getfloat('Timeouts', 'transcription_timeout', fallback=0),
+            'analysis_timeout': self.getfloat('Timeouts', 'analysis_timeout', fallback=0),
+            'output_timeout': self.getfloat('Timeouts', 'output_timeout', fallback=0),
+            'job_timeout': self.getfloat('Timeouts', 'job_timeout', fallback=0)
+        }
+    
+    def get_adaptive_concurrency_config(self) -> Dict[str, Any]:
+        """Получает конфигурацию адаптивной параллельности запросов к провайдерам"""
+        return {
+            'enabled': self.getboolean('Adaptive_Concurrency', 'enabled', fallback=True),
+            'initial_limit': self.getint('Adaptive_Concurrency', 'initial_limit', fallback=2),
+            'min_limit': self.getint('Adaptive_Concurrency', 'min_limit', fallback=1),
+            'max_limit': self.getint('Adaptive_Concurrency', 'max_limit', fallback=8),
+            'decrease_factor': self.getfloat('Adaptive_Concurrency', 'decrease_factor', fallback=0.5),
+            'latency_tolerance': self.getfloat('Adaptive_Concurrency', 'latency_tolerance', fallback=3.0),
+            'max_retries': self.getint('Adaptive_Concurrency', 'max_retries', fallback=3)
+        }
+    
+    def get_monitoring_config(self) -> Dict[str, Any]:
+        """Получает конфигурацию демона мониторинга"""
+        return {
+            'daemon_workers': self.getint('Monitoring', 'daemon_workers',
+                                          fallback=self.getint('Processing', 'max_parallel_processes', fallback=2)),
+            'daemon_queue_size': self.getint('Monitoring', 'daemon_queue_size', fallback=100),
+            'file_settle_seconds': self.getint('Monitoring', 'file_settle_seconds', fallback=2),
+            'delete_source_after_processing': self.getboolean('Monitoring', 'delete_source_after_processing', fallback=True)
+        }
+    
+    def get_allowed_extensions(self) -> List[str]:
+        """Получает список разрешенных расширений файлов (пустой список - без ограничений)"""
+        allowed_extensions_str = self.get('File_Filtering', 'allowed_extensions', fallback='')
+        return [ext.strip().lower() for ext in allowed_extensions_str.split(',') if ext.strip()]
+    
     def get_paths_config(self) -> Dict[str, str]:
         """Получает конфигурацию путей"""
         return {
             'watch_directory': self.get('Paths', 'watch_directory'),
             'obsidian_vault_path': self.get('Paths', 'obsidian_vault_path'),
-            'transcript_cache_directory': self.get('Paths', 'transcript_cache_directory')
+            'transcript_cache_directory': self.get('Paths', 'transcript_cache_directory', fallback='.deepgram_cache'),
+            'job_store_path': self.get('Paths', 'job_store_path', fallback='.jobs.sqlite3'),
+            'analysis_cache_path': self.get('Paths', 'analysis_cache_path', fallback='.analysis_cache.sqlite3')
         }
     
     def get_api_config(self) -> Dict[str, str]:
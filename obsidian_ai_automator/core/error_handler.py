@@ -1,7 +1,7 @@
 """
 Модуль для централизованной обработки исключений
 """
-from typing import Type, Callable, Any
+from typing import Type, Callable, Any, Optional, Tuple
 import functools
 import logging
 from obsidian_ai_automator.core.logger import Logger
@@ -11,7 +11,22 @@ from obsidian_ai_automator.core.config import ConfigManager
 
 class ProcessingError(Exception):
     """Базовое исключение для ошибок обработки"""
-    pass
+    
+    def __init__(self, message: str = "", status_code: int = None, retry_after: float = None):
+        """
+        Args:
+            message: Описание ошибки
+            status_code: HTTP-статус ответа провайдера, если ошибка пришла от API
+            retry_after: Рекомендованная провайдером пауза перед повтором в секундах
+        """
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+    
+    @property
+    def is_overload(self) -> bool:
+        """Провайдер перегружен или ограничивает частоту запросов (429 или 5xx)"""
+        return self.status_code is not None and (self.status_code == 429 or self.status_code >= 500)
 
 
 class TranscriptionError(ProcessingError):
@@ -34,6 +49,33 @@ class ConfigError(ProcessingError):
     pass
 
 
+def extract_http_status(error: Exception) -> Tuple[Optional[int], Optional[float]]:
+    """
+    Извлекает HTTP-статус и заголовок Retry-After из исключения requests или aiohttp
+    
+    Args:
+        error: Исключение HTTP-клиента
+    
+    Returns:
+        Кортеж (статус, пауза в секундах), элементы равны None, если данных нет
+    """
+    response = getattr(error, 'response', None)
+    status_code = getattr(response, 'status_code', None) if response is not None else None
+    headers = getattr(response, 'headers', None) if response is not None else None
+    if status_code is None:
+        # aiohttp.ClientResponseError хранит статус и заголовки в самом исключении
+        status_code = getattr(error, 'status', None)
+        headers = getattr(error, 'headers', None)
+    
+    retry_after = None
+    if headers:
+        try:
+            retry_after = float(headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            retry_after = None
+    return status_code, retry_after
+
+
 def handle_exceptions(exception_mapping: dict = None):
     """
     Декоратор для централизованной обработки исключений
@@ -0,0 +1,78 @@
+"""
+Модуль с общим асинхронным HTTP-клиентом для обращения к API провайдеров
+"""
+import asyncio
+import weakref
+from typing import Any
+
+
+class AsyncHttpClient:
+    """
+    Общий пул соединений aiohttp для всех провайдеров
+
+    Сессия aiohttp привязана к циклу событий, поэтому для каждого цикла
+    создается своя сессия, которая переиспользуется всеми запросами
+    """
+
+    connection_limit: int = 100
+    _sessions: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def is_available() -> bool:
+        """Проверяет, установлена ли библиотека aiohttp"""
+        try:
+            import aiohttp  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    @classmethod
+    def configure(cls, connection_limit: int = 100):
+        """
+        Задает размер пула соединений для создаваемых сессий
+
+        Args:
+            connection_limit: Максимальное количество одновременных соединений (0 - без ограничений)
+        """
+        cls.connection_limit = connection_limit
+
+    @staticmethod
+    def request_timeout(seconds: float = None) -> Any:
+        """
+        Создает ограничение времени для одного запроса
+        
+        Args:
+            seconds: Общее время на запрос в секундах (None или 0 - без ограничений)
+        
+        Returns:
+            Экземпляр aiohttp.ClientTimeout
+        """
+        import aiohttp
+        
+        return aiohttp.ClientTimeout(total=seconds or None)
+    
+    @classmethod
+    async def get_session(cls) -> Any:
+        """
+        Возвращает общую сессию aiohttp для текущего цикла событий
+
+        Returns:
+            Экземпляр aiohttp.ClientSession
+        """
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        session = cls._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit=cls.connection_limit)
+            session = aiohttp.ClientSession(connector=connector)
+            cls._sessions[loop] = session
+        return session
+
+    @classmethod
+    async def close(cls):
+        """Закрывает сессию текущего цикла событий"""
+        loop = asyncio.get_running_loop()
+        session = cls._sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            await session.close()
@@ -1,16 +1,29 @@
 import os
 import sys
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple
 from obsidian_ai_automator.core.config import ConfigManager
 from obsidian_ai_automator.core.logger import Logger
 from obsidian_ai_automator.core.event_manager import EventManager
 from obsidian_ai_automator.storage.cache_manager import CacheManager
+from obsidian_ai_automator.storage.job_store import JobStore, JobState
+from obsidian_ai_automator.storage.fingerprint import compute_fingerprint
+from obsidian_ai_automator.storage.transcript_store import TranscriptStore
+from obsidian_ai_automator.storage.analysis_cache import AnalysisCache
 from obsidian_ai_automator.core.error_handler import ErrorHandler, TranscriptionError, AnalysisError, OutputError
 from obsidian_ai_automator.core.analytics import MetricsCollector
+from obsidian_ai_automator.core.scheduler import JobScheduler
+from obsidian_ai_automator.core.analysis_stream import AnalysisStreamTracker
 from obsidian_ai_automator.processing.transcription.deepgram_transcriber import DeepgramTranscriber
 from obsidian_ai_automator.processing.analysis.nvidia_analyzer import NvidiaAnalyzer
+from obsidian_ai_automator.processing.analysis.map_reduce_analyzer import MapReduceAnalyzer
+from obsidian_ai_automator.processing.analysis.cached_analyzer import CachedAnalyzer
+from obsidian_ai_automator.processing.analysis.prompt_manager import estimate_tokens
 from obsidian_ai_automator.processing.output.obsidian_formatter import ObsidianFormatter
+from obsidian_ai_automator.processing.transcription.audio_extractor import AudioExtractor
+from obsidian_ai_automator.processing.transcription.chunked_transcriber import ChunkedTranscriber
+from obsidian_ai_automator.processing.transcription.vad import VadTranscriber
+from obsidian_ai_automator.processing.transcription.transcript import Transcript, TimecodeGranularity
 
 
 class ProcessingOrchestrator:
@@ -23,8 +36,10 @@ class ProcessingOrchestrator:
         self.logger = Logger()
         self.event_manager = EventManager(self.config)
         self.cache_manager = CacheManager()
+        self.transcript_store = TranscriptStore(self.config.get_paths_config()['transcript_cache_directory'])
         self.error_handler = ErrorHandler(self.config)
         self.metrics_collector = MetricsCollector(self.config)
+        self.job_store = JobStore(self.config.get_paths_config()['job_store_path'])
         
         # Инициализируем логирование
         log_level = self.config.get('Logging', 'level', fallback='INFO')
@@ -35,41 +50,108 @@ class ProcessingOrchestrator:
         
         # Инициализируем компоненты в зависимости от конфигурации
         self._initialize_components()
+        
+        processing_config = self.config.get_processing_config()
+        self.max_job_attempts = processing_config['max_job_attempts']
+        # Режим отпечатка содержимого: ключ хранилища транскрипций и кэша дорожек
+        self.fingerprint_mode = processing_config['fingerprint_mode']
+        
+        # Ограничения времени стадий и задания целиком (0 - без ограничений); проверяются между стадиями
+        timeouts_config = self.config.get_timeouts_config()
+        self.transcription_timeout = timeouts_config['transcription_timeout']
+        self.analysis_timeout = timeouts_config['analysis_timeout']
+        self.job_timeout = timeouts_config['job_timeout']
+        
+        self.scheduler = JobScheduler(processing_config['scheduling_policy'],
+                                      processing_config['scheduler_window'],
+                                      processing_config['scheduling_cost'])
+    
+    def shutdown(self):
+        """Освобождает ресурсы компонентов (например, пул процессов локального Whisper)"""
+        self.transcriber.close()
     
     def _initialize_components(self):
         """Инициализирует компоненты на основе конфигурации"""
         processing_config = self.config.get_processing_config()
         
         # Инициализируем транскрибер
+        # Ограничение времени одного запроса к API провайдера (0 - без ограничений)
+        request_timeout = self.config.get_timeouts_config()['request_timeout'] or None
+        
         transcription_provider = processing_config['transcription_provider']
         if transcription_provider == 'deepgram':
-            self.transcriber = DeepgramTranscriber()
+            self.transcriber = DeepgramTranscriber(timeout=request_timeout)
         elif transcription_provider == 'openai':
             from obsidian_ai_automator.processing.transcription.openai_transcriber import OpenAITranscriber
-            self.transcriber = OpenAITranscriber()
+            self.transcriber = OpenAITranscriber(timeout=request_timeout)
         elif transcription_provider == 'whisper':
             from obsidian_ai_automator.processing.transcription.whisper_transcriber import WhisperTranscriber
-            self.transcriber = WhisperTranscriber()
+            self.transcriber = WhisperTranscriber(timeout=request_timeout)
         elif transcription_provider == 'ollama':
             from obsidian_ai_automator.processing.transcription.ollama_transcriber import OllamaTranscriber
-            self.transcriber = OllamaTranscriber()
+            self.transcriber = OllamaTranscriber(timeout=request_timeout)
         elif transcription_provider == 'local_whisper':
             from obsidian_ai_automator.processing.transcription.local_whisper_transcriber import LocalWhisperTranscriber
-            self.transcriber = LocalWhisperTranscriber()
+            local_whisper_config = self.config.get_local_whisper_config()
+            warmup = local_whisper_config.pop('warmup')
+            self.transcriber = LocalWhisperTranscriber(**local_whisper_config)
+            if warmup:
+                self.logger.info("Предварительно загружаем модель локального Whisper...")
+                try:
+                    self.transcriber.warmup()
+                except Exception as e:
+                    # Ошибка повторится и будет обработана при транскрибации первого файла
+                    self.logger.warning(f"Не удалось предварительно загрузить модель Whisper: {e}")
         else:
             raise ValueError(f"Неподдерживаемый провайдер транскрибации: {transcription_provider}")
         
+        # Тишина вырезается внутри каждой части, чтобы декодированная запись не занимала много памяти
+        vad_config = self.config.get_vad_config()
+        if vad_config.pop('enabled'):
+            self.transcriber = VadTranscriber(self.transcriber, metrics_collector=self.metrics_collector, **vad_config)
+        
+        # Длинные записи транскрибируются по частям параллельно
+        chunking_config = self.config.get_chunking_config()
+        if chunking_config.pop('enabled'):
+            self.transcriber = ChunkedTranscriber(self.transcriber, **chunking_config)
+        
         # Инициализируем анализатор
         analysis_provider = processing_config['analysis_provider']
         if analysis_provider == 'nvidia':
             # Не передаем API-ключи сразу, они будут загружены по необходимости
-            self.analyzer = NvidiaAnalyzer()
+            self.analyzer = NvidiaAnalyzer(timeout=request_timeout)
         elif analysis_provider == 'openai':
             from obsidian_ai_automator.processing.analysis.openai_analyzer import OpenAIAnalyzer
-            self.analyzer = OpenAIAnalyzer()
+            self.analyzer = OpenAIAnalyzer(timeout=request_timeout)
         else:
             raise ValueError(f"Неподдерживаемый провайдер анализа: {analysis_provider}")
         
+        # Транскрипции, не помещающиеся в один запрос, анализируются по частям
+        map_reduce_config = self.config.get_map_reduce_config()
+        if map_reduce_config.pop('enabled'):
+            self.analyzer = MapReduceAnalyzer(self.analyzer, **map_reduce_config)
+        
+        # Результат для той же транскрипции, промпта и параметров модели берется из кэша без запроса к модели
+        analysis_cache_config = self.config.get_analysis_cache_config()
+        if analysis_cache_config.pop('enabled'):
+            self.analysis_cache = AnalysisCache(self.config.get_paths_config()['analysis_cache_path'],
+                                                **analysis_cache_config)
+            self.analyzer = CachedAnalyzer(self.analyzer, self.analysis_cache,
+                                           metrics_collector=self.metrics_collector)
+        
+        # Детализация тайм-кодов в транскрипции для анализа (в заметку попадают тайм-коды всех слов)
+        self.analysis_timecodes = self.config.get_analysis_timecodes_config()
+        self.analysis_timecodes['granularity'] = TimecodeGranularity.normalize(self.analysis_timecodes['granularity'])
+        
+        # Потоковый анализ: заметка пишется по мере генерации ответа
+        streaming_config = self.config.get_streaming_config()
+        self.streaming = streaming_config['enabled']
+        self.streaming_progress_interval = streaming_config['progress_interval']
+        
+        # Извлечение аудиодорожки перед отправкой файла провайдеру
+        audio_config = self.config.get_audio_preprocessing_config()
+        self.audio_extractor = AudioExtractor(**audio_config) if audio_config.pop('enabled') else None
+        
         # Инициализируем форматтер
         output_format = processing_config['output_format']
         if output_format == 'obsidian':
@@ -90,26 +172,144 @@ class ProcessingOrchestrator:
         start_time = time.time()
         self.logger.info(f"Начало обработки файла: {file_path}")
         
+        job = self.job_store.enqueue(file_path)
+        if job['state'] == JobState.WRITTEN:
+            self.logger.info(f"Файл уже обработан ранее: {file_path} -> {job['output_path']}")
+            return job['output_path']
+        self.job_store.start_attempt(file_path)
+        
+        # Продолжаем с последней завершенной стадии задания
+        transcript = job['transcript']
+        if transcript is None:
+            stage_start = time.time()
+            transcript = self._run_transcription_stage(file_path)
+            if transcript is None:
+                self.job_store.mark_failed(file_path, "Ошибка на стадии транскрибации")
+                return None
+            self.job_store.mark_transcribed(file_path, transcript.to_dict())
+            if self._is_timed_out(file_path, "транскрибации", start_time, stage_start, self.transcription_timeout):
+                return None
+        else:
+            self.logger.info(f"Возобновляем задание после транскрибации: {file_path}")
+            transcript = Transcript.from_cached(transcript)
+        
+        analysis_result = job['analysis']
+        if analysis_result is None and self.streaming:
+            # Анализ и сохранение выполняются одной стадией: ответ дописывается в заметку по мере генерации
+            streamed = self._run_streaming_stage(file_path, transcript, start_time)
+            if streamed is None:
+                self.job_store.mark_failed(file_path, "Ошибка на стадии анализа")
+                return None
+            analysis_result, output_path = streamed
+            self.job_store.mark_analyzed(file_path, analysis_result)
+            self.job_store.mark_written(file_path, output_path)
+            return output_path
+        
+        if analysis_result is None:
+            stage_start = time.time()
+            analysis_result = self._run_analysis_stage(transcript)
+            if analysis_result is None:
+                self.job_store.mark_failed(file_path, "Ошибка на стадии анализа")
+                return None
+            self.job_store.mark_analyzed(file_path, analysis_result)
+            if self._is_timed_out(file_path, "анализа", start_time, stage_start, self.analysis_timeout):
+                return None
+        else:
+            self.logger.info(f"Возобновляем задание после анализа: {file_path}")
+        
+        output_path = self._run_output_stage(file_path, transcript, analysis_result, start_time)
+        if output_path is None:
+            self.job_store.mark_failed(file_path, "Ошибка на стадии сохранения")
+            return None
+        
+        self.job_store.mark_written(file_path, output_path)
+        return output_path
+    
+    def _is_timed_out(self, file_path: str, stage_name: str, job_start: float, stage_start: float,
+                      stage_timeout: float) -> bool:
+        """
+        Проверяет ограничения времени после завершения стадии
+        
+        Синхронная стадия не прерывается, поэтому ограничения проверяются между стадиями:
+        результат завершенной стадии уже сохранен, а задание помечается как timed_out
+        и при следующем запуске возобновляется со следующей стадии. Стадия сохранения
+        не проверяется - после нее задание завершено
+        
+        Args:
+            file_path: Путь к файлу задания
+            stage_name: Название стадии для сообщения об ошибке
+            job_start: Время начала обработки файла
+            stage_start: Время начала стадии
+            stage_timeout: Ограничение времени стадии в секундах (0 - без ограничений)
+            
+        Returns:
+            True, если ограничение превышено и обработку нужно прекратить
+        """
+        now = time.time()
+        stage_expired = stage_timeout > 0 and now - stage_start > stage_timeout
+        job_expired = self.job_timeout > 0 and now - job_start > self.job_timeout
+        if not stage_expired and not job_expired:
+            return False
+        
+        message = f"Превышено время ожидания на стадии {stage_name}"
+        self.logger.error(f"{message}: {file_path}")
+        self.event_manager.emit("processing_error", f"{message}: {file_path}")
+        self.metrics_collector.record_error("TimeoutError", f"{message}: {file_path}")
+        self.job_store.mark_timed_out(file_path, message)
+        return True
+    
+    def _prepare_audio(self, file_path: str, content_hash: str) -> str:
+        """
+        Извлекает компактную аудиодорожку для провайдеров, отправляющих файл по сети
+        
+        Args:
+            file_path: Путь к исходному файлу
+            content_hash: Хэш содержимого файла (ключ кэша дорожек)
+            
+        Returns:
+            Путь к файлу для отправки провайдеру
+        """
+        if self.audio_extractor is None or not self.transcriber.uploads_media:
+            return file_path
+        
+        try:
+            return self.audio_extractor.prepare(file_path, content_hash)
+        except Exception as e:
+            self.logger.warning(f"Не удалось извлечь аудио из {file_path}, отправляем исходный файл: {e}")
+            return file_path
+    
+    def _run_transcription_stage(self, file_path: str) -> Optional[Transcript]:
+        """
+        Стадия транскрибации: возвращает транскрипцию из хранилища или от провайдера
+        
+        Args:
+            file_path: Путь к файлу для обработки
+            
+        Returns:
+            Структурированная транскрипция или None в случае ошибки
+        """
         # Проверяем, существует ли файл
         if not os.path.exists(file_path):
             self.logger.error(f"Файл не найден: {file_path}")
             self.metrics_collector.record_error("FileNotFound", f"Файл не найден: {file_path}")
             return None
         
-        # Генерируем ключ для кэша на основе пути к файлу и его содержимого
-        cache_key = f"transcript_{file_path}_{os.path.getmtime(file_path)}"
+        # Ключ хранилища транскрипций строится по содержимому, поэтому копия, перемещенный
+        # или переименованный файл и пересохранение с новым mtime используют уже полученную транскрипцию
+        content_hash = compute_fingerprint(file_path, self.fingerprint_mode)
         
-        # Проверяем, есть ли транскрипция в кэше
-        cached_transcript = self.cache_manager.get(cache_key)
-        if cached_transcript:
-            self.logger.info(f"Используем кэшированную транскрипцию для файла: {file_path}")
-            transcript = cached_transcript
+        # Проверяем, есть ли транскрипция этого содержимого с теми же параметрами в хранилище
+        identity = self.transcriber.cache_identity()
+        transcript = self.transcript_store.get(content_hash, identity)
+        if transcript:
+            self.logger.info(f"Используем сохраненную транскрипцию для файла: {file_path}")
         else:
             # Выполняем транскрибацию
             self.logger.info("Выполняем транскрибацию файла...")
             transcription_start = time.time()
             try:
-                transcript = self.transcriber.get_transcription_with_timecodes(file_path)
+                audio_path = self._prepare_audio(file_path, content_hash)
+                transcript = self.transcriber.get_transcript(audio_path)
                 transcription_time = time.time() - transcription_start
                 
                 # Записываем метрики транскрибации
@@ -132,22 +332,56 @@ class ProcessingOrchestrator:
                 self.metrics_collector.record_error("TranscriptionError", "Транскрипция не удалась или вернула пустой результат")
                 return None
             
-            # Сохраняем в кэш на 24 часа
-            self.cache_manager.set(cache_key, transcript, ttl=86400)
+            # Сохраняем структурированную транскрипцию без срока хранения: любые текстовые
+            # представления строятся из нее без повторной отправки файла
+            self.transcript_store.put(content_hash, identity, transcript, source_path=file_path)
+        
+        return transcript
+    
+    def _prepare_analysis_input(self, transcript: Transcript) -> str:
+        """
+        Строит текст транскрипции для анализа с настроенной детализацией тайм-кодов
+        
+        Args:
+            transcript: Структурированная транскрипция
+            
+        Returns:
+            Текст для промпта
+        """
+        granularity = self.analysis_timecodes['granularity']
+        analysis_input = transcript.render_timecoded(granularity, self.analysis_timecodes['interval_seconds'])
+        full_tokens = estimate_tokens(transcript.timecoded_text)
+        input_tokens = estimate_tokens(analysis_input)
+        self.metrics_collector.record_analysis_input(granularity, full_tokens, input_tokens)
+        self.logger.info(f"Транскрипция для анализа (тайм-коды: {granularity}): "
+                         f"~{input_tokens} токенов вместо ~{full_tokens}")
+        return analysis_input
+    
+    def _run_analysis_stage(self, transcript: Transcript) -> Optional[Dict[str, Any]]:
+        """
+        Стадия анализа транскрипции
+        
+        Args:
+            transcript: Структурированная транскрипция
+            
+        Returns:
+            Словарь с результатом анализа и тегами или None в случае ошибки
+        """
+        analysis_input = self._prepare_analysis_input(transcript)
         
         # Выполняем анализ
         self.logger.info("Выполняем анализ транскрипции...")
         analysis_start = time.time()
         try:
-            analysis_result = self.analyzer.get_analysis_with_tags(transcript)
+            analysis_result = self.analyzer.get_analysis_with_tags(analysis_input)
             analysis_time = time.time() - analysis_start
             
             # Записываем метрики анализа
             self.metrics_collector.record_api_call("nvidia", duration=analysis_time,
-                                                  additional_data={"tokens": len(transcript)})
+                                                  additional_data={"tokens": estimate_tokens(analysis_input)})
             self.metrics_collector.metrics["total_analysis_time"] += analysis_time
         except AnalysisError as e:
-            self.error_handler.handle_analysis_error(e, transcript)
+            self.error_handler.handle_analysis_error(e, analysis_input)
             self.event_manager.emit("processing_error", str(e))
             self.metrics_collector.record_error("AnalysisError", str(e))
             return None
@@ -157,13 +391,109 @@ class ProcessingOrchestrator:
             self.metrics_collector.record_error("AnalysisError", str(e))
             return None
         
-        # Подготавливаем контент для форматирования
-        content = {
+        return analysis_result
+    
+    def _build_note_content(self, file_path: str, transcript: Transcript, tags: List[str],
+                            analysis: str = '') -> Dict[str, Any]:
+        """Подготавливает контент заметки для форматирования"""
+        return {
             'title': f"Анализ: {os.path.basename(file_path)}",
-            'tags': analysis_result['tags'],
-            'analysis': analysis_result['analysis'],
-            'transcript': transcript
+            'tags': tags,
+            'analysis': analysis,
+            'transcript': transcript.timecoded_text
         }
+    
+    def _get_output_file_path(self, file_path: str) -> str:
+        """Возвращает путь к заметке для исходного файла в хранилище Obsidian"""
+        paths_config = self.config.get_paths_config()
+        obsidian_vault_path = os.path.expanduser(paths_config['obsidian_vault_path'])
+        
+        # Создаем безопасное имя файла
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        safe_filename = f"{base_name}.md"
+        return os.path.join(obsidian_vault_path, safe_filename)
+    
+    def _run_streaming_stage(self, file_path: str, transcript: Transcript,
+                             start_time: float) -> Optional[Tuple[Dict[str, Any], str]]:
+        """
+        Стадия потокового анализа с постепенной записью заметки
+        
+        Заметка пишется во временный файл, который заменяет итоговый только после
+        полного ответа модели; при ошибке временный файл удаляется
+        
+        Args:
+            file_path: Путь к исходному файлу
+            transcript: Структурированная транскрипция
+            start_time: Время начала обработки файла
+            
+        Returns:
+            Результат анализа с тегами и путь к созданному файлу или None в случае ошибки
+        """
+        analysis_input = self._prepare_analysis_input(transcript)
+        tags = self.analyzer.build_tags()
+        content = self._build_note_content(file_path, transcript, tags)
+        writer = self.formatter.open_note_writer(self._get_output_file_path(file_path))
+        tracker = AnalysisStreamTracker(self.event_manager, writer, file_path, self.streaming_progress_interval)
+        
+        self.logger.info(f"Выполняем потоковый анализ транскрипции с записью в: {writer.file_path}")
+        try:
+            with writer:
+                writer.write(self.formatter.format_header(content))
+                tracker.start()
+                for delta in self.analyzer.stream_analysis(analysis_input):
+                    tracker.on_delta(delta)
+                analysis = tracker.finish()
+                writer.write(self.formatter.format_footer(content))
+                output_file_path = writer.commit()
+        except AnalysisError as e:
+            self.error_handler.handle_analysis_error(e, analysis_input)
+            self.event_manager.emit("processing_error", str(e))
+            self.metrics_collector.record_error("AnalysisError", str(e))
+            return None
+        except OutputError as e:
+            self.error_handler.handle_output_error(e, writer.file_path)
+            self.event_manager.emit("processing_error", str(e))
+            self.metrics_collector.record_error("OutputError", str(e))
+            return None
+        except Exception as e:
+            self.logger.error(f"Неожиданная ошибка при потоковом анализе: {e}")
+            self.event_manager.emit("processing_error", str(e))
+            self.metrics_collector.record_error("AnalysisError", str(e))
+            return None
+        
+        # Записываем метрики анализа
+        self.metrics_collector.record_api_call("nvidia", duration=tracker.total_time,
+                                              additional_data={"tokens": estimate_tokens(analysis_input)})
+        self.metrics_collector.metrics["total_analysis_time"] += tracker.total_time
+        self.metrics_collector.record_analysis_latency(tracker.time_to_first_token, tracker.total_time)
+        
+        self.logger.info(f"Файл успешно создан: {output_file_path}")
+        self.event_manager.emit("file_processed", output_file_path)
+        
+        # Фиксируем успешную обработку файла
+        processing_time = time.time() - start_time
+        self.metrics_collector.record_file_processed(file_path, processing_time)
+        self.metrics_collector.save_metrics()
+        
+        return {"analysis": analysis, "tags": tags}, output_file_path
+    
+    def _run_output_stage(self, file_path: str, transcript: Transcript, analysis_result: Dict[str, Any],
+                          start_time: float) -> Optional[str]:
+        """
+        Стадия форматирования и сохранения заметки
+        
+        Args:
+            file_path: Путь к исходному файлу
+            transcript: Структурированная транскрипция (в заметку попадают тайм-коды всех слов)
+            analysis_result: Результат анализа с тегами
+            start_time: Время начала обработки файла
+            
+        Returns:
+            Путь к созданному файлу или None в случае ошибки
+        """
+        # Подготавливаем контент для форматирования
+        content = self._build_note_content(file_path, transcript, analysis_result['tags'],
+                                           analysis_result['analysis'])
         
         # Форматируем контент
         self.logger.info("Форматируем контент для Obsidian...")
@@ -181,13 +511,7 @@ class ProcessingOrchestrator:
             return None
         
         # Определяем путь для сохранения
-        paths_config = self.config.get_paths_config()
-        obsidian_vault_path = os.path.expanduser(paths_config['obsidian_vault_path'])
-        
-        # Создаем безопасное имя файла
-        base_name = os.path.splitext(os.path.basename(file_path))[0]
-        safe_filename = f"{base_name}.md"
-        output_file_path = os.path.join(obsidian_vault_path, safe_filename)
+        output_file_path = self._get_output_file_path(file_path)
         
         # Сохраняем файл
         self.logger.info(f"Сохраняем файл в: {output_file_path}")
@@ -227,10 +551,28 @@ class ProcessingOrchestrator:
         Returns:
             Список путей к созданным файлам
         """
-        results = []
+        # Генератор путей обходится дважды: при регистрации и при планировании порядка
+        file_paths = list(file_paths)
+        
+        # Сначала регистрируем все файлы, чтобы после перезапуска пакет можно было возобновить
         for file_path in file_paths:
+            self.job_store.enqueue(file_path)
+        
+        results = []
+        for file_path in self.scheduler.order(file_paths):
             result = self.process_file(file_path)
             if result:
                 results.append(result)
         
-        return results
\ No newline at end of file
+        return results
+    
+    def process_pending_jobs(self) -> List[str]:
+        """
+        Возобновляет незавершенные задания из очереди, например после перезапуска
+        
+        Returns:
+            Список путей к созданным файлам
+        """
+        pending_files = self.job_store.get_pending(self.max_job_attempts)
+        self.logger.info(f"Незавершенных заданий в очереди: {len(pending_files)}")
+        return self.process_multiple_files(pending_files)
\ No newline at end of file
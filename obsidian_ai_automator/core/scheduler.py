@@ -0,0 +1,126 @@
+"""
+Модуль для планирования порядка обработки файлов в пакете
+"""
+import bisect
+import json
+import os
+import shutil
+import subprocess
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from obsidian_ai_automator.core.logger import Logger
+
+
+class SchedulingPolicy:
+    """
+    Доступные политики планирования
+    """
+    FIFO = 'fifo'  # В порядке поступления
+    SJF = 'sjf'    # Сначала короткие задания
+    FAIR = 'fair'  # Короткие задания с периодическим пропуском длинных вперед
+
+    ALL = (FIFO, SJF, FAIR)
+
+
+def probe_media_duration(file_path: str) -> Optional[float]:
+    """
+    Определяет длительность медиафайла с помощью ffprobe
+
+    Args:
+        file_path: Путь к медиафайлу
+
+    Returns:
+        Длительность в секундах или None, если определить не удалось
+    """
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "json", file_path],
+            capture_output=True, text=True, timeout=30)
+        return float(json.loads(result.stdout)["format"]["duration"])
+    except (OSError, subprocess.SubprocessError, ValueError, KeyError, TypeError):
+        return None
+
+
+class JobScheduler:
+    """
+    Упорядочивает поток файлов согласно политике планирования
+
+    Работает со скользящим окном: из итератора читается не более window файлов,
+    и следующий файл выбирается среди них, поэтому потоковый обход папки
+    не разворачивается целиком, а память остается ограниченной
+    """
+
+    def __init__(self, policy: str = SchedulingPolicy.FIFO, window: int = 64, cost_metric: str = 'duration',
+                 fair_long_every: int = 4, cost_function: Callable[[str], float] = None):
+        """
+        Args:
+            policy: Политика планирования (fifo, sjf, fair)
+            window: Количество файлов, среди которых выбирается следующий
+            cost_metric: Оценка стоимости задания: duration (через ffprobe) или size
+            fair_long_every: В режиме fair каждый N-й выбор отдается самому длинному заданию
+            cost_function: Собственная функция оценки стоимости (путь -> число)
+        """
+        self.logger = Logger()
+        if policy not in SchedulingPolicy.ALL:
+            self.logger.warning(f"Неизвестная политика планирования '{policy}', используется fifo")
+            policy = SchedulingPolicy.FIFO
+        self.policy = policy
+        self.window = max(1, window)
+        self.fair_long_every = max(2, fair_long_every)
+
+        if cost_function is not None:
+            self.cost_function = cost_function
+        elif cost_metric == 'duration' and shutil.which("ffprobe"):
+            self.cost_function = self._duration_cost
+        else:
+            self.cost_function = self._size_cost
+
+    @staticmethod
+    def _size_cost(file_path: str) -> float:
+        """Оценивает стоимость задания по размеру файла"""
+        try:
+            return float(os.path.getsize(file_path))
+        except OSError:
+            return 0.0
+
+    def _duration_cost(self, file_path: str) -> float:
+        """Оценивает стоимость задания по длительности медиа, при ошибке - по размеру файла"""
+        duration = probe_media_duration(file_path)
+        if duration is None:
+            # Размер в байтах несравним с секундами, поэтому приводим его к грубой оценке
+            # длительности при битрейте около 1 Мбит/с
+            return self._size_cost(file_path) / 125000
+        return duration
+
+    def order(self, file_paths: Iterable[str]) -> Iterator[str]:
+        """
+        Возвращает файлы в порядке обработки
+
+        Args:
+            file_paths: Пути к файлам (список или генератор)
+
+        Yields:
+            Пути к файлам в порядке, заданном политикой
+        """
+        if self.policy == SchedulingPolicy.FIFO:
+            yield from file_paths
+            return
+
+        # Окно хранится отсортированным по стоимости; счетчик сохраняет порядок поступления при равной стоимости
+        window: List[Tuple[float, int, str]] = []
+        picks = 0
+        for sequence, file_path in enumerate(file_paths):
+            bisect.insort(window, (self.cost_function(file_path), sequence, file_path))
+            if len(window) >= self.window:
+                yield self._pick(window, picks)
+                picks += 1
+
+        while window:
+            yield self._pick(window, picks)
+            picks += 1
+
+    def _pick(self, window: List[Tuple[float, int, str]], picks: int) -> str:
+        """Извлекает из окна следующий файл согласно политике"""
+        if self.policy == SchedulingPolicy.FAIR and picks % self.fair_long_every == self.fair_long_every - 1:
+            # Длинное задание занимает один слот, пока остальные обрабатывают короткие
+            return window.pop()[2]
+        return window.pop(0)[2]
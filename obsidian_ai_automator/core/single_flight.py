@@ -0,0 +1,63 @@
+"""
+Модуль для объединения одинаковых одновременных операций
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class FlightCancelledError(Exception):
+    """Ведущая операция была отменена до завершения; ожидающие вызовы могут повторить ее"""
+    pass
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные вызовы с одинаковым ключом в одну операцию
+
+    Первый вызов выполняет операцию, а последующие вызовы с тем же ключом,
+    пришедшие до ее завершения, получают тот же результат или то же исключение
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    def is_in_flight(self, key: Hashable) -> bool:
+        """Проверяет, выполняется ли сейчас операция с указанным ключом"""
+        return key in self._in_flight
+
+    async def run(self, key: Hashable, operation: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет операцию или присоединяется к уже выполняющейся с тем же ключом
+
+        Args:
+            key: Ключ операции (например, хэш содержимого файла)
+            operation: Функция без аргументов, возвращающая корутину
+
+        Returns:
+            Результат операции
+        """
+        future = self._in_flight.get(key)
+        if future is not None:
+            # Отмена ожидающего вызова не должна отменять общую операцию
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await operation()
+        except asyncio.CancelledError:
+            # Отмена касается только ведущего вызова (например, по истечении его времени),
+            # поэтому ожидающим передается обычное исключение, а не отмена
+            future.set_exception(FlightCancelledError(f"Операция {key} была отменена"))
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Исключение уже получено ведущим вызовом, помечаем его обработанным для случая без ожидающих
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._in_flight[key]
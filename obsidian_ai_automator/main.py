@@ -7,28 +7,51 @@ import os
 import asyncio
 from obsidian_ai_automator.core.orchestrator import ProcessingOrchestrator
 from obsidian_ai_automator.core.async_orchestrator import AsyncProcessingOrchestrator
+from obsidian_ai_automator.monitoring.file_scanner import iter_media_files
 
 
 def main():
     if len(sys.argv) < 2:
         print("Usage: python main.py <path_to_video_or_transcript_file>")
+        print("       python main.py --resume")
+        print("       python main.py --watch [<directory>]")
         sys.exit(1)
     
     input_path = sys.argv[1]
     
+    if input_path == "--watch":
+        # Долгоживущий режим: один прогретый оркестратор обрабатывает новые файлы из папки
+        from obsidian_ai_automator.monitoring.watch_daemon import run_daemon
+        run_daemon(watch_directory=sys.argv[2] if len(sys.argv) > 2 else None)
+        return
+    
+    if input_path == "--resume":
+        # Возобновляем незавершенные задания из очереди после перезапуска
+        async def process_pending():
+            orchestrator = AsyncProcessingOrchestrator()
+            try:
+                return await orchestrator.process_pending_jobs_async()
+            finally:
+                await orchestrator.aclose()
+        
+        results = asyncio.run(process_pending())
+        print(f"Обработано файлов: {len(results)}")
+        for result in results:
+            print(f"Создан файл: {result}")
+        return
+    
     # Проверяем, является ли input_path директорией
     if os.path.isdir(input_path):
-        # Если это директория, обрабатываем все файлы в ней
-        file_paths = []
-        for root, dirs, files in os.walk(input_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                file_paths.append(file_path)
-        
-        # Используем асинхронный оркестратор для параллельной обработки
+        # Если это директория, обрабатываем подходящие файлы по мере обхода
         async def process_multiple():
             orchestrator = AsyncProcessingOrchestrator()
-            results = await orchestrator.process_multiple_files_async(file_paths)
+            try:
+                allowed_extensions = orchestrator.config.get_allowed_extensions()
+                file_paths = iter_media_files(input_path, allowed_extensions)
+                # Используем асинхронный оркестратор для параллельной обработки
+                results = await orchestrator.process_multiple_files_async(file_paths)
+            finally:
+                await orchestrator.aclose()
             return results
         
         results = asyncio.run(process_multiple())
@@ -39,7 +62,10 @@ def main():
     else:
         # Если это отдельный файл, обрабатываем его синхронно
         orchestrator = ProcessingOrchestrator()
-        result = orchestrator.process_file(input_path)
+        try:
+            result = orchestrator.process_file(input_path)
+        finally:
+            orchestrator.shutdown()
         
         if result:
             print(f"Файл успешно создан: {result}")
@@ -0,0 +1,58 @@
+"""
+Модуль для потокового обхода папок с медиафайлами
+"""
+import os
+from typing import Iterator, List
+
+
+def is_allowed_file(file_name: str, allowed_extensions: List[str]) -> bool:
+    """
+    Проверяет, подлежит ли файл обработке
+
+    Скрытые файлы и заметки .md пропускаются всегда
+
+    Args:
+        file_name: Имя или путь файла
+        allowed_extensions: Разрешенные расширения в нижнем регистре (пустой список - без ограничений)
+
+    Returns:
+        True если файл нужно обработать
+    """
+    base_name = os.path.basename(file_name)
+    if base_name.startswith('.'):
+        return False
+
+    file_extension = os.path.splitext(base_name)[1].lower()
+    if file_extension == '.md':
+        return False
+    return not allowed_extensions or file_extension in allowed_extensions
+
+
+def iter_media_files(directory: str, allowed_extensions: List[str], recursive: bool = True) -> Iterator[str]:
+    """
+    Лениво обходит папку через os.scandir и возвращает пути подходящих файлов
+
+    Список файлов не строится целиком, поэтому память не зависит от размера папки,
+    а обработка первых файлов начинается сразу
+
+    Args:
+        directory: Папка для обхода
+        allowed_extensions: Разрешенные расширения в нижнем регистре
+        recursive: Обходить ли вложенные папки
+
+    Yields:
+        Пути к файлам для обработки
+    """
+    pending_directories = [directory]
+    while pending_directories:
+        current_directory = pending_directories.pop()
+        try:
+            with os.scandir(current_directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and not entry.name.startswith('.'):
+                            pending_directories.append(entry.path)
+                    elif entry.is_file() and is_allowed_file(entry.name, allowed_extensions):
+                        yield entry.path
+        except OSError:
+            continue  # Папка недоступна или удалена во время обхода
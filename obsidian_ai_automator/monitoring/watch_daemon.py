@@ -0,0 +1,211 @@
+"""
+Долгоживущий демон мониторинга папки с обработкой файлов внутри процесса
+"""
+import asyncio
+import os
+import signal
+import threading
+from concurrent.futures import CancelledError, Future
+from typing import Optional, Set
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+from obsidian_ai_automator.core.async_orchestrator import AsyncProcessingOrchestrator
+from obsidian_ai_automator.core.logger import Logger
+from obsidian_ai_automator.monitoring.file_scanner import is_allowed_file
+
+
+class DaemonEventHandler(FileSystemEventHandler):
+    """
+    Передает события файловой системы в очередь демона
+    """
+
+    def __init__(self, daemon: 'WatchDaemon'):
+        super().__init__()
+        self.daemon = daemon
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.daemon.submit(event.src_path)
+
+    def on_moved(self, event):
+        # Файлы, перемещенные в папку (например, Syncthing после докачки), тоже обрабатываем
+        if not event.is_directory:
+            self.daemon.submit(event.dest_path)
+
+
+class WatchDaemon:
+    """
+    Демон, который держит один прогретый AsyncProcessingOrchestrator и передает
+    новые файлы в ограниченную очередь внутри процесса вместо запуска
+    отдельного процесса на каждый файл. Модели и HTTP-сессии загружаются один раз.
+    """
+
+    def __init__(self, config_file_path: str = "config.ini", watch_directory: str = None):
+        self.orchestrator = AsyncProcessingOrchestrator(config_file_path)
+        self.config = self.orchestrator.config
+        self.logger = Logger()
+
+        paths_config = self.config.get_paths_config()
+        self.watch_directory = os.path.expanduser(watch_directory or paths_config['watch_directory'])
+
+        monitoring_config = self.config.get_monitoring_config()
+        self.workers = max(1, monitoring_config['daemon_workers'])
+        self.queue_size = max(1, monitoring_config['daemon_queue_size'])
+        self.file_settle_seconds = monitoring_config['file_settle_seconds']
+        self.delete_source_after_processing = monitoring_config['delete_source_after_processing']
+
+        self.allowed_extensions = self.config.get_allowed_extensions()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        # Файлы в очереди или в обработке, чтобы повторные события не дублировали задания
+        self._active_files: Set[str] = set()
+        # Постановки в очередь, которые ждет поток наблюдателя; при остановке они отменяются
+        self._pending_submits: Set[Future] = set()
+        self._submit_lock = threading.Lock()
+
+    def _is_allowed(self, file_path: str) -> bool:
+        """Проверяет расширение файла по списку разрешенных"""
+        if not is_allowed_file(file_path, self.allowed_extensions):
+            file_extension = os.path.splitext(file_path)[1].lower()
+            self.logger.info(f"Файл {file_path} имеет неподдерживаемое расширение ({file_extension}). Пропускаю.")
+            return False
+        return True
+
+    def submit(self, file_path: str):
+        """
+        Ставит файл в очередь обработки; вызывается из потока watchdog
+
+        Если очередь заполнена, поток наблюдателя ждет освобождения места,
+        а события накапливаются в буфере inotify. При остановке демона
+        ожидание отменяется, чтобы поток наблюдателя мог завершиться
+        """
+        if not self._is_allowed(file_path):
+            return
+
+        with self._submit_lock:
+            if self._loop is None:
+                return
+            self.logger.info(f"Обнаружен новый файл: {file_path}")
+            future = asyncio.run_coroutine_threadsafe(self._enqueue(file_path), self._loop)
+            self._pending_submits.add(future)
+        try:
+            future.result()
+        except CancelledError:
+            self.logger.info(f"Демон останавливается, файл не поставлен в очередь: {file_path}")
+        except Exception as e:
+            self.logger.error(f"Ошибка при постановке файла {file_path} в очередь: {e}")
+        finally:
+            with self._submit_lock:
+                self._pending_submits.discard(future)
+
+    def _cancel_pending_submits(self):
+        """Запрещает новые постановки в очередь и отменяет ожидающие места в очереди"""
+        with self._submit_lock:
+            self._loop = None
+            pending = list(self._pending_submits)
+        for future in pending:
+            future.cancel()
+
+    async def _enqueue(self, file_path: str):
+        """Добавляет файл в очередь, если он еще не ожидает обработки"""
+        if file_path in self._active_files:
+            return
+        self._active_files.add(file_path)
+        try:
+            await self._queue.put(file_path)
+        except asyncio.CancelledError:
+            self._active_files.discard(file_path)
+            raise
+
+    async def _wait_until_stable(self, file_path: str) -> bool:
+        """
+        Ждет, пока файл перестанет изменяться (копирование завершено)
+
+        Returns:
+            True если файл существует и его размер стабилен
+        """
+        previous_size = -1
+        while os.path.exists(file_path):
+            current_size = os.path.getsize(file_path)
+            if current_size == previous_size:
+                return True
+            previous_size = current_size
+            await asyncio.sleep(self.file_settle_seconds)
+        return False
+
+    async def _worker(self):
+        """Обрабатывает файлы из очереди прогретым оркестратором"""
+        while True:
+            file_path = await self._queue.get()
+            try:
+                if not await self._wait_until_stable(file_path):
+                    self.logger.warning(f"Файл исчез до начала обработки: {file_path}")
+                    continue
+
+                result = await self.orchestrator.process_file_async(file_path)
+                if result and self.delete_source_after_processing:
+                    os.remove(file_path)
+                    self.logger.info(f"Исходный файл успешно удален: {file_path}")
+            except Exception as e:
+                self.logger.error(f"Ошибка при обработке файла {file_path}: {e}")
+            finally:
+                self._active_files.discard(file_path)
+                self._queue.task_done()
+
+    async def run(self):
+        """
+        Запускает наблюдение за папкой и воркеры до получения SIGINT/SIGTERM
+        """
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._stop_event = asyncio.Event()
+
+        for stop_signal in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self._loop.add_signal_handler(stop_signal, self._stop_event.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # Обработчики сигналов недоступны (не главный поток или Windows)
+
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+        # Возобновляем задания, прерванные предыдущим запуском
+        for file_path in self.orchestrator.job_store.get_pending(self.orchestrator.max_job_attempts):
+            if os.path.exists(file_path) and self._is_allowed(file_path):
+                await self._enqueue(file_path)
+
+        observer = Observer()
+        observer.schedule(DaemonEventHandler(self), self.watch_directory, recursive=False)
+        observer.start()
+        self.logger.info(f"Демон запущен: мониторинг папки {self.watch_directory}, воркеров: {self.workers}")
+
+        try:
+            await self._stop_event.wait()
+        finally:
+            self.logger.info("Остановка демона...")
+            # Поток наблюдателя может ждать места в заполненной очереди: отменяем ожидание
+            # и воркеры до остановки наблюдателя, иначе join() не дождется его завершения
+            self._cancel_pending_submits()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await asyncio.to_thread(self._stop_observer, observer)
+            await self.orchestrator.aclose()
+            self.logger.info("Мониторинг остановлен.")
+
+    def _stop_observer(self, observer: Observer):
+        """Останавливает поток наблюдателя watchdog"""
+        observer.stop()
+        observer.join()
+
+    def stop(self):
+        """Запрашивает остановку демона (потокобезопасно)"""
+        loop = self._loop
+        if loop is not None and self._stop_event is not None:
+            loop.call_soon_threadsafe(self._stop_event.set)
+
+
+def run_daemon(config_file_path: str = "config.ini", watch_directory: str = None):
+    """Запускает демон мониторинга в текущем процессе"""
+    asyncio.run(WatchDaemon(config_file_path, watch_directory).run())
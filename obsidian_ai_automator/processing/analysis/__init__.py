@@ -4,9 +4,13 @@
 from .base_analyzer import BaseAnalyzer
 from .nvidia_analyzer import NvidiaAnalyzer
 from .openai_analyzer import OpenAIAnalyzer
+from .map_reduce_analyzer import MapReduceAnalyzer
+from .cached_analyzer import CachedAnalyzer
 
 __all__ = [
     'BaseAnalyzer',
     'NvidiaAnalyzer',
-    'OpenAIAnalyzer'
+    'OpenAIAnalyzer',
+    'MapReduceAnalyzer',
+    'CachedAnalyzer'
 ]
\ No newline at end of file
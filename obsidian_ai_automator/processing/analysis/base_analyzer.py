@@ -1,5 +1,6 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List, Iterator, AsyncIterator
 from obsidian_ai_automator.processing.base_processor import BaseProcessor
 
 
@@ -8,6 +9,9 @@ class BaseAnalyzer(BaseProcessor):
     Абстрактный базовый класс для анализаторов
     """
     
+    # Анализатор реализует асинхронные методы без выделения потока на запрос
+    supports_native_async = False
+    
     @abstractmethod
     def analyze(self, transcript: str) -> str:
         """
@@ -21,6 +25,55 @@ class BaseAnalyzer(BaseProcessor):
         """
         pass
     
+    def cache_identity(self) -> Dict[str, Any]:
+        """
+        Параметры, от которых зависит результат анализа (часть ключа кэша анализа)
+        
+        Returns:
+            Словарь с провайдером, моделью и параметрами генерации
+        """
+        return {
+            "provider": type(self).__name__,
+            "model": getattr(self, "model", None),
+            "temperature": getattr(self, "temperature", None),
+            "top_p": getattr(self, "top_p", None),
+            "max_tokens": getattr(self, "max_tokens", None)
+        }
+    
+    def complete(self, prompt: str) -> str:
+        """
+        Отправляет готовый промпт модели и возвращает ответ
+        
+        Нужен для промптов, которые строятся не из шаблона анализа
+        (например, для частей длинной транскрипции при анализе map-reduce)
+        
+        Args:
+            prompt: Текст промпта
+            
+        Returns:
+            Ответ модели
+        """
+        raise NotImplementedError(f"{type(self).__name__} не поддерживает отправку готового промпта")
+    
+    def stream_analysis(self, transcript: str) -> Iterator[str]:
+        """
+        Анализирует транскрипт, возвращая ответ модели по мере генерации
+        
+        По умолчанию возвращает весь результат analyze() одним фрагментом.
+        Провайдеры с потоковым API переопределяют этот метод.
+        
+        Args:
+            transcript: Текст транскрипции для анализа
+            
+        Returns:
+            Итератор фрагментов результата анализа
+        """
+        yield self.analyze(transcript)
+    
+    def build_tags(self) -> List[str]:
+        """Возвращает теги для результата анализа"""
+        return ["analysis"]
+    
     @abstractmethod
     def get_analysis_with_tags(self, transcript: str) -> Dict[str, Any]:
         """
@@ -32,4 +85,73 @@ class BaseAnalyzer(BaseProcessor):
         Returns:
             Словарь с результатом анализа и тегами
         """
-        pass
\ No newline at end of file
+        pass
+    
+    async def analyze_async(self, transcript: str) -> str:
+        """
+        Асинхронно анализирует транскрипт
+        
+        По умолчанию выполняет синхронный метод в отдельном потоке.
+        Провайдеры с собственным асинхронным клиентом переопределяют этот метод.
+        
+        Args:
+            transcript: Текст транскрипции для анализа
+            
+        Returns:
+            Результат анализа
+        """
+        return await asyncio.to_thread(self.analyze, transcript)
+    
+    async def complete_async(self, prompt: str) -> str:
+        """
+        Асинхронно отправляет готовый промпт модели
+        
+        По умолчанию выполняет синхронный метод в отдельном потоке.
+        
+        Args:
+            prompt: Текст промпта
+            
+        Returns:
+            Ответ модели
+        """
+        return await asyncio.to_thread(self.complete, prompt)
+    
+    async def get_analysis_with_tags_async(self, transcript: str) -> Dict[str, Any]:
+        """
+        Асинхронно анализирует транскрипт и возвращает результат с тегами
+        
+        Args:
+            transcript: Текст транскрипции для анализа
+            
+        Returns:
+            Словарь с результатом анализа и тегами
+        """
+        return await asyncio.to_thread(self.get_analysis_with_tags, transcript)
+    
+    async def stream_analysis_async(self, transcript: str) -> AsyncIterator[str]:
+        """
+        Асинхронно анализирует транскрипт, возвращая ответ модели по мере генерации
+        
+        По умолчанию продвигает синхронный stream_analysis() в отдельном потоке,
+        поэтому фрагменты приходят по мере генерации и у провайдеров без асинхронного клиента.
+        
+        Args:
+            transcript: Текст транскрипции для анализа
+            
+        Returns:
+            Асинхронный итератор фрагментов результата анализа
+        """
+        iterator = self.stream_analysis(transcript)
+        finished = object()
+        try:
+            while True:
+                delta = await asyncio.to_thread(next, iterator, finished)
+                if delta is finished:
+                    break
+                yield delta
+        finally:
+            try:
+                iterator.close()
+            except ValueError:
+                # При отмене поток еще продвигает итератор; запрос завершится сам (его ограничивает timeout)
+                pass
@@ -0,0 +1,181 @@
+"""
+Модуль для повторного использования результатов анализа из кэша
+"""
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from obsidian_ai_automator.processing.analysis.base_analyzer import BaseAnalyzer
+from obsidian_ai_automator.processing.analysis.map_reduce_analyzer import MapReduceAnalyzer
+from obsidian_ai_automator.processing.analysis.prompt_manager import PromptManager
+from obsidian_ai_automator.storage.analysis_cache import AnalysisCache, hash_text
+from obsidian_ai_automator.core.logger import Logger
+
+
+class CachedAnalyzer(BaseAnalyzer):
+    """
+    Обертка над анализатором, которая возвращает сохраненный результат для той же
+    транскрипции, того же промпта и тех же параметров модели без запроса к модели
+
+    Повторный запуск папки или задания, упавшего на стадии сохранения, не оплачивает
+    анализ повторно. Промпт строится заново при каждом анализе, поэтому изменение
+    custom_prompt.txt или запрещенных тегов дает новый ключ; при анализе по частям
+    в ключ входят и шаблоны map_prompt.txt и combine_prompt.txt
+    """
+
+    def __init__(self, analyzer: BaseAnalyzer, cache: AnalysisCache, metrics_collector=None):
+        """
+        Args:
+            analyzer: Анализатор, который выполняет запросы к модели при промахе
+            cache: Кэш результатов анализа
+            metrics_collector: Сборщик метрик для учета попаданий в кэш
+        """
+        self.analyzer = analyzer
+        self.cache = cache
+        self.metrics_collector = metrics_collector
+        self.supports_native_async = analyzer.supports_native_async
+        self.prompt_manager = PromptManager()
+        self.logger = Logger()
+
+    def validate_config(self, config: Dict[str, Any]) -> bool:
+        """Проверяет конфигурацию анализатора"""
+        return self.analyzer.validate_config(config)
+
+    def process(self, input_data: str, config: Dict[str, Any]) -> str:
+        """Обрабатывает транскрипт и возвращает анализ"""
+        return self.analyze(input_data)
+
+    def complete(self, prompt: str) -> str:
+        return self.analyzer.complete(prompt)
+
+    async def complete_async(self, prompt: str) -> str:
+        return await self.analyzer.complete_async(prompt)
+
+    def build_tags(self) -> List[str]:
+        return self.analyzer.build_tags()
+
+    def cache_identity(self) -> Dict[str, Any]:
+        return self.analyzer.cache_identity()
+
+    def _lookup(self, transcript: str) -> Tuple[Optional[str], Tuple[str, str, str, Dict[str, Any]]]:
+        """
+        Ищет результат в кэше
+
+        Returns:
+            Результат анализа или None и данные записи для сохранения результата
+        """
+        identity = self.analyzer.cache_identity()
+        prompt = self.prompt_manager.get_analysis_prompt(transcript, identity["model"])
+        if isinstance(self.analyzer, MapReduceAnalyzer):
+            prompt += self.prompt_manager.get_map_reduce_templates()
+        transcript_hash, prompt_hash = hash_text(transcript), hash_text(prompt)
+        entry = (self.cache.make_key(transcript_hash, prompt_hash, identity), transcript_hash, prompt_hash, identity)
+
+        analysis = self.cache.get(entry[0])
+        if self.metrics_collector is not None:
+            self.metrics_collector.record_analysis_cache(analysis is not None)
+        if analysis is not None:
+            self.logger.info("Используем сохраненный результат анализа (запрос к модели не выполняется)")
+        return analysis, entry
+
+    def _store(self, entry: Tuple[str, str, str, Dict[str, Any]], analysis: str):
+        """Сохраняет непустой результат анализа"""
+        if analysis and analysis.strip():
+            self.cache.put(*entry, analysis)
+
+    def analyze(self, transcript: str) -> str:
+        """
+        Анализирует транскрипт, используя сохраненный результат при попадании в кэш
+
+        Args:
+            transcript: Текст транскрипции для анализа
+
+        Returns:
+            Результат анализа
+        """
+        analysis, entry = self._lookup(transcript)
+        if analysis is None:
+            analysis = self.analyzer.analyze(transcript)
+            self._store(entry, analysis)
+        return analysis
+
+    async def analyze_async(self, transcript: str) -> str:
+        """
+        Асинхронно анализирует транскрипт, используя сохраненный результат при попадании в кэш
+
+        Args:
+            transcript: Текст транскрипции для анализа
+
+        Returns:
+            Результат анализа
+        """
+        analysis, entry = self._lookup(transcript)
+        if analysis is None:
+            analysis = await self.analyzer.analyze_async(transcript)
+            self._store(entry, analysis)
+        return analysis
+
+    def stream_analysis(self, transcript: str) -> Iterator[str]:
+        """
+        Анализирует транскрипт по мере генерации; сохраненный результат возвращается одним фрагментом
+
+        Результат сохраняется только после полного ответа модели
+
+        Args:
+            transcript: Текст транскрипции для анализа
+
+        Returns:
+            Итератор фрагментов результата анализа
+        """
+        analysis, entry = self._lookup(transcript)
+        if analysis is not None:
+            yield analysis
+            return
+
+        parts = []
+        for delta in self.analyzer.stream_analysis(transcript):
+            parts.append(delta)
+            yield delta
+        self._store(entry, "".join(parts))
+
+    async def stream_analysis_async(self, transcript: str) -> AsyncIterator[str]:
+        """
+        Асинхронно анализирует транскрипт по мере генерации; сохраненный результат возвращается одним фрагментом
+
+        Args:
+            transcript: Текст транскрипции для анализа
+
+        Returns:
+            Асинхронный итератор фрагментов результата анализа
+        """
+        analysis, entry = self._lookup(transcript)
+        if analysis is not None:
+            yield analysis
+            return
+
+        parts = []
+        async for delta in self.analyzer.stream_analysis_async(transcript):
+            parts.append(delta)
+            yield delta
+        self._store(entry, "".join(parts))
+
+    def get_analysis_with_tags(self, transcript: str) -> Dict[str, Any]:
+        """
+        Анализирует транскрипт и возвращает результат с тегами
+
+        Args:
+            transcript: Текст транскрипции для анализа
+
+        Returns:
+            Словарь с результатом анализа и тегами
+        """
+        return {"analysis": self.analyze(transcript), "tags": self.build_tags()}
+
+    async def get_analysis_with_tags_async(self, transcript: str) -> Dict[str, Any]:
+        """
+        Асинхронно анализирует транскрипт и возвращает результат с тегами
+
+        Args:
+            transcript: Текст транскрипции для анализа
+
+        Returns:
+            Словарь с результатом анализа и тегами
+        """
+        return {"analysis": await self.analyze_async(transcript), "tags": self.build_tags()}
@@ -0,0 +1,345 @@
+"""
+Модуль для анализа длинных транскрипций по частям (map-reduce)
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from obsidian_ai_automator.processing.analysis.base_analyzer import BaseAnalyzer
+from obsidian_ai_automator.processing.analysis.prompt_manager import PromptManager, AnalysisStrategy, estimate_tokens
+from obsidian_ai_automator.processing.transcription.timecodes import TIMECODE_PATTERN
+from obsidian_ai_automator.core.error_handler import AnalysisError, ProcessingError, extract_http_status
+from obsidian_ai_automator.core.logger import Logger
+
+
+def _split_words(text: str, max_tokens: int) -> List[str]:
+    """Делит текст без тайм-кодов на части по словам"""
+    parts = []
+    current: List[str] = []
+    current_tokens = 0
+    for word in text.split():
+        # Пробел-разделитель учитывается, чтобы сумма оценок не была меньше оценки всей части
+        word_tokens = estimate_tokens(f" {word}" if current else word)
+        if current and current_tokens + word_tokens > max_tokens:
+            parts.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += word_tokens
+    if current:
+        parts.append(" ".join(current))
+    return parts
+
+
+def split_timecoded_text(text: str, max_tokens: int) -> List[str]:
+    """
+    Делит текст с тайм-кодами на части не больше max_tokens токенов
+
+    Границы частей проходят только перед тайм-кодами, поэтому каждая часть
+    начинается с тайм-кода и фрагменты не разрываются. Фрагмент больше бюджета
+    (или текст без тайм-кодов) делится по словам
+
+    Args:
+        text: Текст с тайм-кодами вида [HH:MM:SS]
+        max_tokens: Бюджет части в токенах (оценка estimate_tokens)
+
+    Returns:
+        Список частей текста
+    """
+    boundaries = [match.start() for match in TIMECODE_PATTERN.finditer(text)]
+    if not boundaries or boundaries[0] != 0:
+        boundaries.insert(0, 0)
+    units = [text[start:end].strip() for start, end in zip(boundaries, boundaries[1:] + [len(text)])]
+
+    parts = []
+    current: List[str] = []
+    current_tokens = 0
+    for unit in units:
+        if not unit:
+            continue
+        unit_tokens = estimate_tokens(f" {unit}" if current else unit)
+        if current and current_tokens + unit_tokens > max_tokens:
+            parts.append(" ".join(current))
+            current, current_tokens = [], 0
+        if unit_tokens > max_tokens:
+            parts.extend(_split_words(unit, max_tokens))
+            continue
+        current.append(unit)
+        current_tokens += unit_tokens
+    if current:
+        parts.append(" ".join(current))
+    return parts
+
+
+class MapReduceAnalyzer(BaseAnalyzer):
+    """
+    Обертка над любым анализатором для транскрипций, не помещающихся в один запрос
+
+    Транскрипция делится на части по бюджету токенов с границами по тайм-кодам,
+    из каждой части параллельно извлекаются примеры (map), затем списки примеров
+    объединяются (reduce) и итоговая заметка строится обычным промптом анализа.
+    Если объединенные списки сами не помещаются в запрос, они объединяются
+    группами в несколько уровней. Время анализа определяется самой длинной частью,
+    а не длиной всей транскрипции. Короткие транскрипции анализируются одним запросом
+    """
+
+    def __init__(self, analyzer: BaseAnalyzer, max_input_tokens: int = 60000, chunk_tokens: int = 12000,
+                 max_concurrency: int = 4, max_retries: int = 2, retry_delay: float = 2.0,
+                 max_reduce_levels: int = 3):
+        """
+        Args:
+            analyzer: Анализатор, который выполняет запросы к модели
+            max_input_tokens: Размер транскрипции, до которого анализ выполняется одним запросом,
+                              и максимальный размер входа итогового запроса
+            chunk_tokens: Бюджет одной части в токенах
+            max_concurrency: Количество частей, анализируемых одновременно
+            max_retries: Количество повторов для части после ошибки
+            retry_delay: Начальная пауза перед повтором (удваивается с каждой попыткой)
+            max_reduce_levels: Максимальное количество уровней промежуточного объединения
+        """
+        self.analyzer = analyzer
+        self.max_input_tokens = max_input_tokens
+        self.chunk_tokens = min(chunk_tokens, max_input_tokens)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_reduce_levels = max_reduce_levels
+        self.supports_native_async = analyzer.supports_native_async
+        self.prompt_manager = PromptManager()
+        self.logger = Logger()
+
+    def validate_config(self, config: Dict[str, Any]) -> bool:
+        """Проверяет конфигурацию анализатора"""
+        return self.analyzer.validate_config(config)
+
+    def process(self, input_data: str, config: Dict[str, Any]) -> str:
+        """Обрабатывает транскрипт и возвращает анализ"""
+        return self.analyze(input_data)
+
+    def complete(self, prompt: str) -> str:
+        return self.analyzer.complete(prompt)
+
+    async def complete_async(self, prompt: str) -> str:
+        return await self.analyzer.complete_async(prompt)
+
+    def build_tags(self) -> List[str]:
+        return self.analyzer.build_tags()
+
+    def cache_identity(self) -> Dict[str, Any]:
+        # Анализ по частям дает другой результат для длинных транскрипций, поэтому размеры частей входят в ключ
+        return dict(self.analyzer.cache_identity(),
+                    map_reduce={"max_input_tokens": self.max_input_tokens, "chunk_tokens": self.chunk_tokens})
+
+    def _plan(self, transcript: str) -> Optional[Tuple[List[str], int]]:
+        """
+        Возвращает части транскрипции и допустимый размер входа итогового запроса
+        или None, если транскрипция помещается в один запрос
+
+        Анализ по частям выбирается, если промпт не помещается в контекст модели даже
+        с прореженными тайм-кодами или транскрипция длиннее max_input_tokens
+        """
+        model = getattr(self.analyzer, "model", None)
+        plan = self.prompt_manager.plan_analysis(transcript, model, getattr(self.analyzer, "max_tokens", 8192))
+        tokens = estimate_tokens(transcript, model)
+        if plan["strategy"] != AnalysisStrategy.CHUNKED and tokens <= self.max_input_tokens:
+            return None
+
+        # Часть вместе с промптом map должна поместиться в контекст модели
+        input_budget = min(self.max_input_tokens, plan["budget"])
+        parts = split_timecoded_text(transcript, min(self.chunk_tokens, input_budget // 2))
+        self.logger.info(f"Транскрипция (~{tokens} токенов) разделена для анализа на {len(parts)} частей")
+        return parts, input_budget
+
+    @staticmethod
+    def _merge(results: List[str]) -> str:
+        """Объединяет непустые промежуточные результаты в хронологическом порядке"""
+        return "\n".join(result.strip() for result in results if result and result.strip())
+
+    def _retry_or_raise(self, error: Exception, attempt: int, description: str) -> float:
+        """
+        Решает, повторять ли запрос части после ошибки
+
+        Перегрузку провайдера (429 или 5xx) локально не повторяем: ошибка с исходным
+        HTTP-статусом и паузой Retry-After поднимается в адаптивный лимит запросов,
+        который сам уменьшает параллельность и повторяет анализ
+
+        Returns:
+            Пауза перед повтором в секундах
+
+        Raises:
+            AnalysisError: Если запрос повторять не нужно или попытки исчерпаны
+        """
+        if isinstance(error, ProcessingError):
+            status_code, retry_after = error.status_code, error.retry_after
+        else:
+            status_code, retry_after = extract_http_status(error)
+        failure = AnalysisError(f"Не удалось выполнить анализ ({description}): {error}", status_code, retry_after)
+        if failure.is_overload or attempt >= self.max_retries:
+            raise failure from error
+        self.logger.warning(f"Ошибка анализа ({description}), повтор {attempt + 1}/{self.max_retries}: {error}")
+        return self.retry_delay * (2 ** attempt)
+
+    def _complete_with_retries(self, prompt: str, description: str) -> str:
+        """Отправляет промпт с повторами при ошибке"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.analyzer.complete(prompt)
+            except Exception as e:
+                time.sleep(self._retry_or_raise(e, attempt, description))
+
+    async def _complete_with_retries_async(self, prompt: str, description: str) -> str:
+        """Асинхронно отправляет промпт с повторами при ошибке"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self.analyzer.complete_async(prompt)
+            except Exception as e:
+                await asyncio.sleep(self._retry_or_raise(e, attempt, description))
+
+    def _map_prompts(self, parts: List[str]) -> List[str]:
+        return [self.prompt_manager.get_map_prompt(part, index + 1, len(parts)) for index, part in enumerate(parts)]
+
+    def _combine_groups(self, merged: str, level: int, input_budget: int) -> List[str]:
+        """
+        Делит объединенные результаты на группы для промежуточного объединения
+
+        Raises:
+            AnalysisError: Если результаты не удалось уменьшить за max_reduce_levels уровней
+        """
+        if level >= self.max_reduce_levels:
+            raise AnalysisError(f"Результаты анализа частей (~{estimate_tokens(merged)} токенов) не уменьшились "
+                                f"до {input_budget} токенов за {self.max_reduce_levels} уровней объединения")
+        groups = split_timecoded_text(merged, min(self.chunk_tokens, input_budget // 2))
+        self.logger.info(f"Уровень объединения {level + 1}: {len(groups)} групп")
+        return groups
+
+    def _run_parallel(self, prompts: List[str], stage: str) -> List[str]:
+        """Выполняет запросы в пуле потоков, сохраняя порядок результатов"""
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="analysis") as executor:
+            return list(executor.map(self._complete_with_retries, prompts,
+                                     [f"{stage} {index + 1}/{len(prompts)}" for index in range(len(prompts))]))
+
+    async def _run_parallel_async(self, prompts: List[str], stage: str) -> List[str]:
+        """Асинхронно выполняет запросы с ограничением параллельности, сохраняя порядок результатов"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def complete_with_limit(index: int, prompt: str) -> str:
+            async with semaphore:
+                return await self._complete_with_retries_async(prompt, f"{stage} {index + 1}/{len(prompts)}")
+
+        return list(await asyncio.gather(*(complete_with_limit(index, prompt)
+                                           for index, prompt in enumerate(prompts))))
+
+    def _map_reduce(self, parts: List[str], input_budget: int) -> str:
+        """
+        Анализирует части в пуле потоков и объединяет результаты
+        
+        Returns:
+            Объединенные результаты частей для итогового запроса анализа
+        """
+        merged = self._merge(self._run_parallel(self._map_prompts(parts), "часть"))
+        level = 0
+        while estimate_tokens(merged) > input_budget:
+            groups = self._combine_groups(merged, level, input_budget)
+            combine_prompts = [self.prompt_manager.get_combine_prompt(group) for group in groups]
+            merged = self._merge(self._run_parallel(combine_prompts, "объединение"))
+            level += 1
+        return merged
+
+    async def _map_reduce_async(self, parts: List[str], input_budget: int) -> str:
+        """
+        Асинхронно анализирует части и объединяет результаты
+        
+        Returns:
+            Объединенные результаты частей для итогового запроса анализа
+        """
+        merged = self._merge(await self._run_parallel_async(self._map_prompts(parts), "часть"))
+        level = 0
+        while estimate_tokens(merged) > input_budget:
+            groups = self._combine_groups(merged, level, input_budget)
+            combine_prompts = [self.prompt_manager.get_combine_prompt(group) for group in groups]
+            merged = self._merge(await self._run_parallel_async(combine_prompts, "объединение"))
+            level += 1
+        return merged
+
+    def analyze(self, transcript: str) -> str:
+        """
+        Анализирует транскрипт, разбивая длинную транскрипцию на части
+
+        Args:
+            transcript: Текст транскрипции с тайм-кодами
+
+        Returns:
+            Результат анализа
+        """
+        plan = self._plan(transcript)
+        if plan is None:
+            return self.analyzer.analyze(transcript)
+        return self.analyzer.analyze(self._map_reduce(*plan))
+
+    async def analyze_async(self, transcript: str) -> str:
+        """
+        Асинхронно анализирует транскрипт, обрабатывая части параллельно
+
+        Args:
+            transcript: Текст транскрипции с тайм-кодами
+
+        Returns:
+            Результат анализа
+        """
+        plan = self._plan(transcript)
+        if plan is None:
+            return await self.analyzer.analyze_async(transcript)
+        return await self.analyzer.analyze_async(await self._map_reduce_async(*plan))
+    
+    def stream_analysis(self, transcript: str) -> Iterator[str]:
+        """
+        Анализирует транскрипт, возвращая ответ итогового запроса по мере генерации
+        
+        Части длинной транскрипции анализируются полностью до начала итогового запроса
+        
+        Args:
+            transcript: Текст транскрипции с тайм-кодами
+            
+        Returns:
+            Итератор фрагментов результата анализа
+        """
+        plan = self._plan(transcript)
+        yield from self.analyzer.stream_analysis(transcript if plan is None else self._map_reduce(*plan))
+    
+    async def stream_analysis_async(self, transcript: str) -> AsyncIterator[str]:
+        """
+        Асинхронно анализирует транскрипт, возвращая ответ итогового запроса по мере генерации
+        
+        Args:
+            transcript: Текст транскрипции с тайм-кодами
+            
+        Returns:
+            Асинхронный итератор фрагментов результата анализа
+        """
+        plan = self._plan(transcript)
+        final_input = transcript if plan is None else await self._map_reduce_async(*plan)
+        async for delta in self.analyzer.stream_analysis_async(final_input):
+            yield delta
+
+    def get_analysis_with_tags(self, transcript: str) -> Dict[str, Any]:
+        """
+        Анализирует транскрипт и возвращает результат с тегами
+
+        Args:
+            transcript: Текст транскрипции для анализа
+
+        Returns:
+            Словарь с результатом анализа и тегами
+        """
+        return {"analysis": self.analyze(transcript), "tags": self.build_tags()}
+
+    async def get_analysis_with_tags_async(self, transcript: str) -> Dict[str, Any]:
+        """
+        Асинхронно анализирует транскрипт и возвращает результат с тегами
+
+        Args:
+            transcript: Текст транскрипции для анализа
+
+        Returns:
+            Словарь с результатом анализа и тегами
+        """
+        return {"analysis": await self.analyze_async(transcript), "tags": self.build_tags()}
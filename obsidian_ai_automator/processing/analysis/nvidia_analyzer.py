@@ -1,9 +1,11 @@
 import requests
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple, Iterator, AsyncIterator
 from obsidian_ai_automator.processing.analysis.base_analyzer import BaseAnalyzer
 from obsidian_ai_automator.processing.analysis.prompt_manager import PromptManager
-from obsidian_ai_automator.core.error_handler import AnalysisError
+from obsidian_ai_automator.processing.analysis.sse import iter_sse_events, aiter_sse_events, extract_delta_content
+from obsidian_ai_automator.core.error_handler import AnalysisError, extract_http_status
+from obsidian_ai_automator.core.http_client import AsyncHttpClient
 
 
 class NvidiaAnalyzer(BaseAnalyzer):
@@ -11,10 +13,17 @@ class NvidiaAnalyzer(BaseAnalyzer):
     Реализация анализатора с использованием NVIDIA API
     """
     
-    def __init__(self, api_key: str = None, api_url: str = None, model: str = None):
+    supports_native_async = True
+    
+    def __init__(self, api_key: str = None, api_url: str = None, model: str = None, timeout: float = None):
         self.api_key = api_key  # Оставляем None, если не передан
         self.api_url = api_url
-        self.model = model
+        # Модель по умолчанию известна сразу: от нее зависит допустимый размер промпта
+        self.model = model or self._load_model()
+        self.timeout = timeout  # Ограничение времени запроса в секундах (None - без ограничений)
+        self.max_tokens = 8192  # Место под ответ модели в токенах
+        self.temperature = 0.3
+        self.top_p = 0.7
         # Не загружаем параметры автоматически, только при необходимости
         self.prompt_manager = PromptManager()
     
@@ -71,24 +80,11 @@ class NvidiaAnalyzer(BaseAnalyzer):
         
         return self.analyze(input_data)
     
-    def analyze(self, transcript: str) -> str:
-        """
-        Анализирует транскрипт и возвращает результат
-        
-        Args:
-            transcript: Текст транскрипции для анализа
-            
-        Returns:
-            Результат анализа
-        """
-        # Проверяем учетные данные перед выполнением запроса
-        self._ensure_credentials()
-        
-        prompt = self.prompt_manager.get_analysis_prompt(transcript, self.model)
-
+    def _build_request(self, prompt: str, stream: bool = False) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """Формирует заголовки и тело запроса к NVIDIA API"""
         headers = {
             "Authorization": f"Bearer {self.api_key}",
-            "Accept": "application/json",
+            "Accept": "text/event-stream" if stream else "application/json",
             "Content-Type": "application/json"
         }
         
@@ -97,20 +93,117 @@ class NvidiaAnalyzer(BaseAnalyzer):
             "messages": [
                 {"role": "user", "content": prompt}
             ],
-            "temperature": 0.3,
-            "top_p": 0.7,
-            "max_tokens": 8192,
-            "stream": False
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "max_tokens": self.max_tokens,
+            "stream": stream
         }
+        if stream:
+            # Последнее событие потока содержит usage для калибровки оценки токенов
+            data["stream_options"] = {"include_usage": True}
+        return headers, data
+    
+    def cache_identity(self) -> Dict[str, Any]:
+        return {"provider": "nvidia", "model": self.model, "temperature": self.temperature,
+                "top_p": self.top_p, "max_tokens": self.max_tokens}
+    
+    def build_tags(self) -> List[str]:
+        """Возвращает теги для результата анализа"""
+        # Временная реализация - в будущем можно улучшить извлечение тегов
+        return ["nvidia", "analysis", self.model.replace("/", "_")]
+    
+    def _record_usage(self, prompt: str, body: Dict[str, Any]):
+        """Уточняет оценку токенов по полю usage ответа API"""
+        usage = body.get("usage") or {}
+        if usage.get("prompt_tokens"):
+            self.prompt_manager.token_estimator.record_usage(prompt, usage["prompt_tokens"], self.model)
+    
+    def complete(self, prompt: str) -> str:
+        """
+        Отправляет готовый промпт в NVIDIA API
+        
+        Args:
+            prompt: Текст промпта
+            
+        Returns:
+            Ответ модели
+        """
+        # Проверяем учетные данные перед выполнением запроса
+        self._ensure_credentials()
+        # Запрос, который гарантированно не поместится в контекст модели, не отправляется
+        self.prompt_manager.ensure_fits(prompt, self.model, self.max_tokens)
+        
+        headers, data = self._build_request(prompt)
 
         try:
-            response = requests.post(self.api_url, headers=headers, json=data)
+            response = requests.post(self.api_url, headers=headers, json=data, timeout=self.timeout)
             response.raise_for_status()
             
-            result = response.json().get("choices")[0].get("message").get("content", "")
-            return result
+            body = response.json()
+            result = body.get("choices")[0].get("message").get("content", "")
+        except Exception as e:
+            raise AnalysisError(f"Ошибка при обращении к NVIDIA API: {e}", *extract_http_status(e))
+        self._record_usage(prompt, body)
+        return result
+    
+    def complete_stream(self, prompt: str) -> Iterator[str]:
+        """
+        Отправляет готовый промпт в NVIDIA API и возвращает ответ по мере генерации
+        
+        Args:
+            prompt: Текст промпта
+            
+        Returns:
+            Итератор фрагментов ответа модели
+        """
+        self._ensure_credentials()
+        self.prompt_manager.ensure_fits(prompt, self.model, self.max_tokens)
+        
+        headers, data = self._build_request(prompt, stream=True)
+        
+        try:
+            with requests.post(self.api_url, headers=headers, json=data, timeout=self.timeout,
+                               stream=True) as response:
+                response.raise_for_status()
+                for event in iter_sse_events(response.iter_lines()):
+                    self._record_usage(prompt, event)
+                    delta = extract_delta_content(event)
+                    if delta:
+                        yield delta
         except Exception as e:
-            raise AnalysisError(f"Ошибка при обращении к NVIDIA API: {e}")
+            raise AnalysisError(f"Ошибка при обращении к NVIDIA API: {e}", *extract_http_status(e))
+    
+    def _build_analysis_prompt(self, transcript: str) -> str:
+        """Строит промпт анализа, при необходимости прореживая тайм-коды, чтобы он поместился в контекст"""
+        plan = self.prompt_manager.plan_analysis(transcript, self.model, self.max_tokens, allow_chunked=False)
+        return self.prompt_manager.get_analysis_prompt(plan["text"], self.model)
+    
+    def analyze(self, transcript: str) -> str:
+        """
+        Анализирует транскрипт и возвращает результат
+        
+        Args:
+            transcript: Текст транскрипции для анализа
+            
+        Returns:
+            Результат анализа
+        """
+        # Модель подставляется в промпт, поэтому учетные данные загружаются до его построения
+        self._ensure_credentials()
+        return self.complete(self._build_analysis_prompt(transcript))
+    
+    def stream_analysis(self, transcript: str) -> Iterator[str]:
+        """
+        Анализирует транскрипт, возвращая ответ модели по мере генерации
+        
+        Args:
+            transcript: Текст транскрипции для анализа
+            
+        Returns:
+            Итератор фрагментов результата анализа
+        """
+        self._ensure_credentials()
+        yield from self.complete_stream(self._build_analysis_prompt(transcript))
 
     def get_analysis_with_tags(self, transcript: str) -> Dict[str, Any]:
         """
@@ -124,8 +217,115 @@ class NvidiaAnalyzer(BaseAnalyzer):
         """
         analysis_result = self.analyze(transcript)
         
-        # Временная реализация - в будущем можно улучшить извлечение тегов
         return {
             "analysis": analysis_result,
-            "tags": ["nvidia", "analysis", self.model.replace("/", "_")]
+            "tags": self.build_tags()
+        }
+    
+    async def complete_async(self, prompt: str) -> str:
+        """
+        Асинхронно отправляет готовый промпт без выделения потока на запрос
+        
+        Args:
+            prompt: Текст промпта
+            
+        Returns:
+            Ответ модели
+        """
+        if not AsyncHttpClient.is_available():
+            return await super().complete_async(prompt)
+        
+        self._ensure_credentials()
+        self.prompt_manager.ensure_fits(prompt, self.model, self.max_tokens)
+        
+        headers, data = self._build_request(prompt)
+        
+        try:
+            session = await AsyncHttpClient.get_session()
+            async with session.post(self.api_url, headers=headers, json=data,
+                                    timeout=AsyncHttpClient.request_timeout(self.timeout)) as response:
+                response.raise_for_status()
+                body = await response.json()
+            
+            result = body.get("choices")[0].get("message").get("content", "")
+        except Exception as e:
+            raise AnalysisError(f"Ошибка при обращении к NVIDIA API: {e}", *extract_http_status(e))
+        self._record_usage(prompt, body)
+        return result
+    
+    async def complete_stream_async(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Асинхронно отправляет готовый промпт и возвращает ответ по мере генерации
+        
+        Args:
+            prompt: Текст промпта
+            
+        Returns:
+            Асинхронный итератор фрагментов ответа модели
+        """
+        self._ensure_credentials()
+        self.prompt_manager.ensure_fits(prompt, self.model, self.max_tokens)
+        
+        headers, data = self._build_request(prompt, stream=True)
+        
+        try:
+            session = await AsyncHttpClient.get_session()
+            async with session.post(self.api_url, headers=headers, json=data,
+                                    timeout=AsyncHttpClient.request_timeout(self.timeout)) as response:
+                response.raise_for_status()
+                async for event in aiter_sse_events(response.content):
+                    self._record_usage(prompt, event)
+                    delta = extract_delta_content(event)
+                    if delta:
+                        yield delta
+        except Exception as e:
+            raise AnalysisError(f"Ошибка при обращении к NVIDIA API: {e}", *extract_http_status(e))
+    
+    async def analyze_async(self, transcript: str) -> str:
+        """
+        Асинхронно анализирует транскрипт без выделения потока на запрос
+        
+        Args:
+            transcript: Текст транскрипции для анализа
+            
+        Returns:
+            Результат анализа
+        """
+        self._ensure_credentials()
+        return await self.complete_async(self._build_analysis_prompt(transcript))
+    
+    async def stream_analysis_async(self, transcript: str) -> AsyncIterator[str]:
+        """
+        Асинхронно анализирует транскрипт, возвращая ответ модели по мере генерации
+        
+        Args:
+            transcript: Текст транскрипции для анализа
+            
+        Returns:
+            Асинхронный итератор фрагментов результата анализа
+        """
+        if not AsyncHttpClient.is_available():
+            async for delta in super().stream_analysis_async(transcript):
+                yield delta
+            return
+        
+        self._ensure_credentials()
+        async for delta in self.complete_stream_async(self._build_analysis_prompt(transcript)):
+            yield delta
+    
+    async def get_analysis_with_tags_async(self, transcript: str) -> Dict[str, Any]:
+        """
+        Асинхронно анализирует транскрипт и возвращает результат с тегами
+        
+        Args:
+            transcript: Текст транскрипции для анализа
+            
+        Returns:
+            Словарь с результатом анализа и тегами
+        """
+        analysis_result = await self.analyze_async(transcript)
+        
+        return {
+            "analysis": analysis_result,
+            "tags": self.build_tags()
         }
\ No newline at end of file
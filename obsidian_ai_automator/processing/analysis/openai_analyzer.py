@@ -3,7 +3,7 @@
 """
 import openai
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Iterator
 from obsidian_ai_automator.processing.analysis.base_analyzer import BaseAnalyzer
 from obsidian_ai_automator.processing.analysis.prompt_manager import PromptManager
 from obsidian_ai_automator.core.error_handler import AnalysisError
@@ -14,9 +14,13 @@ class OpenAIAnalyzer(BaseAnalyzer):
     Реализация анализатора с использованием OpenAI API
     """
     
-    def __init__(self, api_key: str = None, model: str = "gpt-3.5-turbo"):
+    def __init__(self, api_key: str = None, model: str = "gpt-3.5-turbo", timeout: float = None):
         self.api_key = api_key
         self.model = model
+        self.timeout = timeout  # Ограничение времени запроса в секундах (None - по умолчанию клиента OpenAI)
+        self.max_tokens = 2048  # Место под ответ модели в токенах
+        self.temperature = 0.3
+        self.top_p = 1.0  # Значение по умолчанию OpenAI API
         # Не загружаем параметры автоматически, только при необходимости
         self.client = None
         self.prompt_manager = PromptManager()
@@ -40,7 +44,7 @@ class OpenAIAnalyzer(BaseAnalyzer):
                 raise AnalysisError("API-ключ OpenAI не установлен")
             
             # Инициализируем клиент OpenAI
-            self.client = openai.OpenAI(api_key=self.api_key)
+            self.client = openai.OpenAI(api_key=self.api_key, timeout=self.timeout or openai.NOT_GIVEN)
     
     def validate_config(self, config: Dict[str, Any]) -> bool:
         """Проверяет конфигурацию анализатора"""
@@ -50,17 +54,19 @@ class OpenAIAnalyzer(BaseAnalyzer):
         """Обрабатывает транскрипт и возвращает анализ"""
         return self.analyze(input_data)
     
-    def analyze(self, transcript: str) -> str:
+    def complete(self, prompt: str) -> str:
         """
-        Анализирует транскрипт и возвращает результат
+        Отправляет готовый промпт в OpenAI API
+        
         Args:
-            transcript: Текст транскрипции для анализа
+            prompt: Текст промпта
+            
         Returns:
-            Результат анализа
+            Ответ модели
         """
         self._ensure_client()
-        
-        prompt = self.prompt_manager.get_analysis_prompt(transcript, self.model)
+        # Запрос, который гарантированно не поместится в контекст модели, не отправляется
+        self.prompt_manager.ensure_fits(prompt, self.model, self.max_tokens)
         
         try:
             response = self.client.chat.completions.create(
@@ -68,14 +74,93 @@ class OpenAIAnalyzer(BaseAnalyzer):
                 messages=[
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.3,
-                max_tokens=2048
+                temperature=self.temperature,
+                top_p=self.top_p,
+                max_tokens=self.max_tokens
             )
             
             result = response.choices[0].message.content
-            return result
         except Exception as e:
             raise AnalysisError(f"Ошибка при обращении к OpenAI API: {e}")
+        
+        # Уточняем оценку токенов по фактическому размеру промпта
+        if getattr(response, "usage", None) and response.usage.prompt_tokens:
+            self.prompt_manager.token_estimator.record_usage(prompt, response.usage.prompt_tokens, self.model)
+        return result
+    
+    def complete_stream(self, prompt: str) -> Iterator[str]:
+        """
+        Отправляет готовый промпт в OpenAI API и возвращает ответ по мере генерации
+        
+        Args:
+            prompt: Текст промпта
+            
+        Returns:
+            Итератор фрагментов ответа модели
+        """
+        self._ensure_client()
+        self.prompt_manager.ensure_fits(prompt, self.model, self.max_tokens)
+        
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=self.temperature,
+                top_p=self.top_p,
+                max_tokens=self.max_tokens,
+                stream=True,
+                # Последний фрагмент потока содержит usage для калибровки оценки токенов
+                stream_options={"include_usage": True}
+            )
+            
+            with stream:
+                for chunk in stream:
+                    if getattr(chunk, "usage", None) and chunk.usage.prompt_tokens:
+                        self.prompt_manager.token_estimator.record_usage(prompt, chunk.usage.prompt_tokens,
+                                                                         self.model)
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise AnalysisError(f"Ошибка при обращении к OpenAI API: {e}")
+    
+    def _build_analysis_prompt(self, transcript: str) -> str:
+        """Строит промпт анализа, при необходимости прореживая тайм-коды, чтобы он поместился в контекст"""
+        plan = self.prompt_manager.plan_analysis(transcript, self.model, self.max_tokens, allow_chunked=False)
+        return self.prompt_manager.get_analysis_prompt(plan["text"], self.model)
+    
+    def analyze(self, transcript: str) -> str:
+        """
+        Анализирует транскрипт и возвращает результат
+        Args:
+            transcript: Текст транскрипции для анализа
+        Returns:
+            Результат анализа
+        """
+        # Тайм-коды прореживаются, если транскрипция с ними не помещается в контекст модели
+        return self.complete(self._build_analysis_prompt(transcript))
+    
+    def stream_analysis(self, transcript: str) -> Iterator[str]:
+        """
+        Анализирует транскрипт, возвращая ответ модели по мере генерации
+        
+        Args:
+            transcript: Текст транскрипции для анализа
+            
+        Returns:
+            Итератор фрагментов результата анализа
+        """
+        yield from self.complete_stream(self._build_analysis_prompt(transcript))
+    
+    def cache_identity(self) -> Dict[str, Any]:
+        return {"provider": "openai", "model": self.model, "temperature": self.temperature,
+                "top_p": self.top_p, "max_tokens": self.max_tokens}
+    
+    def build_tags(self) -> List[str]:
+        """Возвращает теги для результата анализа"""
+        # Временная реализация - в будущем можно улучшить извлечение тегов
+        return ["openai", "analysis", self.model.replace("-", "_")]
     
     def get_analysis_with_tags(self, transcript: str) -> Dict[str, Any]:
         """
@@ -89,8 +174,7 @@ class OpenAIAnalyzer(BaseAnalyzer):
         """
         analysis_result = self.analyze(transcript)
         
-        # Временная реализация - в будущем можно улучшить извлечение тегов
         return {
             "analysis": analysis_result,
-            "tags": ["openai", "analysis", self.model.replace("-", "_")]
+            "tags": self.build_tags()
         }
\ No newline at end of file
@@ -1,6 +1,98 @@
 import os
+import re
 import configparser
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from obsidian_ai_automator.core.error_handler import AnalysisError
+from obsidian_ai_automator.processing.analysis.token_estimator import get_token_estimator, get_context_tokens
+from obsidian_ai_automator.processing.transcription.timecodes import TIMECODE_PATTERN
+
+
+# Тайм-код вместе с пробелом после него: удаленный тайм-код не оставляет двойной пробел
+_TIMECODE_WITH_SPACE_PATTERN = re.compile(TIMECODE_PATTERN.pattern + r"[ \t]*")
+
+
+def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Оценивает количество токенов текста без обращения к API
+
+    Тайм-код "[00:00:01]" дает 10 токенов, как и у токенизаторов моделей,
+    которые разбивают цифры по одной; остальной текст оценивается по
+    калиброванному числу символов на токен для языка текста
+    """
+    return get_token_estimator().estimate(text, model)
+
+
+def condense_timecodes(text: str, interval_seconds: float) -> str:
+    """
+    Оставляет в тексте не больше одного тайм-кода на interval_seconds секунд
+
+    Args:
+        text: Текст с тайм-кодами вида [HH:MM:SS]
+        interval_seconds: Минимальное расстояние между оставленными тайм-кодами
+
+    Returns:
+        Текст с прореженными тайм-кодами
+    """
+    last_kept = None
+
+    def keep_or_drop(match):
+        nonlocal last_kept
+        seconds = int(match.group(1)) * 3600 + int(match.group(2)) * 60 + int(match.group(3))
+        if last_kept is not None and seconds - last_kept < interval_seconds:
+            return ""
+        last_kept = seconds
+        return match.group(0)
+
+    return _TIMECODE_WITH_SPACE_PATTERN.sub(keep_or_drop, text)
+
+
+# Шаблоны промптов анализа по частям; переопределяются файлами map_prompt_file и combine_prompt_file
+DEFAULT_MAP_PROMPT = """Ты — ИИ-аналитик, помогающий исследователю. Перед тобой часть {part_number} из {total_parts} длинной стенограммы.
+Итоговый анализ будет выполнен по инструкции ниже, но модель увидит не стенограмму, а только выписки из всех частей.
+
+Выпиши из этой части ВСЕ фрагменты, которые понадобятся для итогового анализа по инструкции.
+Каждый фрагмент — отдельной строкой в формате:
+[HH:MM:SS] Краткое название — пересказ в одно-два предложения
+
+Тайм-код бери из транскрипта (начало фрагмента). Используй только информацию из транскрипта, не выполняй
+итоговый анализ и не добавляй ничего, кроме списка строк. Если подходящих фрагментов нет, ответь пустой строкой.
+Не используй следующие теги: {FORBIDDEN_TAGS}
+
+### ИНСТРУКЦИЯ ИТОГОВОГО АНАЛИЗА:
+{instructions}
+
+### ЧАСТЬ ТРАНСКРИПТА:
+{transcript}"""
+
+DEFAULT_COMBINE_PROMPT = """Ниже — выписки из последовательных частей одной стенограммы, сделанные для итогового анализа по инструкции.
+Объедини их в один список: убери повторы, оставь самое важное для итогового анализа,
+сохрани исходные тайм-коды и хронологический порядок. Формат каждой строки:
+[HH:MM:SS] Краткое название — пересказ в одно-два предложения
+
+Не выполняй итоговый анализ и не добавляй ничего, кроме списка строк.
+Не используй следующие теги: {FORBIDDEN_TAGS}
+
+### ИНСТРУКЦИЯ ИТОГОВОГО АНАЛИЗА:
+{instructions}
+
+### ВЫПИСКИ:
+{partial_results}"""
+
+
+class _PromptValues(dict):
+    """Значения для подстановки в шаблон: неизвестные заполнители остаются в тексте как есть"""
+
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
+class AnalysisStrategy:
+    """
+    Способ отправки транскрипции на анализ
+    """
+    SINGLE = 'single'          # Промпт с транскрипцией помещается в контекст модели
+    CONDENSED = 'condensed'    # Помещается после прореживания тайм-кодов
+    CHUNKED = 'chunked'        # Нужен анализ по частям (map-reduce)
 
 
 class PromptManager:
@@ -24,6 +116,83 @@ class PromptManager:
         except configparser.NoSectionError:
             self.custom_prompt_file = 'custom_prompt.txt'
             self.forbidden_tags = []
+        # Шаблоны анализа по частям (map-reduce) лежат рядом с пользовательским промптом
+        self.map_prompt_file = self.config.get('LLM', 'map_prompt_file', fallback='map_prompt.txt')
+        self.combine_prompt_file = self.config.get('LLM', 'combine_prompt_file', fallback='combine_prompt.txt')
+        
+        # Ограничения размера промпта (0 - контекстное окно определяется по модели)
+        self.context_tokens = self.config.getint('LLM', 'context_tokens', fallback=0)
+        self.safety_margin = self.config.getfloat('LLM', 'prompt_safety_margin', fallback=0.1)
+        self.condensed_interval_seconds = self.config.getfloat('LLM', 'condensed_timecode_interval', fallback=60)
+        self.token_estimator = get_token_estimator()
+    
+    @staticmethod
+    def _prompt_path(file_name: str) -> str:
+        """Возвращает путь к файлу промпта относительно корня проекта"""
+        return os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", file_name)
+    
+    def _read_template(self, file_name: str, default: str) -> str:
+        """Читает шаблон промпта из файла или возвращает шаблон по умолчанию"""
+        prompt_file_path = self._prompt_path(file_name)
+        if os.path.exists(prompt_file_path):
+            with open(prompt_file_path, 'r', encoding='utf-8') as f:
+                return f.read()
+        return default
+    
+    def _forbidden_tags_text(self) -> str:
+        return ", ".join(self.forbidden_tags) if self.forbidden_tags else "нет запрещенных тегов"
+    
+    def get_prompt_budget(self, model: Optional[str], max_output_tokens: int) -> int:
+        """
+        Возвращает допустимый размер промпта в токенах: контекст модели без места
+        под ответ и запаса на погрешность оценки
+        """
+        context_tokens = self.context_tokens or get_context_tokens(model)
+        return int((context_tokens - max_output_tokens) * (1 - self.safety_margin))
+    
+    def ensure_fits(self, prompt: str, model: Optional[str], max_output_tokens: int) -> int:
+        """
+        Проверяет, что промпт помещается в контекст модели, до отправки запроса
+        :return: оценка размера промпта в токенах
+        :raises AnalysisError: если промпт гарантированно не поместится
+        """
+        prompt_tokens = self.token_estimator.estimate(prompt, model)
+        context_tokens = self.context_tokens or get_context_tokens(model)
+        # Запас на погрешность оценки здесь не учитывается: отклоняются только запросы,
+        # которые не поместятся даже при точной оценке
+        if prompt_tokens + max_output_tokens > context_tokens:
+            raise AnalysisError(f"Промпт (~{prompt_tokens} токенов) и ответ ({max_output_tokens} токенов) "
+                                f"не помещаются в контекст модели {model} ({context_tokens} токенов); запрос не отправлен")
+        return prompt_tokens
+    
+    def plan_analysis(self, transcript: str, model: Optional[str], max_output_tokens: int,
+                      allow_chunked: bool = True) -> Dict[str, Any]:
+        """
+        Выбирает способ анализа по оценке размера промпта до отправки запроса
+        :param transcript: текст транскрипции с тайм-кодами
+        :param model: модель анализа
+        :param max_output_tokens: место под ответ модели в токенах
+        :param allow_chunked: доступен ли анализ по частям
+        :return: словарь со стратегией (AnalysisStrategy), текстом для промпта,
+                 оценкой размера промпта и допустимым размером промпта в токенах
+        :raises AnalysisError: если транскрипция не помещается, а анализ по частям недоступен
+        """
+        budget = self.get_prompt_budget(model, max_output_tokens)
+        overhead = self.token_estimator.estimate(self.get_analysis_prompt("", model or ""), model)
+        plan = {"strategy": AnalysisStrategy.SINGLE, "text": transcript, "budget": budget,
+                "prompt_tokens": overhead + self.token_estimator.estimate(transcript, model)}
+        if plan["prompt_tokens"] <= budget:
+            return plan
+        
+        condensed = condense_timecodes(transcript, self.condensed_interval_seconds)
+        condensed_tokens = overhead + self.token_estimator.estimate(condensed, model)
+        if condensed_tokens <= budget:
+            return dict(plan, strategy=AnalysisStrategy.CONDENSED, text=condensed, prompt_tokens=condensed_tokens)
+        
+        if not allow_chunked:
+            raise AnalysisError(f"Транскрипция (~{plan['prompt_tokens']} токенов с промптом) не помещается в "
+                                f"{budget} токенов даже с прореженными тайм-кодами; включите анализ по частям [Map_Reduce]")
+        return dict(plan, strategy=AnalysisStrategy.CHUNKED)
     
     def get_analysis_prompt(self, transcript: str, nvidia_model: str) -> str:
         """
@@ -33,7 +202,7 @@ class PromptManager:
         :return: готовый промпт для LLM
         """
         # Загружаем пользовательский промпт из файла
-        prompt_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", self.custom_prompt_file)
+        prompt_file_path = self._prompt_path(self.custom_prompt_file)
         if os.path.exists(prompt_file_path):
             with open(prompt_file_path, 'r', encoding='utf-8') as f:
                 prompt_template = f.read()
@@ -77,16 +246,74 @@ class PromptManager:
             ### ТРАНСКРИПТ ДЛЯ АНАЛИЗА:
             {transcript}"""
 
-        # Подставляем переменные в шаблон промпта
-        forbidden_tags_str = ", ".join(self.forbidden_tags) if self.forbidden_tags else "нет запрещенных тегов"
-        prompt = prompt_template.format(
-            FORBIDDEN_TAGS=forbidden_tags_str,
+        # Подставляем переменные в шаблон промпта; неизвестные заполнители остаются как есть
+        prompt = prompt_template.format_map(_PromptValues(
+            FORBIDDEN_TAGS=self._forbidden_tags_text(),
             NVIDIA_MODEL=nvidia_model,
             transcript=transcript
-        )
+        ))
 
         return prompt
 
+    def get_analysis_instructions(self) -> str:
+        """
+        Возвращает инструкции итогового анализа без транскрипта: пользовательский промпт
+        (или стандартный) с подставленными значениями, кроме самого транскрипта
+        :return: текст инструкций для промптов анализа по частям
+        """
+        marker = "\0"
+        instructions = self.get_analysis_prompt(marker, "").split(marker)[0].rstrip()
+        # Заголовок раздела транскрипта ("### ТРАНСКРИПТ ДЛЯ АНАЛИЗА:") в инструкции не нужен
+        lines = instructions.splitlines()
+        if lines and lines[-1].lstrip().startswith("###"):
+            lines.pop()
+        return "\n".join(lines).rstrip()
+    
+    def get_map_prompt(self, transcript_part: str, part_number: int, total_parts: int) -> str:
+        """
+        Получает промпт для выписок из части длинного транскрипта (стадия map)
+        
+        Шаблон берется из файла map_prompt_file рядом с пользовательским промптом или
+        используется стандартный. Заполнители: {transcript}, {part_number}, {total_parts},
+        {instructions} (пользовательский промпт без транскрипта) и {FORBIDDEN_TAGS}
+        :param transcript_part: часть транскрипта с тайм-кодами
+        :param part_number: номер части (с единицы)
+        :param total_parts: количество частей
+        :return: готовый промпт для LLM
+        """
+        template = self._read_template(self.map_prompt_file, DEFAULT_MAP_PROMPT)
+        return template.format_map(_PromptValues(
+            transcript=transcript_part,
+            part_number=part_number,
+            total_parts=total_parts,
+            instructions=self.get_analysis_instructions(),
+            FORBIDDEN_TAGS=self._forbidden_tags_text()
+        ))
+    
+    def get_combine_prompt(self, partial_results: str) -> str:
+        """
+        Получает промпт для объединения промежуточных результатов (иерархическая стадия reduce)
+        
+        Шаблон берется из файла combine_prompt_file рядом с пользовательским промптом или
+        используется стандартный. Заполнители: {partial_results}, {instructions} и {FORBIDDEN_TAGS}
+        :param partial_results: выписки, полученные для нескольких частей
+        :return: готовый промпт для LLM
+        """
+        template = self._read_template(self.combine_prompt_file, DEFAULT_COMBINE_PROMPT)
+        return template.format_map(_PromptValues(
+            partial_results=partial_results,
+            instructions=self.get_analysis_instructions(),
+            FORBIDDEN_TAGS=self._forbidden_tags_text()
+        ))
+    
+    def get_map_reduce_templates(self) -> str:
+        """
+        Возвращает действующие шаблоны анализа по частям (для ключа кэша результатов)
+        :return: шаблоны map и combine одной строкой
+        """
+        return "\n".join((self._read_template(self.map_prompt_file, DEFAULT_MAP_PROMPT),
+                          self._read_template(self.combine_prompt_file, DEFAULT_COMBINE_PROMPT)))
+    
     def get_custom_prompt(self) -> str:
         """
         Возвращает пользовательский промпт из файла
@@ -0,0 +1,71 @@
+"""
+Модуль разбора потоковых ответов (server-sent events) OpenAI-совместимых API
+
+Каждое событие - строка "data: <JSON>", события разделяются пустыми строками,
+поток завершается строкой "data: [DONE]"
+"""
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, Optional, Union
+
+
+SSE_DONE = "[DONE]"
+
+
+def parse_sse_line(line: Union[str, bytes]) -> Optional[str]:
+    """
+    Возвращает данные строки события или None для служебных строк
+
+    Комментарии (":"), поля event/id/retry и пустые строки пропускаются
+    """
+    if isinstance(line, bytes):
+        line = line.decode("utf-8")
+    line = line.strip()
+    if not line.startswith("data:"):
+        return None
+    return line[len("data:"):].strip()
+
+
+def iter_sse_events(lines: Iterable[Union[str, bytes]]) -> Iterator[Dict[str, Any]]:
+    """
+    Разбирает строки потокового ответа в события до завершающего [DONE]
+
+    Args:
+        lines: Строки ответа (например, response.iter_lines() из requests)
+
+    Returns:
+        Итератор JSON-объектов событий
+    """
+    for line in lines:
+        data = parse_sse_line(line)
+        if not data:
+            continue
+        if data == SSE_DONE:
+            return
+        yield json.loads(data)
+
+
+async def aiter_sse_events(lines: AsyncIterable[Union[str, bytes]]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Асинхронно разбирает строки потокового ответа в события до завершающего [DONE]
+
+    Args:
+        lines: Строки ответа (например, response.content из aiohttp)
+
+    Returns:
+        Асинхронный итератор JSON-объектов событий
+    """
+    async for line in lines:
+        data = parse_sse_line(line)
+        if not data:
+            continue
+        if data == SSE_DONE:
+            return
+        yield json.loads(data)
+
+
+def extract_delta_content(event: Dict[str, Any]) -> str:
+    """Возвращает фрагмент текста ответа из события (пустую строку для событий без текста)"""
+    choices = event.get("choices") or []
+    if not choices:
+        return ""
+    return (choices[0].get("delta") or {}).get("content") or ""
@@ -0,0 +1,185 @@
+"""
+Модуль оценки количества токенов без обращения к API
+
+Тайм-код "[HH:MM:SS]" считается фиксированным числом токенов (токенизаторы
+моделей разбивают цифры по одной), остальной текст - делением числа символов
+на среднее число символов в токене для языка. Таблица символов на токен
+уточняется по полю usage реальных ответов API для каждой пары (модель, язык)
+и сохраняется между запусками
+"""
+import json
+import math
+import os
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+from obsidian_ai_automator.core.logger import Logger
+from obsidian_ai_automator.processing.transcription.timecodes import TIMECODE_PATTERN
+
+
+# Токенов на тайм-код "[00:00:01]": скобки, шесть цифр и два двоеточия
+TIMECODE_TOKENS = 10
+
+# Символов на токен до калибровки; значения занижены, чтобы оценка была с запасом
+DEFAULT_CHARS_PER_TOKEN = {
+    "ru": 2.5,
+    "en": 3.8,
+    "other": 2.5
+}
+
+# Контекстное окно известных моделей в токенах
+MODEL_CONTEXT_TOKENS = {
+    "deepseek-ai/deepseek-v3.1-terminus": 128000,
+    "gpt-3.5-turbo": 16385,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000
+}
+
+DEFAULT_CALIBRATION_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    ".token_calibration.json")
+
+
+def detect_language(text: str) -> str:
+    """
+    Определяет язык текста по доле кириллических букв среди букв
+
+    Returns:
+        ru, en или other
+    """
+    sample = text[:20000]
+    letters = sum(1 for char in sample if char.isalpha())
+    if not letters:
+        return "other"
+    cyrillic = sum(1 for char in sample if "Ѐ" <= char <= "ӿ")
+    if cyrillic / letters > 0.3:
+        return "ru"
+    ascii_letters = sum(1 for char in sample if char.isascii() and char.isalpha())
+    return "en" if ascii_letters / letters > 0.7 else "other"
+
+
+class TokenEstimator:
+    """
+    Оценка токенов с калибровкой символов на токен по ответам API
+    """
+
+    def __init__(self, calibration_path: Optional[str] = DEFAULT_CALIBRATION_PATH):
+        """
+        Args:
+            calibration_path: Файл таблицы калибровки (None - калибровка только в памяти)
+        """
+        self.calibration_path = calibration_path
+        self.logger = Logger()
+        self._lock = threading.Lock()
+        # "модель|язык" -> {"chars": ..., "tokens": ..., "samples": ...}
+        self._calibration: Dict[str, Dict[str, float]] = {}
+        self._load()
+
+    def _load(self):
+        if not self.calibration_path or not os.path.exists(self.calibration_path):
+            return
+        try:
+            with open(self.calibration_path, 'r', encoding='utf-8') as f:
+                self._calibration = json.load(f)
+        except Exception as e:
+            self.logger.warning(f"Не удалось прочитать калибровку токенов {self.calibration_path}: {e}")
+
+    def _save(self):
+        """Сохраняет таблицу калибровки атомарно (вызывается под блокировкой)"""
+        if not self.calibration_path:
+            return
+        directory = os.path.dirname(self.calibration_path) or "."
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._calibration, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.calibration_path)
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            self.logger.warning(f"Не удалось сохранить калибровку токенов {self.calibration_path}: {e}")
+
+    @staticmethod
+    def _split(text: str) -> Tuple[int, int]:
+        """Возвращает количество тайм-кодов и символов остального текста"""
+        stripped, timecodes = TIMECODE_PATTERN.subn("", text)
+        return timecodes, len(stripped)
+
+    @staticmethod
+    def _key(model: Optional[str], language: str) -> str:
+        return f"{model or 'default'}|{language}"
+
+    def chars_per_token(self, model: Optional[str] = None, language: str = "ru") -> float:
+        """
+        Символов на токен для модели и языка: калиброванное значение или значение по умолчанию
+        """
+        with self._lock:
+            entry = self._calibration.get(self._key(model, language))
+        if entry and entry["tokens"] > 0:
+            return entry["chars"] / entry["tokens"]
+        return DEFAULT_CHARS_PER_TOKEN.get(language, DEFAULT_CHARS_PER_TOKEN["other"])
+
+    def estimate(self, text: str, model: Optional[str] = None, language: Optional[str] = None) -> int:
+        """
+        Оценивает количество токенов текста
+
+        Args:
+            text: Текст
+            model: Модель (для калиброванного значения)
+            language: Язык текста (по умолчанию определяется по тексту)
+
+        Returns:
+            Оценка количества токенов
+        """
+        if not text:
+            return 0
+        timecodes, chars = self._split(text)
+        cpt = self.chars_per_token(model, language or detect_language(text))
+        return timecodes * TIMECODE_TOKENS + math.ceil(chars / cpt)
+
+    def record_usage(self, prompt: str, prompt_tokens: int, model: Optional[str] = None):
+        """
+        Уточняет таблицу по фактическому количеству токенов промпта из ответа API
+
+        Args:
+            prompt: Отправленный промпт
+            prompt_tokens: Значение usage.prompt_tokens из ответа
+            model: Модель, обработавшая запрос
+        """
+        timecodes, chars = self._split(prompt)
+        text_tokens = prompt_tokens - timecodes * TIMECODE_TOKENS
+        if not prompt_tokens or text_tokens <= 0 or not chars:
+            return
+
+        key = self._key(model, detect_language(prompt))
+        with self._lock:
+            entry = self._calibration.setdefault(key, {"chars": 0, "tokens": 0, "samples": 0})
+            entry["chars"] += chars
+            entry["tokens"] += text_tokens
+            entry["samples"] += 1
+            self._save()
+
+    def get_calibration(self) -> Dict[str, float]:
+        """Калиброванные значения символов на токен по ключам "модель|язык\""""
+        with self._lock:
+            return {key: entry["chars"] / entry["tokens"]
+                    for key, entry in self._calibration.items() if entry["tokens"] > 0}
+
+
+def get_context_tokens(model: Optional[str], default: int = 32000) -> int:
+    """Возвращает контекстное окно модели в токенах (default для неизвестных моделей)"""
+    return MODEL_CONTEXT_TOKENS.get(model or "", default)
+
+
+# Оценщик процесса, общий для всех анализаторов (калибровка накапливается в одном файле)
+_estimator: Optional[TokenEstimator] = None
+_estimator_lock = threading.Lock()
+
+
+def get_token_estimator() -> TokenEstimator:
+    """Возвращает общий оценщик токенов процесса"""
+    global _estimator
+    with _estimator_lock:
+        if _estimator is None:
+            _estimator = TokenEstimator()
+        return _estimator
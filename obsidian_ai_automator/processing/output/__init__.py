@@ -1,3 +1,8 @@
 """
 Пакет output для форматирования вывода
-"""
\ No newline at end of file
+"""
+from .note_writer import IncrementalNoteWriter
+
+__all__ = [
+    'IncrementalNoteWriter'
+]
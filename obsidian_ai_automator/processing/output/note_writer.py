@@ -0,0 +1,89 @@
+"""
+Модуль для постепенной записи заметки с атомарной заменой в конце
+"""
+import os
+import tempfile
+from typing import Optional
+from obsidian_ai_automator.core.error_handler import OutputError
+
+
+class IncrementalNoteWriter:
+    """
+    Пишет заметку частями во временный файл рядом с итоговым и атомарно
+    переименовывает его после завершения
+
+    Временный файл скрыт (имя начинается с точки), поэтому хранилище Obsidian
+    и синхронизация не видят недописанную заметку; при ошибке он удаляется.
+    Используется как контекстный менеджер: без вызова commit() запись отменяется
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Args:
+            file_path: Путь к итоговому файлу заметки
+        """
+        self.file_path = file_path
+        self.temp_path: Optional[str] = None
+        self._file = None
+        self.written = 0
+
+    def open(self) -> 'IncrementalNoteWriter':
+        """Создает временный файл рядом с итоговым"""
+        directory = os.path.dirname(self.file_path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, self.temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(self.file_path)}.",
+                                                  suffix=".tmp")
+            self._file = os.fdopen(fd, 'w', encoding='utf-8')
+        except OSError as e:
+            raise OutputError(f"Ошибка при создании временного файла для {self.file_path}: {e}")
+        return self
+
+    def write(self, text: str):
+        """Дописывает текст (в буфер файла; на диск он попадает при flush или commit)"""
+        try:
+            self._file.write(text)
+        except OSError as e:
+            raise OutputError(f"Ошибка при записи файла {self.temp_path}: {e}")
+        self.written += len(text)
+
+    def flush(self):
+        """Сбрасывает записанный текст на диск"""
+        try:
+            self._file.flush()
+        except OSError as e:
+            raise OutputError(f"Ошибка при записи файла {self.temp_path}: {e}")
+
+    def commit(self) -> str:
+        """
+        Завершает запись и атомарно заменяет итоговый файл
+
+        Returns:
+            Путь к итоговому файлу
+        """
+        try:
+            self._file.close()
+            os.replace(self.temp_path, self.file_path)
+        except OSError as e:
+            self.abort()
+            raise OutputError(f"Ошибка при сохранении файла {self.file_path}: {e}")
+        self._file = None
+        self.temp_path = None
+        return self.file_path
+
+    def abort(self):
+        """Отменяет запись и удаляет временный файл"""
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+        self._file = None
+        if self.temp_path and os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+        self.temp_path = None
+
+    def __enter__(self) -> 'IncrementalNoteWriter':
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.temp_path is not None:
+            self.abort()
+        return False
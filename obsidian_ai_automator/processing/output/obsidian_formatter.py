@@ -2,6 +2,7 @@ import os
 import re
 from typing import Dict, Any
 from obsidian_ai_automator.processing.output.base_formatter import BaseFormatter
+from obsidian_ai_automator.processing.output.note_writer import IncrementalNoteWriter
 from obsidian_ai_automator.core.error_handler import OutputError
 
 
@@ -22,42 +23,69 @@ class ObsidianFormatter(BaseFormatter):
         
         return self.format(input_data)
     
-    def format(self, content: Dict[str, Any]) -> str:
+    def format_header(self, content: Dict[str, Any]) -> str:
         """
-        Форматирует контент в соответствии с требованиями Obsidian
+        Возвращает начало заметки до текста анализа (для постепенной записи)
         
         Args:
             content: Словарь с контентом для форматирования
-            
-        Returns:
-            Отформатированный контент в виде строки
         """
-        # Извлекаем данные из контента
         title = content.get('title', 'Без названия')
         tags = content.get('tags', [])
-        analysis = content.get('analysis', '')
-        transcript = content.get('transcript', '')
         
         # Формируем YAML frontmatter
         yaml_frontmatter = f"""---
 title: {title}
 tags: [{', '.join(tags)}]
 ---"""
+        return f"{yaml_frontmatter}\n## Анализ\n\n"
+    
+    def format_footer(self, content: Dict[str, Any]) -> str:
+        """
+        Возвращает окончание заметки после текста анализа (для постепенной записи)
         
-        # Формируем тело заметки
-        note_body = f"""
-## Анализ
-
-{analysis}
-
-## Полный Транскрипт
-
-{transcript}
-"""
+        Args:
+            content: Словарь с контентом для форматирования
+        """
+        transcript = content.get('transcript', '')
+        return f"\n\n## Полный Транскрипт\n\n{transcript}\n"
+    
+    def format(self, content: Dict[str, Any]) -> str:
+        """
+        Форматирует контент в соответствии с требованиями Obsidian
         
-        # Комбинируем всё вместе
-        formatted_content = f"{yaml_frontmatter}{note_body}"
-        return formatted_content
+        Args:
+            content: Словарь с контентом для форматирования
+            
+        Returns:
+            Отформатированный контент в виде строки
+        """
+        # Заметка собирается из тех же частей, что и при постепенной записи
+        analysis = content.get('analysis', '')
+        return f"{self.format_header(content)}{analysis}{self.format_footer(content)}"
+    
+    def get_output_path(self, file_path: str) -> str:
+        """
+        Возвращает путь к файлу заметки с безопасным именем
+        
+        Args:
+            file_path: Желаемый путь к файлу заметки
+        """
+        directory = os.path.dirname(file_path)
+        # Расширение сохраняем отдельно, иначе точка перед .md удаляется вместе с остальными символами
+        base_name, extension = os.path.splitext(os.path.basename(file_path))
+        safe_filename = re.sub(r'[^\w\s-]', '', base_name)
+        safe_filename = re.sub(r'[-\s]+', '_', safe_filename) + extension
+        return os.path.join(directory, safe_filename)
+    
+    def open_note_writer(self, file_path: str) -> IncrementalNoteWriter:
+        """
+        Создает объект для постепенной записи заметки
+        
+        Args:
+            file_path: Желаемый путь к файлу заметки
+        """
+        return IncrementalNoteWriter(self.get_output_path(file_path))
     
     def save_to_file(self, content: str, file_path: str) -> bool:
         """
@@ -71,18 +99,10 @@ tags: [{', '.join(tags)}]
             True если сохранение прошло успешно, иначе False
         """
         try:
-            # Создаем директорию, если она не существует
-            directory = os.path.dirname(file_path)
-            if directory:
-                os.makedirs(directory, exist_ok=True)
-            
-            # Определяем безопасное имя файла
-            safe_filename = re.sub(r'[^\w\s-]', '', os.path.basename(file_path))
-            safe_filename = re.sub(r'[-\s]+', '_', safe_filename)
-            final_file_path = os.path.join(directory, safe_filename)
-            
-            with open(final_file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # Файл пишется во временный и атомарно заменяется: прерванная запись не портит заметку
+            with self.open_note_writer(file_path) as writer:
+                writer.write(content)
+                writer.commit()
             
             return True
         except Exception as e:
@@ -2,17 +2,36 @@
 Пакет transcription для транскрибации аудио/видео
 """
 from .base_transcriber import BaseTranscriber
+from .transcript import Transcript, Segment, TimecodeGranularity
+from .word_timeline import Word, WordTimeline
 from .deepgram_transcriber import DeepgramTranscriber
 from .openai_transcriber import OpenAITranscriber
 from .whisper_transcriber import WhisperTranscriber
 from .ollama_transcriber import OllamaTranscriber
 from .local_whisper_transcriber import LocalWhisperTranscriber
+from .whisper_backends import WhisperBackend, get_whisper_backend
+from .model_registry import WhisperModelRegistry, get_model_registry
+from .audio_extractor import AudioExtractor
+from .chunked_transcriber import ChunkedTranscriber
+from .vad import VadTranscriber
 
 __all__ = [
     'BaseTranscriber',
+    'Transcript',
+    'Segment',
+    'Word',
+    'WordTimeline',
+    'TimecodeGranularity',
     'DeepgramTranscriber',
     'OpenAITranscriber',
     'WhisperTranscriber',
     'OllamaTranscriber',
-    'LocalWhisperTranscriber'
+    'LocalWhisperTranscriber',
+    'WhisperBackend',
+    'get_whisper_backend',
+    'WhisperModelRegistry',
+    'get_model_registry',
+    'AudioExtractor',
+    'ChunkedTranscriber',
+    'VadTranscriber'
 ]
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""
+Модуль для извлечения и сжатия звуковой дорожки перед отправкой на транскрибацию
+"""
+import os
+import shutil
+import subprocess
+import time
+from typing import Callable, Optional
+from obsidian_ai_automator.core.logger import Logger
+from obsidian_ai_automator.core.error_handler import TranscriptionError
+from obsidian_ai_automator.storage.fingerprint import compute_fingerprint
+
+
+# Расширения, которые уже являются сжатой речевой дорожкой и не требуют перекодирования
+PASSTHROUGH_EXTENSIONS = ('.ogg', '.opus')
+
+
+def ffmpeg_decoder(input_path: str, output_path: str, sample_rate: int, bitrate: str):
+    """
+    Извлекает звуковую дорожку в моно Opus с помощью ffmpeg
+
+    Args:
+        input_path: Исходный аудио/видео файл
+        output_path: Путь для результата (.ogg)
+        sample_rate: Частота дискретизации в Гц
+        bitrate: Битрейт Opus (например, "24k")
+    """
+    command = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+        "-i", input_path,
+        "-vn", "-ac", "1", "-ar", str(sample_rate),
+        "-c:a", "libopus", "-b:a", bitrate, "-application", "voip",
+        output_path
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise TranscriptionError(f"Ошибка ffmpeg при извлечении аудио из {input_path}: {result.stderr.strip()}")
+
+
+class AudioExtractor:
+    """
+    Готовит компактную речевую дорожку для провайдеров транскрибации
+
+    Результат кэшируется по хэшу содержимого исходного файла, поэтому повторные
+    попытки и разные провайдеры используют одну и ту же извлеченную дорожку
+    """
+
+    def __init__(self, cache_dir: str = ".audio_cache", sample_rate: int = 16000, bitrate: str = "24k",
+                 max_cache_age_hours: float = 24,
+                 decoder: Callable[[str, str, int, str], None] = None):
+        """
+        Args:
+            cache_dir: Папка для извлеченных дорожек
+            sample_rate: Частота дискретизации результата в Гц
+            bitrate: Битрейт результата
+            max_cache_age_hours: Время хранения дорожек в кэше (0 - хранить всегда)
+            decoder: Функция декодирования (input_path, output_path, sample_rate, bitrate);
+                по умолчанию используется ffmpeg
+        """
+        self.cache_dir = cache_dir
+        self.sample_rate = sample_rate
+        self.bitrate = bitrate
+        self.max_cache_age_hours = max_cache_age_hours
+        self.logger = Logger()
+
+        if decoder is None and shutil.which("ffmpeg") is None:
+            self.logger.warning("ffmpeg не найден, файлы отправляются на транскрибацию без извлечения аудио")
+            self.decoder = None
+        else:
+            self.decoder = decoder or ffmpeg_decoder
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.purge_expired()
+
+    @property
+    def is_available(self) -> bool:
+        """Проверяет, доступен ли декодер"""
+        return self.decoder is not None
+
+    def get_cached_path(self, content_hash: str) -> str:
+        """Возвращает путь к дорожке в кэше для хэша содержимого"""
+        return os.path.join(self.cache_dir, f"{content_hash}.ogg")
+
+    def prepare(self, file_path: str, content_hash: Optional[str] = None) -> str:
+        """
+        Возвращает путь к файлу, который нужно отправить провайдеру
+
+        Args:
+            file_path: Исходный аудио/видео файл
+            content_hash: Хэш содержимого файла, если уже вычислен
+
+        Returns:
+            Путь к извлеченной дорожке или к исходному файлу, если извлечение не требуется
+        """
+        if not self.is_available or os.path.splitext(file_path)[1].lower() in PASSTHROUGH_EXTENSIONS:
+            return file_path
+
+        content_hash = content_hash or compute_fingerprint(file_path)
+        output_path = self.get_cached_path(content_hash)
+        if os.path.exists(output_path):
+            self.logger.info(f"Используем извлеченную ранее аудиодорожку: {output_path}")
+            return output_path
+
+        # Пишем во временный файл, чтобы прерванное извлечение не попало в кэш
+        temp_path = f"{output_path}.{os.getpid()}.tmp.ogg"
+        start_time = time.time()
+        try:
+            self.decoder(file_path, temp_path, self.sample_rate, self.bitrate)
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        source_size = os.path.getsize(file_path)
+        output_size = os.path.getsize(output_path)
+        self.logger.info(f"Аудио извлечено за {time.time() - start_time:.1f} сек: "
+                         f"{source_size / 1e6:.1f} МБ -> {output_size / 1e6:.1f} МБ ({file_path})")
+        return output_path
+
+    def purge_expired(self):
+        """Удаляет из кэша дорожки старше max_cache_age_hours"""
+        if self.max_cache_age_hours <= 0:
+            return
+
+        expiration_time = time.time() - self.max_cache_age_hours * 3600
+        for entry in os.scandir(self.cache_dir):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < expiration_time:
+                    os.remove(entry.path)
+            except OSError as e:
+                self.logger.warning(f"Не удалось удалить устаревшую аудиодорожку {entry.path}: {e}")
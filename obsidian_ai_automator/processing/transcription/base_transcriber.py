@@ -1,6 +1,8 @@
-from abc import ABC, abstractmethod
-from typing import Dict, Any
+import asyncio
+from abc import abstractmethod
+from typing import Any, Dict
 from obsidian_ai_automator.processing.base_processor import BaseProcessor
+from obsidian_ai_automator.processing.transcription.transcript import Transcript
 
 
 class BaseTranscriber(BaseProcessor):
@@ -8,7 +10,42 @@ class BaseTranscriber(BaseProcessor):
     Абстрактный базовый класс для транскриберов
     """
     
+    # Транскрибер реализует асинхронные методы без выделения потока на запрос
+    supports_native_async = False
+    
+    # Транскрибер отправляет файл по сети, поэтому ему выгодно получать извлеченную аудиодорожку
+    uploads_media = False
+    
+    def close(self):
+        """Освобождает ресурсы транскрибера (пулы процессов, модели)"""
+        pass
+    
+    def cache_identity(self) -> Dict[str, Any]:
+        """
+        Параметры, от которых зависит результат транскрибации (часть ключа хранилища транскрипций)
+        
+        Returns:
+            Словарь с провайдером, моделью и опциями распознавания
+        """
+        return {"provider": type(self).__name__, "model": None, "options": {}}
+    
     @abstractmethod
+    def get_transcript(self, file_path: str) -> Transcript:
+        """
+        Транскрибирует файл одним запросом к провайдеру
+        
+        Текстовые представления строятся из результата без повторной отправки файла.
+        Транскрибер, который получает от провайдера только строку с тайм-кодами,
+        возвращает Transcript.from_timecoded_text(...)
+        
+        Args:
+            file_path: Путь к файлу для транскрибации
+            
+        Returns:
+            Структурированная транскрипция
+        """
+        pass
+    
     def transcribe(self, file_path: str) -> str:
         """
         Транскрибирует аудио/видео файл
@@ -19,9 +56,8 @@ class BaseTranscriber(BaseProcessor):
         Returns:
             Текст транскрипции
         """
-        pass
+        return self.get_transcript(file_path).text
     
-    @abstractmethod
     def get_transcription_with_timecodes(self, file_path: str) -> str:
         """
         Транскрибирует файл с тайм-кодами
@@ -32,4 +68,43 @@ class BaseTranscriber(BaseProcessor):
         Returns:
             Транскрипция с тайм-кодами
         """
-        pass
\ No newline at end of file
+        return self.get_transcript(file_path).timecoded_text
+    
+    async def get_transcript_async(self, file_path: str) -> Transcript:
+        """
+        Асинхронно транскрибирует файл одним запросом к провайдеру
+        
+        По умолчанию выполняет синхронный метод в отдельном потоке.
+        Провайдеры с собственным асинхронным клиентом переопределяют этот метод.
+        
+        Args:
+            file_path: Путь к файлу для транскрибации
+            
+        Returns:
+            Структурированная транскрипция
+        """
+        return await asyncio.to_thread(self.get_transcript, file_path)
+    
+    async def transcribe_async(self, file_path: str) -> str:
+        """
+        Асинхронно транскрибирует аудио/видео файл
+        
+        Args:
+            file_path: Путь к файлу для транскрибации
+            
+        Returns:
+            Текст транскрипции
+        """
+        return (await self.get_transcript_async(file_path)).text
+    
+    async def get_transcription_with_timecodes_async(self, file_path: str) -> str:
+        """
+        Асинхронно транскрибирует файл с тайм-кодами
+        
+        Args:
+            file_path: Путь к файлу для транскрибации
+            
+        Returns:
+            Транскрипция с тайм-кодами
+        """
+        return (await self.get_transcript_async(file_path)).timecoded_text
@@ -0,0 +1,322 @@
+"""
+Модуль для транскрибации длинных записей по частям
+"""
+import asyncio
+import math
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from obsidian_ai_automator.processing.transcription.base_transcriber import BaseTranscriber
+from obsidian_ai_automator.processing.transcription.transcript import Transcript, Segment
+from obsidian_ai_automator.core.error_handler import TranscriptionError, ProcessingError, extract_http_status
+from obsidian_ai_automator.core.logger import Logger
+from obsidian_ai_automator.core.scheduler import probe_media_duration
+
+
+SILENCE_START_PATTERN = re.compile(r"silence_start:\s*(-?[\d.]+)")
+SILENCE_END_PATTERN = re.compile(r"silence_end:\s*([\d.]+)")
+
+
+def detect_silences(file_path: str, noise_db: int = -35, min_duration: float = 0.5) -> List[Tuple[float, float]]:
+    """
+    Находит паузы в записи с помощью фильтра ffmpeg silencedetect
+
+    Args:
+        file_path: Путь к аудио/видео файлу
+        noise_db: Порог тишины в дБ
+        min_duration: Минимальная длительность паузы в секундах
+
+    Returns:
+        Список пар (начало, конец) пауз в секундах
+    """
+    command = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-i", file_path, "-vn",
+        "-af", f"silencedetect=noise={noise_db}dB:d={min_duration}", "-f", "null", "-"
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+
+    silences = []
+    silence_start = None
+    for line in result.stderr.splitlines():
+        start_match = SILENCE_START_PATTERN.search(line)
+        if start_match:
+            silence_start = max(0.0, float(start_match.group(1)))
+            continue
+        end_match = SILENCE_END_PATTERN.search(line)
+        if end_match and silence_start is not None:
+            silences.append((silence_start, float(end_match.group(1))))
+            silence_start = None
+    return silences
+
+
+def extract_segment(file_path: str, output_path: str, start: float, duration: float):
+    """
+    Вырезает фрагмент записи в моно Opus с помощью ffmpeg
+
+    Args:
+        file_path: Исходный аудио/видео файл
+        output_path: Путь для фрагмента (.ogg)
+        start: Начало фрагмента в секундах
+        duration: Длительность фрагмента в секундах
+    """
+    command = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+        "-ss", f"{start:.3f}", "-t", f"{duration:.3f}", "-i", file_path,
+        "-vn", "-ac", "1", "-ar", "16000", "-c:a", "libopus", "-b:a", "24k", output_path
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise TranscriptionError(f"Ошибка ffmpeg при нарезке {file_path}: {result.stderr.strip()}")
+
+
+def plan_chunks(duration: float, silences: List[Tuple[float, float]], chunk_seconds: float,
+                search_seconds: float) -> List[Tuple[float, float]]:
+    """
+    Делит запись на части, выбирая границы в паузах рядом с целевой длиной части
+
+    Args:
+        duration: Длительность записи в секундах
+        silences: Паузы (начало, конец) в секундах
+        chunk_seconds: Целевая длина части
+        search_seconds: Насколько далеко от целевой границы искать паузу
+
+    Returns:
+        Список пар (начало, конец) частей без перекрытия
+    """
+    midpoints = [(start + end) / 2 for start, end in silences]
+    chunks = []
+    chunk_start = 0.0
+    while duration - chunk_start > chunk_seconds * 1.5:
+        target = chunk_start + chunk_seconds
+        candidates = [point for point in midpoints
+                      if abs(point - target) <= search_seconds and point > chunk_start + chunk_seconds / 2]
+        # Без подходящей паузы режем по целевой границе, перекрытие сгладит разрыв
+        boundary = min(candidates, key=lambda point: abs(point - target)) if candidates else target
+        chunks.append((chunk_start, boundary))
+        chunk_start = boundary
+    chunks.append((chunk_start, duration))
+    return chunks
+
+
+class ChunkedTranscriber(BaseTranscriber):
+    """
+    Обертка над любым транскрибером: делит длинную запись на части по паузам,
+    транскрибирует части параллельно и склеивает результат с исправленными тайм-кодами
+
+    Каждая часть (кроме первой) начинается на overlap_seconds раньше своей границы,
+    чтобы слово на стыке не потерялось; фрагменты из перекрытия отбрасываются
+    при склейке. Ошибка в части приводит к повтору только этой части
+    """
+
+    def __init__(self, transcriber: BaseTranscriber, chunk_seconds: float = 600, overlap_seconds: float = 2,
+                 search_seconds: float = 60, max_concurrency: int = 4, max_retries: int = 2,
+                 retry_delay: float = 2.0,
+                 duration_probe: Callable[[str], Optional[float]] = probe_media_duration,
+                 silence_detector: Callable[[str], List[Tuple[float, float]]] = detect_silences,
+                 segment_extractor: Callable[[str, str, float, float], None] = extract_segment):
+        """
+        Args:
+            transcriber: Транскрибер, который обрабатывает отдельные части
+            chunk_seconds: Целевая длина части в секундах
+            overlap_seconds: Перекрытие соседних частей в секундах
+            search_seconds: Окно поиска паузы вокруг целевой границы
+            max_concurrency: Количество частей, транскрибируемых одновременно
+            max_retries: Количество повторов для части после ошибки
+            retry_delay: Начальная пауза перед повтором (удваивается с каждой попыткой)
+            duration_probe: Функция определения длительности записи
+            silence_detector: Функция поиска пауз
+            segment_extractor: Функция вырезания фрагмента (источник, результат, начало, длительность)
+        """
+        self.transcriber = transcriber
+        self.chunk_seconds = chunk_seconds
+        self.overlap_seconds = overlap_seconds
+        self.search_seconds = search_seconds
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.duration_probe = duration_probe
+        self.silence_detector = silence_detector
+        self.segment_extractor = segment_extractor
+        self.uploads_media = transcriber.uploads_media
+        # Синхронный транскрибер выполняется в пуле потоков стадии, а не в пуле цикла событий
+        self.supports_native_async = transcriber.supports_native_async
+        self.logger = Logger()
+
+        # Нарезка через ffmpeg по умолчанию недоступна без ffmpeg, тогда файлы передаются целиком
+        self.is_available = segment_extractor is not extract_segment or shutil.which("ffmpeg") is not None
+
+    def cache_identity(self) -> Dict[str, Any]:
+        # Транскрипция по частям равноценна транскрипции целиком тем же провайдером
+        return self.transcriber.cache_identity()
+    
+    def close(self):
+        """Освобождает ресурсы вложенного транскрибера"""
+        self.transcriber.close()
+
+    def validate_config(self, config: Dict[str, Any]) -> bool:
+        """Проверяет конфигурацию транскрибера"""
+        return self.transcriber.validate_config(config)
+
+    def process(self, input_data: str, config: Dict[str, Any]) -> str:
+        """Обрабатывает файл и возвращает транскрипцию"""
+        return self.transcribe(input_data)
+
+    def _plan(self, file_path: str) -> Optional[List[Tuple[float, float]]]:
+        """
+        Возвращает части записи или None, если запись достаточно короткая для одного запроса
+        """
+        if not self.is_available:
+            return None
+
+        duration = self.duration_probe(file_path)
+        if duration is None or duration <= self.chunk_seconds * 1.5:
+            return None
+
+        chunks = plan_chunks(duration, self.silence_detector(file_path), self.chunk_seconds, self.search_seconds)
+        self.logger.info(f"Запись {file_path} длительностью {duration:.0f} сек разделена на {len(chunks)} частей")
+        return chunks
+
+    def _extract_chunks(self, file_path: str, chunks: List[Tuple[float, float]], work_dir: str) -> List[Tuple[str, float, float]]:
+        """
+        Вырезает части записи во временную папку
+
+        Returns:
+            Список (путь к части, смещение начала части, номинальное начало части)
+        """
+        extracted = []
+        for index, (start, end) in enumerate(chunks):
+            offset = max(0.0, start - self.overlap_seconds) if index > 0 else 0.0
+            chunk_path = os.path.join(work_dir, f"chunk_{index:04d}.ogg")
+            self.segment_extractor(file_path, chunk_path, offset, end - offset)
+            extracted.append((chunk_path, offset, start))
+        return extracted
+
+    def _trim_overlap(self, transcript: Transcript, offset: float, nominal_start: float) -> Transcript:
+        """Переводит время части на шкалу исходной записи и отбрасывает перекрытие"""
+        def in_overlap(start: float, end: Optional[float]) -> bool:
+            # Без времени конца (тайм-коды с точностью до секунды) считаем, что фрагмент длится секунду
+            return (end if end is not None and not math.isnan(end) else start + 1) <= nominal_start
+
+        shifted = transcript.map_times(lambda seconds: seconds + offset)
+        timeline = shifted.timeline
+        kept_words = []
+        segments = []
+        for segment in shifted.segments:
+            if segment.word_count:
+                words = [index for index in range(segment.first_word, segment.first_word + segment.word_count)
+                         if not in_overlap(timeline.starts[index], timeline.ends[index])]
+                if not words:
+                    continue  # Фрагмент из перекрытия уже есть в предыдущей части
+                text, start = segment.text, segment.start
+                if len(words) < segment.word_count:
+                    text = " ".join(timeline.vocabulary[timeline.word_ids[index]] for index in words)
+                    start = timeline.starts[words[0]]
+                segment = Segment(text, start, segment.end, segment.speaker, segment.confidence,
+                                  len(kept_words), len(words))
+                kept_words.extend(words)
+            elif in_overlap(segment.start, segment.end):
+                continue
+            segments.append(segment)
+        return Transcript(segments, transcript.granularity, transcript.language, timeline=timeline.select(kept_words))
+    
+    def _retry_or_raise(self, error: Exception, attempt: int, index: int) -> float:
+        """
+        Решает, повторять ли транскрибацию части после ошибки
+
+        Перегрузку провайдера (429 или 5xx) локально не повторяем: ошибка с исходным
+        HTTP-статусом и паузой Retry-After поднимается в адаптивный лимит запросов
+
+        Returns:
+            Пауза перед повтором в секундах
+
+        Raises:
+            TranscriptionError: Если запрос повторять не нужно или попытки исчерпаны
+        """
+        if isinstance(error, ProcessingError):
+            status_code, retry_after = error.status_code, error.retry_after
+        else:
+            status_code, retry_after = extract_http_status(error)
+        failure = TranscriptionError(f"Не удалось транскрибировать часть {index + 1}: {error}", status_code, retry_after)
+        if failure.is_overload or attempt >= self.max_retries:
+            raise failure from error
+        self.logger.warning(f"Ошибка транскрибации части {index + 1}, повтор {attempt + 1}/{self.max_retries}: {error}")
+        return self.retry_delay * (2 ** attempt)
+
+    def _transcribe_chunk(self, chunk_path: str, index: int) -> Transcript:
+        """Транскрибирует часть с повторами при ошибке"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.transcriber.get_transcript(chunk_path)
+            except Exception as e:
+                time.sleep(self._retry_or_raise(e, attempt, index))
+
+    async def _transcribe_chunk_async(self, chunk_path: str, index: int) -> Transcript:
+        """Асинхронно транскрибирует часть с повторами при ошибке"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self.transcriber.get_transcript_async(chunk_path)
+            except Exception as e:
+                await asyncio.sleep(self._retry_or_raise(e, attempt, index))
+
+    def _stitch(self, transcripts: List[Transcript], extracted: List[Tuple[str, float, float]]) -> Transcript:
+        """Склеивает транскрипции частей в одну транскрипцию на шкале исходной записи"""
+        return Transcript.concatenate([self._trim_overlap(transcript, offset, nominal_start)
+                                       for transcript, (_, offset, nominal_start) in zip(transcripts, extracted)])
+    
+    def _transcribe_chunks(self, file_path: str, chunks: List[Tuple[float, float]]) -> Transcript:
+        """Транскрибирует части в пуле потоков и склеивает результат"""
+        with tempfile.TemporaryDirectory(prefix="chunks_") as work_dir:
+            extracted = self._extract_chunks(file_path, chunks, work_dir)
+            with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="chunk") as executor:
+                transcripts = list(executor.map(self._transcribe_chunk, [path for path, _, _ in extracted],
+                                                range(len(extracted))))
+        return self._stitch(transcripts, extracted)
+
+    async def _transcribe_chunks_async(self, file_path: str, chunks: List[Tuple[float, float]]) -> Transcript:
+        """Асинхронно транскрибирует части с ограничением параллельности и склеивает результат"""
+        with tempfile.TemporaryDirectory(prefix="chunks_") as work_dir:
+            extracted = await asyncio.to_thread(self._extract_chunks, file_path, chunks, work_dir)
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def transcribe_with_limit(index: int, chunk_path: str) -> Transcript:
+                async with semaphore:
+                    return await self._transcribe_chunk_async(chunk_path, index)
+
+            transcripts = await asyncio.gather(*(transcribe_with_limit(index, path)
+                                                 for index, (path, _, _) in enumerate(extracted)))
+        return self._stitch(transcripts, extracted)
+
+    def get_transcript(self, file_path: str) -> Transcript:
+        """
+        Транскрибирует файл, разбивая длинную запись на части
+
+        Args:
+            file_path: Путь к файлу для транскрибации
+
+        Returns:
+            Транскрипция со временем исходной записи
+        """
+        chunks = self._plan(file_path)
+        if chunks is None:
+            return self.transcriber.get_transcript(file_path)
+        return self._transcribe_chunks(file_path, chunks)
+
+    async def get_transcript_async(self, file_path: str) -> Transcript:
+        """
+        Асинхронно транскрибирует файл, обрабатывая части параллельно
+
+        Args:
+            file_path: Путь к файлу для транскрибации
+
+        Returns:
+            Транскрипция со временем исходной записи
+        """
+        chunks = await asyncio.to_thread(self._plan, file_path)
+        if chunks is None:
+            return await self.transcriber.get_transcript_async(file_path)
+        return await self._transcribe_chunks_async(file_path, chunks)
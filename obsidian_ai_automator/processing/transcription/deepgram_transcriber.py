@@ -1,9 +1,104 @@
+import bisect
 import json
+import mimetypes
 import requests
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List
 from obsidian_ai_automator.processing.transcription.base_transcriber import BaseTranscriber
-from obsidian_ai_automator.core.error_handler import TranscriptionError
+from obsidian_ai_automator.processing.transcription.transcript import Transcript, Segment, TimecodeGranularity
+from obsidian_ai_automator.processing.transcription.word_timeline import WordTimeline, NO_SPEAKER
+from obsidian_ai_automator.core.error_handler import TranscriptionError, extract_http_status
+from obsidian_ai_automator.core.http_client import AsyncHttpClient
+
+
+# MIME-типы, которые mimetypes определяет неточно или не знает
+MEDIA_CONTENT_TYPES = {
+    '.ogg': 'audio/ogg',
+    '.opus': 'audio/ogg',
+    '.m4a': 'audio/mp4',
+    '.mkv': 'video/x-matroska',
+    '.webm': 'video/webm'
+}
+
+
+def _append_words(timeline: WordTimeline, alternative: Dict[str, Any]):
+    """Добавляет слова варианта распознавания в шкалу слов, собирая столбцы целиком"""
+    words = alternative.get('words', [])
+    if not words:
+        return
+    timeline.extend(WordTimeline.from_columns(
+        [(word_info.get('punctuated_word') or word_info['word']).strip() for word_info in words],
+        [word_info['start'] for word_info in words],
+        [word_info.get('end') for word_info in words],
+        [word_info.get('speaker') for word_info in words],
+        [word_info.get('confidence') for word_info in words]
+    ))
+
+
+def _group_by_sentences(alternative: Dict[str, Any], timeline: WordTimeline, first_word: int) -> List[Segment]:
+    """Формирует сегменты из предложений абзацев Deepgram и распределяет по ним слова"""
+    segments = []
+    word_index = first_word
+    for paragraph in alternative['paragraphs']['paragraphs']:
+        for sentence in paragraph.get('sentences', []):
+            sentence_start = word_index
+            # Допуск учитывает округление времени до float32 в шкале слов
+            word_index = max(word_index, bisect.bisect_left(timeline.starts, sentence['end'] - 1e-3, lo=word_index))
+            segments.append(Segment(sentence['text'], sentence['start'], sentence['end'], paragraph.get('speaker'),
+                                    first_word=sentence_start, word_count=word_index - sentence_start))
+    # Слова после последнего предложения (если границы не совпали) добавляем к нему
+    if segments:
+        segments[-1].word_count += len(timeline) - word_index
+    return segments
+
+
+def _group_by_speaker(timeline: WordTimeline, first_word: int) -> List[Segment]:
+    """Формирует сегменты из непрерывных реплик одного спикера"""
+    segments = []
+    for index in range(first_word, len(timeline)):
+        speaker = timeline.speakers[index]
+        if segments and timeline.speakers[index - 1] == speaker:
+            segments[-1].word_count += 1
+            segments[-1].end = timeline.ends[index]
+        else:
+            segments.append(Segment("", timeline.starts[index], timeline.ends[index],
+                                    None if speaker == NO_SPEAKER else speaker, first_word=index, word_count=1))
+    for segment in segments:
+        segment.text = timeline.render_text(segment.first_word, segment.first_word + segment.word_count)
+    return segments
+
+
+def parse_deepgram_response(data: Dict[str, Any]) -> Transcript:
+    """
+    Преобразует ответ Deepgram в структурированную транскрипцию
+    
+    Args:
+        data: JSON-ответ Deepgram /v1/listen
+        
+    Returns:
+        Транскрипция со словами в WordTimeline
+    """
+    if not ('results' in data and 'channels' in data['results'] and data['results']['channels']):
+        raise TranscriptionError("Транскрипция не найдена в ответе Deepgram")
+    
+    timeline = WordTimeline()
+    segments = []
+    for channel in data['results']['channels']:
+        if not channel.get('alternatives'):
+            continue
+        # Первый вариант - наиболее вероятный, остальные являются альтернативными гипотезами
+        alternative = channel['alternatives'][0]
+        first_word = len(timeline)
+        _append_words(timeline, alternative)
+        if alternative.get('paragraphs', {}).get('paragraphs'):
+            segments.extend(_group_by_sentences(alternative, timeline, first_word))
+        elif len(timeline) > first_word:
+            segments.extend(_group_by_speaker(timeline, first_word))
+        elif alternative.get('transcript'):
+            segments.append(Segment(alternative['transcript'], 0.0, confidence=alternative.get('confidence')))
+    
+    duration = data.get('metadata', {}).get('duration')
+    return Transcript(segments, granularity=TimecodeGranularity.WORD, duration=duration, timeline=timeline)
 
 
 class DeepgramTranscriber(BaseTranscriber):
@@ -11,8 +106,12 @@ class DeepgramTranscriber(BaseTranscriber):
     Реализация транскрибера с использованием Deepgram API
     """
     
-    def __init__(self, api_key: str = None):
+    supports_native_async = True
+    uploads_media = True
+    
+    def __init__(self, api_key: str = None, timeout: float = None):
         self.api_key = api_key  # Оставляем None, если не передан
+        self.timeout = timeout  # Ограничение времени запроса в секундах (None - без ограничений)
         # Не загружаем ключ автоматически, только при необходимости
     
     def _load_api_key(self) -> str:
@@ -48,97 +147,92 @@ class DeepgramTranscriber(BaseTranscriber):
         
         return self.transcribe(input_data)
     
-    def transcribe(self, file_path: str) -> str:
-        """
-        Транскрибирует аудио/видео файл
-        
-        Args:
-            file_path: Путь к файлу для транскрибации
-            
-        Returns:
-            Текст транскрипции
-        """
+    # Параметры распознавания; абзацы запрашиваются всегда: из одного ответа строятся и текст, и тайм-коды
+    model = "nova-2"
+    query_options = {"punctuate": "true", "diarize": "true", "paragraphs": "true", "language": "ru"}
+    
+    def cache_identity(self) -> Dict[str, Any]:
+        return {"provider": "deepgram", "model": self.model, "options": dict(self.query_options)}
+    
+    def _build_url(self) -> str:
+        """Формирует URL запроса к Deepgram API"""
+        query = "&".join(f"{name}={value}" for name, value in self.query_options.items())
+        return f"https://api.deepgram.com/v1/listen?{query}&model={self.model}"
+    
+    def _build_headers(self, file_path: str) -> Dict[str, str]:
+        """Формирует заголовки запроса к Deepgram API с MIME-типом по расширению файла"""
+        content_type = MEDIA_CONTENT_TYPES.get(os.path.splitext(file_path)[1].lower())
+        return {
+            "Authorization": f"Token {self.api_key}",
+            "Content-Type": content_type or mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+        }
+    
+    def _request(self, file_path: str) -> Dict[str, Any]:
+        """Отправляет файл в Deepgram API и возвращает JSON-ответ"""
         # Проверяем API-ключ перед выполнением запроса
         self._ensure_api_key()
         
-        # URL для Deepgram API
-        model = "nova-2"  # по умолчанию
-        language = "ru"   # по умолчанию
-        
-        DEEPGRAM_URL = f"https://api.deepgram.com/v1/listen?punctuate=true&diarize=true&language={language}&model={model}"
-
-        headers = {
-            "Authorization": f"Token {self.api_key}",
-            "Content-Type": "video/mp4"  # или другой соответствующий MIME-тип видео
-        }
-
         try:
             with open(file_path, 'rb') as audio_file:
-                response = requests.post(DEEPGRAM_URL, headers=headers, data=audio_file)
+                response = requests.post(self._build_url(), headers=self._build_headers(file_path),
+                                         data=audio_file,
+                                         timeout=self.timeout)
                 response.raise_for_status()
-
-            data = response.json()
             
-            # Извлечение текста транскрипции
-            if 'results' in data and 'channels' in data['results'] and data['results']['channels']:
-                transcript = ""
-                for channel in data['results']['channels']:
-                    for alternative in channel['alternatives']:
-                        transcript += alternative['transcript'] + " "
-                return transcript.strip()
-            else:
-                raise TranscriptionError("Транскрипция не найдена в ответе Deepgram")
-                
+            return response.json()
         except requests.exceptions.RequestException as e:
-            raise TranscriptionError(f"Ошибка при обращении к Deepgram API: {e}")
+            raise TranscriptionError(f"Ошибка при обращении к Deepgram API: {e}", *extract_http_status(e))
+    
+    async def _request_async(self, file_path: str) -> Dict[str, Any]:
+        """Асинхронно отправляет файл в Deepgram API через общий пул соединений"""
+        import aiohttp
+        
+        self._ensure_api_key()
+        
+        try:
+            session = await AsyncHttpClient.get_session()
+            with open(file_path, 'rb') as audio_file:
+                async with session.post(self._build_url(), headers=self._build_headers(file_path),
+                                        data=audio_file,
+                                        timeout=AsyncHttpClient.request_timeout(self.timeout)) as response:
+                    response.raise_for_status()
+                    return await response.json()
+        except aiohttp.ClientError as e:
+            raise TranscriptionError(f"Ошибка при обращении к Deepgram API: {e}", *extract_http_status(e))
+    
+    def get_transcript(self, file_path: str) -> Transcript:
+        """
+        Транскрибирует аудио/видео файл одним запросом к Deepgram
+        
+        Args:
+            file_path: Путь к файлу для транскрибации
+            
+        Returns:
+            Структурированная транскрипция
+        """
+        try:
+            return parse_deepgram_response(self._request(file_path))
+        except TranscriptionError:
+            raise
         except Exception as e:
             raise TranscriptionError(f"Неизвестная ошибка при транскрипции с Deepgram: {e}")
-
-    def get_transcription_with_timecodes(self, file_path: str) -> str:
+    
+    async def get_transcript_async(self, file_path: str) -> Transcript:
         """
-        Транскрибирует файл с тайм-кодами
+        Асинхронно транскрибирует файл одним запросом без выделения потока на запрос
         
         Args:
             file_path: Путь к файлу для транскрибации
             
         Returns:
-            Транскрипция с тайм-кодами
+            Структурированная транскрипция
         """
-        # Проверяем API-ключ перед выполнением запроса
-        self._ensure_api_key()
+        if not AsyncHttpClient.is_available():
+            return await super().get_transcript_async(file_path)
         
-        # URL для Deepgram API
-        model = "nova-2"  # по умолчанию
-        language = "ru"   # по умолчанию
-        
-        DEEPGRAM_URL = f"https://api.deepgram.com/v1/listen?punctuate=true&diarize=true&language={language}&model={model}&paragraphs=true"
-
-        headers = {
-            "Authorization": f"Token {self.api_key}",
-            "Content-Type": "video/mp4"  # или другой соответствующий MIME-тип видео
-        }
-
         try:
-            with open(file_path, 'rb') as audio_file:
-                response = requests.post(DEEPGRAM_URL, headers=headers, data=audio_file)
-                response.raise_for_status()
-
-            data = response.json()
-            
-            # Извлечение транскрипта с тайм-кодами
-            full_text_with_timecodes = []
-            if 'results' in data and 'channels' in data['results'] and data['results']['channels']:
-                for channel in data['results']['channels']:
-                    for alternative in channel['alternatives']:
-                        for word_info in alternative['words']:
-                            start_time = str(int(word_info['start'] // 3600)).zfill(2) + ':' + \
-                                         str(int((word_info['start'] % 3600) // 60)).zfill(2) + ':' + \
-                                         str(int(word_info['start'] % 60)).zfill(2)
-                            full_text_with_timecodes.append(f"[{start_time}] {word_info['word'].strip()}")
-            
-            return " ".join(full_text_with_timecodes)
-                
-        except requests.exceptions.RequestException as e:
-            raise TranscriptionError(f"Ошибка при обращении к Deepgram API: {e}")
+            return parse_deepgram_response(await self._request_async(file_path))
+        except TranscriptionError:
+            raise
         except Exception as e:
-            raise TranscriptionError(f"Неизвестная ошибка при транскрипции с Deepgram: {e}")
\ No newline at end of file
+            raise TranscriptionError(f"Неизвестная ошибка при транскрипции с Deepgram: {e}")
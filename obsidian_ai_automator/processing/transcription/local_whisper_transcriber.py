@@ -1,32 +1,162 @@
 """
 Модуль для транскрибации с использованием локальной модели Whisper
+
+Модель выполняется одним из движков whisper_backends (openai-whisper или faster-whisper)
 """
+import asyncio
+import multiprocessing
 import os
-from typing import Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
 from obsidian_ai_automator.processing.transcription.base_transcriber import BaseTranscriber
+from obsidian_ai_automator.processing.transcription.transcript import Transcript
+from obsidian_ai_automator.processing.transcription.whisper_transcriber import parse_whisper_result
+from obsidian_ai_automator.processing.transcription.whisper_backends import WhisperBackend, get_whisper_backend
+from obsidian_ai_automator.processing.transcription.model_registry import WhisperModelRegistry, get_model_registry
 from obsidian_ai_automator.core.error_handler import TranscriptionError
 
 
+# Движок и модель, загруженная в процессе-воркере пула
+_worker_backend: Optional[WhisperBackend] = None
+_worker_model = None
+
+
+def _partition_cpus(workers: int) -> List[List[int]]:
+    """
+    Делит доступные процессору ядра на непересекающиеся группы для воркеров
+    
+    Args:
+        workers: Количество воркеров
+    
+    Returns:
+        Список групп номеров ядер
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count() or 1))
+    
+    workers = max(1, min(workers, len(cpus)))
+    group_size, remainder = divmod(len(cpus), workers)
+    groups = []
+    start = 0
+    for index in range(workers):
+        size = group_size + (1 if index < remainder else 0)
+        groups.append(cpus[start:start + size])
+        start += size
+    return groups
+
+
+def _init_worker(backend_name: str, compute_type: str, model_size: str, cpu_groups: List[List[int]],
+                 threads_per_worker: int, counter):
+    """
+    Инициализирует процесс-воркер: закрепляет его за группой ядер,
+    ограничивает число потоков вычислений и заранее загружает модель
+    """
+    global _worker_backend, _worker_model
+    
+    with counter.get_lock():
+        worker_index = counter.value
+        counter.value += 1
+    cpu_group = cpu_groups[worker_index % len(cpu_groups)]
+    threads = threads_per_worker or len(cpu_group)
+    
+    # Переменные окружения должны быть заданы до импорта torch/ctranslate2
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpu_group)
+    
+    _worker_backend = get_whisper_backend(backend_name, compute_type)
+    _worker_model = _worker_backend.load_model(model_size, threads)
+
+
+def _worker_transcribe(file_path: str, word_timestamps: bool) -> Dict[str, Any]:
+    """
+    Транскрибирует файл моделью процесса-воркера
+    
+    Returns:
+        Словарь с текстом и сегментами (только поля, нужные для транскрипции)
+    """
+    return _worker_backend.transcribe(_worker_model, file_path, word_timestamps)
+
+
 class LocalWhisperTranscriber(BaseTranscriber):
     """
     Реализация транскрибера с использованием локальной модели Whisper
+    
+    При workers = 1 модель берется из общего реестра процесса, поэтому несколько
+    транскриберов (например, двух оркестраторов) используют одну ее копию.
+    При workers > 1 транскрибация выполняется в пуле процессов, где каждый воркер
+    держит свою заранее загруженную модель и использует отдельную группу ядер
     """
     
-    def __init__(self, model_size: str = "base"):
-        # Инициализируем модель при первом использовании, чтобы избежать долгой инициализации при импорте
-        self._model = None
+    def __init__(self, model_size: str = "base", workers: int = 1, threads_per_worker: int = 0,
+                 word_timestamps: bool = True, backend: str = "openai-whisper", compute_type: str = "int8",
+                 idle_unload_seconds: Optional[float] = None, registry: Optional[WhisperModelRegistry] = None):
+        # Модель загружается при первом использовании (или при warmup), чтобы избежать долгой инициализации при импорте
+        self.registry = registry or get_model_registry()
+        self.idle_unload_seconds = idle_unload_seconds
         self.model_size = model_size
+        self.backend = get_whisper_backend(backend, compute_type)
+        # Время отдельных слов требует дополнительного прохода выравнивания, но нужно для точных тайм-кодов
+        self.word_timestamps = word_timestamps
+        self.workers = max(1, workers)
+        self.threads_per_worker = threads_per_worker
+        self._pool: Optional[ProcessPoolExecutor] = None
+        
+        # В режиме пула процессов асинхронные вызовы не занимают потоки оркестратора
+        self.supports_native_async = self.workers > 1
     
-    def _load_model(self):
-        """Загружает модель whisper при необходимости"""
-        try:
-            import whisper
-            if self._model is None:
-                self._model = whisper.load_model(self.model_size)
-        except ImportError:
-            raise TranscriptionError("Библиотека 'whisper' не установлена. Установите её с помощью 'pip install openai-whisper'")
-        except Exception as e:
-            raise TranscriptionError(f"Ошибка при загрузке модели Whisper: {e}")
+    def warmup(self):
+        """Заранее загружает модель (в реестр процесса или в воркеры пула)"""
+        if self.workers > 1:
+            # Воркеры загружают модель при старте; ожидаем запуска всех процессов пула
+            pool = self._get_pool()
+            for future in [pool.submit(os.getpid) for _ in range(self.workers)]:
+                future.result()
+        else:
+            self.registry.warmup(self.backend, self.model_size, self.threads_per_worker, self.idle_unload_seconds)
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Создает пул процессов с предзагруженными моделями при первом обращении"""
+        if self._pool is None:
+            # spawn не наследует состояние torch родительского процесса
+            context = multiprocessing.get_context("spawn")
+            counter = context.Value('i', 0)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.backend.name, self.backend.compute_type, self.model_size,
+                          _partition_cpus(self.workers), self.threads_per_worker, counter)
+            )
+        return self._pool
+    
+    def _run_model(self, file_path: str, word_timestamps: bool) -> Dict[str, Any]:
+        """Выполняет транскрибацию в текущем процессе или в пуле процессов"""
+        if self.workers > 1:
+            return self._get_pool().submit(_worker_transcribe, file_path, word_timestamps).result()
+        
+        with self.registry.lease(self.backend, self.model_size, self.threads_per_worker,
+                                 self.idle_unload_seconds) as model:
+            return self.backend.transcribe(model, file_path, word_timestamps)
+    
+    async def _run_model_async(self, file_path: str, word_timestamps: bool) -> Dict[str, Any]:
+        """Асинхронно выполняет транскрибацию в пуле процессов"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_pool(), _worker_transcribe, file_path, word_timestamps)
+    
+    def cache_identity(self) -> Dict[str, Any]:
+        return {"provider": "local_whisper", "model": self.model_size,
+                "options": {"backend": self.backend.name, "dtype": self.backend.dtype,
+                            "word_timestamps": self.word_timestamps}}
+    
+    def close(self):
+        """Останавливает пул процессов"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
     
     def validate_config(self, config: Dict[str, Any]) -> bool:
         """Проверяет конфигурацию транскрибера"""
@@ -36,64 +166,38 @@ class LocalWhisperTranscriber(BaseTranscriber):
         """Обрабатывает файл и возвращает транскрипцию"""
         return self.transcribe(input_data)
     
-    def transcribe(self, file_path: str) -> str:
+    def get_transcript(self, file_path: str) -> Transcript:
         """
         Транскрибирует аудио/видео файл с помощью локальной модели Whisper
         
         Args:
             file_path: Путь к файлу для транскрибации
-            
+        
         Returns:
-            Текст транскрипции
+            Структурированная транскрипция
         """
         try:
-            self._load_model()
-            
-            # Транскрибируем аудио
-            result = self._model.transcribe(file_path)
-            return result["text"]
+            return parse_whisper_result(self._run_model(file_path, self.word_timestamps))
         
+        except TranscriptionError:
+            raise
         except Exception as e:
             raise TranscriptionError(f"Ошибка при транскрибации с локальной моделью Whisper: {e}")
     
-    def get_transcription_with_timecodes(self, file_path: str) -> str:
+    async def get_transcript_async(self, file_path: str) -> Transcript:
         """
-        Транскрибирует файл с тайм-кодами
+        Асинхронно транскрибирует файл; в режиме пула процессов поток не занимается
         
         Args:
             file_path: Путь к файлу для транскрибации
-            
+        
         Returns:
-            Транскрипция с тайм-кодами
+            Структурированная транскрипция
         """
-        try:
-            self._load_model()
-            
-            # Транскрибируем аудио с тайм-кодами
-            result = self._model.transcribe(file_path, word_timestamps=True)
-            
-            transcription_with_timecodes = []
-            for segment in result["segments"]:
-                start_time = self._format_time(segment["start"])
-                text = segment["text"].strip()
-                transcription_with_timecodes.append(f"[{start_time}] {text}")
-            
-            return " ".join(transcription_with_timecodes)
+        if self.workers == 1:
+            return await super().get_transcript_async(file_path)
         
+        try:
+            return parse_whisper_result(await self._run_model_async(file_path, self.word_timestamps))
         except Exception as e:
             raise TranscriptionError(f"Ошибка при транскрибации с локальной моделью Whisper: {e}")
-    
-    def _format_time(self, seconds: float) -> str:
-        """
-        Преобразует время в секундах в формат HH:MM:SS
-        
-        Args:
-            seconds: Время в секундах
-            
-        Returns:
-            Время в формате HH:MM:SS
-        """
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}"
\ No newline at end of file
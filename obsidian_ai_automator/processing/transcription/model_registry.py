@@ -0,0 +1,182 @@
+"""
+Модуль общего для процесса реестра загруженных моделей локального Whisper
+
+Модель занимает от сотен мегабайт до нескольких гигабайт, поэтому все
+транскриберы процесса используют одну копию для каждого сочетания
+(размер модели, движок, тип весов). Модель, которой никто не пользуется
+дольше idle_ttl секунд, выгружается
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from obsidian_ai_automator.core.logger import Logger
+from obsidian_ai_automator.processing.transcription.whisper_backends import WhisperBackend
+
+
+# Ключ модели в реестре: (размер модели, движок, тип весов)
+ModelKey = Tuple[str, str, str]
+
+
+class _ModelEntry:
+    """
+    Загруженная (или загружаемая) модель со счетчиком ссылок
+    """
+
+    def __init__(self):
+        self.model: Any = None
+        self.references = 0
+        self.last_used = 0.0
+        self.idle_ttl: Optional[float] = None
+        # Загрузка выполняется под этой блокировкой, чтобы одновременные вызовы не загружали модель дважды
+        self.load_lock = threading.Lock()
+        self.timer: Optional[threading.Timer] = None
+
+
+class WhisperModelRegistry:
+    """
+    Реестр моделей с подсчетом ссылок, выгрузкой после простоя и предварительной загрузкой
+    """
+
+    def __init__(self, idle_ttl: Optional[float] = 900, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            idle_ttl: Время простоя в секундах, после которого модель без ссылок выгружается
+                      (None или 0 - модели не выгружаются)
+            clock: Источник времени (для тестов)
+        """
+        self.idle_ttl = idle_ttl
+        self.clock = clock
+        self.logger = Logger()
+        self._lock = threading.Lock()
+        self._entries: Dict[ModelKey, _ModelEntry] = {}
+        self.loads = 0
+        self.hits = 0
+        self.unloads = 0
+
+    @staticmethod
+    def make_key(backend: WhisperBackend, model_size: str) -> ModelKey:
+        """Ключ модели: размер, движок и тип весов"""
+        return (model_size, backend.name, backend.dtype)
+
+    def acquire(self, backend: WhisperBackend, model_size: str, threads: int = 0,
+                idle_ttl: Optional[float] = None) -> Any:
+        """
+        Возвращает модель, загружая ее при первом обращении, и увеличивает счетчик ссылок
+
+        Каждому вызову acquire должен соответствовать вызов release
+
+        Args:
+            backend: Движок модели
+            model_size: Размер модели
+            threads: Количество потоков вычислений при загрузке
+            idle_ttl: Время простоя до выгрузки для этой модели (None - значение реестра)
+        """
+        key = self.make_key(backend, model_size)
+        with self._lock:
+            entry = self._entries.setdefault(key, _ModelEntry())
+            entry.references += 1
+            if idle_ttl is not None:
+                entry.idle_ttl = idle_ttl
+            if entry.timer is not None:
+                entry.timer.cancel()
+                entry.timer = None
+
+        try:
+            with entry.load_lock:
+                if entry.model is None:
+                    start_time = time.time()
+                    entry.model = backend.load_model(model_size, threads)
+                    self.loads += 1
+                    self.logger.info(f"Модель Whisper {key} загружена за {time.time() - start_time:.1f} сек")
+                else:
+                    self.hits += 1
+        except BaseException:
+            self.release(backend, model_size)
+            raise
+        return entry.model
+
+    def release(self, backend: WhisperBackend, model_size: str):
+        """
+        Уменьшает счетчик ссылок; модель без ссылок выгружается после простоя
+        """
+        key = self.make_key(backend, model_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.references = max(0, entry.references - 1)
+            entry.last_used = self.clock()
+            if entry.references == 0:
+                self._schedule_unload(key, entry)
+
+    @contextmanager
+    def lease(self, backend: WhisperBackend, model_size: str, threads: int = 0,
+              idle_ttl: Optional[float] = None) -> Iterator[Any]:
+        """
+        Контекстный менеджер для использования модели: acquire при входе и release при выходе
+        """
+        model = self.acquire(backend, model_size, threads, idle_ttl)
+        try:
+            yield model
+        finally:
+            self.release(backend, model_size)
+
+    def warmup(self, backend: WhisperBackend, model_size: str, threads: int = 0, idle_ttl: Optional[float] = None):
+        """
+        Загружает модель заранее, чтобы первая транскрибация не ждала загрузки
+
+        Модель не удерживается: если ею не воспользуются за время простоя, она будет выгружена
+        """
+        with self.lease(backend, model_size, threads, idle_ttl):
+            pass
+
+    def _ttl(self, entry: _ModelEntry) -> Optional[float]:
+        return entry.idle_ttl if entry.idle_ttl is not None else self.idle_ttl
+
+    def _schedule_unload(self, key: ModelKey, entry: _ModelEntry):
+        """Запускает таймер выгрузки модели (вызывается под блокировкой реестра)"""
+        ttl = self._ttl(entry)
+        if not ttl:
+            return
+        entry.timer = threading.Timer(ttl, self.evict_idle)
+        entry.timer.daemon = True
+        entry.timer.start()
+
+    def evict_idle(self) -> int:
+        """
+        Выгружает модели без ссылок, простаивающие дольше времени простоя
+
+        Returns:
+            Количество выгруженных моделей
+        """
+        now = self.clock()
+        with self._lock:
+            expired = [key for key, entry in self._entries.items()
+                       if entry.references == 0 and entry.model is not None and self._ttl(entry)
+                       and now - entry.last_used >= self._ttl(entry)]
+            for key in expired:
+                entry = self._entries.pop(key)
+                if entry.timer is not None:
+                    entry.timer.cancel()
+                self.unloads += 1
+                self.logger.info(f"Модель Whisper {key} выгружена после простоя")
+        return len(expired)
+
+    def loaded_models(self) -> Dict[ModelKey, int]:
+        """Загруженные модели и количество их текущих пользователей"""
+        with self._lock:
+            return {key: entry.references for key, entry in self._entries.items() if entry.model is not None}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика реестра: загрузки, повторные использования и выгрузки моделей"""
+        return {"loaded": len(self.loaded_models()), "loads": self.loads, "hits": self.hits, "unloads": self.unloads}
+
+
+# Реестр процесса, общий для всех транскриберов локального Whisper
+_registry = WhisperModelRegistry()
+
+
+def get_model_registry() -> WhisperModelRegistry:
+    """Возвращает общий реестр моделей процесса"""
+    return _registry
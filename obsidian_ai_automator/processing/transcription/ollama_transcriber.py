@@ -5,6 +5,7 @@ import openai
 import os
 from typing import Dict, Any
 from obsidian_ai_automator.processing.transcription.base_transcriber import BaseTranscriber
+from obsidian_ai_automator.processing.transcription.transcript import Transcript
 from obsidian_ai_automator.core.error_handler import TranscriptionError
 
 
@@ -13,14 +14,22 @@ class OllamaTranscriber(BaseTranscriber):
     Реализация транскрибера с использованием Ollama API через OpenAI-совместимый интерфейс
     """
     
-    def __init__(self, api_url: str = "http://localhost:11434"):
+    uploads_media = True
+    model = "whisper:latest"  # или другая подходящая модель
+    
+    def __init__(self, api_url: str = "http://localhost:11434", timeout: float = None):
         self.api_url = api_url.rstrip('/')
+        self.timeout = timeout  # Ограничение времени запроса в секундах (None - по умолчанию клиента OpenAI)
         # Для Ollama не нужен API-ключ, но мы устанавливаем фиктивный, т.к. openai требует его
         self.client = openai.OpenAI(
             base_url=f"{self.api_url}/v1",
-            api_key="ollama"  # Произвольный ключ для OpenAI клиента, т.к. Ollama не требует ключ
+            api_key="ollama",  # Произвольный ключ для OpenAI клиента, т.к. Ollama не требует ключ
+            timeout=self.timeout or openai.NOT_GIVEN
         )
     
+    def cache_identity(self) -> Dict[str, Any]:
+        return {"provider": "ollama", "model": self.model, "options": {"api_url": self.api_url}}
+    
     def validate_config(self, config: Dict[str, Any]) -> bool:
         """Проверяет конфигурацию транскрибера"""
         return True  # Для Ollama конфигурация минимальна
@@ -29,39 +38,28 @@ class OllamaTranscriber(BaseTranscriber):
         """Обрабатывает файл и возвращает транскрипцию"""
         return self.transcribe(input_data)
     
-    def transcribe(self, file_path: str) -> str:
+    def get_transcript(self, file_path: str) -> Transcript:
         """
         Транскрибирует аудио/видео файл с помощью Ollama API
         
+        Ollama API с whisper не предоставляет тайм-коды, поэтому транскрипция
+        содержит только текст
+        
         Args:
             file_path: Путь к файлу для транскрибации
             
         Returns:
-            Текст транскрипции
+            Структурированная транскрипция без тайм-кодов
         """
         try:
             with open(file_path, "rb") as audio_file:
                 response = self.client.audio.transcriptions.create(
-                    model="whisper:latest",  # или другая подходящая модель
+                    model=self.model,
                     file=audio_file,
                     response_format="text"
                 )
             
-            return response
+            return Transcript.from_text(response)
         
         except Exception as e:
             raise TranscriptionError(f"Ошибка при транскрибации с Ollama API: {e}")
-    
-    def get_transcription_with_timecodes(self, file_path: str) -> str:
-        """
-        Транскрибирует файл с тайм-кодами (реализация зависит от API)
-        Для Ollama тайм-коды не поддерживаются напрямую
-        
-        Args:
-            file_path: Путь к файлу для транскрибации
-            
-        Returns:
-            Транскрипция с тайм-кодами (временная реализация без тайм-кодов)
-        """
-        # Ollama API с whisper не предоставляет тайм-коды, возвращаем обычную транскрипцию
-        return self.transcribe(file_path)
\ No newline at end of file
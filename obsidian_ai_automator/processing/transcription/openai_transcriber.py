@@ -5,6 +5,7 @@ import openai
 import os
 from typing import Dict, Any
 from obsidian_ai_automator.processing.transcription.base_transcriber import BaseTranscriber
+from obsidian_ai_automator.processing.transcription.transcript import Transcript, Segment
 from obsidian_ai_automator.core.error_handler import TranscriptionError
 
 
@@ -13,11 +14,18 @@ class OpenAITranscriber(BaseTranscriber):
     Реализация транскрибера с использованием OpenAI API
     """
     
-    def __init__(self, api_key: str = None):
+    uploads_media = True
+    model = "whisper-1"
+    
+    def __init__(self, api_key: str = None, timeout: float = None):
         self.api_key = api_key
+        self.timeout = timeout  # Ограничение времени запроса в секундах (None - по умолчанию клиента OpenAI)
         # Не загружаем ключ автоматически, только при необходимости
         self.client = None
     
+    def cache_identity(self) -> Dict[str, Any]:
+        return {"provider": "openai", "model": self.model, "options": {}}
+    
     def _load_api_key(self) -> str:
         """Загружает API-ключ OpenAI из файла"""
         api_key_file = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), ".openai_api_key")
@@ -37,7 +45,7 @@ class OpenAITranscriber(BaseTranscriber):
                 raise TranscriptionError("API-ключ OpenAI не установлен")
             
             # Инициализируем клиент OpenAI
-            self.client = openai.OpenAI(api_key=self.api_key)
+            self.client = openai.OpenAI(api_key=self.api_key, timeout=self.timeout or openai.NOT_GIVEN)
     
     def validate_config(self, config: Dict[str, Any]) -> bool:
         """Проверяет конфигурацию транскрибера"""
@@ -47,52 +55,39 @@ class OpenAITranscriber(BaseTranscriber):
         """Обрабатывает файл и возвращает транскрипцию"""
         return self.transcribe(input_data)
     
-    def transcribe(self, file_path: str) -> str:
-        """
-        Транскрибирует аудио/видео файл с помощью OpenAI Whisper API
-        
-        Args:
-            file_path: Путь к файлу для транскрибации
-            
-        Returns:
-            Текст транскрипции
-        """
-        self._ensure_client()
-        
-        try:
-            with open(file_path, "rb") as audio_file:
-                response = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="text"
-                )
-            
-            return response
-        
-        except Exception as e:
-            raise TranscriptionError(f"Ошибка при транскрибации с OpenAI API: {e}")
+    def _parse_response(self, response: Any) -> Transcript:
+        """Преобразует ответ verbose_json в структурированную транскрипцию"""
+        result = response.model_dump() if hasattr(response, "model_dump") else dict(response)
+        segments = [Segment(segment["text"].strip(), segment["start"], segment.get("end"))
+                    for segment in result.get("segments") or []]
+        if not segments:
+            return Transcript.from_text(result.get("text", ""))
+        return Transcript(segments, language=result.get("language"), duration=result.get("duration"))
     
-    def get_transcription_with_timecodes(self, file_path: str) -> str:
+    def get_transcript(self, file_path: str) -> Transcript:
         """
-        Транскрибирует файл с тайм-кодами (OpenAI Whisper не предоставляет тайм-коды в текстовом формате)
+        Транскрибирует файл одним запросом к OpenAI Whisper API
+        
+        Формат verbose_json возвращает текст вместе с сегментами и их временем
         
         Args:
             file_path: Путь к файлу для транскрибации
             
         Returns:
-            Транскрипция с тайм-кодами (временная реализация без тайм-кодов)
+            Структурированная транскрипция
         """
         self._ensure_client()
         
         try:
             with open(file_path, "rb") as audio_file:
                 response = self.client.audio.transcriptions.create(
-                    model="whisper-1",
+                    model=self.model,
                     file=audio_file,
-                    response_format="text"
+                    response_format="verbose_json",
+                    timestamp_granularities=["segment"]
                 )
             
-            return response  # Возвращаем просто текст, так как тайм-коды не поддерживаются
+            return self._parse_response(response)
         
         except Exception as e:
-            raise TranscriptionError(f"Ошибка при транскрибации с OpenAI API: {e}")
\ No newline at end of file
+            raise TranscriptionError(f"Ошибка при транскрибации с OpenAI API: {e}")
@@ -0,0 +1,71 @@
+"""
+Модуль для работы с транскрипциями в формате "[HH:MM:SS] текст"
+"""
+import re
+from typing import List, Tuple
+
+
+TIMECODE_PATTERN = re.compile(r"\[(\d{2,}):(\d{2}):(\d{2})\]")
+
+
+def format_timecode(seconds: float) -> str:
+    """
+    Преобразует время в секундах в формат HH:MM:SS
+
+    Args:
+        seconds: Время в секундах
+
+    Returns:
+        Время в формате HH:MM:SS
+    """
+    seconds = max(0, int(seconds))
+    hours, remainder = divmod(seconds, 3600)
+    minutes, secs = divmod(remainder, 60)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+
+
+def parse_timecoded_text(text: str) -> List[Tuple[float, str]]:
+    """
+    Разбирает транскрипцию с тайм-кодами на фрагменты
+
+    Текст до первого тайм-кода относится к началу записи
+
+    Args:
+        text: Транскрипция вида "[00:00:01] слово [00:00:02] слово"
+
+    Returns:
+        Список пар (время в секундах, текст фрагмента)
+    """
+    entries = []
+    position = 0
+    current_time = 0.0
+    for match in TIMECODE_PATTERN.finditer(text):
+        fragment = text[position:match.start()].strip()
+        if fragment:
+            entries.append((current_time, fragment))
+        hours, minutes, secs = (int(value) for value in match.groups())
+        current_time = float(hours * 3600 + minutes * 60 + secs)
+        position = match.end()
+
+    fragment = text[position:].strip()
+    if fragment:
+        entries.append((current_time, fragment))
+    return entries
+
+
+def format_timecoded_entries(entries: List[Tuple[float, str]]) -> str:
+    """
+    Собирает транскрипцию с тайм-кодами из фрагментов
+
+    Args:
+        entries: Список пар (время в секундах, текст фрагмента)
+
+    Returns:
+        Транскрипция вида "[00:00:01] слово [00:00:02] слово"
+    """
+    return " ".join(f"[{format_timecode(start)}] {text}" for start, text in entries)
+
+
+def strip_timecodes(text: str) -> str:
+    """Удаляет тайм-коды из транскрипции, оставляя только текст"""
+    return " ".join(fragment for _, fragment in parse_timecoded_text(text))
@@ -0,0 +1,305 @@
+"""
+Модуль структурированной транскрипции: сегменты и слова с временем, спикером и уверенностью
+
+Транскрипция получается от провайдера один раз, а текст, текст с тайм-кодами,
+абзацы и субтитры строятся из нее по запросу и запоминаются
+"""
+from typing import Any, Callable, Dict, List, Optional
+from obsidian_ai_automator.processing.transcription.timecodes import (
+    TIMECODE_PATTERN, format_timecode, parse_timecoded_text
+)
+from obsidian_ai_automator.processing.transcription.word_timeline import Word, WordTimeline
+
+
+# Пауза между сегментами в секундах, после которой начинается новый абзац
+PARAGRAPH_GAP_SECONDS = 2.0
+
+# Длительность последнего сегмента субтитров, если провайдер не сообщил его конец
+DEFAULT_SUBTITLE_SECONDS = 3.0
+
+# Длина интервала по умолчанию для детализации TimecodeGranularity.INTERVAL
+DEFAULT_INTERVAL_SECONDS = 30.0
+
+
+class TimecodeGranularity:
+    """
+    Детализация тайм-кодов в текстовом представлении транскрипции
+    """
+    WORD = 'word'
+    SEGMENT = 'segment'
+    PARAGRAPH = 'paragraph'
+    INTERVAL = 'interval'
+    NONE = 'none'
+
+    # Сегменты провайдеров с абзацами - это предложения, в настройках удобнее называть их так
+    ALIASES = {'sentence': SEGMENT}
+
+    @classmethod
+    def normalize(cls, value: str) -> str:
+        """Приводит значение из настроек к одной из констант класса"""
+        value = cls.ALIASES.get(value.strip().lower(), value.strip().lower())
+        if value not in (cls.WORD, cls.SEGMENT, cls.PARAGRAPH, cls.INTERVAL, cls.NONE):
+            raise ValueError(f"Неизвестная детализация тайм-кодов: {value}")
+        return value
+
+
+class Segment:
+    """
+    Фраза транскрипции (предложение или сегмент модели)
+
+    Слова фразы хранятся в WordTimeline транскрипции: first_word - номер первого
+    слова, word_count - их количество (0, если провайдер не вернул слова)
+    """
+
+    __slots__ = ("text", "start", "end", "speaker", "confidence", "first_word", "word_count")
+
+    def __init__(self, text: str, start: float, end: Optional[float] = None, speaker: Optional[int] = None,
+                 confidence: Optional[float] = None, first_word: int = 0, word_count: int = 0):
+        self.text = text
+        self.start = start
+        self.end = end
+        self.speaker = speaker
+        self.confidence = confidence
+        self.first_word = first_word
+        self.word_count = word_count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"text": self.text, "start": self.start, "end": self.end, "speaker": self.speaker,
+                "confidence": self.confidence, "first_word": self.first_word, "word_count": self.word_count}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Segment':
+        return cls(data["text"], data["start"], data.get("end"), data.get("speaker"), data.get("confidence"),
+                   data.get("first_word", 0), data.get("word_count", 0))
+
+
+def _format_subtitle_time(seconds: float, separator: str) -> str:
+    """Преобразует время в формат субтитров HH:MM:SS,mmm (SRT) или HH:MM:SS.mmm (WebVTT)"""
+    milliseconds = int(round(max(0.0, seconds) * 1000))
+    hours, remainder = divmod(milliseconds, 3600 * 1000)
+    minutes, remainder = divmod(remainder, 60 * 1000)
+    secs, milliseconds = divmod(remainder, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{milliseconds:03d}"
+
+
+class Transcript:
+    """
+    Транскрипция, полученная одним запросом к провайдеру
+
+    Объект не изменяется после создания, поэтому производные представления
+    вычисляются один раз и запоминаются
+    """
+
+    def __init__(self, segments: List[Segment], granularity: str = TimecodeGranularity.SEGMENT,
+                 language: Optional[str] = None, duration: Optional[float] = None,
+                 timeline: Optional[WordTimeline] = None):
+        """
+        Args:
+            segments: Сегменты транскрипции по порядку времени
+            granularity: Детализация тайм-кодов в timecoded_text (см. TimecodeGranularity)
+            language: Язык записи, если провайдер его сообщил
+            duration: Длительность записи в секундах, если известна
+            timeline: Слова всех сегментов по порядку
+        """
+        self.segments = segments
+        self.timeline = timeline if timeline is not None else WordTimeline()
+        self.granularity = granularity
+        self.language = language
+        self.duration = duration
+        self._renderings: Dict[str, Any] = {}
+
+    @classmethod
+    def from_text(cls, text: str) -> 'Transcript':
+        """Создает транскрипцию из текста без тайм-кодов"""
+        text = (text or "").strip()
+        segments = [Segment(text, 0.0)] if text else []
+        return cls(segments, granularity=TimecodeGranularity.NONE)
+
+    @classmethod
+    def from_timecoded_text(cls, text: str) -> 'Transcript':
+        """Создает транскрипцию из строки вида "[HH:MM:SS] текст [HH:MM:SS] текст" """
+        if not text or not TIMECODE_PATTERN.search(text):
+            return cls.from_text(text)
+        return cls([Segment(fragment, start) for start, fragment in parse_timecoded_text(text)])
+
+    @classmethod
+    def concatenate(cls, transcripts: List['Transcript']) -> 'Transcript':
+        """Склеивает транскрипции последовательных фрагментов одной записи"""
+        timeline = WordTimeline()
+        segments = []
+        for transcript in transcripts:
+            word_offset = len(timeline)
+            timeline.extend(transcript.timeline)
+            segments.extend(Segment(segment.text, segment.start, segment.end, segment.speaker, segment.confidence,
+                                    segment.first_word + word_offset, segment.word_count)
+                            for segment in transcript.segments)
+        granularity = transcripts[0].granularity if transcripts else TimecodeGranularity.SEGMENT
+        language = next((transcript.language for transcript in transcripts if transcript.language), None)
+        return cls(segments, granularity, language, timeline=timeline)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Сериализует транскрипцию для кэша"""
+        return {"segments": [segment.to_dict() for segment in self.segments], "words": self.timeline.to_dict(),
+                "granularity": self.granularity, "language": self.language, "duration": self.duration}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Transcript':
+        """Восстанавливает транскрипцию из кэша"""
+        granularity = data.get("granularity", TimecodeGranularity.SEGMENT)
+        if isinstance(data.get("words"), dict):
+            return cls([Segment.from_dict(segment) for segment in data.get("segments", [])], granularity,
+                       data.get("language"), data.get("duration"), WordTimeline.from_dict(data["words"]))
+
+        # Формат с объектом на каждое слово внутри сегмента
+        timeline = WordTimeline()
+        segments = []
+        for segment in data.get("segments", []):
+            first_word = len(timeline)
+            for word in segment.get("words", []):
+                timeline.append(word["text"], word["start"], word.get("end"), word.get("speaker"), word.get("confidence"))
+            segments.append(Segment(segment["text"], segment["start"], segment.get("end"), segment.get("speaker"),
+                                    segment.get("confidence"), first_word, len(timeline) - first_word))
+        return cls(segments, granularity, data.get("language"), data.get("duration"), timeline)
+
+    @classmethod
+    def from_cached(cls, data: Any) -> 'Transcript':
+        """Восстанавливает транскрипцию из кэша, включая записи старого формата (строка с тайм-кодами)"""
+        if isinstance(data, str):
+            return cls.from_timecoded_text(data)
+        return cls.from_dict(data)
+
+    def map_times(self, mapper: Callable[[float], float], duration: Optional[float] = None) -> 'Transcript':
+        """
+        Возвращает копию транскрипции с пересчитанным временем
+
+        Args:
+            mapper: Функция перевода времени (например, сдвиг на смещение части записи)
+            duration: Длительность записи на новой шкале
+        """
+        segments = [
+            Segment(segment.text, mapper(segment.start), None if segment.end is None else mapper(segment.end),
+                    segment.speaker, segment.confidence, segment.first_word, segment.word_count)
+            for segment in self.segments
+        ]
+        return Transcript(segments, self.granularity, self.language, duration, self.timeline.map_times(mapper))
+
+    def segment_words(self, segment: Segment) -> List[Word]:
+        """Слова сегмента"""
+        return [self.timeline[index] for index in range(segment.first_word, segment.first_word + segment.word_count)]
+
+    def _render(self, name: str, builder: Callable[[], Any]) -> Any:
+        """Возвращает запомненное представление или строит его"""
+        if name not in self._renderings:
+            self._renderings[name] = builder()
+        return self._renderings[name]
+
+    @property
+    def words(self) -> List[Word]:
+        """Все слова транскрипции по порядку (объекты создаются по запросу)"""
+        return self._render("words", lambda: [self.timeline[index] for index in range(len(self.timeline))])
+
+    @property
+    def text(self) -> str:
+        """Текст транскрипции без тайм-кодов"""
+        return self._render("text", lambda: " ".join(segment.text for segment in self.segments if segment.text))
+
+    @property
+    def timecoded_text(self) -> str:
+        """Текст с тайм-кодами вида "[HH:MM:SS] текст" с детализацией granularity"""
+        return self._render("timecoded_text", self._build_timecoded_text)
+
+    def _build_timecoded_text(self) -> str:
+        return self.render_timecoded(self.granularity)
+
+    def render_timecoded(self, granularity: str, interval_seconds: float = DEFAULT_INTERVAL_SECONDS) -> str:
+        """
+        Текст с тайм-кодами заданной детализации
+
+        Метка ставится перед каждым словом, предложением (сегментом), абзацем или
+        перед первой фразой каждого интервала в interval_seconds секунд. Если слов
+        с временем нет, детализация по словам сводится к сегментам
+
+        Args:
+            granularity: Детализация (см. TimecodeGranularity, допускается 'sentence')
+            interval_seconds: Длина интервала для TimecodeGranularity.INTERVAL
+        """
+        granularity = TimecodeGranularity.normalize(granularity)
+        if granularity == TimecodeGranularity.NONE or self.granularity == TimecodeGranularity.NONE:
+            return self.text
+        return self._render(f"timecoded_{granularity}_{interval_seconds:g}",
+                            lambda: self._build_spans(granularity, interval_seconds))
+
+    def _build_spans(self, granularity: str, interval_seconds: float) -> str:
+        if granularity == TimecodeGranularity.WORD and len(self.timeline):
+            return self.timeline.render_timecoded()
+        if granularity == TimecodeGranularity.PARAGRAPH:
+            groups = self._paragraph_groups()
+        elif granularity == TimecodeGranularity.INTERVAL:
+            groups = self._interval_groups(max(interval_seconds, 1.0))
+        else:
+            groups = [[segment] for segment in self.segments if segment.text]
+        return " ".join(f"[{format_timecode(group[0].start)}] {' '.join(segment.text for segment in group)}"
+                        for group in groups)
+
+    def _interval_groups(self, interval_seconds: float) -> List[List[Segment]]:
+        """Группы сегментов, начинающихся в одном интервале записи"""
+        groups = []
+        current_interval = None
+        for segment in self.segments:
+            if not segment.text:
+                continue
+            interval = int(segment.start // interval_seconds)
+            if interval != current_interval:
+                groups.append([])
+                current_interval = interval
+            groups[-1].append(segment)
+        return groups
+
+    def _paragraph_groups(self) -> List[List[Segment]]:
+        """Группы сегментов абзацев: новый абзац начинается при смене спикера или после длинной паузы"""
+        groups = []
+        previous = None
+        for segment in self.segments:
+            if not segment.text:
+                continue
+            if previous is None or (segment.speaker != previous.speaker or
+                                    segment.start - (previous.end or previous.start) >= PARAGRAPH_GAP_SECONDS):
+                groups.append([])
+            groups[-1].append(segment)
+            previous = segment
+        return groups
+
+    @property
+    def paragraphs(self) -> List[str]:
+        """Абзацы: новый абзац начинается при смене спикера или после длинной паузы"""
+        return self._render("paragraphs", lambda: [" ".join(segment.text for segment in group)
+                                                   for group in self._paragraph_groups()])
+
+    def _subtitle_cues(self) -> List[tuple]:
+        """Возвращает (начало, конец, текст) для каждого сегмента субтитров"""
+        segments = [segment for segment in self.segments if segment.text]
+        cues = []
+        for index, segment in enumerate(segments):
+            end = segment.end
+            if end is None:
+                end = segments[index + 1].start if index + 1 < len(segments) else segment.start + DEFAULT_SUBTITLE_SECONDS
+            cues.append((segment.start, max(end, segment.start), segment.text))
+        return cues
+
+    def to_srt(self) -> str:
+        """Субтитры в формате SRT"""
+        return self._render("srt", lambda: "\n".join(
+            f"{index}\n{_format_subtitle_time(start, ',')} --> {_format_subtitle_time(end, ',')}\n{text}\n"
+            for index, (start, end, text) in enumerate(self._subtitle_cues(), start=1)
+        ))
+
+    def to_vtt(self) -> str:
+        """Субтитры в формате WebVTT"""
+        return self._render("vtt", lambda: "WEBVTT\n\n" + "\n".join(
+            f"{_format_subtitle_time(start, '.')} --> {_format_subtitle_time(end, '.')}\n{text}\n"
+            for start, end, text in self._subtitle_cues()
+        ))
+
+    def __bool__(self) -> bool:
+        """Пустая транскрипция считается ложной, как пустая строка"""
+        return bool(self.text)
@@ -0,0 +1,382 @@
+"""
+Модуль для удаления тишины из записи перед транскрибацией (детектор речевой активности)
+"""
+import asyncio
+import bisect
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from obsidian_ai_automator.processing.transcription.base_transcriber import BaseTranscriber
+from obsidian_ai_automator.processing.transcription.transcript import Transcript
+from obsidian_ai_automator.core.error_handler import TranscriptionError
+from obsidian_ai_automator.core.logger import Logger
+
+
+# Размер отсчета PCM s16le в байтах
+SAMPLE_WIDTH = 2
+
+
+def decode_pcm(file_path: str, sample_rate: int = 16000) -> bytes:
+    """
+    Декодирует запись в моно PCM s16le с помощью ffmpeg
+
+    Args:
+        file_path: Путь к аудио/видео файлу
+        sample_rate: Частота дискретизации в Гц
+
+    Returns:
+        Отсчеты PCM
+    """
+    command = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-i", file_path, "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "-"
+    ]
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0:
+        raise TranscriptionError(f"Ошибка ffmpeg при декодировании {file_path}: "
+                                 f"{result.stderr.decode(errors='replace').strip()}")
+    return result.stdout
+
+
+def encode_pcm(pcm: bytes, output_path: str, sample_rate: int = 16000):
+    """
+    Кодирует моно PCM s16le в Opus с помощью ffmpeg
+
+    Args:
+        pcm: Отсчеты PCM
+        output_path: Путь для результата (.ogg)
+        sample_rate: Частота дискретизации в Гц
+    """
+    command = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "-i", "-",
+        "-c:a", "libopus", "-b:a", "24k", "-application", "voip", output_path
+    ]
+    result = subprocess.run(command, input=pcm, capture_output=True)
+    if result.returncode != 0:
+        raise TranscriptionError(f"Ошибка ffmpeg при кодировании {output_path}: "
+                                 f"{result.stderr.decode(errors='replace').strip()}")
+
+
+def frame_energies(pcm: bytes, sample_rate: int, frame_ms: int = 30) -> List[float]:
+    """
+    Вычисляет энергию кадров записи в дБ относительно полной шкалы
+
+    Args:
+        pcm: Отсчеты PCM s16le
+        sample_rate: Частота дискретизации в Гц
+        frame_ms: Длина кадра в миллисекундах
+
+    Returns:
+        Энергия каждого полного кадра в дБ
+    """
+    import numpy as np
+
+    frame_size = max(1, sample_rate * frame_ms // 1000)
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    frame_count = len(samples) // frame_size
+    if frame_count == 0:
+        return []
+
+    frames = samples[:frame_count * frame_size].reshape(frame_count, frame_size).astype(np.float32) / 32768.0
+    energies = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    return energies.tolist()
+
+
+def speech_threshold(energies: List[float], margin_db: float = 10.0, dynamic_range_db: float = 25.0) -> float:
+    """
+    Выбирает порог речи по распределению энергии кадров
+
+    Порог - меньшее из "шум + margin_db" и "громкая речь - dynamic_range_db":
+    первое отделяет речь от фонового шума в записях с паузами, второе не дает
+    отрезать тихие слова, когда речь идет почти без пауз и уровень шума завышен
+
+    Args:
+        energies: Энергия кадров в дБ
+        margin_db: Превышение над уровнем шума, начиная с которого кадр считается речью
+        dynamic_range_db: Допустимое отклонение речи от ее громкого уровня
+
+    Returns:
+        Порог в дБ
+    """
+    ordered = sorted(energies)
+    noise_floor = ordered[len(ordered) // 10]
+    speech_level = ordered[min(len(ordered) - 1, len(ordered) * 95 // 100)]
+    return min(noise_floor + margin_db, speech_level - dynamic_range_db)
+
+
+def frames_to_regions(voiced: List[bool], frame_seconds: float, duration: float,
+                      min_silence_seconds: float = 1.0, padding_seconds: float = 0.25) -> List[Tuple[float, float]]:
+    """
+    Собирает речевые кадры в участки речи
+
+    Паузы короче min_silence_seconds остаются внутри участка, каждый участок
+    расширяется на padding_seconds, чтобы не обрезать начала и концы слов
+
+    Args:
+        voiced: Признак речи для каждого кадра
+        frame_seconds: Длина кадра в секундах
+        duration: Длительность записи в секундах
+        min_silence_seconds: Минимальная пауза, которая вырезается
+        padding_seconds: Запас вокруг участка речи
+
+    Returns:
+        Список непересекающихся пар (начало, конец) в секундах
+    """
+    raw_regions = []
+    region_start = None
+    for index, is_voiced in enumerate(voiced):
+        if is_voiced and region_start is None:
+            region_start = index
+        elif not is_voiced and region_start is not None:
+            raw_regions.append((region_start * frame_seconds, index * frame_seconds))
+            region_start = None
+    if region_start is not None:
+        raw_regions.append((region_start * frame_seconds, len(voiced) * frame_seconds))
+
+    regions = []
+    for start, end in raw_regions:
+        start = max(0.0, start - padding_seconds)
+        end = min(duration, end + padding_seconds)
+        if regions and start - regions[-1][1] < min_silence_seconds:
+            regions[-1] = (regions[-1][0], max(regions[-1][1], end))
+        else:
+            regions.append((start, end))
+    return regions
+
+
+def detect_speech_regions(pcm: bytes, sample_rate: int = 16000, frame_ms: int = 30,
+                          margin_db: float = 10.0, dynamic_range_db: float = 25.0,
+                          min_silence_seconds: float = 1.0, padding_seconds: float = 0.25) -> List[Tuple[float, float]]:
+    """
+    Находит участки речи по энергии кадров (только CPU, требуется numpy)
+
+    Args:
+        pcm: Отсчеты PCM s16le
+        sample_rate: Частота дискретизации в Гц
+        frame_ms: Длина кадра в миллисекундах
+        margin_db: Превышение над уровнем шума для речи
+        dynamic_range_db: Допустимое отклонение речи от ее громкого уровня
+        min_silence_seconds: Минимальная пауза, которая вырезается
+        padding_seconds: Запас вокруг участка речи
+
+    Returns:
+        Список пар (начало, конец) участков речи в секундах
+    """
+    energies = frame_energies(pcm, sample_rate, frame_ms)
+    if not energies:
+        return []
+
+    threshold = speech_threshold(energies, margin_db, dynamic_range_db)
+    duration = len(pcm) / SAMPLE_WIDTH / sample_rate
+    return frames_to_regions([energy > threshold for energy in energies], frame_ms / 1000.0, duration,
+                             min_silence_seconds, padding_seconds)
+
+
+class OffsetMap:
+    """
+    Соответствие времени в записи без тишины времени в исходной записи
+    """
+
+    def __init__(self):
+        self.trimmed_starts: List[float] = []
+        self.segments: List[Tuple[float, float]] = []
+
+    def add(self, trimmed_start: float, original_start: float, duration: float):
+        """Добавляет участок: начало в сокращенной записи, начало в исходной, длительность"""
+        self.trimmed_starts.append(trimmed_start)
+        self.segments.append((original_start, duration))
+
+    def to_original(self, trimmed_time: float) -> float:
+        """
+        Переводит время сокращенной записи на шкалу исходной
+
+        Время во вставленном промежутке между участками относится к концу предыдущего участка
+        """
+        index = bisect.bisect_right(self.trimmed_starts, trimmed_time) - 1
+        if index < 0:
+            return self.segments[0][0] if self.segments else trimmed_time
+        original_start, duration = self.segments[index]
+        return original_start + min(trimmed_time - self.trimmed_starts[index], duration)
+
+
+def build_trimmed_audio(pcm: bytes, sample_rate: int, regions: List[Tuple[float, float]],
+                        gap_seconds: float = 0.5) -> Tuple[bytes, OffsetMap]:
+    """
+    Склеивает участки речи, разделяя их короткими промежутками тишины
+
+    Args:
+        pcm: Отсчеты PCM s16le исходной записи
+        sample_rate: Частота дискретизации в Гц
+        regions: Участки речи (начало, конец) в секундах
+        gap_seconds: Длина тишины между участками, чтобы провайдер видел границу фразы
+
+    Returns:
+        Отсчеты PCM сокращенной записи и соответствие времени
+    """
+    gap = b"\x00" * (int(gap_seconds * sample_rate) * SAMPLE_WIDTH)
+    offset_map = OffsetMap()
+    parts = []
+    trimmed_samples = 0
+    for index, (start, end) in enumerate(regions):
+        if index > 0 and gap:
+            parts.append(gap)
+            trimmed_samples += len(gap) // SAMPLE_WIDTH
+        first_sample = int(start * sample_rate)
+        last_sample = int(end * sample_rate)
+        parts.append(pcm[first_sample * SAMPLE_WIDTH:last_sample * SAMPLE_WIDTH])
+        offset_map.add(trimmed_samples / sample_rate, first_sample / sample_rate,
+                       (last_sample - first_sample) / sample_rate)
+        trimmed_samples += last_sample - first_sample
+    return b"".join(parts), offset_map
+
+
+def _numpy_available() -> bool:
+    """Проверяет наличие numpy без его импорта при загрузке модуля"""
+    try:
+        import numpy  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class VadTranscriber(BaseTranscriber):
+    """
+    Обертка над любым транскрибером: отправляет провайдеру только участки речи
+
+    Длинные паузы (перерывы, выключенный микрофон) вырезаются, а тайм-коды
+    ответа переводятся обратно на шкалу исходной записи. Если речи почти
+    везде, файл передается без изменений, чтобы не тратить время на перекодирование
+    """
+
+    def __init__(self, transcriber: BaseTranscriber, sample_rate: int = 16000, frame_ms: int = 30,
+                 margin_db: float = 10.0, dynamic_range_db: float = 25.0,
+                 min_silence_seconds: float = 1.0, padding_seconds: float = 0.25,
+                 gap_seconds: float = 0.5, max_voiced_ratio: float = 0.9,
+                 decoder: Callable[[str, int], bytes] = decode_pcm,
+                 encoder: Callable[[bytes, str, int], None] = encode_pcm,
+                 metrics_collector=None):
+        """
+        Args:
+            transcriber: Транскрибер, который получает запись без тишины
+            sample_rate: Частота дискретизации для анализа в Гц
+            frame_ms: Длина кадра анализа в миллисекундах
+            margin_db: Превышение над уровнем шума для речи
+            dynamic_range_db: Допустимое отклонение речи от ее громкого уровня
+            min_silence_seconds: Минимальная пауза, которая вырезается
+            padding_seconds: Запас вокруг участка речи
+            gap_seconds: Длина тишины между склеенными участками
+            max_voiced_ratio: Доля речи, при превышении которой файл передается без изменений
+            decoder: Функция декодирования (путь, частота) -> PCM
+            encoder: Функция кодирования (PCM, путь результата, частота)
+            metrics_collector: Сборщик метрик для учета вырезанной тишины
+        """
+        self.transcriber = transcriber
+        # Синхронный транскрибер выполняется в пуле потоков стадии, а не в пуле цикла событий
+        self.supports_native_async = transcriber.supports_native_async
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.margin_db = margin_db
+        self.dynamic_range_db = dynamic_range_db
+        self.min_silence_seconds = min_silence_seconds
+        self.padding_seconds = padding_seconds
+        self.gap_seconds = gap_seconds
+        self.max_voiced_ratio = max_voiced_ratio
+        self.decoder = decoder
+        self.encoder = encoder
+        self.metrics_collector = metrics_collector
+        self.uploads_media = transcriber.uploads_media
+        self.logger = Logger()
+
+        uses_ffmpeg = decoder is decode_pcm or encoder is encode_pcm
+        self.is_available = _numpy_available() and (not uses_ffmpeg or shutil.which("ffmpeg") is not None)
+        if not self.is_available:
+            self.logger.warning("Для удаления тишины нужны numpy и ffmpeg, файлы транскрибируются целиком")
+
+    def cache_identity(self) -> Dict[str, Any]:
+        # Тайм-коды пересчитываются на шкалу исходной записи, результат равноценен транскрипции целиком
+        return self.transcriber.cache_identity()
+    
+    def close(self):
+        """Освобождает ресурсы вложенного транскрибера"""
+        self.transcriber.close()
+
+    def validate_config(self, config: Dict[str, Any]) -> bool:
+        """Проверяет конфигурацию транскрибера"""
+        return self.transcriber.validate_config(config)
+
+    def process(self, input_data: str, config: Dict[str, Any]) -> str:
+        """Обрабатывает файл и возвращает транскрипцию"""
+        return self.transcribe(input_data)
+
+    def _trim(self, file_path: str, work_dir: str) -> Optional[Tuple[str, OffsetMap]]:
+        """
+        Готовит запись без тишины
+
+        Returns:
+            Путь к сокращенной записи и соответствие времени, либо None,
+            если файл нужно передать без изменений
+        """
+        if not self.is_available:
+            return None
+
+        start_time = time.perf_counter()
+        pcm = self.decoder(file_path, self.sample_rate)
+        duration = len(pcm) / SAMPLE_WIDTH / self.sample_rate
+        regions = detect_speech_regions(pcm, self.sample_rate, self.frame_ms, self.margin_db,
+                                        self.dynamic_range_db, self.min_silence_seconds, self.padding_seconds)
+        voiced_seconds = sum(end - start for start, end in regions)
+
+        if duration <= 0 or not regions or voiced_seconds / duration > self.max_voiced_ratio:
+            # Без найденной речи тоже передаем файл целиком: порог мог ошибиться на тихой записи
+            self.logger.info(f"Удаление тишины пропущено для {file_path}: речь {voiced_seconds:.0f} из {duration:.0f} сек")
+            return None
+
+        trimmed_pcm, offset_map = build_trimmed_audio(pcm, self.sample_rate, regions, self.gap_seconds)
+        trimmed_path = os.path.join(work_dir, "voiced.ogg")
+        self.encoder(trimmed_pcm, trimmed_path, self.sample_rate)
+
+        elapsed = time.perf_counter() - start_time
+        self.logger.info(f"Вырезано {duration - voiced_seconds:.0f} сек тишины из {duration:.0f} сек "
+                         f"({len(regions)} участков речи), RTF {elapsed / duration:.4f}: {file_path}")
+        if self.metrics_collector:
+            self.metrics_collector.record_vad(file_path, duration, voiced_seconds, elapsed)
+        return trimmed_path, offset_map
+
+    def get_transcript(self, file_path: str) -> Transcript:
+        """
+        Транскрибирует только участки речи со временем исходной записи
+
+        Args:
+            file_path: Путь к файлу для транскрибации
+
+        Returns:
+            Транскрипция со временем исходной записи
+        """
+        with tempfile.TemporaryDirectory(prefix="vad_") as work_dir:
+            trimmed = self._trim(file_path, work_dir)
+            if trimmed is None:
+                return self.transcriber.get_transcript(file_path)
+            trimmed_path, offset_map = trimmed
+            return self.transcriber.get_transcript(trimmed_path).map_times(offset_map.to_original)
+
+    async def get_transcript_async(self, file_path: str) -> Transcript:
+        """
+        Асинхронно транскрибирует только участки речи со временем исходной записи
+
+        Args:
+            file_path: Путь к файлу для транскрибации
+
+        Returns:
+            Транскрипция со временем исходной записи
+        """
+        with tempfile.TemporaryDirectory(prefix="vad_") as work_dir:
+            trimmed = await asyncio.to_thread(self._trim, file_path, work_dir)
+            if trimmed is None:
+                return await self.transcriber.get_transcript_async(file_path)
+            trimmed_path, offset_map = trimmed
+            transcript = await self.transcriber.get_transcript_async(trimmed_path)
+            return transcript.map_times(offset_map.to_original)
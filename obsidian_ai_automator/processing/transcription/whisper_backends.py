@@ -0,0 +1,149 @@
+"""
+Модуль движков локальной транскрибации Whisper
+
+Движок загружает модель и возвращает результат в едином компактном формате
+(текст, язык и сегменты со словами), из которого строится транскрипция:
+- openai-whisper: исходная реализация на PyTorch (float32 на CPU)
+- faster-whisper: реализация на CTranslate2 с квантованием весов (int8 на CPU),
+  обычно в несколько раз быстрее и требует меньше памяти
+"""
+import os
+from typing import Any, Dict
+from obsidian_ai_automator.core.error_handler import TranscriptionError
+
+
+class WhisperBackend:
+    """
+    Базовый класс движка локальной модели Whisper
+    """
+
+    name = None
+
+    def __init__(self, compute_type: str = "int8"):
+        """
+        Args:
+            compute_type: Тип весов и вычислений модели (учитывается движками с квантованием)
+        """
+        self.compute_type = compute_type
+
+    @property
+    def dtype(self) -> str:
+        """Фактический тип весов загружаемой модели"""
+        return self.compute_type
+
+    def load_model(self, model_size: str, threads: int = 0) -> Any:
+        """
+        Загружает модель
+
+        Args:
+            model_size: Размер модели (tiny, base, small, medium, large)
+            threads: Количество потоков вычислений (0 - по умолчанию движка)
+        """
+        raise NotImplementedError
+
+    def transcribe(self, model: Any, file_path: str, word_timestamps: bool) -> Dict[str, Any]:
+        """
+        Транскрибирует файл загруженной моделью
+
+        Returns:
+            Словарь с текстом, языком и сегментами (только поля, нужные для транскрипции)
+        """
+        raise NotImplementedError
+
+
+class OpenAIWhisperBackend(WhisperBackend):
+    """
+    Движок openai-whisper (PyTorch, float32 на CPU)
+    """
+
+    name = "openai-whisper"
+
+    @property
+    def dtype(self) -> str:
+        # На CPU openai-whisper всегда работает в float32
+        return "float32"
+
+    def load_model(self, model_size: str, threads: int = 0) -> Any:
+        try:
+            import whisper
+            if threads:
+                import torch
+                torch.set_num_threads(threads)
+            return whisper.load_model(model_size)
+        except ImportError:
+            raise TranscriptionError("Библиотека 'whisper' не установлена. Установите её с помощью 'pip install openai-whisper'")
+        except Exception as e:
+            raise TranscriptionError(f"Ошибка при загрузке модели Whisper: {e}")
+
+    def transcribe(self, model: Any, file_path: str, word_timestamps: bool) -> Dict[str, Any]:
+        result = model.transcribe(file_path, word_timestamps=word_timestamps)
+        return {
+            "text": result["text"],
+            "language": result.get("language"),
+            "segments": [
+                {
+                    "start": segment["start"],
+                    "end": segment["end"],
+                    "text": segment["text"],
+                    "words": [{"word": word["word"], "start": word["start"], "end": word["end"],
+                               "probability": word.get("probability")}
+                              for word in segment.get("words", [])]
+                }
+                for segment in result["segments"]
+            ]
+        }
+
+
+class FasterWhisperBackend(WhisperBackend):
+    """
+    Движок faster-whisper (CTranslate2, по умолчанию веса int8 на CPU)
+    """
+
+    name = "faster-whisper"
+
+    def load_model(self, model_size: str, threads: int = 0) -> Any:
+        try:
+            from faster_whisper import WhisperModel
+            return WhisperModel(model_size, device="cpu", compute_type=self.compute_type,
+                                cpu_threads=threads or (os.cpu_count() or 1))
+        except ImportError:
+            raise TranscriptionError("Библиотека 'faster-whisper' не установлена. Установите её с помощью 'pip install faster-whisper'")
+        except Exception as e:
+            raise TranscriptionError(f"Ошибка при загрузке модели faster-whisper: {e}")
+
+    def transcribe(self, model: Any, file_path: str, word_timestamps: bool) -> Dict[str, Any]:
+        # Сегменты возвращаются генератором: распознавание идет по мере их чтения
+        segments, info = model.transcribe(file_path, word_timestamps=word_timestamps)
+        compact_segments = [
+            {
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text,
+                "words": [{"word": word.word, "start": word.start, "end": word.end, "probability": word.probability}
+                          for word in (segment.words or [])]
+            }
+            for segment in segments
+        ]
+        return {
+            "text": "".join(segment["text"] for segment in compact_segments),
+            "language": info.language,
+            "duration": info.duration,
+            "segments": compact_segments
+        }
+
+
+_BACKENDS = {backend.name: backend for backend in (OpenAIWhisperBackend, FasterWhisperBackend)}
+
+
+def get_whisper_backend(name: str, compute_type: str = "int8") -> WhisperBackend:
+    """
+    Возвращает движок по имени из конфигурации
+
+    Args:
+        name: openai-whisper или faster-whisper
+        compute_type: Тип весов для движков с квантованием (int8, int8_float32, float32 и т. д.)
+    """
+    backend_class = _BACKENDS.get(name.strip().lower())
+    if backend_class is None:
+        raise ValueError(f"Неподдерживаемый движок локального Whisper: {name}")
+    return backend_class(compute_type)
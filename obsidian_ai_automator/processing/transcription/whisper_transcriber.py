@@ -5,7 +5,38 @@ import requests
 import os
 from typing import Dict, Any
 from obsidian_ai_automator.processing.transcription.base_transcriber import BaseTranscriber
-from obsidian_ai_automator.core.error_handler import TranscriptionError
+from obsidian_ai_automator.processing.transcription.transcript import Transcript, Segment
+from obsidian_ai_automator.processing.transcription.word_timeline import WordTimeline
+from obsidian_ai_automator.core.error_handler import TranscriptionError, extract_http_status
+from obsidian_ai_automator.core.http_client import AsyncHttpClient
+
+
+def parse_whisper_result(result: Dict[str, Any]) -> Transcript:
+    """
+    Преобразует результат Whisper (ответ verbose_json или результат модели) в структурированную транскрипцию
+    
+    Args:
+        result: Словарь с ключами text, segments и, при наличии, language/duration
+        
+    Returns:
+        Транскрипция; без сегментов - только текст без тайм-кодов
+    """
+    if "segments" in result:
+        timeline = WordTimeline()
+        segments = []
+        for segment in result["segments"]:
+            first_word = len(timeline)
+            for word in segment.get("words") or []:
+                timeline.append(word["word"].strip(), word["start"], word.get("end"), confidence=word.get("probability"))
+            segments.append(Segment(segment["text"].strip(), segment["start"], segment.get("end"),
+                                    first_word=first_word, word_count=len(timeline) - first_word))
+        return Transcript(segments, language=result.get("language"), duration=result.get("duration"),
+                          timeline=timeline)
+    elif "text" in result:
+        # Сервер не поддерживает подробный формат, тайм-коды недоступны
+        return Transcript.from_text(result["text"])
+    else:
+        raise TranscriptionError(f"Непредвиденный формат ответа от Whisper API: {result}")
 
 
 class WhisperTranscriber(BaseTranscriber):
@@ -13,10 +44,18 @@ class WhisperTranscriber(BaseTranscriber):
     Реализация транскрибера с использованием локального Whisper API (через Ollama или другой сервер)
     """
     
-    def __init__(self, api_url: str = "http://localhost:8000"):
+    supports_native_async = True
+    uploads_media = True
+    
+    def __init__(self, api_url: str = "http://localhost:8000", timeout: float = None):
         self.api_url = api_url
+        self.timeout = timeout  # Ограничение времени запроса в секундах (None - без ограничений)
         # Для работы с локальным Whisper API нам не нужен API-ключ
     
+    def cache_identity(self) -> Dict[str, Any]:
+        # Модель определяется сервером, поэтому в ключ входит его адрес
+        return {"provider": "whisper", "model": None, "options": {"api_url": self.api_url}}
+    
     def validate_config(self, config: Dict[str, Any]) -> bool:
         """Проверяет конфигурацию транскрибера"""
         return True  # Для Whisper конфигурация минимальна
@@ -25,82 +64,63 @@ class WhisperTranscriber(BaseTranscriber):
         """Обрабатывает файл и возвращает транскрипцию"""
         return self.transcribe(input_data)
     
-    def transcribe(self, file_path: str) -> str:
+    def get_transcript(self, file_path: str) -> Transcript:
         """
-        Транскрибирует аудио/видео файл с помощью локального Whisper API
+        Транскрибирует файл одним запросом к локальному Whisper API
         
         Args:
             file_path: Путь к файлу для транскрибации
             
         Returns:
-            Текст транскрипции
+            Структурированная транскрипция
         """
         try:
             with open(file_path, "rb") as audio_file:
+                # Подробный формат содержит и текст, и сегменты с тайм-кодами
                 files = {"file": audio_file}
-                response = requests.post(f"{self.api_url}/transcriptions", files=files)
+                data = {"response_format": "verbose_json"}
+                response = requests.post(f"{self.api_url}/transcriptions", files=files, data=data,
+                                         timeout=self.timeout)
                 response.raise_for_status()
                 
-                # Ответ в формате JSON с ключом text
-                result = response.json()
-                if "text" in result:
-                    return result["text"]
-                else:
-                    raise TranscriptionError(f"Непредвиденный формат ответа от Whisper API: {result}")
+                return parse_whisper_result(response.json())
         
+        except TranscriptionError:
+            raise
         except Exception as e:
-            raise TranscriptionError(f"Ошибка при транскрибации с Whisper API: {e}")
+            raise TranscriptionError(f"Ошибка при транскрибации с Whisper API: {e}", *extract_http_status(e))
+    
+    async def _request_async(self, file_path: str) -> Dict[str, Any]:
+        """Асинхронно отправляет файл в Whisper API через общий пул соединений"""
+        import aiohttp
+        
+        session = await AsyncHttpClient.get_session()
+        with open(file_path, "rb") as audio_file:
+            form = aiohttp.FormData()
+            form.add_field("file", audio_file, filename=os.path.basename(file_path))
+            form.add_field("response_format", "verbose_json")
+            async with session.post(f"{self.api_url}/transcriptions", data=form,
+                                    timeout=AsyncHttpClient.request_timeout(self.timeout)) as response:
+                response.raise_for_status()
+                return await response.json()
     
-    def get_transcription_with_timecodes(self, file_path: str) -> str:
+    async def get_transcript_async(self, file_path: str) -> Transcript:
         """
-        Транскрибирует файл с тайм-кодами (реализация зависит от API)
+        Асинхронно транскрибирует файл одним запросом без выделения потока на запрос
         
         Args:
             file_path: Путь к файлу для транскрибации
             
         Returns:
-            Транскрипция с тайм-кодами
+            Структурированная транскрипция
         """
+        if not AsyncHttpClient.is_available():
+            return await super().get_transcript_async(file_path)
+        
         try:
-            with open(file_path, "rb") as audio_file:
-                # Некоторые реализации Whisper API поддерживают формат srt или vtt с тайм-кодами
-                files = {"file": audio_file}
-                data = {"response_format": "verbose_json"}  # Пытаемся получить подробный формат с тайм-кодами
-                response = requests.post(f"{self.api_url}/transcriptions", files=files, data=data)
-                response.raise_for_status()
-                
-                result = response.json()
-                
-                # Если API предоставляет сегменты с тайм-кодами, форматируем их
-                if "segments" in result:
-                    transcription_with_timecodes = []
-                    for segment in result["segments"]:
-                        start_time = self._format_time(segment["start"])
-                        text = segment["text"].strip()
-                        transcription_with_timecodes.append(f"[{start_time}] {text}")
-                    
-                    return " ".join(transcription_with_timecodes)
-                else:
-                    # В противном случае возвращаем обычный текст
-                    if "text" in result:
-                        return result["text"]
-                    else:
-                        raise TranscriptionError(f"Непредвиденный формат ответа от Whisper API: {result}")
+            return parse_whisper_result(await self._request_async(file_path))
         
+        except TranscriptionError:
+            raise
         except Exception as e:
-            raise TranscriptionError(f"Ошибка при транскрибации с Whisper API: {e}")
-    
-    def _format_time(self, seconds: float) -> str:
-        """
-        Преобразует время в секундах в формат HH:MM:SS
-        
-        Args:
-            seconds: Время в секундах
-            
-        Returns:
-            Время в формате HH:MM:SS
-        """
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}"
\ No newline at end of file
+            raise TranscriptionError(f"Ошибка при транскрибации с Whisper API: {e}", *extract_http_status(e))
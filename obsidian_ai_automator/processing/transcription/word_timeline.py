@@ -0,0 +1,185 @@
+"""
+Модуль компактного хранения слов транскрипции в столбцах
+
+Часовая запись содержит порядка десяти тысяч слов. Вместо объекта на каждое
+слово время хранится в массивах float32, текст - в таблице уникальных слов,
+а спикеры - в массиве номеров. Тайм-коды форматируются один раз на каждую
+секунду записи, а не на каждое слово
+"""
+import math
+from array import array
+from operator import add
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from obsidian_ai_automator.processing.transcription.timecodes import format_timecode
+
+
+# Номер спикера, если провайдер не выполнял разделение по спикерам
+NO_SPEAKER = -1
+
+
+class Word:
+    """
+    Слово транскрипции (представление одной строки WordTimeline)
+    """
+
+    __slots__ = ("text", "start", "end", "speaker", "confidence")
+
+    def __init__(self, text: str, start: float, end: Optional[float] = None,
+                 speaker: Optional[int] = None, confidence: Optional[float] = None):
+        self.text = text
+        self.start = start
+        self.end = end
+        self.speaker = speaker
+        self.confidence = confidence
+
+
+def _optional(value: float) -> Optional[float]:
+    """Преобразует NaN (отсутствующее значение в массиве) в None"""
+    return None if math.isnan(value) else value
+
+
+class WordTimeline:
+    """
+    Слова транскрипции в столбцах: время начала и конца, номер слова в таблице, спикер, уверенность
+    """
+
+    def __init__(self):
+        self.starts = array('f')
+        self.ends = array('f')
+        self.confidences = array('f')
+        self.speakers = array('h')
+        self.word_ids = array('I')
+        self.vocabulary: List[str] = []
+        self._word_index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: int) -> Word:
+        speaker = self.speakers[index]
+        return Word(self.vocabulary[self.word_ids[index]], self.starts[index], _optional(self.ends[index]),
+                    None if speaker == NO_SPEAKER else speaker, _optional(self.confidences[index]))
+
+    def _intern(self, text: str) -> int:
+        """Возвращает номер слова в таблице, добавляя новое слово при необходимости"""
+        word_id = self._word_index.get(text)
+        if word_id is None:
+            word_id = len(self.vocabulary)
+            self.vocabulary.append(text)
+            self._word_index[text] = word_id
+        return word_id
+
+    @classmethod
+    def from_columns(cls, texts: List[str], starts: List[float], ends: Optional[List[Optional[float]]] = None,
+                     speakers: Optional[List[Optional[int]]] = None,
+                     confidences: Optional[List[Optional[float]]] = None) -> 'WordTimeline':
+        """
+        Создает шкалу из столбцов целиком (быстрее, чем добавление по одному слову)
+
+        Args:
+            texts: Тексты слов
+            starts: Время начала слов
+            ends: Время конца слов (None - неизвестно)
+            speakers: Номера спикеров (None - без разделения по спикерам)
+            confidences: Уверенность распознавания (None - неизвестно)
+        """
+        timeline = cls()
+        count = len(texts)
+        timeline.starts = array('f', starts)
+        timeline.ends = array('f', [math.nan if value is None else value for value in ends] if ends else [math.nan] * count)
+        timeline.confidences = array('f', [math.nan if value is None else value for value in confidences]
+                                     if confidences else [math.nan] * count)
+        timeline.speakers = array('h', [NO_SPEAKER if value is None else value for value in speakers]
+                                  if speakers else [NO_SPEAKER] * count)
+        word_index = timeline._word_index
+        timeline.word_ids = array('I', [word_index.setdefault(text, len(word_index)) for text in texts])
+        timeline.vocabulary = list(word_index)
+        return timeline
+
+    def append(self, text: str, start: float, end: Optional[float] = None,
+               speaker: Optional[int] = None, confidence: Optional[float] = None):
+        """Добавляет слово в конец"""
+        self.starts.append(start)
+        self.ends.append(math.nan if end is None else end)
+        self.confidences.append(math.nan if confidence is None else confidence)
+        self.speakers.append(NO_SPEAKER if speaker is None else speaker)
+        self.word_ids.append(self._intern(text))
+
+    def extend(self, other: 'WordTimeline', start: int = 0, stop: Optional[int] = None):
+        """Добавляет в конец слова другой шкалы (или их диапазон)"""
+        stop = len(other) if stop is None else stop
+        self.starts.extend(other.starts[start:stop])
+        self.ends.extend(other.ends[start:stop])
+        self.confidences.extend(other.confidences[start:stop])
+        self.speakers.extend(other.speakers[start:stop])
+        remap = [self._intern(text) for text in other.vocabulary]
+        self.word_ids.extend(remap[word_id] for word_id in other.word_ids[start:stop])
+
+    def texts(self, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        """Тексты слов диапазона"""
+        return list(map(self.vocabulary.__getitem__, self.word_ids[start:stop]))
+
+    def render_text(self, start: int = 0, stop: Optional[int] = None) -> str:
+        """Текст слов диапазона через пробел"""
+        return " ".join(self.texts(start, stop))
+
+    def render_timecoded(self, start: int = 0, stop: Optional[int] = None) -> str:
+        """
+        Текст вида "[HH:MM:SS] слово" для каждого слова диапазона
+
+        Метка форматируется один раз для каждой секунды, в которой начинается
+        хотя бы одно слово; строки собираются без создания объектов слов
+        """
+        seconds = list(map(int, self.starts[start:stop]))
+        labels = {second: f"[{format_timecode(second)}] " for second in set(seconds)}
+        texts = map(self.vocabulary.__getitem__, self.word_ids[start:stop])
+        return " ".join(map(add, map(labels.__getitem__, seconds), texts))
+
+    def map_times(self, mapper: Callable[[float], float]) -> 'WordTimeline':
+        """Возвращает копию с пересчитанным временем; таблица слов используется совместно"""
+        timeline = WordTimeline()
+        timeline.starts = array('f', map(mapper, self.starts))
+        timeline.ends = array('f', (value if math.isnan(value) else mapper(value) for value in self.ends))
+        timeline.confidences = array('f', self.confidences)
+        timeline.speakers = array('h', self.speakers)
+        timeline.word_ids = array('I', self.word_ids)
+        timeline.vocabulary = self.vocabulary
+        timeline._word_index = self._word_index
+        return timeline
+
+    def select(self, indexes: Iterable[int]) -> 'WordTimeline':
+        """Возвращает шкалу из слов с указанными номерами"""
+        indexes = list(indexes)
+        timeline = WordTimeline()
+        timeline.starts = array('f', map(self.starts.__getitem__, indexes))
+        timeline.ends = array('f', map(self.ends.__getitem__, indexes))
+        timeline.confidences = array('f', map(self.confidences.__getitem__, indexes))
+        timeline.speakers = array('h', map(self.speakers.__getitem__, indexes))
+        timeline.word_ids = array('I', map(self.word_ids.__getitem__, indexes))
+        timeline.vocabulary = self.vocabulary
+        timeline._word_index = self._word_index
+        return timeline
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Сериализует шкалу в столбцы для кэша (NaN заменяется на None)"""
+        return {
+            "vocabulary": self.vocabulary,
+            "word_ids": self.word_ids.tolist(),
+            "starts": self.starts.tolist(),
+            "ends": [_optional(value) for value in self.ends],
+            "confidences": [_optional(value) for value in self.confidences],
+            "speakers": self.speakers.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'WordTimeline':
+        """Восстанавливает шкалу из кэша"""
+        timeline = cls()
+        timeline.vocabulary = list(data["vocabulary"])
+        timeline._word_index = {text: word_id for word_id, text in enumerate(timeline.vocabulary)}
+        timeline.word_ids = array('I', data["word_ids"])
+        timeline.starts = array('f', data["starts"])
+        timeline.ends = array('f', (math.nan if value is None else value for value in data["ends"]))
+        timeline.confidences = array('f', (math.nan if value is None else value for value in data["confidences"]))
+        timeline.speakers = array('h', data["speakers"])
+        return timeline
@@ -0,0 +1,182 @@
+"""
+Модуль кэша результатов анализа с адресацией по содержимому
+
+Ключ записи строится из хэша транскрипции, хэша итогового промпта и параметров
+модели (модель, temperature, top_p, max_tokens). Промпт строится из текущего
+custom_prompt.txt, поэтому его изменение автоматически дает новый ключ, а прежние
+записи вытесняются политикой вытеснения
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+from obsidian_ai_automator.core.logger import Logger
+
+
+# Порядок вытеснения записей: lru - давно не использованные, lfu - реже используемые
+EVICTION_POLICIES = {
+    "lru": "last_accessed ASC",
+    "lfu": "hits ASC, last_accessed ASC"
+}
+
+
+def hash_text(text: str) -> str:
+    """Возвращает SHA-256 текста"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Постоянный кэш результатов анализа в SQLite
+
+    Размер ограничивается количеством записей и суммарным размером текста;
+    лишние записи вытесняются после каждого сохранения. Счетчики попаданий
+    и промахов ведутся с момента создания объекта
+    """
+
+    def __init__(self, db_path: str = ".analysis_cache.sqlite3", max_entries: int = 1000,
+                 max_size_mb: float = 100, eviction_policy: str = "lru"):
+        """
+        Args:
+            db_path: Путь к базе данных кэша
+            max_entries: Максимальное количество записей (0 - без ограничения)
+            max_size_mb: Максимальный суммарный размер результатов в мегабайтах (0 - без ограничения)
+            eviction_policy: Политика вытеснения: lru или lfu
+        """
+        if eviction_policy not in EVICTION_POLICIES:
+            raise ValueError(f"Неизвестная политика вытеснения кэша анализа: {eviction_policy}")
+
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.eviction_policy = eviction_policy
+        self.logger = Logger()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                cache_key TEXT PRIMARY KEY,
+                transcript_hash TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                identity TEXT NOT NULL,
+                analysis TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+        """)
+        self._connection.commit()
+
+    @staticmethod
+    def make_key(transcript_hash: str, prompt_hash: str, identity: Dict[str, Any]) -> str:
+        """
+        Строит ключ записи
+
+        Args:
+            transcript_hash: Хэш транскрипции для анализа
+            prompt_hash: Хэш итогового промпта
+            identity: Параметры модели (см. BaseAnalyzer.cache_identity)
+
+        Returns:
+            Шестнадцатеричная строка ключа
+        """
+        payload = json.dumps({"transcript": transcript_hash, "prompt": prompt_hash, **identity},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """
+        Возвращает результат анализа или None, если его нет в кэше
+
+        Попадание обновляет время последнего использования и счетчик записи
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT analysis FROM analysis_cache WHERE cache_key = ?",
+                                           (cache_key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._connection.execute("UPDATE analysis_cache SET hits = hits + 1, last_accessed = ? "
+                                     "WHERE cache_key = ?", (time.time(), cache_key))
+            self._connection.commit()
+        return row['analysis']
+
+    def put(self, cache_key: str, transcript_hash: str, prompt_hash: str, identity: Dict[str, Any],
+            analysis: str):
+        """
+        Сохраняет результат анализа и вытесняет лишние записи
+
+        Args:
+            cache_key: Ключ записи (make_key)
+            transcript_hash: Хэш транскрипции для анализа
+            prompt_hash: Хэш итогового промпта
+            identity: Параметры модели
+            analysis: Результат анализа
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO analysis_cache (cache_key, transcript_hash, prompt_hash, identity, "
+                "analysis, size, hits, created_at, last_accessed) VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)",
+                (cache_key, transcript_hash, prompt_hash, json.dumps(identity, sort_keys=True, ensure_ascii=False),
+                 analysis, len(analysis.encode("utf-8")), datetime.now().isoformat(), time.time()))
+            self._evict(keep_key=cache_key)
+            self._connection.commit()
+
+    def _evict(self, keep_key: str):
+        """Удаляет записи сверх ограничений в порядке политики вытеснения (вызывается под блокировкой)"""
+        count, total_size = self._connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_cache").fetchone()
+        if (not self.max_entries or count <= self.max_entries) and \
+                (not self.max_size_bytes or total_size <= self.max_size_bytes):
+            return
+
+        evicted = []
+        rows = self._connection.execute(f"SELECT cache_key, size FROM analysis_cache WHERE cache_key != ? "
+                                        f"ORDER BY {EVICTION_POLICIES[self.eviction_policy]}", (keep_key,))
+        for row in rows:
+            if (not self.max_entries or count <= self.max_entries) and \
+                    (not self.max_size_bytes or total_size <= self.max_size_bytes):
+                break
+            evicted.append((row['cache_key'],))
+            count -= 1
+            total_size -= row['size']
+
+        self._connection.executemany("DELETE FROM analysis_cache WHERE cache_key = ?", evicted)
+        self.evictions += len(evicted)
+        self.logger.info(f"Из кэша анализа вытеснено записей: {len(evicted)} (политика {self.eviction_policy})")
+
+    def stats(self) -> Dict[str, Any]:
+        """Возвращает количество записей, размер и счетчики попаданий с момента создания объекта"""
+        with self._lock:
+            count, total_size = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_cache").fetchone()
+        requests = self.hits + self.misses
+        return {
+            "entries": count,
+            "size_bytes": total_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / requests if requests else 0.0
+        }
+
+    def close(self):
+        """Закрывает соединение с базой данных"""
+        with self._lock:
+            self._connection.close()
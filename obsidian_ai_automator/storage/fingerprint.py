@@ -0,0 +1,96 @@
+"""
+Модуль для вычисления отпечатков содержимого файлов
+
+Два режима:
+- fast: размер файла и хэш трех выборочных блоков (начало, середина, конец).
+  Читает несколько мегабайт независимо от размера видео, поэтому не зависит
+  от скорости сетевого хранилища
+- full: SHA-256 всего содержимого; используется для подтверждения совпадения
+"""
+import hashlib
+import os
+
+
+# Размер буфера чтения: крупные блоки снижают число системных вызовов на больших видеофайлах
+READ_BUFFER_SIZE = 1024 * 1024
+
+# Размер каждого из трех выборочных блоков быстрого отпечатка
+SAMPLE_BLOCK_SIZE = 4 * 1024 * 1024
+
+FINGERPRINT_MODES = ("fast", "full")
+
+
+def compute_file_hash(file_path: str) -> str:
+    """
+    Вычисляет SHA-256 содержимого файла
+
+    Args:
+        file_path: Путь к файлу
+
+    Returns:
+        Шестнадцатеричная строка хэша
+    """
+    sha256_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for byte_block in iter(lambda: f.read(READ_BUFFER_SIZE), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+def compute_sampled_fingerprint(file_path: str, block_size: int = SAMPLE_BLOCK_SIZE) -> str:
+    """
+    Вычисляет быстрый отпечаток файла по размеру и блокам из начала, середины и конца
+
+    Файлы меньше трех блоков хэшируются целиком. BLAKE2b используется как быстрый
+    хэш из стандартной библиотеки: на нескольких мегабайтах время уходит на чтение, а не на хэширование
+
+    Args:
+        file_path: Путь к файлу
+        block_size: Размер выборочного блока в байтах
+
+    Returns:
+        Шестнадцатеричная строка отпечатка (32 символа, отличается по длине от SHA-256)
+    """
+    size = os.path.getsize(file_path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(size.to_bytes(8, "little"))
+
+    with open(file_path, "rb", buffering=0) as f:
+        if size <= 3 * block_size:
+            for byte_block in iter(lambda: f.read(READ_BUFFER_SIZE), b""):
+                digest.update(byte_block)
+        else:
+            for offset in (0, (size - block_size) // 2, size - block_size):
+                f.seek(offset)
+                digest.update(f.read(block_size))
+    return digest.hexdigest()
+
+
+def compute_fingerprint(file_path: str, mode: str = "fast") -> str:
+    """
+    Вычисляет отпечаток файла в заданном режиме
+
+    Args:
+        file_path: Путь к файлу
+        mode: fast - выборочный отпечаток, full - SHA-256 всего содержимого
+
+    Returns:
+        Шестнадцатеричная строка отпечатка
+    """
+    if mode == "fast":
+        return compute_sampled_fingerprint(file_path)
+    if mode == "full":
+        return compute_file_hash(file_path)
+    raise ValueError(f"Неизвестный режим отпечатка: {mode}")
+
+
+def confirm_same_content(first_path: str, second_path: str) -> bool:
+    """
+    Подтверждает, что у двух файлов одинаковое содержимое, полным хэшированием
+
+    Нужен, когда совпадение быстрых отпечатков приводит к необратимому действию
+    (например, к пропуску файла как дубликата)
+    """
+    if os.path.getsize(first_path) != os.path.getsize(second_path):
+        return False
+    return compute_file_hash(first_path) == compute_file_hash(second_path)
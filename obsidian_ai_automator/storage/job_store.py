@@ -0,0 +1,183 @@
+"""
+Модуль для хранения состояния заданий обработки в SQLite
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+from obsidian_ai_automator.core.logger import Logger
+
+
+class JobState:
+    """
+    Состояния задания обработки файла
+    """
+    QUEUED = 'queued'
+    TRANSCRIBED = 'transcribed'
+    ANALYZED = 'analyzed'
+    WRITTEN = 'written'
+    FAILED = 'failed'
+    TIMED_OUT = 'timed_out'
+
+
+class JobStore:
+    """
+    Постоянная очередь заданий: одна запись на файл с текущей стадией,
+    количеством попыток и результатами завершенных стадий
+    """
+
+    def __init__(self, db_path: str = ".jobs.sqlite3"):
+        self.db_path = db_path
+        self.logger = Logger()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                file_path TEXT PRIMARY KEY,
+                file_mtime REAL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                transcript TEXT,
+                analysis TEXT,
+                output_path TEXT,
+                last_error TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        self._connection.commit()
+
+    def _row_to_job(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Преобразует строку таблицы в словарь задания"""
+        job = dict(row)
+        # Структурированная транскрипция хранится в JSON, прежние задания - строкой с тайм-кодами
+        if job['transcript'] is not None and job['transcript'].startswith('{'):
+            job['transcript'] = json.loads(job['transcript'])
+        if job['analysis'] is not None:
+            job['analysis'] = json.loads(job['analysis'])
+        return job
+
+    def _update(self, file_path: str, **fields):
+        """Обновляет поля задания и время последнего изменения"""
+        fields['updated_at'] = datetime.now().isoformat()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._connection.execute(f"UPDATE jobs SET {assignments} WHERE file_path = ?",
+                                     list(fields.values()) + [file_path])
+            self._connection.commit()
+
+    def get(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Возвращает задание для файла или None, если его нет"""
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM jobs WHERE file_path = ?", (file_path,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def enqueue(self, file_path: str) -> Dict[str, Any]:
+        """
+        Ставит файл в очередь или возвращает существующее задание
+
+        Если файл изменился с момента создания задания, результаты стадий сбрасываются.
+        Если заметка завершенного задания удалена, задание возвращается к последней
+        сохраненной стадии, чтобы заметка была записана заново
+
+        Args:
+            file_path: Путь к файлу
+
+        Returns:
+            Словарь задания
+        """
+        file_mtime = os.path.getmtime(file_path) if os.path.exists(file_path) else None
+        job = self.get(file_path)
+
+        if job is None:
+            now = datetime.now().isoformat()
+            with self._lock:
+                self._connection.execute(
+                    "INSERT OR IGNORE INTO jobs (file_path, file_mtime, state, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (file_path, file_mtime, JobState.QUEUED, now, now))
+                self._connection.commit()
+        elif file_mtime is not None and job['file_mtime'] != file_mtime:
+            self.logger.info(f"Файл {file_path} изменился, задание начинается заново")
+            self._update(file_path, file_mtime=file_mtime, state=JobState.QUEUED, attempts=0,
+                         transcript=None, analysis=None, output_path=None, last_error=None)
+        elif job['state'] == JobState.WRITTEN and job['output_path'] and not os.path.exists(job['output_path']):
+            self.logger.info(f"Заметка {job['output_path']} удалена, задание для {file_path} выполняется заново")
+            if job['analysis'] is not None:
+                state = JobState.ANALYZED
+            elif job['transcript'] is not None:
+                state = JobState.TRANSCRIBED
+            else:
+                state = JobState.QUEUED
+            self._update(file_path, state=state, attempts=0, output_path=None, last_error=None)
+
+        return self.get(file_path)
+
+    def start_attempt(self, file_path: str):
+        """Увеличивает счетчик попыток обработки задания"""
+        with self._lock:
+            self._connection.execute("UPDATE jobs SET attempts = attempts + 1, updated_at = ? WHERE file_path = ?",
+                                     (datetime.now().isoformat(), file_path))
+            self._connection.commit()
+
+    def mark_transcribed(self, file_path: str, transcript: Union[str, Dict[str, Any]]):
+        """Сохраняет транскрипцию (строку или словарь структурированной транскрипции) и переводит задание в состояние transcribed"""
+        if not isinstance(transcript, str):
+            transcript = json.dumps(transcript, ensure_ascii=False)
+        self._update(file_path, state=JobState.TRANSCRIBED, transcript=transcript, last_error=None)
+
+    def mark_analyzed(self, file_path: str, analysis_result: Dict[str, Any]):
+        """Сохраняет результат анализа и переводит задание в состояние analyzed"""
+        self._update(file_path, state=JobState.ANALYZED,
+                     analysis=json.dumps(analysis_result, ensure_ascii=False), last_error=None)
+
+    def mark_written(self, file_path: str, output_path: str):
+        """Фиксирует успешное сохранение заметки"""
+        self._update(file_path, state=JobState.WRITTEN, output_path=output_path, last_error=None)
+
+    def mark_failed(self, file_path: str, error: str):
+        """
+        Переводит задание в состояние failed
+
+        Результаты завершенных стадий сохраняются, поэтому повторная попытка
+        продолжит обработку с последней успешной стадии
+        """
+        self._update(file_path, state=JobState.FAILED, last_error=error)
+
+    def mark_timed_out(self, file_path: str, error: str):
+        """
+        Переводит задание в состояние timed_out после превышения ограничения времени
+
+        Как и при ошибке, результаты завершенных стадий сохраняются
+        """
+        self._update(file_path, state=JobState.TIMED_OUT, last_error=error)
+
+    def get_pending(self, max_attempts: int = 3) -> List[str]:
+        """
+        Возвращает пути файлов незавершенных заданий в порядке постановки в очередь
+
+        Args:
+            max_attempts: Задания, исчерпавшие это количество попыток, не возвращаются
+
+        Returns:
+            Список путей к файлам
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT file_path FROM jobs WHERE state != ? AND attempts < ? ORDER BY created_at",
+                (JobState.WRITTEN, max_attempts)).fetchall()
+        return [row['file_path'] for row in rows]
+
+    def close(self):
+        """Закрывает соединение с базой данных"""
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,177 @@
+"""
+Модуль индекса обработанных файлов для проверки дубликатов
+
+Заменяет каталог .hash_cache (один файл-маркер на каждый обработанный отпечаток)
+одной таблицей SQLite с первичным ключом по отпечатку
+"""
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+from obsidian_ai_automator.core.logger import Logger
+from obsidian_ai_automator.storage.fingerprint import compute_fingerprint
+
+
+class ProcessedHashIndex:
+    """
+    Индекс отпечатков успешно обработанных файлов
+
+    Поиск выполняется по первичному ключу, а файл отмечается обработанным
+    одной транзакцией только после успешной обработки
+    """
+
+    def __init__(self, db_path: str = ".processed_hashes.sqlite3"):
+        self.db_path = db_path
+        self.logger = Logger()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS processed (
+                fingerprint TEXT PRIMARY KEY,
+                file_path TEXT,
+                file_mtime REAL,
+                output_path TEXT,
+                processed_at TEXT NOT NULL
+            )
+        """)
+        # Служебные отметки индекса (например, о выполненном переносе .hash_cache)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+        self._connection.commit()
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Возвращает запись об обработанном файле или None"""
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM processed WHERE fingerprint = ?",
+                                           (fingerprint,)).fetchone()
+        return dict(row) if row else None
+
+    def contains(self, fingerprint: str) -> bool:
+        """Проверяет, обрабатывался ли файл с таким отпечатком"""
+        return self.get(fingerprint) is not None
+
+    def mark_processed(self, fingerprint: str, file_path: str, output_path: Optional[str] = None):
+        """
+        Отмечает файл обработанным (вызывается после успешного сохранения результата)
+
+        Args:
+            fingerprint: Отпечаток содержимого файла
+            file_path: Путь к обработанному файлу
+            output_path: Путь к созданной заметке
+        """
+        file_mtime = os.path.getmtime(file_path) if os.path.exists(file_path) else None
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO processed (fingerprint, file_path, file_mtime, output_path, processed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (fingerprint, file_path, file_mtime, output_path, datetime.now().isoformat()))
+            self._connection.commit()
+
+    def count(self) -> int:
+        """Количество записей в индексе"""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM processed").fetchone()[0]
+
+    def migrate_hash_cache(self, hash_cache_dir: str) -> int:
+        """
+        Переносит записи из каталога .hash_cache в индекс
+
+        Запись каталога - файл с именем отпечатка и содержимым "Processed: <путь> at <mtime>".
+        Записи, названные SHA-256 (64 символа), переносятся под быстрым отпечатком, если
+        исходный файл еще на месте, и дополнительно под прежним именем. Завершение переноса
+        отмечается в таблице meta вместе с записями, поэтому перенос выполняется один раз,
+        даже если каталог не удалось переименовать. После переноса каталог переименовывается
+        в <каталог>.migrated (или <каталог>.migrated.N, если такой каталог уже есть)
+
+        Args:
+            hash_cache_dir: Путь к каталогу .hash_cache
+
+        Returns:
+            Количество перенесенных записей
+        """
+        if not os.path.isdir(hash_cache_dir):
+            return 0
+
+        migration_key = f"hash_cache_migrated:{os.path.abspath(hash_cache_dir)}"
+        with self._lock:
+            migrated = self._connection.execute("SELECT value FROM meta WHERE key = ?",
+                                                (migration_key,)).fetchone()
+        if migrated:
+            self.logger.debug(f"Каталог {hash_cache_dir} уже перенесен в индекс {migrated['value']}")
+            return 0
+
+        rows = []
+        for name in os.listdir(hash_cache_dir):
+            record_path = os.path.join(hash_cache_dir, name)
+            if name.startswith(".") or not os.path.isfile(record_path):
+                continue
+            file_path, file_mtime = self._parse_hash_record(record_path)
+            processed_at = datetime.fromtimestamp(os.path.getmtime(record_path)).isoformat()
+            rows.append((name, file_path, file_mtime, None, processed_at))
+
+            if len(name) == 64 and file_path and os.path.exists(file_path):
+                try:
+                    rows.append((compute_fingerprint(file_path), file_path, file_mtime, None, processed_at))
+                except OSError as e:
+                    self.logger.warning(f"Не удалось вычислить отпечаток {file_path} при переносе .hash_cache: {e}")
+
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO processed (fingerprint, file_path, file_mtime, output_path, processed_at) "
+                "VALUES (?, ?, ?, ?, ?)", rows)
+            self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                     (migration_key, datetime.now().isoformat()))
+            self._connection.commit()
+        self.logger.info(f"Записи {hash_cache_dir} перенесены в индекс {self.db_path}: {len(rows)}")
+
+        migrated_dir = self._migrated_dir_name(hash_cache_dir)
+        try:
+            os.rename(hash_cache_dir, migrated_dir)
+            self.logger.info(f"Каталог {hash_cache_dir} переименован в {migrated_dir} и может быть удален")
+        except OSError as e:
+            self.logger.warning(f"Не удалось переименовать каталог {hash_cache_dir}, он больше не используется "
+                                f"и может быть удален: {e}")
+        return len(rows)
+
+    @staticmethod
+    def _migrated_dir_name(hash_cache_dir: str) -> str:
+        """Возвращает свободное имя для перенесенного каталога: <каталог>.migrated или <каталог>.migrated.N"""
+        migrated_dir = f"{hash_cache_dir.rstrip(os.sep)}.migrated"
+        candidate, suffix = migrated_dir, 1
+        while os.path.exists(candidate):
+            candidate = f"{migrated_dir}.{suffix}"
+            suffix += 1
+        return candidate
+
+    @staticmethod
+    def _parse_hash_record(record_path: str):
+        """Возвращает путь к файлу и mtime из записи .hash_cache ("Processed: <путь> at <mtime>")"""
+        try:
+            with open(record_path, 'r') as f:
+                record = f.read()
+        except (OSError, UnicodeDecodeError):
+            return None, None
+        if not record.startswith("Processed: "):
+            return None, None
+        file_path, _, file_mtime = record[len("Processed: "):].rpartition(" at ")
+        try:
+            return file_path, float(file_mtime)
+        except ValueError:
+            return file_path or None, None
+
+    def close(self):
+        """Закрывает соединение с базой данных"""
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,120 @@
+"""
+Модуль хранилища транскрипций с адресацией по содержимому
+
+Ключ записи строится из хэша содержимого медиафайла и параметров транскрибации
+(провайдер, модель, опции), поэтому переименование, перемещение или повторная
+загрузка того же файла не приводят к повторной платной транскрибации.
+Хранилище используется и пакетом, и scripts/ai_analyzer.py
+"""
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, Optional
+from obsidian_ai_automator.core.logger import Logger
+from obsidian_ai_automator.processing.transcription.transcript import Transcript
+
+
+# Относительный путь хранилища отсчитывается от корня проекта, чтобы пакет и скрипты
+# использовали один каталог независимо от текущей директории
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TranscriptStore:
+    """
+    Постоянное хранилище структурированных транскрипций
+
+    Записи не имеют срока хранения: одинаковые ключ и содержимое всегда дают
+    одинаковую транскрипцию. Файлы раскладываются по подкаталогам по первым
+    символам ключа, чтобы каталоги не разрастались
+    """
+
+    def __init__(self, store_dir: str = ".deepgram_cache"):
+        self.store_dir = os.path.join(PROJECT_ROOT, os.path.expanduser(store_dir))
+        self.logger = Logger()
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(media_hash: str, identity: Dict[str, Any]) -> str:
+        """
+        Строит ключ записи
+
+        Args:
+            media_hash: Хэш содержимого медиафайла
+            identity: Параметры транскрибации (см. BaseTranscriber.cache_identity)
+
+        Returns:
+            Шестнадцатеричная строка ключа
+        """
+        payload = json.dumps({"media": media_hash, **identity}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.store_dir, key[:2], f"{key}.json")
+
+    def get(self, media_hash: str, identity: Dict[str, Any]) -> Optional[Transcript]:
+        """
+        Возвращает транскрипцию или None, если ее нет в хранилище
+
+        Args:
+            media_hash: Хэш содержимого медиафайла
+            identity: Параметры транскрибации
+        """
+        path = self._path(self.make_key(media_hash, identity))
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+            return Transcript.from_dict(record['transcript'])
+        except Exception as e:
+            # Поврежденная запись равносильна ее отсутствию
+            self.logger.error(f"Ошибка при чтении транскрипции из хранилища {path}: {e}")
+            return None
+
+    def put(self, media_hash: str, identity: Dict[str, Any], transcript: Transcript,
+            source_path: Optional[str] = None) -> str:
+        """
+        Сохраняет транскрипцию
+
+        Запись сначала пишется во временный файл и затем атомарно переименовывается,
+        поэтому при сбое в хранилище не остается частично записанных файлов
+
+        Args:
+            media_hash: Хэш содержимого медиафайла
+            identity: Параметры транскрибации
+            transcript: Транскрипция
+            source_path: Путь к исходному файлу (сохраняется для справки)
+
+        Returns:
+            Путь к файлу записи
+        """
+        key = self.make_key(media_hash, identity)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        record = {
+            "media_hash": media_hash,
+            "identity": identity,
+            "source_path": source_path,
+            "stored_at": datetime.now().isoformat(),
+            "transcript": transcript.to_dict()
+        }
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        self.logger.info(f"Транскрипция сохранена в хранилище: {path}")
+        return path
+
+    def contains(self, media_hash: str, identity: Dict[str, Any]) -> bool:
+        """Проверяет, есть ли транскрипция в хранилище"""
+        return os.path.exists(self._path(self.make_key(media_hash, identity)))
@@ -1,14 +1,19 @@
 import sys
-import json
 import requests
 import os
 import re
 import time
 import logging
 import configparser
-import hashlib
 from prompt_manager import PromptManager
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from obsidian_ai_automator.core.error_handler import TranscriptionError
+from obsidian_ai_automator.processing.transcription.deepgram_transcriber import DeepgramTranscriber
+from obsidian_ai_automator.storage.fingerprint import compute_fingerprint, confirm_same_content
+from obsidian_ai_automator.storage.transcript_store import TranscriptStore, PROJECT_ROOT
+from obsidian_ai_automator.storage.processed_index import ProcessedHashIndex
+
 def send_notification(message, level="ERROR"):
     """Отправляет уведомления через различные каналы (email, Telegram)."""
     # Сначала логируем сообщение
@@ -115,156 +120,78 @@ else:
 NVIDIA_API_URL = config.get('NVIDIA_API', 'api_url')
 NVIDIA_MODEL = config.get('NVIDIA_API', 'model')
 OBSIDIAN_VAULT_PATH = os.path.expanduser(config.get('Paths', 'obsidian_vault_path'))
-TRANSCRIPT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", config.get('Paths', 'transcript_cache_directory'))
+# Хранилище транскрипций, общее с пакетом obsidian_ai_automator (путь отсчитывается от корня проекта)
+TRANSCRIPT_STORE = TranscriptStore(config.get('Paths', 'transcript_cache_directory', fallback='.deepgram_cache'))
+# Индекс обработанных файлов (отпечатки успешно обработанных файлов) вместо каталога .hash_cache
+PROCESSED_INDEX = ProcessedHashIndex(os.path.join(
+    PROJECT_ROOT, os.path.expanduser(config.get('Paths', 'processed_index_path', fallback='.processed_hashes.sqlite3'))))
+PROCESSED_INDEX.migrate_hash_cache(os.path.join(PROJECT_ROOT, ".hash_cache"))
 
 
 # ---------------------
 
 def calculate_file_hash(file_path):
-    """Вычисляет SHA-256 хеш файла для проверки дубликатов."""
-    hash_sha256 = hashlib.sha256()
+    """Вычисляет быстрый отпечаток файла (размер и выборочные блоки) для проверки дубликатов и ключа хранилища."""
     try:
-        with open(file_path, "rb") as f:
-            # Читаем файл по частям для экономии памяти
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_sha256.update(chunk)
-        return hash_sha256.hexdigest()
+        return compute_fingerprint(file_path)
     except Exception as e:
         logging.error(f"Ошибка при вычислении хеша файла {file_path}: {e}")
         send_notification(f"Ошибка при вычислении хеша файла {file_path}: {e}")
         return None
 
 
-def check_duplicate_file(file_path):
-    """Проверяет, обрабатывался ли файл ранее, используя его хеш."""
-    # Получаем директорию для хранения хешей
-    hash_cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".hash_cache")
-    os.makedirs(hash_cache_dir, exist_ok=True)
-    
-    file_hash = calculate_file_hash(file_path)
+def check_duplicate_file(file_path, file_hash=None):
+    """Проверяет, обрабатывался ли файл ранее, используя его отпечаток."""
+    if file_hash is None:
+        file_hash = calculate_file_hash(file_path)
     if not file_hash:
         return False  # Не удалось вычислить хеш, продолжаем обработку
     
-    hash_file_path = os.path.join(hash_cache_dir, file_hash)
+    record = PROCESSED_INDEX.get(file_hash)
+    if record is None:
+        return False
     
-    if os.path.exists(hash_file_path):
-        # Файл с таким хешем уже обрабатывался
-        logging.info(f"Файл {file_path} уже обрабатывался ранее (найден хеш: {file_hash})")
-        return True
-    else:
-        # Отмечаем, что файл с таким хешем теперь обрабатывается
-        with open(hash_file_path, 'w') as f:
-            f.write(f"Processed: {file_path} at {str(os.path.getmtime(file_path))}")
-        logging.info(f"Файл {file_path} отмечен как обработанный (хеш: {file_hash})")
+    # Пропуск файла необратим, поэтому совпадение выборочных отпечатков подтверждаем
+    # полным хешированием, если ранее обработанный файл еще доступен
+    processed_path = record['file_path']
+    if (processed_path and os.path.exists(processed_path)
+            and os.path.abspath(processed_path) != os.path.abspath(file_path)
+            and not confirm_same_content(processed_path, file_path)):
+        logging.warning(f"Отпечаток файла {file_path} совпал с {processed_path}, но содержимое отличается")
         return False
+    # Файл с таким отпечатком уже обрабатывался
+    logging.info(f"Файл {file_path} уже обрабатывался ранее (найден отпечаток: {file_hash})")
+    return True
 
 
-def transcribe_with_deepgram(video_path):
-    """Транскрибирует видеофайл с помощью Deepgram API, используя кэширование."""
+def transcribe_with_deepgram(video_path, media_hash=None):
+    """Транскрибирует видеофайл с помощью Deepgram API, используя общее с пакетом хранилище транскрипций."""
     if not DEEPGRAM_API_KEY:
         error_message = f"Ошибка: DEEPGRAM_API_KEY не установлен. Пожалуйста, создайте файл {DEEPGRAM_API_KEY_FILE} и поместите в него ваш ключ."
         logging.error(error_message)
         send_notification(error_message)
         sys.exit(1)
 
-    # Создаем директорию для кэша, если ее нет
-    os.makedirs(TRANSCRIPT_CACHE_DIR, exist_ok=True)
-
-    # Генерируем имя кэш-файла на основе имени видеофайла
+    transcriber = DeepgramTranscriber(api_key=DEEPGRAM_API_KEY)
+    identity = transcriber.cache_identity()
     video_filename = os.path.basename(video_path)
-    json_cache_filename = os.path.join(TRANSCRIPT_CACHE_DIR, f"{video_filename}.json")
-    text_cache_filename = os.path.join(TRANSCRIPT_CACHE_DIR, f"{video_filename}.txt")
-
-    # Проверяем, существует ли кэшированный текстовый транскрипт
-    if os.path.exists(text_cache_filename):
-        logging.info(f"Используем кэшированный текстовый транскрипт для {video_filename}")
-        with open(text_cache_filename, 'r', encoding='utf-8') as f:
-            return f.read()
-
-    # Проверяем, существует ли кэшированный JSON-транскрипт
-    if os.path.exists(json_cache_filename):
-        logging.info(f"Используем кэшированный JSON-транскрипт для {video_filename}")
-        try:
-            with open(json_cache_filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            # Извлечение полного текста из JSON для сохранения в текстовый кэш
-            full_text_from_json = []
-            if 'results' in data and 'channels' in data['results'] and data['results']['channels']:
-                for channel in data['results']['channels']:
-                    for alternative in channel['alternatives']:
-                        full_text_from_json.append(alternative['transcript'])
-            plain_text_transcript = " ".join(full_text_from_json).strip()
-
-            # Сохраняем чистый текстовый транскрипт в кэш-файл
-            with open(text_cache_filename, 'w', encoding='utf-8') as f:
-                f.write(plain_text_transcript)
-            logging.info(f"Чистый текстовый транскрипт сохранен в кэш: {text_cache_filename}")
-
-            # Извлечение транскрипта с тайм-кодами для возврата
-            full_text_with_timecodes = []
-            if 'results' in data and 'channels' in data['results'] and data['results']['channels']:
-                for channel in data['results']['channels']:
-                    for alternative in channel['alternatives']:
-                        for word_info in alternative['words']:
-                            start_time = str(int(word_info['start'] // 3600)).zfill(2) + ':' + \
-                                         str(int((word_info['start'] % 3600) // 60)).zfill(2) + ':' + \
-                                         str(int(word_info['start'] % 60)).zfill(2)
-                            full_text_with_timecodes.append(f"[{start_time}] {word_info['word'].strip()}")
-            return " ".join(full_text_with_timecodes)
-        except Exception as e:
-            logging.error(f"Ошибка при чтении кэш-файла {json_cache_filename}: {e}. Повторяем транскрипцию.")
-            # Если кэш-файл поврежден, удаляем его и продолжаем без него
-            os.remove(json_cache_filename)
-
-    logging.info(f"Кэшированный транскрипт для {video_filename} не найден или поврежден. Выполняем транскрипцию с Deepgram API...")
 
-    # URL для Deepgram API
-    DEEPGRAM_URL = "https://api.deepgram.com/v1/listen?punctuate=true&diarize=true&language=ru&model=nova-2"
+    # Транскрипция ищется по содержимому файла, а не по имени: перемещенный или
+    # переименованный файл не транскрибируется повторно, а одноименные файлы из разных папок не путаются
+    if media_hash is None:
+        media_hash = calculate_file_hash(video_path)
+    if media_hash:
+        transcript = TRANSCRIPT_STORE.get(media_hash, identity)
+        if transcript:
+            logging.info(f"Используем сохраненную транскрипцию для {video_filename}")
+            return transcript.timecoded_text
 
-    headers = {
-        "Authorization": f"Token {DEEPGRAM_API_KEY}",
-        "Content-Type": "video/mp4" # Или другой соответствующий MIME-тип видео
-    }
+    logging.info(f"Сохраненная транскрипция для {video_filename} не найдена. Выполняем транскрипцию с Deepgram API...")
 
     try:
-        with open(video_path, 'rb') as video_file:
-            response = requests.post(DEEPGRAM_URL, headers=headers, data=video_file)
-            response.raise_for_status() # Вызывает исключение для ошибок HTTP
-
-        data = response.json()
-        
-        # Сохраняем полный ответ Deepgram в кэш-файл
-        with open(json_cache_filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-        logging.info(f"Полный JSON-транскрипт Deepgram сохранен в кэш: {json_cache_filename}")
-
-        # Извлечение чистого текста транскрипции для сохранения в текстовый кэш
-        plain_text_transcript = ""
-        if 'results' in data and 'channels' in data['results'] and data['results']['channels']:
-            for channel in data['results']['channels']:
-                for alternative in channel['alternatives']:
-                    plain_text_transcript += alternative['transcript'] + " "
-        plain_text_transcript = plain_text_transcript.strip()
-
-        # Сохраняем чистый текстовый транскрипт в кэш-файл
-        with open(text_cache_filename, 'w', encoding='utf-8') as f:
-            f.write(plain_text_transcript)
-        logging.info(f"Чистый текстовый транскрипт сохранен в кэш: {text_cache_filename}")
-
-        # Извлечение транскрипта с тайм-кодами для возврата
-        full_text_with_timecodes = []
-        if 'results' in data and 'channels' in data['results'] and data['results']['channels']:
-            for channel in data['results']['channels']:
-                for alternative in channel['alternatives']:
-                    for word_info in alternative['words']:
-                        start_time = str(int(word_info['start'] // 3600)).zfill(2) + ':' + \
-                                     str(int((word_info['start'] % 3600) // 60)).zfill(2) + ':' + \
-                                     str(int(word_info['start'] % 60)).zfill(2)
-                        full_text_with_timecodes.append(f"[{start_time}] {word_info['word'].strip()}")
-        
-        return " ".join(full_text_with_timecodes)
-    except requests.exceptions.RequestException as e:
-        error_message = f"Ошибка при обращении к Deepgram API: {e}"
+        transcript = transcriber.get_transcript(video_path)
+    except TranscriptionError as e:
+        error_message = str(e)
         logging.error(error_message)
         send_notification(error_message)
         sys.exit(1)
@@ -273,6 +200,14 @@ def transcribe_with_deepgram(video_path):
         logging.error(error_message)
         send_notification(error_message)
         sys.exit(1)
+
+    if media_hash and transcript:
+        TRANSCRIPT_STORE.put(media_hash, identity, transcript, source_path=video_path)
+        logging.info(f"Транскрипция {video_filename} сохранена в хранилище")
+
+    return transcript.timecoded_text
+
+
 def analyze_with_nvidia_llm(transcript):
     """Отправляет транскрипт в NVIDIA API и получает структурированный Markdown."""
     if not NVIDIA_API_KEY:
@@ -331,8 +266,11 @@ def main():
 
     input_path = sys.argv[1]
     
+    # Отпечаток вычисляется один раз: он нужен и для проверки дубликатов, и как ключ хранилища транскрипций
+    file_hash = calculate_file_hash(input_path)
+    
     # Проверяем, обрабатывался ли файл ранее
-    if check_duplicate_file(input_path):
+    if check_duplicate_file(input_path, file_hash):
         logging.info(f"Файл {input_path} уже был обработан ранее. Пропускаем.")
         print(f"Файл {input_path} уже был обработан ранее. Пропускаем.")
         sys.exit(0)
@@ -351,7 +289,7 @@ def main():
     transcript_with_timecodes = ""
     if is_video_file:
         logging.info(f"Начало транскрипции видео с Deepgram API: {input_path}...")
-        transcript_with_timecodes = transcribe_with_deepgram(input_path)
+        transcript_with_timecodes = transcribe_with_deepgram(input_path, file_hash)
         logging.info("Транскрипция завершена.")
     elif file_extension == '.txt':
         logging.info(f"Используем предоставленный текстовый файл как транскрипт: {input_path}...")
@@ -405,6 +343,11 @@ def main():
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write(markdown_output)
 
+    # Файл отмечается обработанным только после сохранения заметки: при сбое на любой
+    # предыдущей стадии повторный запуск обработает его снова
+    if file_hash:
+        PROCESSED_INDEX.mark_processed(file_hash, input_path, output_path)
+
     logging.info(f"Успех. Obsidian заметка создана: {output_path}")
     print(output_path)  # Выводим путь к созданному файлу для bash-скрипта
     
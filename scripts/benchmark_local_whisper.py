@@ -0,0 +1,76 @@
+"""
+Замер движков локального Whisper: скорость (RTF - время транскрибации, деленное
+на длительность записи) и пиковая память процесса
+
+Каждый движок запускается в отдельном процессе, чтобы память одной модели
+не влияла на замер другой
+
+Использование:
+    python scripts/benchmark_local_whisper.py <файл> [--model base] [--threads 0]
+        [--backends openai-whisper faster-whisper] [--compute-type int8]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from obsidian_ai_automator.core.scheduler import probe_media_duration
+from obsidian_ai_automator.processing.transcription.whisper_backends import get_whisper_backend
+
+
+def run_backend(backend_name: str, compute_type: str, model_size: str, threads: int, file_path: str, results):
+    """Загружает модель и транскрибирует файл в отдельном процессе"""
+    backend = get_whisper_backend(backend_name, compute_type)
+
+    start_time = time.perf_counter()
+    model = backend.load_model(model_size, threads)
+    load_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    result = backend.transcribe(model, file_path, word_timestamps=True)
+    transcribe_time = time.perf_counter() - start_time
+
+    words = sum(len(segment["words"]) for segment in result["segments"])
+    # ru_maxrss в Linux измеряется в килобайтах
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.put((load_time, transcribe_time, words, peak_rss))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file", help="Аудио или видео файл")
+    parser.add_argument("--model", default="base", help="Размер модели")
+    parser.add_argument("--threads", type=int, default=0, help="Количество потоков (0 - по числу ядер)")
+    parser.add_argument("--backends", nargs="+", default=["openai-whisper", "faster-whisper"])
+    parser.add_argument("--compute-type", default="int8", help="Тип весов для faster-whisper")
+    args = parser.parse_args()
+
+    duration = probe_media_duration(args.file)
+    if not duration:
+        sys.exit(f"Не удалось определить длительность файла {args.file} (нужен ffprobe)")
+    threads = args.threads or os.cpu_count() or 1
+    print(f"{os.path.basename(args.file)}: {duration:.0f} сек, модель {args.model}, потоков {threads}")
+
+    # spawn: каждый движок в чистом процессе без загруженных библиотек
+    context = multiprocessing.get_context("spawn")
+    for backend_name in args.backends:
+        results = context.Queue()
+        process = context.Process(target=run_backend,
+                                  args=(backend_name, args.compute_type, args.model, threads, args.file, results))
+        process.start()
+        process.join()
+        if process.exitcode != 0 or results.empty():
+            print(f"  {backend_name}: ошибка (код завершения {process.exitcode})")
+            continue
+
+        load_time, transcribe_time, words, peak_rss = results.get()
+        print(f"  {backend_name}: загрузка {load_time:.1f} сек, транскрибация {transcribe_time:.1f} сек, "
+              f"RTF {transcribe_time / duration:.3f}, слов {words}, пик памяти {peak_rss:.0f} МБ")
+
+
+if __name__ == "__main__":
+    main()
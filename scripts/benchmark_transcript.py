@@ -0,0 +1,130 @@
+"""
+Замер разбора ответа Deepgram и построения транскрипции с тайм-кодами
+
+Сравнивает прежний способ (строка "[HH:MM:SS] слово" для каждого слова с тремя
+вызовами zfill) с WordTimeline: время и пиковую память на многочасовых записях,
+а также память, которую занимают слова транскрипции в кэше процесса
+(объект на каждое слово против столбцов) и размер транскрипции для анализа
+при разной детализации тайм-кодов
+
+Использование:
+    python scripts/benchmark_transcript.py [часы ...]
+"""
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from obsidian_ai_automator.processing.transcription.deepgram_transcriber import parse_deepgram_response
+from obsidian_ai_automator.processing.transcription.word_timeline import Word
+from obsidian_ai_automator.processing.analysis.prompt_manager import estimate_tokens
+
+WORDS_PER_SECOND = 2.8
+VOCABULARY = [f"слово{index}" for index in range(3000)]
+
+
+def synthetic_response(hours: float):
+    """Генерирует ответ Deepgram с абзацами для записи заданной длительности"""
+    rng = random.Random(0)
+    words = []
+    sentences = []
+    position = 0.0
+    duration = hours * 3600
+    while position < duration:
+        sentence_start = position
+        sentence_words = []
+        for _ in range(rng.randint(5, 20)):
+            text = rng.choice(VOCABULARY)
+            sentence_words.append(text)
+            # Deepgram возвращает время с точностью до сотых секунды
+            words.append({"word": text, "punctuated_word": text, "start": round(position, 2),
+                          "end": round(position + 0.3, 2), "confidence": 0.9, "speaker": 0})
+            position += 1 / WORDS_PER_SECOND
+        sentences.append({"text": " ".join(sentence_words), "start": round(sentence_start, 2), "end": round(position, 2)})
+    return {"metadata": {"duration": duration},
+            "results": {"channels": [{"alternatives": [{
+                "transcript": "", "words": words,
+                "paragraphs": {"paragraphs": [{"speaker": 0, "sentences": sentences}]}
+            }]}]}}
+
+
+def legacy_timecodes(data) -> str:
+    """Прежний способ построения тайм-кодов (по строке на каждое слово)"""
+    full_text_with_timecodes = []
+    for channel in data['results']['channels']:
+        for alternative in channel['alternatives']:
+            for word_info in alternative['words']:
+                start_time = str(int(word_info['start'] // 3600)).zfill(2) + ':' + \
+                             str(int((word_info['start'] % 3600) // 60)).zfill(2) + ':' + \
+                             str(int(word_info['start'] % 60)).zfill(2)
+                full_text_with_timecodes.append(f"[{start_time}] {word_info['word'].strip()}")
+    return " ".join(full_text_with_timecodes)
+
+
+def timeline_timecodes(data) -> str:
+    """Разбор в WordTimeline и построение тайм-кодов по столбцам"""
+    return parse_deepgram_response(data).timecoded_text
+
+
+def word_objects(data):
+    """Слова в виде объекта на каждое слово"""
+    return [Word(word_info['punctuated_word'], word_info['start'], word_info['end'],
+                 word_info['speaker'], word_info['confidence'])
+            for word_info in data['results']['channels'][0]['alternatives'][0]['words']]
+
+
+def word_columns(data):
+    """Слова в столбцах WordTimeline"""
+    return parse_deepgram_response(data).timeline
+
+
+def retained(function, data) -> float:
+    """Память в МБ, которую занимает результат функции"""
+    gc.collect()
+    tracemalloc.start()
+    result = function(data)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current / 1e6
+
+
+def measure(function, data):
+    """Возвращает (время в секундах, пиковая дополнительная память в МБ, результат)"""
+    gc.collect()
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    result = function(data)
+    elapsed = time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6, result
+
+
+def main():
+    hours_list = [float(value) for value in sys.argv[1:]] or [1, 3, 6]
+    for hours in hours_list:
+        data = synthetic_response(hours)
+        word_count = len(data['results']['channels'][0]['alternatives'][0]['words'])
+        legacy_time, legacy_peak, legacy_text = measure(legacy_timecodes, data)
+        timeline_time, timeline_peak, timeline_text = measure(timeline_timecodes, data)
+        assert legacy_text == timeline_text
+
+        print(f"{hours:g} ч, {word_count} слов:")
+        print(f"  по строке на слово: {legacy_time * 1000:.0f} мс, пик памяти {legacy_peak:.1f} МБ")
+        print(f"  WordTimeline:       {timeline_time * 1000:.0f} мс, пик памяти {timeline_peak:.1f} МБ")
+        print(f"  слова в памяти: объекты {retained(word_objects, data):.1f} МБ, "
+              f"столбцы {retained(word_columns, data):.1f} МБ")
+        transcript = parse_deepgram_response(data)
+        tokens = {granularity: estimate_tokens(transcript.render_timecoded(granularity))
+                  for granularity in ("word", "sentence", "paragraph", "interval", "none")}
+        print("  токенов для анализа: " + ", ".join(f"{name} {count}" for name, count in tokens.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Замер скорости детектора речи (RTF - время обработки, деленное на длительность записи)
+
+Использование:
+    python scripts/benchmark_vad.py <файл> [<файл> ...]
+    python scripts/benchmark_vad.py --synthetic 3600
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from obsidian_ai_automator.processing.transcription.vad import (
+    SAMPLE_WIDTH, decode_pcm, detect_speech_regions, build_trimmed_audio
+)
+
+SAMPLE_RATE = 16000
+
+
+def synthetic_pcm(duration_seconds: float) -> bytes:
+    """
+    Генерирует запись с чередованием "речи" (модулированный шум) и тишины с фоновым шумом
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0, 0.003, int(duration_seconds * SAMPLE_RATE))
+    position = 0
+    while position < len(samples):
+        speech_length = int(rng.uniform(5, 40) * SAMPLE_RATE)
+        envelope = 0.5 + 0.5 * np.sin(np.linspace(0, speech_length / SAMPLE_RATE * 2 * np.pi * 3, speech_length))
+        segment = samples[position:position + speech_length]
+        segment += rng.normal(0, 0.2, len(segment)) * envelope[:len(segment)]
+        position += speech_length + int(rng.uniform(1, 30) * SAMPLE_RATE)
+    return (np.clip(samples, -1, 1) * 32767).astype(np.int16).tobytes()
+
+
+def benchmark(name: str, pcm: bytes, decode_time: float = 0.0):
+    """Замеряет детектор и склейку участков речи и печатает RTF"""
+    duration = len(pcm) / SAMPLE_WIDTH / SAMPLE_RATE
+
+    start_time = time.perf_counter()
+    regions = detect_speech_regions(pcm, SAMPLE_RATE)
+    detect_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    trimmed_pcm, _ = build_trimmed_audio(pcm, SAMPLE_RATE, regions)
+    trim_time = time.perf_counter() - start_time
+
+    voiced = len(trimmed_pcm) / SAMPLE_WIDTH / SAMPLE_RATE
+    print(f"{name}: {duration:.0f} сек, участков речи {len(regions)}, после удаления тишины {voiced:.0f} сек "
+          f"({voiced / duration:.0%})")
+    if decode_time:
+        print(f"  декодирование ffmpeg: {decode_time:.2f} сек, RTF {decode_time / duration:.4f}")
+    print(f"  детектор: {detect_time:.3f} сек, RTF {detect_time / duration:.5f}")
+    print(f"  склейка: {trim_time:.3f} сек, RTF {trim_time / duration:.5f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер скорости детектора речи")
+    parser.add_argument("files", nargs="*", help="Аудио/видео файлы для замера")
+    parser.add_argument("--synthetic", type=float, metavar="SECONDS",
+                        help="Сгенерировать синтетическую запись заданной длительности")
+    args = parser.parse_args()
+
+    if not args.files and not args.synthetic:
+        parser.print_help()
+        return
+
+    if args.synthetic:
+        benchmark("синтетическая запись", synthetic_pcm(args.synthetic))
+
+    for file_path in args.files:
+        start_time = time.perf_counter()
+        pcm = decode_pcm(file_path, SAMPLE_RATE)
+        benchmark(file_path, pcm, time.perf_counter() - start_time)
+
+
+if __name__ == "__main__":
+    main()
@@ -53,7 +53,22 @@ class NewFileHandler(FileSystemEventHandler):
         except Exception as e:
             logging.error(f"Ошибка при запуске обработки файла {file_path}: {e}")
 
+def run_daemon_mode():
+    """
+    Обрабатывает файлы внутри одного процесса с прогретым оркестратором
+    вместо запуска отдельного процесса на каждый файл
+    """
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from obsidian_ai_automator.monitoring.watch_daemon import run_daemon
+
+    logging.info(f"Запуск демона мониторинга папки: {WATCH_DIR}...")
+    run_daemon(CONFIG_FILE, WATCH_DIR)
+
 def main():
+    if "--daemon" in sys.argv[1:]:
+        run_daemon_mode()
+        return
+
     logging.info(f"Запуск мониторинга папки: {WATCH_DIR} с inotify...")
     event_handler = NewFileHandler()
     observer = Observer()
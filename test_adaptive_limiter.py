@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Тестирование адаптивного ограничителя параллельности
+"""
+import asyncio
+import os
+import sys
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.core.adaptive_limiter import AdaptiveLimiter
+from obsidian_ai_automator.core.error_handler import AnalysisError
+
+
+def test_limit_grows_while_healthy():
+    """Тестируем аддитивный рост лимита при успешных запросах"""
+    limiter = AdaptiveLimiter("nvidia", initial_limit=1, max_limit=4, latency_tolerance=1000)
+
+    async def request():
+        await asyncio.sleep(0.001)
+        return "ok"
+
+    async def run_batch():
+        return await asyncio.gather(*(limiter.run(request) for _ in range(20)))
+
+    assert asyncio.run(run_batch()) == ["ok"] * 20
+    assert limiter.current_limit == 4
+    assert limiter.in_flight == 0
+
+    print("✓ Лимит растет до верхней границы при нормальной задержке")
+    return True
+
+
+def test_throttling_backs_off_and_retries():
+    """Тестируем мультипликативное уменьшение лимита и повтор после 429"""
+    limiter = AdaptiveLimiter("nvidia", initial_limit=8, max_limit=8, max_retries=2)
+    responses = iter([AnalysisError("Too Many Requests", status_code=429, retry_after=0), "ok"])
+
+    async def request():
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert asyncio.run(limiter.run(request)) == "ok"
+    assert limiter.current_limit == 4
+    assert limiter.total_overloads == 1
+
+    print("✓ Ответ 429 уменьшает лимит вдвое, запрос повторяется")
+    return True
+
+
+def test_client_errors_are_not_retried():
+    """Тестируем, что ошибки запроса (4xx) не повторяются и не меняют лимит"""
+    limiter = AdaptiveLimiter("nvidia", initial_limit=2)
+    calls = []
+
+    async def request():
+        calls.append(1)
+        raise AnalysisError("Unauthorized", status_code=401)
+
+    try:
+        asyncio.run(limiter.run(request))
+        assert False, "Ожидалась ошибка AnalysisError"
+    except AnalysisError:
+        pass
+    assert len(calls) == 1
+    assert limiter.current_limit == 2
+
+    print("✓ Ошибки 4xx пробрасываются без повторов")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_limit_grows_while_healthy, test_throttling_backs_off_and_retries, test_client_errors_are_not_retried]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
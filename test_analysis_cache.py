@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Тестирование кэша результатов анализа
+"""
+import os
+import sys
+import tempfile
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.core.analytics import MetricsCollector
+from obsidian_ai_automator.core.error_handler import AnalysisError
+from obsidian_ai_automator.processing.analysis.base_analyzer import BaseAnalyzer
+from obsidian_ai_automator.processing.analysis.cached_analyzer import CachedAnalyzer
+from obsidian_ai_automator.storage.analysis_cache import AnalysisCache
+
+
+class CountingAnalyzer(BaseAnalyzer):
+    """Анализатор, который считает запросы к модели"""
+
+    def __init__(self):
+        self.model = "test-model"
+        self.temperature = 0.3
+        self.top_p = 0.7
+        self.max_tokens = 1024
+        self.calls = 0
+        self.fail = False
+
+    def process(self, input_data, config):
+        return self.analyze(input_data)
+
+    def validate_config(self, config):
+        return True
+
+    def analyze(self, transcript):
+        return "".join(self.stream_analysis(transcript))
+
+    def stream_analysis(self, transcript):
+        self.calls += 1
+        yield "Заметка: "
+        if self.fail:
+            raise AnalysisError("Соединение прервано")
+        yield transcript[:20]
+
+    def get_analysis_with_tags(self, transcript):
+        return {"analysis": self.analyze(transcript), "tags": self.build_tags()}
+
+
+def make_cached_analyzer(directory, **cache_options):
+    """Создает анализатор с кэшем и собственным файлом пользовательского промпта"""
+    prompt_path = os.path.join(directory, "custom_prompt.txt")
+    with open(prompt_path, 'w', encoding='utf-8') as f:
+        f.write("Проанализируй: {transcript}")
+
+    metrics_collector = MetricsCollector()
+    metrics_collector.metrics = {}
+    inner = CountingAnalyzer()
+    cache = AnalysisCache(os.path.join(directory, "analysis_cache.sqlite3"), **cache_options)
+    analyzer = CachedAnalyzer(inner, cache, metrics_collector=metrics_collector)
+    analyzer.prompt_manager.custom_prompt_file = prompt_path
+    return analyzer, inner, prompt_path, metrics_collector
+
+
+def test_cache_hit_skips_model():
+    """Тестируем, что повторный анализ берется из кэша, а изменение промпта или параметров дает новый ключ"""
+    with tempfile.TemporaryDirectory() as directory:
+        analyzer, inner, prompt_path, metrics_collector = make_cached_analyzer(directory)
+        transcript = "[00:00:01] Текст лекции о наглядном примере"
+
+        first = analyzer.get_analysis_with_tags(transcript)
+        assert analyzer.get_analysis_with_tags(transcript) == first
+        assert inner.calls == 1
+
+        # Изменение пользовательского промпта дает новый ключ
+        with open(prompt_path, 'w', encoding='utf-8') as f:
+            f.write("Найди примеры: {transcript}")
+        analyzer.analyze(transcript)
+        assert inner.calls == 2
+
+        # Изменение параметров генерации дает новый ключ
+        inner.temperature = 0.5
+        analyzer.analyze(transcript)
+        assert inner.calls == 3
+
+        analyzer.analyze(transcript)
+        assert inner.calls == 3
+        assert metrics_collector.get_summary()["analysis_cache"] == {"hits": 2, "misses": 3}
+        assert analyzer.cache.stats()["hit_rate"] == 0.4
+        analyzer.cache.close()
+
+    print("✓ Повторный анализ берется из кэша без запроса к модели")
+    return True
+
+
+def test_streaming_stores_only_complete_result():
+    """Тестируем, что прерванный поток не сохраняется, а полный сохраняется"""
+    with tempfile.TemporaryDirectory() as directory:
+        analyzer, inner, _, _ = make_cached_analyzer(directory)
+        transcript = "[00:00:01] Текст лекции"
+
+        inner.fail = True
+        try:
+            list(analyzer.stream_analysis(transcript))
+            assert False, "Ожидалась ошибка анализа"
+        except AnalysisError:
+            pass
+        assert analyzer.cache.stats()["entries"] == 0
+
+        inner.fail = False
+        streamed = "".join(analyzer.stream_analysis(transcript))
+        assert list(analyzer.stream_analysis(transcript)) == [streamed]
+        assert inner.calls == 2
+        analyzer.cache.close()
+
+    print("✓ В кэш попадает только полный ответ модели")
+    return True
+
+
+def test_eviction_policies():
+    """Тестируем вытеснение давно не использованных и редко используемых записей"""
+    identity = {"model": "test-model"}
+    with tempfile.TemporaryDirectory() as directory:
+        lru = AnalysisCache(os.path.join(directory, "lru.sqlite3"), max_entries=2, eviction_policy="lru")
+        for name in ("a", "b"):
+            lru.put(name, name, name, identity, f"Анализ {name}")
+        assert lru.get("a") is not None
+        lru.put("c", "c", "c", identity, "Анализ c")
+        assert lru.get("b") is None and lru.get("a") is not None and lru.get("c") is not None
+        assert lru.stats()["evictions"] == 1
+        lru.close()
+
+        lfu = AnalysisCache(os.path.join(directory, "lfu.sqlite3"), max_entries=2, eviction_policy="lfu")
+        for name in ("a", "b"):
+            lfu.put(name, name, name, identity, f"Анализ {name}")
+        lfu.get("a")
+        lfu.get("a")
+        lfu.get("b")
+        lfu.put("c", "c", "c", identity, "Анализ c")
+        assert lfu.get("b") is None and lfu.get("a") is not None
+        lfu.close()
+
+        # Ограничение по размеру: новая запись сохраняется, даже если вытесняет все остальные
+        sized = AnalysisCache(os.path.join(directory, "sized.sqlite3"), max_entries=0, max_size_mb=0.001)
+        sized.put("a", "a", "a", identity, "x" * 600)
+        sized.put("b", "b", "b", identity, "x" * 600)
+        assert sized.get("a") is None and sized.get("b") is not None
+        sized.close()
+
+    print("✓ Записи вытесняются по политикам lru и lfu и по размеру")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_cache_hit_skips_model, test_streaming_stores_only_complete_result, test_eviction_policies]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
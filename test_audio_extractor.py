@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Тестирование извлечения аудиодорожки перед транскрибацией
+"""
+import os
+import sys
+import tempfile
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.processing.transcription.audio_extractor import AudioExtractor
+
+
+def test_extraction_is_cached_by_content():
+    """Тестируем, что одинаковое содержимое декодируется один раз"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        calls = []
+
+        def fake_decoder(input_path, output_path, sample_rate, bitrate):
+            calls.append((input_path, sample_rate, bitrate))
+            with open(output_path, 'wb') as f:
+                f.write(b"opus")
+
+        original = os.path.join(temp_dir, "lecture.mp4")
+        copy = os.path.join(temp_dir, "lecture (1).mp4")
+        for path in (original, copy):
+            with open(path, 'wb') as f:
+                f.write(b"video" * 1000)
+
+        extractor = AudioExtractor(os.path.join(temp_dir, "audio"), decoder=fake_decoder)
+        first = extractor.prepare(original)
+        second = extractor.prepare(copy)
+
+        assert first == second
+        assert first.endswith(".ogg")
+        assert len(calls) == 1
+        assert calls[0][1:] == (16000, "24k")
+        assert os.listdir(os.path.join(temp_dir, "audio")) == [os.path.basename(first)]
+
+    print("✓ Извлеченная дорожка переиспользуется для копий файла")
+    return True
+
+
+def test_failed_decoding_leaves_no_cache_entry():
+    """Тестируем, что прерванное декодирование не попадает в кэш"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        def broken_decoder(input_path, output_path, sample_rate, bitrate):
+            with open(output_path, 'wb') as f:
+                f.write(b"partial")
+            raise RuntimeError("decoder crashed")
+
+        media_file = os.path.join(temp_dir, "lecture.mp4")
+        with open(media_file, 'wb') as f:
+            f.write(b"video")
+
+        extractor = AudioExtractor(os.path.join(temp_dir, "audio"), decoder=broken_decoder)
+        try:
+            extractor.prepare(media_file)
+            assert False, "Ожидалась ошибка декодера"
+        except RuntimeError:
+            pass
+        assert os.listdir(os.path.join(temp_dir, "audio")) == []
+
+        # Уже сжатая дорожка отправляется без перекодирования
+        opus_file = os.path.join(temp_dir, "voice.ogg")
+        assert extractor.prepare(opus_file) == opus_file
+
+    print("✓ Неудачное извлечение не оставляет файлов в кэше")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_extraction_is_cached_by_content, test_failed_decoding_leaves_no_cache_entry]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
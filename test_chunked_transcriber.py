@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Тестирование транскрибации длинных записей по частям
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+
+import requests
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.core.async_orchestrator import AsyncProcessingOrchestrator
+from obsidian_ai_automator.core.config import ConfigManager
+from obsidian_ai_automator.core.error_handler import TranscriptionError
+from obsidian_ai_automator.processing.transcription.base_transcriber import BaseTranscriber
+from obsidian_ai_automator.processing.transcription.transcript import Transcript
+from obsidian_ai_automator.processing.transcription.chunked_transcriber import ChunkedTranscriber, plan_chunks
+from obsidian_ai_automator.processing.transcription.timecodes import parse_timecoded_text, format_timecode
+
+
+class FakeTranscriber(BaseTranscriber):
+    """Транскрибер, который "слышит" по слову каждые 100 секунд части"""
+
+    def __init__(self, failures=0, error=None):
+        self.failures = failures
+        self.error = error or RuntimeError("сбой провайдера")
+        self.calls = []
+        self.threads = []
+
+    def validate_config(self, config):
+        return True
+
+    def process(self, input_data, config):
+        return self.transcribe(input_data)
+
+    def transcribe(self, file_path):
+        return "текст"
+
+    def get_transcript(self, file_path):
+        # Провайдер возвращает только строку с тайм-кодами
+        return Transcript.from_timecoded_text(self.get_transcription_with_timecodes(file_path))
+
+    def get_transcription_with_timecodes(self, file_path):
+        self.calls.append(file_path)
+        self.threads.append(threading.current_thread().name)
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+        # Файл части содержит начало и длительность, записанные fake_extractor
+        with open(file_path) as f:
+            start, duration = (float(value) for value in f.read().split())
+        words = []
+        for local in range(0, int(duration), 100):
+            words.append(f"[{format_timecode(local)}] w{int(start + local)}")
+        return " ".join(words)
+
+
+def fake_extractor(file_path, output_path, start, duration):
+    with open(output_path, 'w') as f:
+        f.write(f"{start} {duration}")
+
+
+def make_chunker(transcriber):
+    return ChunkedTranscriber(transcriber, chunk_seconds=600, overlap_seconds=2, retry_delay=0,
+                              duration_probe=lambda path: 1800.0,
+                              silence_detector=lambda path: [(590.0, 592.0), (1230.0, 1234.0)],
+                              segment_extractor=fake_extractor)
+
+
+def test_plan_chunks_prefers_silence():
+    """Тестируем выбор границ частей в паузах"""
+    assert plan_chunks(1800, [(590.0, 592.0), (1230.0, 1234.0)], 600, 60) == [(0.0, 591.0), (591.0, 1232.0), (1232.0, 1800)]
+    assert plan_chunks(1800, [], 600, 60) == [(0.0, 600.0), (600.0, 1200.0), (1200.0, 1800)]
+    assert plan_chunks(800, [], 600, 60) == [(0.0, 800)]
+
+    print("✓ Границы частей выбираются в паузах рядом с целевой длиной")
+    return True
+
+
+def test_stitching_restores_original_timeline():
+    """Тестируем пересчет тайм-кодов частей на шкалу исходной записи"""
+    transcriber = FakeTranscriber()
+    result = make_chunker(transcriber).get_transcription_with_timecodes("/videos/lecture.ogg")
+    entries = parse_timecoded_text(result)
+
+    assert len(transcriber.calls) == 3
+    times = [start for start, _ in entries]
+    assert times == sorted(times)
+    # Каждое слово стоит на своем исходном времени
+    assert all(text == f"w{int(start)}" for start, text in entries)
+    assert entries[0] == (0.0, "w0") and entries[-1][0] >= 1700
+
+    print("✓ Части склеиваются с исправленными тайм-кодами")
+    return True
+
+
+def test_failed_chunk_is_retried_alone():
+    """Тестируем повтор только упавшей части"""
+    transcriber = FakeTranscriber(failures=1)
+    result = asyncio.run(make_chunker(transcriber).get_transcription_with_timecodes_async("/videos/lecture.ogg"))
+
+    assert len(transcriber.calls) == 4
+    assert result == make_chunker(FakeTranscriber()).get_transcription_with_timecodes("/videos/lecture.ogg")
+
+    print("✓ Ошибка в части приводит к повтору только этой части")
+    return True
+
+
+def test_overload_keeps_http_status():
+    """Тестируем, что перегрузка провайдера не повторяется локально и сохраняет HTTP-статус"""
+    response = requests.Response()
+    response.status_code = 503
+    response.headers['Retry-After'] = '5'
+    transcriber = FakeTranscriber(failures=1, error=requests.HTTPError("Service Unavailable", response=response))
+    try:
+        make_chunker(transcriber).get_transcription_with_timecodes("/videos/lecture.ogg")
+        assert False, "Ожидалась ошибка перегрузки"
+    except TranscriptionError as e:
+        assert e.is_overload and e.status_code == 503 and e.retry_after == 5
+    # Части, завершившиеся без ошибки, не повторяются, а часть с ошибкой не повторяется локально
+    assert len(transcriber.calls) == 3
+
+    print("✓ Ошибка перегрузки в части передается с исходным HTTP-статусом")
+    return True
+
+
+def test_sync_transcriber_uses_transcription_executor():
+    """Тестируем, что обертки не выдают синхронный транскрибер за асинхронный"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = ConfigManager(os.path.join(directory, "missing.ini")).config
+        config['Paths'] = {
+            'watch_directory': directory,
+            'obsidian_vault_path': os.path.join(directory, "vault"),
+            'transcript_cache_directory': os.path.join(directory, "transcripts"),
+            'job_store_path': os.path.join(directory, "jobs.sqlite3"),
+            'analysis_cache_path': os.path.join(directory, "analysis_cache.sqlite3")
+        }
+        config['Notifications']['type'] = 'none'
+        config['Voice_Activity'] = {'enabled': 'true'}
+        config_path = os.path.join(directory, "config.ini")
+        with open(config_path, 'w', encoding='utf-8') as f:
+            config.write(f)
+
+        orchestrator = AsyncProcessingOrchestrator(config_path)
+        orchestrator.metrics_collector.metrics_file = os.path.join(directory, "metrics.json")
+        transcriber = FakeTranscriber()
+        # Обертки как при создании оркестратора: удаление тишины внутри разбиения на части
+        orchestrator.transcriber = orchestrator._wrap_transcriber(transcriber)
+        assert isinstance(orchestrator.transcriber, ChunkedTranscriber)
+        assert not orchestrator.transcriber.supports_native_async
+
+        file_path = os.path.join(directory, "lecture.ogg")
+        with open(file_path, 'w') as f:
+            f.write("0 300")
+
+        async def scenario():
+            try:
+                return await orchestrator._transcribe_file_async(file_path)
+            finally:
+                await orchestrator.aclose()
+
+        assert asyncio.run(scenario()).text
+        # Работа выполняется в пуле стадии транскрибации, а не в пуле цикла событий
+        assert transcriber.threads and all(name.startswith("transcription") for name in transcriber.threads)
+        orchestrator.job_store.close()
+
+    print("✓ Синхронный транскрибер в обертках выполняется в пуле потоков транскрибации")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_plan_chunks_prefers_silence, test_stitching_restores_original_timeline, test_failed_chunk_is_retried_alone,
+             test_overload_keeps_http_status, test_sync_transcriber_uses_transcription_executor]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Тестирование потокового обхода папок с медиафайлами
+"""
+import os
+import sys
+import tempfile
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.monitoring.file_scanner import iter_media_files, is_allowed_file
+
+
+def test_iter_media_files_filters_early():
+    """Тестируем фильтрацию по расширениям, скрытым файлам и заметкам"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.makedirs(os.path.join(temp_dir, "nested"))
+        os.makedirs(os.path.join(temp_dir, ".stversions"))
+        for name in ["a.mp4", "b.MP3", "note.md", ".hidden.mp4", "readme.txt",
+                     os.path.join("nested", "c.wav"), os.path.join(".stversions", "d.mp4")]:
+            with open(os.path.join(temp_dir, name), 'w') as f:
+                f.write("data")
+
+        allowed_extensions = ['.mp4', '.mp3', '.wav']
+        files = iter_media_files(temp_dir, allowed_extensions)
+        assert not isinstance(files, list)
+
+        names = sorted(os.path.relpath(path, temp_dir) for path in files)
+        assert names == ["a.mp4", "b.MP3", os.path.join("nested", "c.wav")]
+
+        top_level = sorted(os.path.basename(path) for path in iter_media_files(temp_dir, allowed_extensions, recursive=False))
+        assert top_level == ["a.mp4", "b.MP3"]
+
+    print("✓ Обход папки возвращает только подходящие медиафайлы")
+    return True
+
+
+def test_is_allowed_file_without_filter():
+    """Тестируем поведение без списка разрешенных расширений"""
+    assert is_allowed_file("/videos/lecture.mkv", [])
+    assert not is_allowed_file("/videos/lecture.md", [])
+    assert not is_allowed_file("/videos/.lecture.mkv.part", [])
+
+    print("✓ Без списка расширений пропускаются только заметки и скрытые файлы")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_iter_media_files_filters_early, test_is_allowed_file_without_filter]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
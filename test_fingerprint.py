@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Тестирование быстрых отпечатков содержимого файлов
+"""
+import os
+import sys
+import tempfile
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.storage.fingerprint import (
+    compute_sampled_fingerprint, compute_fingerprint, compute_file_hash, confirm_same_content
+)
+
+
+def write_file(path, content):
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+def test_sampled_fingerprint():
+    """Тестируем, что отпечаток зависит от размера и выборочных блоков"""
+    block_size = 1024
+    content = bytes(range(256)) * 64  # 16 КБ: больше трех блоков
+    with tempfile.TemporaryDirectory() as temp_dir:
+        original = write_file(os.path.join(temp_dir, "a.mp4"), content)
+        copy = write_file(os.path.join(temp_dir, "b.mp4"), content)
+        fingerprint = compute_sampled_fingerprint(original, block_size)
+        assert fingerprint == compute_sampled_fingerprint(copy, block_size)
+        assert len(fingerprint) == 32
+
+        # Изменения в начале, середине, конце и размере меняют отпечаток
+        middle = (len(content) - block_size) // 2
+        for changed in (b"x" + content[1:],
+                        content[:middle] + b"x" + content[middle + 1:],
+                        content[:-1] + b"x",
+                        content + b"x"):
+            write_file(copy, changed)
+            assert compute_sampled_fingerprint(copy, block_size) != fingerprint
+
+        # Маленький файл хэшируется целиком
+        small = write_file(os.path.join(temp_dir, "small.mp4"), content[:2048])
+        write_file(copy, content[:1500] + b"x" + content[1501:2048])
+        assert compute_sampled_fingerprint(small, block_size) != compute_sampled_fingerprint(copy, block_size)
+
+    print("✓ Быстрый отпечаток зависит от размера и выборочных блоков")
+    return True
+
+
+def test_full_hash_confirmation():
+    """Тестируем полный режим и подтверждение совпадения полным хэшированием"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        first = write_file(os.path.join(temp_dir, "a.mp4"), b"video" * 100)
+        second = write_file(os.path.join(temp_dir, "b.mp4"), b"video" * 100)
+        assert compute_fingerprint(first, "full") == compute_file_hash(first)
+        assert compute_fingerprint(first) == compute_sampled_fingerprint(first)
+        assert confirm_same_content(first, second)
+
+        write_file(second, b"video" * 99 + b"audio")
+        assert not confirm_same_content(first, second)
+
+        try:
+            compute_fingerprint(first, "md5")
+            assert False, "Ожидалась ошибка для неизвестного режима"
+        except ValueError:
+            pass
+
+    print("✓ Полное хэширование подтверждает совпадение содержимого")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_sampled_fingerprint, test_full_hash_confirmation]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
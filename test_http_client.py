@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Тестирование общего асинхронного HTTP-клиента и запросов к API через aiohttp
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.core.error_handler import AnalysisError, TranscriptionError, extract_http_status
+from obsidian_ai_automator.core.http_client import AsyncHttpClient
+from obsidian_ai_automator.processing.analysis.nvidia_analyzer import NvidiaAnalyzer
+from obsidian_ai_automator.processing.transcription.deepgram_transcriber import DeepgramTranscriber
+
+
+DEEPGRAM_RESPONSE = {
+    "metadata": {"duration": 2.0},
+    "results": {"channels": [{"alternatives": [{
+        "transcript": "привет мир",
+        "words": [{"word": "привет", "start": 0.5, "end": 0.9}, {"word": "мир", "start": 1.0, "end": 1.3}]
+    }]}]}
+}
+
+
+class LocalDeepgramTranscriber(DeepgramTranscriber):
+    """Транскрибер Deepgram, который обращается к локальному тестовому серверу"""
+
+    def __init__(self, url):
+        super().__init__(api_key="test-key")
+        self.url = url
+
+    def _build_url(self):
+        return self.url
+
+
+def make_app(peers):
+    """Тестовый сервер: Deepgram, NVIDIA (обычный и потоковый ответ) и перегруженный провайдер"""
+    async def listen(request):
+        peers.append(request.transport.get_extra_info('peername'))
+        assert request.headers['Authorization'] == "Token test-key"
+        assert await request.read() == b"audio"
+        return web.json_response(DEEPGRAM_RESPONSE)
+
+    async def chat(request):
+        peers.append(request.transport.get_extra_info('peername'))
+        body = await request.json()
+        return web.json_response({"choices": [{"message": {"content": f"Ответ: {body['messages'][0]['content']}"}}]})
+
+    async def chat_stream(request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for delta in ("Пер", "вый ", "ответ"):
+            await response.write(f'data: {{"choices": [{{"delta": {{"content": "{delta}"}}}}]}}\n\n'.encode())
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    async def busy(request):
+        return web.json_response({"error": "busy"}, status=429, headers={"Retry-After": "3"})
+
+    app = web.Application()
+    app.router.add_post("/v1/listen", listen)
+    app.router.add_post("/chat", chat)
+    app.router.add_post("/chat-stream", chat_stream)
+    app.router.add_post("/busy", busy)
+    return app
+
+
+def test_session_reused_per_loop():
+    """Тестируем, что сессия переиспользуется в цикле событий и создается заново для нового цикла"""
+    async def sessions():
+        first = await AsyncHttpClient.get_session()
+        second = await AsyncHttpClient.get_session()
+        await AsyncHttpClient.close()
+        reopened = await AsyncHttpClient.get_session()
+        await AsyncHttpClient.close()
+        return first, second, reopened
+
+    first, second, reopened = asyncio.run(sessions())
+    assert first is second
+    assert first.closed and reopened is not first
+
+    other_loop_session, _, _ = asyncio.run(sessions())
+    assert other_loop_session is not first
+
+    print("✓ Сессия aiohttp одна на цикл событий")
+    return True
+
+
+def test_native_requests():
+    """Тестируем запросы Deepgram и NVIDIA через aiohttp и извлечение HTTP-статуса ошибки"""
+    with tempfile.TemporaryDirectory() as directory:
+        audio_path = os.path.join(directory, "lecture.ogg")
+        with open(audio_path, 'wb') as f:
+            f.write(b"audio")
+
+        async def scenario():
+            peers = []
+            server = TestServer(make_app(peers))
+            await server.start_server()
+            try:
+                transcriber = LocalDeepgramTranscriber(str(server.make_url("/v1/listen")))
+                transcript = await transcriber.get_transcript_async(audio_path)
+                assert transcript.text == "привет мир"
+
+                analyzer = NvidiaAnalyzer(api_key="test-key", api_url=str(server.make_url("/chat")), model="test-model")
+                assert await analyzer.complete_async("вопрос") == "Ответ: вопрос"
+                # Запросы идут через одно соединение общего пула
+                assert len(peers) == 2 and peers[0] == peers[1]
+
+                analyzer.api_url = str(server.make_url("/chat-stream"))
+                assert [delta async for delta in analyzer.complete_stream_async("вопрос")] == ["Пер", "вый ", "ответ"]
+
+                # Статус и Retry-After aiohttp.ClientResponseError доходят до адаптивного лимита
+                session = await AsyncHttpClient.get_session()
+                async with session.post(server.make_url("/busy")) as response:
+                    try:
+                        response.raise_for_status()
+                        assert False, "Ожидалась ошибка HTTP"
+                    except Exception as e:
+                        assert extract_http_status(e) == (429, 3.0)
+
+                analyzer.api_url = str(server.make_url("/busy"))
+                try:
+                    await analyzer.complete_async("вопрос")
+                    assert False, "Ожидалась ошибка перегрузки"
+                except AnalysisError as e:
+                    assert e.is_overload and e.status_code == 429 and e.retry_after == 3.0
+
+                transcriber.url = str(server.make_url("/busy"))
+                try:
+                    await transcriber.get_transcript_async(audio_path)
+                    assert False, "Ожидалась ошибка перегрузки"
+                except TranscriptionError as e:
+                    assert e.status_code == 429 and e.retry_after == 3.0
+            finally:
+                await AsyncHttpClient.close()
+                await server.close()
+
+        asyncio.run(scenario())
+
+    print("✓ Запросы к API выполняются через общий пул aiohttp, статус ошибки сохраняется")
+    return True
+
+
+def test_fallback_without_aiohttp():
+    """Тестируем, что без aiohttp запросы выполняются синхронными методами в пуле потоков"""
+    main_thread = threading.get_ident()
+
+    class ThreadedTranscriber(DeepgramTranscriber):
+        def _request(self, file_path):
+            self.thread = threading.get_ident()
+            return DEEPGRAM_RESPONSE
+
+    class ThreadedAnalyzer(NvidiaAnalyzer):
+        def complete(self, prompt):
+            self.thread = threading.get_ident()
+            return f"Ответ: {prompt}"
+
+    saved = sys.modules.get("aiohttp")
+    # None в sys.modules делает импорт невозможным, как при отсутствии библиотеки
+    sys.modules["aiohttp"] = None
+    try:
+        assert not AsyncHttpClient.is_available()
+        transcriber = ThreadedTranscriber(api_key="test-key")
+        analyzer = ThreadedAnalyzer(api_key="test-key", api_url="http://127.0.0.1:9", model="test-model")
+
+        async def scenario():
+            return (await transcriber.get_transcript_async("lecture.ogg"),
+                    await analyzer.complete_async("вопрос"))
+
+        transcript, answer = asyncio.run(scenario())
+    finally:
+        sys.modules["aiohttp"] = saved
+
+    assert transcript.text == "привет мир" and answer == "Ответ: вопрос"
+    assert transcriber.thread != main_thread and analyzer.thread != main_thread
+    assert AsyncHttpClient.is_available()
+
+    print("✓ Без aiohttp запросы выполняются в пуле потоков")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_session_reused_per_loop, test_native_requests, test_fallback_without_aiohttp]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Тестирование постоянной очереди заданий JobStore
+"""
+import os
+import sys
+import tempfile
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.storage.job_store import JobStore, JobState
+from obsidian_ai_automator.processing.transcription.transcript import Transcript
+
+
+def test_job_resume_after_failure():
+    """Тестируем сохранение результатов стадий после ошибки"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        media_file = os.path.join(temp_dir, "lecture.mp4")
+        with open(media_file, 'w') as f:
+            f.write("data")
+
+        store = JobStore(os.path.join(temp_dir, "jobs.sqlite3"))
+        job = store.enqueue(media_file)
+        assert job['state'] == JobState.QUEUED
+
+        store.start_attempt(media_file)
+        store.mark_transcribed(media_file, "[00:00:01] текст")
+        store.mark_failed(media_file, "Ошибка на стадии анализа")
+        store.close()
+
+        # После "перезапуска" транскрипция доступна и задание в списке незавершенных
+        store = JobStore(os.path.join(temp_dir, "jobs.sqlite3"))
+        job = store.enqueue(media_file)
+        assert job['state'] == JobState.FAILED
+        assert job['transcript'] == "[00:00:01] текст"
+        assert job['attempts'] == 1
+        assert store.get_pending() == [media_file]
+
+        store.mark_analyzed(media_file, {"analysis": "ok", "tags": ["a"]})
+        store.mark_written(media_file, "/vault/lecture.md")
+        assert store.get(media_file)['analysis'] == {"analysis": "ok", "tags": ["a"]}
+        assert store.get_pending() == []
+        store.close()
+
+    print("✓ Задание возобновляется с последней завершенной стадии")
+    return True
+
+
+def test_job_reset_on_file_change():
+    """Тестируем сброс задания при изменении файла"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        media_file = os.path.join(temp_dir, "lecture.mp4")
+        with open(media_file, 'w') as f:
+            f.write("data")
+
+        store = JobStore(os.path.join(temp_dir, "jobs.sqlite3"))
+        store.enqueue(media_file)
+        store.mark_transcribed(media_file, "старая транскрипция")
+
+        os.utime(media_file, (0, 0))
+        job = store.enqueue(media_file)
+        assert job['state'] == JobState.QUEUED
+        assert job['transcript'] is None
+        store.close()
+
+    print("✓ Измененный файл обрабатывается заново")
+    return True
+
+
+def test_pending_respects_max_attempts():
+    """Тестируем исключение заданий, исчерпавших попытки"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = JobStore(os.path.join(temp_dir, "jobs.sqlite3"))
+        store.enqueue("/missing/file.mp4")
+        for _ in range(3):
+            store.start_attempt("/missing/file.mp4")
+            store.mark_failed("/missing/file.mp4", "Ошибка на стадии транскрибации")
+
+        assert store.get_pending(max_attempts=3) == []
+        assert store.get_pending(max_attempts=4) == ["/missing/file.mp4"]
+        store.close()
+
+    print("✓ Задания без оставшихся попыток не возобновляются")
+    return True
+
+
+def test_timed_out_job_is_resumed():
+    """Тестируем возобновление задания после превышения ограничения времени"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = JobStore(os.path.join(temp_dir, "jobs.sqlite3"))
+        store.enqueue("/videos/lecture.mp4")
+        store.start_attempt("/videos/lecture.mp4")
+        store.mark_transcribed("/videos/lecture.mp4", "текст")
+        store.mark_timed_out("/videos/lecture.mp4", "Превышено время ожидания на стадии анализа")
+
+        job = store.get("/videos/lecture.mp4")
+        assert job['state'] == JobState.TIMED_OUT
+        assert job['transcript'] == "текст"
+        assert store.get_pending() == ["/videos/lecture.mp4"]
+        store.close()
+
+    print("✓ Задание, превысившее время, возобновляется с последней стадии")
+    return True
+
+
+def test_structured_transcript_is_stored():
+    """Тестируем сохранение структурированной транскрипции в задании"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = JobStore(os.path.join(temp_dir, "jobs.sqlite3"))
+        store.enqueue("/videos/lecture.mp4")
+        transcript = Transcript.from_timecoded_text("[00:00:01] Первое. [00:01:05] Второе.")
+        store.mark_transcribed("/videos/lecture.mp4", transcript.to_dict())
+
+        restored = Transcript.from_cached(store.get("/videos/lecture.mp4")['transcript'])
+        assert restored.timecoded_text == transcript.timecoded_text
+        store.close()
+
+    print("✓ Структурированная транскрипция сохраняется в задании")
+    return True
+
+
+def test_deleted_note_is_regenerated():
+    """Тестируем возврат завершенного задания к стадии сохранения, если заметка удалена"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        media_file = os.path.join(temp_dir, "lecture.mp4")
+        note_file = os.path.join(temp_dir, "lecture.md")
+        for path in (media_file, note_file):
+            with open(path, 'w') as f:
+                f.write("data")
+
+        store = JobStore(os.path.join(temp_dir, "jobs.sqlite3"))
+        store.enqueue(media_file)
+        store.start_attempt(media_file)
+        store.mark_transcribed(media_file, "[00:00:01] текст")
+        store.mark_analyzed(media_file, {"analysis": "ok", "tags": ["a"]})
+        store.mark_written(media_file, note_file)
+        assert store.enqueue(media_file)['state'] == JobState.WRITTEN
+
+        os.remove(note_file)
+        job = store.enqueue(media_file)
+        assert job['state'] == JobState.ANALYZED
+        assert job['analysis'] == {"analysis": "ok", "tags": ["a"]}
+        assert job['output_path'] is None and job['attempts'] == 0
+        store.close()
+
+    print("✓ Удаленная заметка записывается заново из сохраненного анализа")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_job_resume_after_failure, test_job_reset_on_file_change, test_pending_respects_max_attempts,
+             test_timed_out_job_is_resumed, test_structured_transcript_is_stored, test_deleted_note_is_regenerated]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
@@ -5,11 +5,43 @@
 import os
 import sys
 from pathlib import Path
+from types import SimpleNamespace
 
 # Добавляем путь к модулям
 sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
 
 from obsidian_ai_automator.processing.transcription.local_whisper_transcriber import LocalWhisperTranscriber
+from obsidian_ai_automator.processing.transcription.whisper_backends import get_whisper_backend
+from obsidian_ai_automator.processing.transcription.whisper_transcriber import parse_whisper_result
+
+
+class FakeFasterWhisperModel:
+    """Модель с интерфейсом faster-whisper: генератор сегментов и сведения о записи"""
+
+    def transcribe(self, file_path, word_timestamps=False):
+        words = [SimpleNamespace(word=" Добрый", start=0.5, end=0.9, probability=0.9),
+                 SimpleNamespace(word=" вечер.", start=1.0, end=1.4, probability=0.8)]
+        segments = (segment for segment in [SimpleNamespace(start=0.5, end=1.4, text=" Добрый вечер.", words=words)])
+        return segments, SimpleNamespace(language="ru", duration=2.0)
+
+
+def test_faster_whisper_backend_result_format():
+    """Тестируем, что результат faster-whisper приводится к формату openai-whisper"""
+    backend = get_whisper_backend("faster-whisper", "int8")
+    transcript = parse_whisper_result(backend.transcribe(FakeFasterWhisperModel(), "lecture.wav", True))
+
+    assert transcript.text == "Добрый вечер."
+    assert transcript.language == "ru" and transcript.duration == 2.0
+    assert transcript.timeline.texts() == ["Добрый", "вечер."]
+
+    try:
+        get_whisper_backend("whisper.cpp")
+        assert False, "неизвестный движок должен приводить к ошибке"
+    except ValueError:
+        pass
+
+    print("✓ Результат faster-whisper совпадает по формату с openai-whisper")
+    return True
 
 
 def test_local_whisper():
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Тестирование анализа длинных транскрипций по частям (map-reduce)
+"""
+import asyncio
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.core.error_handler import AnalysisError
+from obsidian_ai_automator.processing.analysis.base_analyzer import BaseAnalyzer
+from obsidian_ai_automator.processing.analysis.map_reduce_analyzer import MapReduceAnalyzer, split_timecoded_text
+from obsidian_ai_automator.processing.analysis.prompt_manager import PromptManager, estimate_tokens
+from obsidian_ai_automator.processing.transcription.timecodes import format_timecode
+
+
+class FakeAnalyzer(BaseAnalyzer):
+    """Анализатор, который вместо запросов к модели возвращает тайм-коды из промпта"""
+
+    def __init__(self, lines_per_timecode=1):
+        self.lines_per_timecode = lines_per_timecode
+        self.prompts = []
+        self.analyzed = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def process(self, input_data, config):
+        return self.analyze(input_data)
+
+    def validate_config(self, config):
+        return True
+
+    def complete(self, prompt):
+        with self._lock:
+            self.prompts.append(prompt)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.01)
+        with self._lock:
+            self.active -= 1
+        timecodes = re.findall(r"\[\d{2}:\d{2}:\d{2}\]", prompt.split("###")[-1])
+        if "Объедини" in prompt:
+            # Объединение убирает повторы
+            return "\n".join(f"{timecode} Пример" for timecode in dict.fromkeys(timecodes))
+        # Каждый тайм-код части превращается в строки примеров
+        return "\n".join(f"{timecode} Пример" for timecode in timecodes for _ in range(self.lines_per_timecode))
+
+    def analyze(self, transcript):
+        self.analyzed.append(transcript)
+        examples = set(re.findall(r"\[\d{2}:\d{2}:\d{2}\]", transcript))
+        return f"Заметка: {len(examples)} примеров"
+
+    def get_analysis_with_tags(self, transcript):
+        return {"analysis": self.analyze(transcript), "tags": self.build_tags()}
+
+
+def make_transcript(sentences):
+    return " ".join(f"[{format_timecode(index * 5)}] Предложение номер {index} о наглядном примере."
+                    for index in range(sentences))
+
+
+def test_split_on_timecodes():
+    """Тестируем, что части не превышают бюджет и начинаются с тайм-кода"""
+    transcript = make_transcript(200)
+    parts = split_timecoded_text(transcript, 300)
+    assert len(parts) > 1
+    assert all(estimate_tokens(part) <= 300 for part in parts)
+    assert all(part.startswith("[") for part in parts)
+    assert " ".join(parts) == transcript
+
+    # Текст без тайм-кодов делится по словам
+    words = split_timecoded_text("слово " * 100, 30)
+    assert len(words) > 1 and all(estimate_tokens(part) <= 30 for part in words)
+
+    print("✓ Транскрипция делится на части по тайм-кодам")
+    return True
+
+
+def test_map_reduce_analysis():
+    """Тестируем параллельный анализ частей, объединение и анализ короткой транскрипции одним запросом"""
+    inner = FakeAnalyzer()
+    analyzer = MapReduceAnalyzer(inner, max_input_tokens=3000, chunk_tokens=300, max_concurrency=4)
+
+    assert analyzer.analyze(make_transcript(10)) == "Заметка: 10 примеров"
+    assert inner.prompts == []
+
+    result = analyzer.get_analysis_with_tags(make_transcript(200))
+    assert result["analysis"] == "Заметка: 200 примеров"
+    assert result["tags"] == ["analysis"]
+    assert inner.max_active > 1
+    # Итоговый запрос получает примеры всех частей в хронологическом порядке
+    assert inner.analyzed[-1].splitlines()[0] == "[00:00:00] Пример"
+    assert inner.analyzed[-1].splitlines()[-1] == f"[{format_timecode(199 * 5)}] Пример"
+
+    print("✓ Части анализируются параллельно, результаты объединяются")
+    return True
+
+
+def test_hierarchical_reduce_async():
+    """Тестируем многоуровневое объединение результатов в асинхронном режиме"""
+    # Каждая часть дает втрое больше строк, чем тайм-кодов, поэтому результаты нужно объединять
+    inner = FakeAnalyzer(lines_per_timecode=3)
+    analyzer = MapReduceAnalyzer(inner, max_input_tokens=2000, chunk_tokens=300, max_concurrency=2)
+
+    result = asyncio.run(analyzer.analyze_async(make_transcript(120)))
+    assert result == "Заметка: 120 примеров"
+    assert any("Объедини" in prompt for prompt in inner.prompts)
+    assert estimate_tokens(inner.analyzed[-1]) <= 2000
+
+    print("✓ Результаты частей объединяются в несколько уровней")
+    return True
+
+
+class FlakyAnalyzer(FakeAnalyzer):
+    """Анализатор, первые запросы к которому завершаются заданной ошибкой"""
+
+    def __init__(self, error, failures):
+        super().__init__()
+        self.error = error
+        self.failures = failures
+        self.calls = 0
+
+    def complete(self, prompt):
+        with self._lock:
+            self.calls += 1
+            if self.failures:
+                self.failures -= 1
+                raise self.error
+        return super().complete(prompt)
+
+
+def test_overload_errors_reach_limiter():
+    """Тестируем, что перегрузка провайдера не повторяется локально и сохраняет HTTP-статус"""
+    inner = FlakyAnalyzer(AnalysisError("Too Many Requests", status_code=429, retry_after=7), failures=1)
+    analyzer = MapReduceAnalyzer(inner, max_input_tokens=3000, chunk_tokens=300, max_concurrency=1,
+                                 max_retries=2, retry_delay=0)
+    try:
+        asyncio.run(analyzer.analyze_async(make_transcript(200)))
+        assert False, "Ожидалась ошибка перегрузки"
+    except AnalysisError as e:
+        assert e.is_overload and e.status_code == 429 and e.retry_after == 7
+    assert inner.calls == 1
+
+    # Прочие ошибки повторяются локально
+    inner = FlakyAnalyzer(ConnectionError("Соединение сброшено"), failures=2)
+    analyzer = MapReduceAnalyzer(inner, max_input_tokens=3000, chunk_tokens=300, max_concurrency=1,
+                                 max_retries=2, retry_delay=0)
+    assert analyzer.analyze(make_transcript(200)) == "Заметка: 200 примеров"
+
+    print("✓ Ошибки перегрузки передаются адаптивному лимиту с исходным статусом")
+    return True
+
+
+def test_part_prompts_follow_custom_prompt():
+    """Тестируем, что промпты частей строятся по пользовательскому промпту и переопределяются файлами"""
+    with tempfile.TemporaryDirectory() as directory:
+        prompt_manager = PromptManager()
+        prompt_manager.custom_prompt_file = os.path.join(directory, "custom_prompt.txt")
+        prompt_manager.map_prompt_file = os.path.join(directory, "map_prompt.txt")
+        prompt_manager.combine_prompt_file = os.path.join(directory, "combine_prompt.txt")
+        prompt_manager.forbidden_tags = ["секрет"]
+        with open(prompt_manager.custom_prompt_file, 'w', encoding='utf-8') as f:
+            f.write("Найди рецепты блюд. Не используй теги: {FORBIDDEN_TAGS}, {DEFAULT_TAGS}\n\n"
+                    "### ТРАНСКРИПТ ДЛЯ АНАЛИЗА:\n{transcript}")
+
+        # Стандартные шаблоны включают инструкции пользователя без транскрипта и запрещенные теги
+        map_prompt = prompt_manager.get_map_prompt("[00:00:05] Режем лук", 2, 3)
+        assert "Найди рецепты блюд" in map_prompt and "секрет" in map_prompt
+        assert "{DEFAULT_TAGS}" in map_prompt
+        assert "ТРАНСКРИПТ ДЛЯ АНАЛИЗА" not in map_prompt
+        assert map_prompt.split("###")[-1].strip().endswith("[00:00:05] Режем лук")
+        assert "Найди рецепты блюд" in prompt_manager.get_combine_prompt("[00:00:05] Лук")
+
+        with open(prompt_manager.map_prompt_file, 'w', encoding='utf-8') as f:
+            f.write("Часть {part_number}/{total_parts}. {instructions}\n{transcript}")
+        with open(prompt_manager.combine_prompt_file, 'w', encoding='utf-8') as f:
+            f.write("Объедини без тегов {FORBIDDEN_TAGS}:\n{partial_results}")
+        assert prompt_manager.get_map_prompt("[00:00:05] Режем лук", 2, 3).startswith("Часть 2/3. Найди рецепты блюд")
+        assert prompt_manager.get_combine_prompt("[00:00:05] Лук") == "Объедини без тегов секрет:\n[00:00:05] Лук"
+
+    print("✓ Промпты частей строятся по пользовательскому промпту и переопределяются файлами")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_split_on_timecodes, test_map_reduce_analysis, test_hierarchical_reduce_async,
+             test_overload_errors_reach_limiter, test_part_prompts_follow_custom_prompt]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
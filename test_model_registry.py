@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Тестирование общего реестра моделей локального Whisper
+"""
+import os
+import sys
+import threading
+import time
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.processing.transcription.local_whisper_transcriber import LocalWhisperTranscriber
+from obsidian_ai_automator.processing.transcription.model_registry import WhisperModelRegistry
+from obsidian_ai_automator.processing.transcription.whisper_backends import WhisperBackend
+
+
+class CountingBackend(WhisperBackend):
+    """Движок, который считает загрузки вместо загрузки настоящей модели"""
+
+    name = "counting"
+    loads = 0
+
+    def load_model(self, model_size, threads=0):
+        CountingBackend.loads += 1
+        time.sleep(0.01)
+        return object()
+
+    def transcribe(self, model, file_path, word_timestamps):
+        return {"text": " текст", "segments": [{"start": 0.0, "end": 1.0, "text": " текст", "words": []}]}
+
+
+def counting_transcriber(model_size, registry):
+    """Транскрибер локального Whisper с подсчитывающим движком"""
+    transcriber = LocalWhisperTranscriber(model_size, registry=registry)
+    transcriber.backend = CountingBackend()
+    return transcriber
+
+
+class FakeClock:
+    """Управляемый источник времени"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_transcribers_share_one_model():
+    """Тестируем, что транскриберы с одинаковыми настройками используют одну модель"""
+    CountingBackend.loads = 0
+    registry = WhisperModelRegistry(idle_ttl=0)
+    first = counting_transcriber("base", registry)
+    second = counting_transcriber("base", registry)
+    other_size = counting_transcriber("small", registry)
+
+    threads = [threading.Thread(target=transcriber.transcribe, args=("lecture.wav",))
+               for transcriber in (first, second, first, second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert CountingBackend.loads == 1
+
+    assert other_size.transcribe("lecture.wav") == "текст"
+    assert CountingBackend.loads == 2
+    assert registry.loaded_models() == {("base", "counting", "int8"): 0, ("small", "counting", "int8"): 0}
+
+    print("✓ Транскриберы используют одну копию модели")
+    return True
+
+
+def test_idle_model_is_unloaded_and_warmup():
+    """Тестируем выгрузку модели после простоя и предварительную загрузку"""
+    CountingBackend.loads = 0
+    clock = FakeClock()
+    registry = WhisperModelRegistry(idle_ttl=60, clock=clock)
+    transcriber = counting_transcriber("base", registry)
+
+    transcriber.warmup()
+    assert CountingBackend.loads == 1
+    transcriber.transcribe("lecture.wav")
+    assert CountingBackend.loads == 1
+
+    # Модель, которая используется, не выгружается
+    backend = transcriber.backend
+    model = registry.acquire(backend, "base")
+    clock.now += 120
+    assert registry.evict_idle() == 0
+    registry.release(backend, "base")
+    assert registry.evict_idle() == 0
+
+    clock.now += 61
+    assert registry.evict_idle() == 1
+    assert registry.loaded_models() == {}
+    transcriber.transcribe("lecture.wav")
+    assert CountingBackend.loads == 2
+    assert registry.get_stats()["unloads"] == 1
+    assert model is not None
+
+    print("✓ Простаивающая модель выгружается, warmup загружает ее заранее")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_transcribers_share_one_model, test_idle_model_is_unloaded_and_warmup]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
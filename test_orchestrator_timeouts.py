@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Тестирование ограничений времени стадий в синхронном и асинхронном оркестраторах
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.core.async_orchestrator import AsyncProcessingOrchestrator
+from obsidian_ai_automator.core.config import ConfigManager
+from obsidian_ai_automator.core.orchestrator import ProcessingOrchestrator
+from obsidian_ai_automator.processing.analysis.base_analyzer import BaseAnalyzer
+from obsidian_ai_automator.processing.transcription.base_transcriber import BaseTranscriber
+from obsidian_ai_automator.processing.transcription.transcript import Transcript
+from obsidian_ai_automator.storage.job_store import JobState
+
+
+class FakeTranscriber(BaseTranscriber):
+    """Транскрибер, который ждет разрешения (gate) или задержку перед ответом"""
+
+    def __init__(self, delay=0.0, gate=None):
+        self.delay = delay
+        self.gate = gate
+        self.calls = 0
+        self.threads = []
+
+    def validate_config(self, config):
+        return True
+
+    def process(self, input_data, config):
+        return self.transcribe(input_data)
+
+    def get_transcript(self, file_path):
+        self.calls += 1
+        self.threads.append(threading.current_thread().name)
+        if self.gate is not None:
+            self.gate.wait()
+        time.sleep(self.delay)
+        return Transcript.from_timecoded_text(f"[00:00:01] Лекция {os.path.basename(file_path)}")
+
+
+class FakeAnalyzer(BaseAnalyzer):
+    """Анализатор, который сразу возвращает короткий результат"""
+
+    model = "test-model"
+
+    def __init__(self):
+        self.calls = 0
+
+    def validate_config(self, config):
+        return True
+
+    def process(self, input_data, config):
+        return self.analyze(input_data)
+
+    def analyze(self, transcript):
+        self.calls += 1
+        return f"Анализ: {transcript[:30]}"
+
+    def get_analysis_with_tags(self, transcript):
+        return {"analysis": self.analyze(transcript), "tags": ["test"]}
+
+
+def write_config(directory, voice_activity=False, **timeouts):
+    """Создает config.ini во временном каталоге: все хранилища и заметки внутри него"""
+    config = ConfigManager(os.path.join(directory, "missing.ini")).config
+    config['Paths'] = {
+        'watch_directory': directory,
+        'obsidian_vault_path': os.path.join(directory, "vault"),
+        'transcript_cache_directory': os.path.join(directory, "transcripts"),
+        'job_store_path': os.path.join(directory, "jobs.sqlite3"),
+        'analysis_cache_path': os.path.join(directory, "analysis_cache.sqlite3")
+    }
+    config['Notifications']['type'] = 'none'
+    config['LLM']['streaming'] = 'false'
+    config['Audio_Preprocessing']['enabled'] = 'false'
+    config['Analysis_Cache'] = {'enabled': 'false'}
+    config['Voice_Activity'] = {'enabled': str(voice_activity).lower()}
+    for name, value in timeouts.items():
+        config['Timeouts'][name] = str(value)
+
+    config_path = os.path.join(directory, "config.ini")
+    with open(config_path, 'w', encoding='utf-8') as f:
+        config.write(f)
+    return config_path
+
+
+def make_orchestrator(orchestrator_class, directory, transcriber, wrapped=False, **timeouts):
+    """Создает оркестратор с поддельными провайдерами (wrapped - с обертками удаления тишины и разбиения на части)"""
+    orchestrator = orchestrator_class(write_config(directory, voice_activity=wrapped, **timeouts))
+    orchestrator.metrics_collector.metrics_file = os.path.join(directory, "metrics.json")
+    orchestrator.transcriber = orchestrator._wrap_transcriber(transcriber) if wrapped else transcriber
+    orchestrator.analyzer = FakeAnalyzer()
+    return orchestrator
+
+
+def make_media(directory, name="lecture.mp3"):
+    """Создает файл записи для обработки"""
+    file_path = os.path.join(directory, name)
+    with open(file_path, 'wb') as f:
+        f.write(name.encode() * 64)
+    return file_path
+
+
+def test_async_stage_timeout_frees_slot():
+    """Тестируем, что зависшая транскрибация отменяется, а файл не берется повторно, пока работа идет"""
+    with tempfile.TemporaryDirectory() as directory:
+        gate = threading.Event()
+        transcriber = FakeTranscriber(gate=gate)
+        orchestrator = make_orchestrator(AsyncProcessingOrchestrator, directory, transcriber,
+                                         transcription_timeout=0.2)
+        file_path = make_media(directory)
+
+        async def scenario():
+            started = time.time()
+            assert await orchestrator.process_file_async(file_path) is None
+            # Слот освобождается по истечении ограничения, не дожидаясь провайдера
+            assert time.time() - started < 2
+            job = orchestrator.job_store.get(file_path)
+            assert job['state'] == JobState.TIMED_OUT and job['attempts'] == 1
+
+            # Пока транскрибация выполняется в пуле потоков, новая попытка не начинается
+            assert await orchestrator.process_file_async(file_path) is None
+            assert orchestrator.job_store.get(file_path)['attempts'] == 1
+            assert transcriber.calls == 1
+
+            gate.set()
+            while orchestrator._has_running_work(file_path):
+                await asyncio.sleep(0.01)
+
+            orchestrator.transcription_timeout = 0
+            output_path = await orchestrator.process_file_async(file_path)
+            assert output_path is not None and os.path.exists(output_path)
+            assert orchestrator.job_store.get(file_path)['state'] == JobState.WRITTEN
+            await orchestrator.aclose()
+
+        asyncio.run(scenario())
+        orchestrator.job_store.close()
+
+    print("✓ Зависшая стадия отменяется по времени, повторная попытка ждет завершения работы в пуле")
+    return True
+
+
+def test_async_stage_timeout_with_default_wrappers():
+    """Тестируем, что работа транскрибера в обертках по умолчанию учитывается после отмены по времени"""
+    with tempfile.TemporaryDirectory() as directory:
+        gate = threading.Event()
+        transcriber = FakeTranscriber(gate=gate)
+        orchestrator = make_orchestrator(AsyncProcessingOrchestrator, directory, transcriber, wrapped=True,
+                                         transcription_timeout=0.2)
+        file_path = make_media(directory)
+
+        async def scenario():
+            assert await orchestrator.process_file_async(file_path) is None
+            assert orchestrator.job_store.get(file_path)['state'] == JobState.TIMED_OUT
+            # Транскрибация через обертки выполняется в пуле стадии и остается на учете после отмены
+            assert orchestrator._has_running_work(file_path)
+            assert await orchestrator.process_file_async(file_path) is None
+            assert transcriber.calls == 1
+
+            gate.set()
+            while orchestrator._has_running_work(file_path):
+                await asyncio.sleep(0.01)
+            await orchestrator.aclose()
+
+        asyncio.run(scenario())
+        assert all(name.startswith("transcription") for name in transcriber.threads)
+        orchestrator.job_store.close()
+
+    print("✓ Отмена по времени учитывает работу транскрибера в обертках по умолчанию")
+    return True
+
+
+def test_sync_job_timeout_between_stages():
+    """Тестируем, что синхронный оркестратор проверяет ограничения между стадиями"""
+    with tempfile.TemporaryDirectory() as directory:
+        transcriber = FakeTranscriber(delay=0.3)
+        orchestrator = make_orchestrator(ProcessingOrchestrator, directory, transcriber, job_timeout=0.1)
+        file_path = make_media(directory)
+
+        assert orchestrator.process_file(file_path) is None
+        job = orchestrator.job_store.get(file_path)
+        assert job['state'] == JobState.TIMED_OUT
+        # Результат завершенной стадии сохранен, анализ не начинался
+        assert job['transcript'] is not None
+        assert orchestrator.analyzer.calls == 0
+
+        # Следующий запуск возобновляется после транскрибации
+        orchestrator.job_timeout = 0
+        output_path = orchestrator.process_file(file_path)
+        assert output_path is not None and os.path.exists(output_path)
+        assert transcriber.calls == 1
+        orchestrator.job_store.close()
+
+    print("✓ Синхронный оркестратор помечает задание как timed_out между стадиями")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_async_stage_timeout_frees_slot, test_async_stage_timeout_with_default_wrappers,
+             test_sync_job_timeout_between_stages]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
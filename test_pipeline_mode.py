@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Тестирование конвейерного режима асинхронного оркестратора
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.core.async_orchestrator import AsyncProcessingOrchestrator
+from obsidian_ai_automator.core.config import ConfigManager
+from obsidian_ai_automator.core.error_handler import AnalysisError, TranscriptionError
+from obsidian_ai_automator.processing.analysis.base_analyzer import BaseAnalyzer
+from obsidian_ai_automator.processing.transcription.base_transcriber import BaseTranscriber
+from obsidian_ai_automator.processing.transcription.transcript import Transcript
+from obsidian_ai_automator.storage.job_store import JobState
+
+
+class TimelineRecorder:
+    """Журнал начала и окончания стадий по файлам"""
+
+    def __init__(self):
+        self.events = {}
+        self.threads = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, file_path, event):
+        with self._lock:
+            self.events[(stage, os.path.basename(file_path), event)] = time.monotonic()
+            self.threads.setdefault(stage, set()).add(threading.current_thread().name)
+
+
+class SlowTranscriber(BaseTranscriber):
+    """Транскрибер с задержкой, который не справляется с файлами из failing"""
+
+    def __init__(self, timeline, failing, delay=0.1):
+        self.timeline = timeline
+        self.failing = failing
+        self.delay = delay
+
+    def validate_config(self, config):
+        return True
+
+    def process(self, input_data, config):
+        return self.transcribe(input_data)
+
+    def get_transcript(self, file_path):
+        name = os.path.basename(file_path)
+        self.timeline.record("transcription", name, "start")
+        time.sleep(self.delay)
+        self.timeline.record("transcription", name, "end")
+        if name in self.failing:
+            raise TranscriptionError(f"Сбой транскрибации {name}")
+        # Имя файла попадает в транскрипцию, чтобы анализатор знал, какой файл обрабатывает
+        return Transcript.from_timecoded_text(f"[00:00:01] {name}")
+
+
+class SlowAnalyzer(BaseAnalyzer):
+    """Анализатор с задержкой, который не справляется с файлами из failing"""
+
+    model = "test-model"
+
+    def __init__(self, timeline, failing, delay=0.05):
+        self.timeline = timeline
+        self.failing = failing
+        self.delay = delay
+
+    def validate_config(self, config):
+        return True
+
+    def process(self, input_data, config):
+        return self.analyze(input_data)
+
+    def analyze(self, transcript):
+        name = transcript.split()[-1]
+        self.timeline.record("analysis", name, "start")
+        time.sleep(self.delay)
+        if name in self.failing:
+            raise AnalysisError(f"Сбой анализа {name}")
+        return f"Анализ {name}"
+
+    def get_analysis_with_tags(self, transcript):
+        return {"analysis": self.analyze(transcript), "tags": ["test"]}
+
+
+def write_config(directory):
+    """Создает config.ini конвейерного режима с одним воркером на стадию"""
+    config = ConfigManager(os.path.join(directory, "missing.ini")).config
+    config['Paths'] = {
+        'watch_directory': directory,
+        'obsidian_vault_path': os.path.join(directory, "vault"),
+        'transcript_cache_directory': os.path.join(directory, "transcripts"),
+        'job_store_path': os.path.join(directory, "jobs.sqlite3"),
+        'analysis_cache_path': os.path.join(directory, "analysis_cache.sqlite3")
+    }
+    config['Notifications']['type'] = 'none'
+    config['LLM']['streaming'] = 'false'
+    config['Audio_Preprocessing']['enabled'] = 'false'
+    config['Voice_Activity'] = {'enabled': 'true'}
+    config['Processing'].update({
+        'pipeline_mode': 'true',
+        'transcription_workers': '1',
+        'analysis_workers': '1',
+        'output_workers': '1',
+        'pipeline_queue_size': '2',
+        'scheduling_policy': 'fifo'
+    })
+
+    config_path = os.path.join(directory, "config.ini")
+    with open(config_path, 'w', encoding='utf-8') as f:
+        config.write(f)
+    return config_path
+
+
+def test_pipeline_overlap_order_and_failures():
+    """Тестируем перекрытие стадий, порядок результатов и независимость стадий от ошибок"""
+    with tempfile.TemporaryDirectory() as directory:
+        names = [f"lecture{index}.mp3" for index in range(5)]
+        file_paths = []
+        for name in names:
+            file_path = os.path.join(directory, name)
+            with open(file_path, 'wb') as f:
+                f.write(name.encode() * 64)
+            file_paths.append(file_path)
+
+        timeline = TimelineRecorder()
+        orchestrator = AsyncProcessingOrchestrator(write_config(directory))
+        orchestrator.metrics_collector.metrics_file = os.path.join(directory, "metrics.json")
+        # Транскрибер провайдера оборачивается так же, как при создании оркестратора
+        orchestrator.transcriber = orchestrator._wrap_transcriber(SlowTranscriber(timeline, failing={"lecture1.mp3"}))
+        orchestrator.analyzer = SlowAnalyzer(timeline, failing={"lecture2.mp3"})
+
+        async def scenario():
+            try:
+                return await asyncio.wait_for(orchestrator.process_multiple_files_async(iter(file_paths)), timeout=10)
+            finally:
+                await orchestrator.aclose()
+
+        results = asyncio.run(scenario())
+
+        # Анализ первого файла начинается до окончания транскрибации последнего
+        assert timeline.events[("analysis", names[0], "start")] < timeline.events[("transcription", names[-1], "end")]
+
+        # Ошибки на стадиях транскрибации и анализа не останавливают остальные файлы, порядок сохраняется
+        vault = os.path.join(directory, "vault")
+        assert results == [os.path.join(vault, f"lecture{index}.md") for index in (0, 3, 4)]
+        assert all(os.path.exists(path) for path in results)
+        states = [orchestrator.job_store.get(file_path)['state'] for file_path in file_paths]
+        assert states == [JobState.WRITTEN, JobState.FAILED, JobState.FAILED, JobState.WRITTEN, JobState.WRITTEN]
+        # Файл с ошибкой транскрибации не доходит до анализа
+        assert ("analysis", names[1], "start") not in timeline.events
+        # Синхронные провайдеры выполняются в выделенных пулах стадий, в том числе через обертки
+        assert all(name.startswith("transcription") for name in timeline.threads["transcription"])
+        assert all(name.startswith("analysis") for name in timeline.threads["analysis"])
+        orchestrator.job_store.close()
+
+    print("✓ Стадии конвейера перекрываются, ошибки одной стадии не останавливают остальные")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_pipeline_overlap_order_and_failures]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
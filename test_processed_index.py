@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Тестирование индекса обработанных файлов
+"""
+import os
+import sys
+import tempfile
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.storage.fingerprint import compute_file_hash, compute_fingerprint
+from obsidian_ai_automator.storage.processed_index import ProcessedHashIndex
+
+
+def test_mark_processed_and_lookup():
+    """Тестируем отметку обработанного файла и поиск по отпечатку"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        video_path = os.path.join(temp_dir, "lecture.mp4")
+        with open(video_path, "wb") as f:
+            f.write(b"video")
+
+        db_path = os.path.join(temp_dir, "processed.sqlite3")
+        index = ProcessedHashIndex(db_path)
+        fingerprint = compute_fingerprint(video_path)
+        assert not index.contains(fingerprint)
+
+        index.mark_processed(fingerprint, video_path, "/vault/Лекция.md")
+        index.close()
+
+        # Отметка переживает перезапуск
+        index = ProcessedHashIndex(db_path)
+        record = index.get(fingerprint)
+        assert record["file_path"] == video_path
+        assert record["output_path"] == "/vault/Лекция.md"
+        assert index.count() == 1
+        index.close()
+
+    print("✓ Файл отмечается обработанным и находится по отпечатку")
+    return True
+
+
+def test_migrate_hash_cache():
+    """Тестируем перенос записей из каталога .hash_cache"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        video_path = os.path.join(temp_dir, "lecture.mp4")
+        with open(video_path, "wb") as f:
+            f.write(b"video")
+
+        hash_cache_dir = os.path.join(temp_dir, ".hash_cache")
+        os.makedirs(hash_cache_dir)
+        # Запись старого формата (SHA-256) для файла, который еще на месте, и запись удаленного файла
+        with open(os.path.join(hash_cache_dir, compute_file_hash(video_path)), "w") as f:
+            f.write(f"Processed: {video_path} at 1700000000.0")
+        with open(os.path.join(hash_cache_dir, "0" * 32), "w") as f:
+            f.write("Processed: /deleted/old at video.mp4 at 1600000000.0")
+
+        index = ProcessedHashIndex(os.path.join(temp_dir, "processed.sqlite3"))
+        assert index.migrate_hash_cache(hash_cache_dir) == 3
+        assert index.contains(compute_fingerprint(video_path))
+        assert index.contains(compute_file_hash(video_path))
+        assert index.get("0" * 32)["file_path"] == "/deleted/old at video.mp4"
+
+        # Каталог переименован, повторный перенос ничего не делает
+        assert not os.path.exists(hash_cache_dir)
+        assert os.path.isdir(hash_cache_dir + ".migrated")
+        assert index.migrate_hash_cache(hash_cache_dir) == 0
+
+        # Завершение переноса отмечено в индексе: каталог, оставшийся на месте, не переносится повторно
+        os.makedirs(hash_cache_dir)
+        with open(os.path.join(hash_cache_dir, "1" * 32), "w") as f:
+            f.write("Processed: /deleted/new.mp4 at 1600000000.0")
+        assert index.migrate_hash_cache(hash_cache_dir) == 0
+        assert os.path.isdir(hash_cache_dir)
+        index.close()
+
+        # Новый индекс переносит каталог и выбирает свободное имя для переименования
+        other = ProcessedHashIndex(os.path.join(temp_dir, "other.sqlite3"))
+        assert other.migrate_hash_cache(hash_cache_dir) == 1
+        assert not os.path.exists(hash_cache_dir)
+        assert os.path.isdir(hash_cache_dir + ".migrated.1")
+        other.close()
+
+    print("✓ Записи .hash_cache переносятся в индекс")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_mark_processed_and_lookup, test_migrate_hash_cache]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
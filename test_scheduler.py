@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Тестирование политик планирования пакетной обработки
+"""
+import os
+import sys
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.core.scheduler import JobScheduler, SchedulingPolicy
+
+# Длительность записей в минутах: одна длинная лекция в начале пакета
+DURATIONS = {"lecture.mp4": 180, "a.mp4": 5, "b.mp4": 7, "c.mp4": 3, "d.mp4": 6, "e.mp4": 4}
+FILES = list(DURATIONS)
+
+
+def test_fifo_keeps_order():
+    """Тестируем сохранение порядка поступления"""
+    scheduler = JobScheduler(SchedulingPolicy.FIFO, cost_function=DURATIONS.get)
+    assert list(scheduler.order(iter(FILES))) == FILES
+
+    print("✓ fifo сохраняет порядок обхода")
+    return True
+
+
+def test_sjf_within_window():
+    """Тестируем выбор кратчайшего задания в пределах окна"""
+    scheduler = JobScheduler(SchedulingPolicy.SJF, window=10, cost_function=DURATIONS.get)
+    assert list(scheduler.order(FILES)) == ["c.mp4", "e.mp4", "a.mp4", "d.mp4", "b.mp4", "lecture.mp4"]
+
+    # С окном в 2 файла длинная лекция уступает только ближайшему соседу
+    scheduler = JobScheduler(SchedulingPolicy.SJF, window=2, cost_function=DURATIONS.get)
+    assert list(scheduler.order(FILES))[:2] == ["a.mp4", "b.mp4"]
+
+    print("✓ sjf ставит короткие записи вперед")
+    return True
+
+
+def test_fair_does_not_starve_long_jobs():
+    """Тестируем периодический пропуск длинного задания вперед"""
+    scheduler = JobScheduler(SchedulingPolicy.FAIR, window=10, fair_long_every=3, cost_function=DURATIONS.get)
+    order = list(scheduler.order(FILES))
+    assert order[:3] == ["c.mp4", "e.mp4", "lecture.mp4"]
+    assert sorted(order) == sorted(FILES)
+
+    print("✓ fair не откладывает длинные записи до конца пакета")
+    return True
+
+
+def test_unknown_policy_falls_back_to_fifo():
+    """Тестируем откат на fifo при неизвестной политике"""
+    scheduler = JobScheduler("random", cost_function=DURATIONS.get)
+    assert scheduler.policy == SchedulingPolicy.FIFO
+
+    print("✓ Неизвестная политика заменяется на fifo")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_fifo_keeps_order, test_sjf_within_window, test_fair_does_not_starve_long_jobs,
+             test_unknown_policy_falls_back_to_fifo]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Тестирование объединения одинаковых одновременных операций
+"""
+import asyncio
+import os
+import sys
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.core.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_result():
+    """Тестируем, что одновременные вызовы с одним ключом выполняют операцию один раз"""
+    flights = SingleFlight()
+    calls = []
+
+    async def transcribe():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "транскрипция"
+
+    async def run():
+        results = await asyncio.gather(flights.run("hash-a", transcribe), flights.run("hash-a", transcribe),
+                                       flights.run("hash-b", transcribe))
+        return results
+
+    assert asyncio.run(run()) == ["транскрипция"] * 3
+    assert len(calls) == 2
+    assert not flights.is_in_flight("hash-a")
+
+    print("✓ Одинаковые одновременные операции выполняются один раз")
+    return True
+
+
+def test_failure_is_shared_and_not_cached():
+    """Тестируем передачу исключения ожидающим и повтор после ошибки"""
+    flights = SingleFlight()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("сбой провайдера")
+
+    async def run():
+        return await asyncio.gather(flights.run("hash", failing), flights.run("hash", failing),
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(calls) == 1
+
+    # Следующий вызов после ошибки снова выполняет операцию
+    asyncio.run(run())
+    assert len(calls) == 2
+
+    print("✓ Ошибка ведущей операции передается присоединившимся вызовам")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_concurrent_calls_share_result, test_failure_is_shared_and_not_cached]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
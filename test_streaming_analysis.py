@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Тестирование потокового анализа с постепенной записью заметки
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.core.analysis_stream import AnalysisStreamTracker
+from obsidian_ai_automator.core.analytics import MetricsCollector
+from obsidian_ai_automator.core.error_handler import AnalysisError
+from obsidian_ai_automator.core.event_manager import EventManager
+from obsidian_ai_automator.processing.analysis.base_analyzer import BaseAnalyzer
+from obsidian_ai_automator.processing.analysis.sse import iter_sse_events, extract_delta_content
+from obsidian_ai_automator.processing.output.obsidian_formatter import ObsidianFormatter
+
+
+class StreamingAnalyzer(BaseAnalyzer):
+    """Анализатор, который возвращает заранее заданные фрагменты и может прервать поток ошибкой"""
+
+    def __init__(self, deltas, fail_after=None):
+        self.deltas = deltas
+        self.fail_after = fail_after
+
+    def process(self, input_data, config):
+        return self.analyze(input_data)
+
+    def validate_config(self, config):
+        return True
+
+    def analyze(self, transcript):
+        return "".join(self.stream_analysis(transcript))
+
+    def stream_analysis(self, transcript):
+        for index, delta in enumerate(self.deltas):
+            if index == self.fail_after:
+                raise AnalysisError("Соединение прервано")
+            yield delta
+
+    def get_analysis_with_tags(self, transcript):
+        return {"analysis": self.analyze(transcript), "tags": self.build_tags()}
+
+
+def stream_note(analyzer, note_path, content):
+    """Пишет заметку так же, как стадия потокового анализа оркестратора"""
+    formatter = ObsidianFormatter()
+    events = []
+    event_manager = EventManager()
+    for event_type in ("analysis_started", "analysis_first_token", "analysis_progress", "analysis_completed"):
+        event_manager.subscribe(event_type, lambda data, event_type=event_type: events.append(event_type))
+
+    writer = formatter.open_note_writer(note_path)
+    tracker = AnalysisStreamTracker(event_manager, writer, "video.mp4", progress_interval=0)
+    with writer:
+        writer.write(formatter.format_header(content))
+        tracker.start()
+        for delta in analyzer.stream_analysis(content['transcript']):
+            tracker.on_delta(delta)
+        analysis = tracker.finish()
+        writer.write(formatter.format_footer(content))
+        writer.commit()
+    return analysis, tracker, events
+
+
+def test_sse_parsing():
+    """Тестируем разбор потокового ответа OpenAI-совместимого API"""
+    lines = [
+        b": keep-alive",
+        b'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+        b"",
+        b'data: {"choices": [{"delta": {"content": "\xd0\x9f\xd1\x80\xd0\xb8"}}]}',
+        'data: {"choices": [{"delta": {"content": "мер"}}]}',
+        'data: {"choices": [], "usage": {"prompt_tokens": 42}}',
+        "data: [DONE]",
+        'data: {"choices": [{"delta": {"content": "после завершения"}}]}'
+    ]
+    events = list(iter_sse_events(lines))
+    assert "".join(extract_delta_content(event) for event in events) == "Пример"
+    assert events[-1]["usage"]["prompt_tokens"] == 42
+
+    print("✓ События потока разбираются до [DONE]")
+    return True
+
+
+def test_incremental_note_matches_format():
+    """Тестируем, что постепенно записанная заметка совпадает с обычным форматированием"""
+    content = {'title': "Анализ: video.mp4", 'tags': ["analysis"], 'transcript': "[00:00:01] Текст"}
+    analyzer = StreamingAnalyzer(["## Пример", " 1\n", "Текст примера"])
+
+    with tempfile.TemporaryDirectory() as vault:
+        note_path = os.path.join(vault, "video.md")
+        analysis, tracker, events = stream_note(analyzer, note_path, content)
+
+        with open(note_path, 'r', encoding='utf-8') as f:
+            note = f.read()
+        assert note == ObsidianFormatter().format(dict(content, analysis=analysis))
+        assert os.listdir(vault) == ["video.md"]
+
+    assert analysis == "## Пример 1\nТекст примера"
+    assert events[:2] == ["analysis_started", "analysis_first_token"]
+    assert events.count("analysis_progress") == 3 and events[-1] == "analysis_completed"
+    assert 0 <= tracker.time_to_first_token <= tracker.total_time
+
+    print("✓ Заметка записывается по частям и совпадает с обычным форматированием")
+    return True
+
+
+def test_failed_stream_keeps_previous_note():
+    """Тестируем, что прерванный поток не портит существующую заметку и не оставляет временных файлов"""
+    content = {'title': "Анализ: video.mp4", 'tags': ["analysis"], 'transcript': "[00:00:01] Текст"}
+
+    with tempfile.TemporaryDirectory() as vault:
+        note_path = os.path.join(vault, "video.md")
+        with open(note_path, 'w', encoding='utf-8') as f:
+            f.write("Предыдущая версия")
+
+        try:
+            stream_note(StreamingAnalyzer(["Начало", " ответа", " модели"], fail_after=2), note_path, content)
+            assert False, "Ожидалась ошибка анализа"
+        except AnalysisError:
+            pass
+
+        with open(note_path, 'r', encoding='utf-8') as f:
+            assert f.read() == "Предыдущая версия"
+        assert os.listdir(vault) == ["video.md"]
+
+    print("✓ Прерванный поток не оставляет недописанную заметку")
+    return True
+
+
+def test_latency_metrics_and_async_stream():
+    """Тестируем учет времени до первого токена и асинхронный поток по умолчанию"""
+    metrics_collector = MetricsCollector()
+    metrics_collector.metrics = {}
+    metrics_collector.record_analysis_latency(0.5, 10.0)
+    metrics_collector.record_analysis_latency(1.5, 20.0)
+    latency = metrics_collector.get_summary()["analysis_latency"]
+    assert latency["requests"] == 2 and latency["max_ttft"] == 1.5
+    assert latency["total_ttft"] == 2.0 and latency["total_time"] == 30.0
+
+    async def collect():
+        return [delta async for delta in StreamingAnalyzer(["а", "б", "в"]).stream_analysis_async("текст")]
+
+    assert asyncio.run(collect()) == ["а", "б", "в"]
+
+    print("✓ Задержка потокового анализа учитывается в метриках")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_sse_parsing, test_incremental_note_matches_format, test_failed_stream_keeps_previous_note,
+             test_latency_metrics_and_async_stream]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Тестирование оценки токенов и выбора способа анализа по размеру промпта
+"""
+import os
+import sys
+import tempfile
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.core.error_handler import AnalysisError
+from obsidian_ai_automator.processing.analysis.prompt_manager import (
+    PromptManager, AnalysisStrategy, condense_timecodes
+)
+from obsidian_ai_automator.processing.analysis.token_estimator import TokenEstimator, detect_language
+from obsidian_ai_automator.processing.transcription.timecodes import format_timecode
+
+
+def make_transcript(sentences):
+    return " ".join(f"[{format_timecode(index * 5)}] Предложение номер {index} о наглядном примере."
+                    for index in range(sentences))
+
+
+def test_calibration_from_usage():
+    """Тестируем калибровку символов на токен по ответам API и ее сохранение"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        calibration_path = os.path.join(temp_dir, "calibration.json")
+        estimator = TokenEstimator(calibration_path)
+        text = "[00:00:01] " + "Добрый вечер, дорогие друзья. " * 10
+
+        assert detect_language(text) == "ru"
+        assert detect_language("Good evening, dear friends") == "en"
+        default_estimate = estimator.estimate(text, "model-a")
+
+        # API сообщил 10 токенов на тайм-код и по 4 символа на токен в остальном тексте
+        chars = len(text) - len("[00:00:01]")
+        estimator.record_usage(text, 10 + chars // 4, "model-a")
+        assert abs(estimator.chars_per_token("model-a", "ru") - 4.0) < 0.1
+        assert estimator.estimate(text, "model-a") < default_estimate
+        # Калибровка одной модели не влияет на другую
+        assert estimator.estimate(text, "model-b") == default_estimate
+
+        # Калибровка сохраняется между запусками
+        assert TokenEstimator(calibration_path).get_calibration() == estimator.get_calibration()
+
+    print("✓ Таблица символов на токен уточняется по ответам API")
+    return True
+
+
+def test_strategy_selection():
+    """Тестируем выбор способа анализа и отказ от заведомо переполненных запросов"""
+    prompt_manager = PromptManager()
+    prompt_manager.token_estimator = TokenEstimator(calibration_path=None)
+    prompt_manager.safety_margin = 0
+    prompt_manager.context_tokens = 10000
+    transcript = make_transcript(300)
+
+    assert prompt_manager.plan_analysis(make_transcript(10), "model", 1000)["strategy"] == AnalysisStrategy.SINGLE
+
+    condensed = prompt_manager.plan_analysis(transcript, "model", 1000)
+    assert condensed["strategy"] == AnalysisStrategy.CONDENSED
+    assert condensed["text"] == condense_timecodes(transcript, 60)
+    assert condensed["text"].count("[") == 25
+    assert condensed["prompt_tokens"] <= condensed["budget"] == 9000
+
+    assert prompt_manager.plan_analysis(make_transcript(2000), "model", 1000)["strategy"] == AnalysisStrategy.CHUNKED
+    try:
+        prompt_manager.plan_analysis(make_transcript(2000), "model", 1000, allow_chunked=False)
+        assert False, "Ожидалась ошибка для транскрипции, которая не помещается в контекст"
+    except AnalysisError:
+        pass
+
+    try:
+        prompt_manager.ensure_fits(make_transcript(2000), "model", 1000)
+        assert False, "Ожидалась ошибка для переполненного промпта"
+    except AnalysisError:
+        pass
+
+    print("✓ Способ анализа выбирается по оценке размера промпта")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_calibration_from_usage, test_strategy_selection]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
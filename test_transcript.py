@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Тестирование структурированной транскрипции и ее представлений
+"""
+import os
+import sys
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.processing.transcription.deepgram_transcriber import DeepgramTranscriber
+from obsidian_ai_automator.processing.transcription.transcript import Transcript
+from obsidian_ai_automator.processing.transcription.word_timeline import WordTimeline
+from obsidian_ai_automator.processing.analysis.prompt_manager import estimate_tokens
+
+DEEPGRAM_RESPONSE = {
+    "metadata": {"duration": 9.5},
+    "results": {"channels": [{"alternatives": [{
+        "transcript": "привет всем начнем",
+        "words": [
+            {"word": "привет", "punctuated_word": "Привет", "start": 0.5, "end": 0.9, "confidence": 0.98, "speaker": 0},
+            {"word": "всем", "punctuated_word": "всем.", "start": 1.0, "end": 1.3, "confidence": 0.95, "speaker": 0},
+            {"word": "начнем", "punctuated_word": "Начнем.", "start": 6.2, "end": 6.8, "confidence": 0.91, "speaker": 1}
+        ],
+        "paragraphs": {"paragraphs": [
+            {"speaker": 0, "sentences": [{"text": "Привет всем.", "start": 0.5, "end": 1.3}]},
+            {"speaker": 1, "sentences": [{"text": "Начнем.", "start": 6.2, "end": 6.8}]}
+        ]}
+    }]}]}
+}
+
+
+class CountingDeepgram(DeepgramTranscriber):
+    """Транскрибер Deepgram, который считает запросы вместо отправки файла"""
+
+    def __init__(self):
+        super().__init__(api_key="test")
+        self.requests = 0
+
+    def _request(self, file_path):
+        self.requests += 1
+        return DEEPGRAM_RESPONSE
+
+
+def test_deepgram_response_is_parsed_once():
+    """Тестируем, что все представления строятся из одного ответа Deepgram"""
+    transcriber = CountingDeepgram()
+    transcript = transcriber.get_transcript("/recordings/meeting.ogg")
+
+    assert transcriber.requests == 1
+    assert transcript.text == "Привет всем. Начнем."
+    assert transcript.timecoded_text == "[00:00:00] Привет [00:00:01] всем. [00:00:06] Начнем."
+    assert transcript.paragraphs == ["Привет всем.", "Начнем."]
+    assert [segment.word_count for segment in transcript.segments] == [2, 1]
+    assert transcript.words[2].speaker == 1 and abs(transcript.words[2].confidence - 0.91) < 1e-6
+    assert transcript.duration == 9.5
+
+    print("✓ Текст, тайм-коды и абзацы строятся из одного запроса")
+    return True
+
+
+def test_subtitles_and_cache_roundtrip():
+    """Тестируем субтитры и сохранение транскрипции в кэш"""
+    transcript = CountingDeepgram().get_transcript("/recordings/meeting.ogg")
+    restored = Transcript.from_cached(transcript.to_dict())
+
+    assert restored.timecoded_text == transcript.timecoded_text
+    assert restored.to_srt().splitlines()[:3] == ["1", "00:00:00,500 --> 00:00:01,300", "Привет всем."]
+    assert restored.to_vtt().startswith("WEBVTT\n\n00:00:00.500 --> 00:00:01.300\nПривет всем.")
+
+    # Кэш старого формата хранил только строку с тайм-кодами
+    legacy = Transcript.from_cached("[00:00:00] Привет всем. [00:00:06] Начнем.")
+    assert legacy.text == "Привет всем. Начнем."
+    assert legacy.timecoded_text == "[00:00:00] Привет всем. [00:00:06] Начнем."
+
+    print("✓ Субтитры и кэш строятся из структурированной транскрипции")
+    return True
+
+
+def test_plain_text_transcript_has_no_timecodes():
+    """Тестируем транскрипцию провайдера без тайм-кодов"""
+    transcript = Transcript.from_text("  просто текст  ")
+
+    assert transcript.text == "просто текст"
+    assert transcript.timecoded_text == "просто текст"
+    assert not Transcript.from_text("")
+
+    print("✓ Транскрипция без тайм-кодов остается обычным текстом")
+    return True
+
+
+def test_word_timeline_matches_per_word_formatting():
+    """Тестируем, что столбцовая шкала слов дает те же тайм-коды, что и форматирование по словам"""
+    timeline = WordTimeline()
+    words = [("да", 0.2), ("да", 0.7), ("нет", 59.9), ("да", 3600.0), ("нет", 3725.4)]
+    for text, start in words:
+        timeline.append(text, start, start + 0.3, speaker=1 if start > 60 else None)
+
+    expected = " ".join(f"[{int(start // 3600):02d}:{int(start % 3600 // 60):02d}:{int(start % 60):02d}] {text}"
+                        for text, start in words)
+    assert timeline.render_timecoded() == expected
+    assert timeline.vocabulary == ["да", "нет"]
+    assert timeline[0].speaker is None and timeline[3].speaker == 1
+
+    restored = WordTimeline.from_dict(timeline.to_dict())
+    merged = WordTimeline()
+    merged.extend(restored, 3)
+    assert merged.render_text() == "да нет"
+    assert abs(merged[1].end - 3725.7) < 1e-3
+
+    print("✓ Шкала слов форматирует тайм-коды так же, как и по одному слову")
+    return True
+
+
+def test_analysis_timecode_granularity():
+    """Тестируем укрупнение тайм-кодов для анализа при сохранении тайм-кодов слов"""
+    transcript = CountingDeepgram().get_transcript("/recordings/meeting.ogg")
+
+    assert transcript.render_timecoded("sentence") == "[00:00:00] Привет всем. [00:00:06] Начнем."
+    assert transcript.render_timecoded("paragraph") == "[00:00:00] Привет всем. [00:00:06] Начнем."
+    assert transcript.render_timecoded("interval", 60) == "[00:00:00] Привет всем. Начнем."
+    assert transcript.render_timecoded("none") == "Привет всем. Начнем."
+    assert transcript.render_timecoded("word") == transcript.timecoded_text
+    assert estimate_tokens(transcript.render_timecoded("interval", 60)) < estimate_tokens(transcript.timecoded_text)
+
+    try:
+        transcript.render_timecoded("minute")
+        assert False, "неизвестная детализация должна приводить к ошибке"
+    except ValueError:
+        pass
+
+    print("✓ Тайм-коды для анализа укрупняются до предложений, абзацев и интервалов")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_deepgram_response_is_parsed_once, test_subtitles_and_cache_roundtrip,
+             test_plain_text_transcript_has_no_timecodes, test_word_timeline_matches_per_word_formatting,
+             test_analysis_timecode_granularity]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Тестирование хранилища транскрипций с адресацией по содержимому
+"""
+import os
+import sys
+import tempfile
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.storage.fingerprint import compute_file_hash
+from obsidian_ai_automator.storage.transcript_store import TranscriptStore
+from obsidian_ai_automator.processing.transcription.deepgram_transcriber import DeepgramTranscriber
+from obsidian_ai_automator.processing.transcription.chunked_transcriber import ChunkedTranscriber
+from obsidian_ai_automator.processing.transcription.transcript import Transcript
+
+
+def test_moved_file_uses_stored_transcript():
+    """Тестируем, что транскрипция находится по содержимому, а не по пути файла"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = TranscriptStore(os.path.join(temp_dir, "store"))
+        identity = DeepgramTranscriber().cache_identity()
+
+        first_path = os.path.join(temp_dir, "a", "lecture.mp4")
+        moved_path = os.path.join(temp_dir, "b", "renamed.mp4")
+        other_path = os.path.join(temp_dir, "b", "lecture.mp4")
+        for path, content in ((first_path, b"video"), (moved_path, b"video"), (other_path, b"another video")):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(content)
+
+        transcript = Transcript.from_timecoded_text("[00:00:01] Добрый вечер.")
+        store.put(compute_file_hash(first_path), identity, transcript, source_path=first_path)
+
+        restored = store.get(compute_file_hash(moved_path), identity)
+        assert restored.timecoded_text == "[00:00:01] Добрый вечер."
+        # Одноименный файл с другим содержимым не получает чужую транскрипцию
+        assert store.get(compute_file_hash(other_path), identity) is None
+
+    print("✓ Перемещенный файл использует сохраненную транскрипцию")
+    return True
+
+
+def test_key_depends_on_provider_options():
+    """Тестируем, что ключ учитывает провайдера, модель и опции, но не обертки транскрибера"""
+    deepgram = DeepgramTranscriber()
+    identity = deepgram.cache_identity()
+
+    assert ChunkedTranscriber(deepgram).cache_identity() == identity
+    assert TranscriptStore.make_key("hash", identity) == TranscriptStore.make_key("hash", dict(identity))
+    assert TranscriptStore.make_key("hash", identity) != TranscriptStore.make_key(
+        "hash", dict(identity, model="nova-3"))
+    assert TranscriptStore.make_key("hash", identity) != TranscriptStore.make_key("other", identity)
+
+    print("✓ Ключ хранилища зависит от содержимого и параметров транскрибации")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_moved_file_uses_stored_transcript, test_key_depends_on_provider_options]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Тестирование удаления тишины перед транскрибацией
+"""
+import os
+import struct
+import sys
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.processing.transcription.vad import (
+    SAMPLE_WIDTH, frames_to_regions, build_trimmed_audio, VadTranscriber
+)
+from obsidian_ai_automator.processing.transcription.base_transcriber import BaseTranscriber
+from obsidian_ai_automator.processing.transcription.transcript import Transcript
+from obsidian_ai_automator.processing.transcription.timecodes import format_timecode, parse_timecoded_text
+
+SAMPLE_RATE = 100
+
+
+def test_frames_to_regions():
+    """Тестируем сборку участков речи из кадров"""
+    # Кадры по 0.1 сек: речь 0.0-0.3, короткая пауза, речь 0.5-0.7, длинная пауза, речь 3.0-3.2
+    voiced = [True] * 3 + [False] * 2 + [True] * 2 + [False] * 23 + [True] * 2 + [False] * 3
+    regions = frames_to_regions(voiced, 0.1, 3.5, min_silence_seconds=1.0, padding_seconds=0.1)
+
+    assert len(regions) == 2
+    assert regions[0][0] == 0.0 and abs(regions[0][1] - 0.8) < 1e-9
+    assert abs(regions[1][0] - 2.9) < 1e-9 and abs(regions[1][1] - 3.3) < 1e-9
+
+    print("✓ Короткие паузы остаются внутри участка, длинные вырезаются")
+    return True
+
+
+def test_offset_map_restores_original_time():
+    """Тестируем соответствие времени сокращенной и исходной записи"""
+    pcm = b"\x01\x00" * (SAMPLE_RATE * 100)
+    trimmed, offset_map = build_trimmed_audio(pcm, SAMPLE_RATE, [(10.0, 20.0), (60.0, 70.0)], gap_seconds=1.0)
+
+    assert len(trimmed) == SAMPLE_WIDTH * SAMPLE_RATE * 21
+    assert offset_map.to_original(0.0) == 10.0
+    assert offset_map.to_original(5.0) == 15.0
+    # Промежуток между участками относится к концу первого участка
+    assert offset_map.to_original(10.5) == 20.0
+    assert offset_map.to_original(11.0) == 60.0
+    assert offset_map.to_original(16.0) == 65.0
+
+    print("✓ Время сокращенной записи переводится на шкалу исходной")
+    return True
+
+
+class EchoTranscriber(BaseTranscriber):
+    """Транскрибер, который ставит слово на каждую секунду записи"""
+
+    def validate_config(self, config):
+        return True
+
+    def process(self, input_data, config):
+        return self.transcribe(input_data)
+
+    def transcribe(self, file_path):
+        return "текст"
+
+    def get_transcript(self, file_path):
+        # Провайдер возвращает только строку с тайм-кодами
+        return Transcript.from_timecoded_text(self.get_transcription_with_timecodes(file_path))
+
+    def get_transcription_with_timecodes(self, file_path):
+        with open(file_path, 'rb') as f:
+            seconds = len(f.read()) // SAMPLE_WIDTH // SAMPLE_RATE
+        return " ".join(f"[{format_timecode(second)}] w{second}" for second in range(seconds))
+
+
+def test_vad_transcriber_keeps_original_timecodes():
+    """Тестируем, что после удаления тишины тайм-коды указывают на исходную запись"""
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("numpy не установлен, тест пропущен")
+        return True
+
+    # 10 сек тишины, 5 сек громкого сигнала, 20 сек тишины, 5 сек сигнала
+    loud = struct.pack("<h", 8000) + struct.pack("<h", -8000)
+    quiet = b"\x00\x00" * 2
+    pcm = (quiet * (SAMPLE_RATE * 5) + loud * (SAMPLE_RATE * 5 // 2) + quiet * (SAMPLE_RATE * 10)
+           + loud * (SAMPLE_RATE * 5 // 2))
+
+    def write_pcm(data, output_path, sample_rate):
+        with open(output_path, 'wb') as f:
+            f.write(data)
+
+    transcriber = VadTranscriber(EchoTranscriber(), sample_rate=SAMPLE_RATE, frame_ms=100, padding_seconds=0,
+                                 gap_seconds=0, decoder=lambda path, rate: pcm, encoder=write_pcm)
+    entries = parse_timecoded_text(transcriber.get_transcription_with_timecodes("/recordings/call.ogg"))
+
+    assert [start for start, _ in entries] == [10.0, 11.0, 12.0, 13.0, 14.0, 35.0, 36.0, 37.0, 38.0, 39.0]
+
+    print("✓ Транскрибируется только речь, тайм-коды исходной записи сохраняются")
+    return True
+
+
+def test_vad_transcriber_follows_native_async():
+    """Тестируем, что обертка сохраняет способ асинхронного вызова вложенного транскрибера"""
+    class NativeEchoTranscriber(EchoTranscriber):
+        supports_native_async = True
+
+    assert not VadTranscriber(EchoTranscriber()).supports_native_async
+    assert VadTranscriber(NativeEchoTranscriber()).supports_native_async
+
+    print("✓ Синхронный транскрибер внутри обертки выполняется в пуле потоков стадии")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_frames_to_regions, test_offset_map_restores_original_time,
+             test_vad_transcriber_keeps_original_timecodes, test_vad_transcriber_follows_native_async]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Тестирование остановки демона мониторинга папки
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Добавляем путь к модулям
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from obsidian_ai_automator.core.config import ConfigManager
+from obsidian_ai_automator.monitoring.watch_daemon import WatchDaemon
+
+
+def write_config(directory):
+    """Создает config.ini с очередью демона на один файл и одним воркером"""
+    config = ConfigManager(os.path.join(directory, "missing.ini")).config
+    config['Paths'] = {
+        'watch_directory': os.path.join(directory, "inbox"),
+        'obsidian_vault_path': os.path.join(directory, "vault"),
+        'transcript_cache_directory': os.path.join(directory, "transcripts"),
+        'job_store_path': os.path.join(directory, "jobs.sqlite3"),
+        'analysis_cache_path': os.path.join(directory, "analysis_cache.sqlite3")
+    }
+    config['Notifications']['type'] = 'none'
+    config['Monitoring'] = {
+        'daemon_workers': '1',
+        'daemon_queue_size': '1',
+        'file_settle_seconds': '0',
+        'delete_source_after_processing': 'false'
+    }
+
+    config_path = os.path.join(directory, "config.ini")
+    with open(config_path, 'w', encoding='utf-8') as f:
+        config.write(f)
+    return config_path
+
+
+def test_stop_with_full_queue():
+    """Тестируем, что демон останавливается, когда поток наблюдателя ждет места в заполненной очереди"""
+    with tempfile.TemporaryDirectory() as directory:
+        os.makedirs(os.path.join(directory, "inbox"))
+        daemon = WatchDaemon(write_config(directory))
+        daemon.orchestrator.metrics_collector.metrics_file = os.path.join(directory, "metrics.json")
+        started = []
+
+        async def stalled_processing(file_path):
+            # Обработка не завершается, поэтому очередь не освобождается
+            started.append(file_path)
+            await asyncio.Event().wait()
+
+        daemon.orchestrator.process_file_async = stalled_processing
+
+        async def scenario():
+            run_task = asyncio.create_task(daemon.run())
+            while daemon._loop is None:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.2)
+
+            # Первый файл обрабатывается, второй занимает очередь, третий ждет места
+            for index in range(3):
+                with open(os.path.join(directory, "inbox", f"lecture{index}.mp3"), 'wb') as f:
+                    f.write(b"audio")
+
+            deadline = time.time() + 5
+            while not daemon._pending_submits and time.time() < deadline:
+                await asyncio.sleep(0.01)
+            assert daemon._pending_submits, "Поток наблюдателя должен ждать места в очереди"
+            assert len(started) == 1
+
+            daemon.stop()
+            await asyncio.wait_for(run_task, timeout=5)
+            assert not daemon._pending_submits
+
+        asyncio.run(scenario())
+        daemon.orchestrator.job_store.close()
+
+    print("✓ Демон останавливается при заполненной очереди")
+    return True
+
+
+if __name__ == "__main__":
+    tests = [test_stop_with_full_queue]
+    success = all(test() for test in tests)
+    sys.exit(0 if success else 1)